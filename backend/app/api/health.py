@@ -15,6 +15,8 @@ from app.cache import get_redis_health
 from app.websockets import get_socket_manager
 from app.data import get_option_chain_feed, get_ltp_feed, get_market_data_storage, get_validation_health
 from app.worker.data_retention import get_data_retention_worker, manual_data_cleanup
+from app.utils.latency_histogram import get_latency_snapshot
+from app.worker.strategy_runtime import get_strategy_runtime
 
 logger = get_logger(__name__)
 
@@ -158,6 +160,18 @@ async def validation_health():
     return await get_validation_health_status()
 
 
+@health_router.get("/latency")
+async def latency_health():
+    """Order execution latency percentiles (1m, 5m and session windows)"""
+    return get_latency_health()
+
+
+@health_router.get("/strategies")
+async def strategy_runtime_health():
+    """Per-strategy worker health, CPU time and feed lag"""
+    return get_strategy_runtime_health()
+
+
 @health_router.get("/detailed")
 async def detailed_health_check():
     """Detailed health check with all metrics and diagnostics"""
@@ -480,5 +494,54 @@ async def get_validation_health_status() -> Dict[str, Any]:
         }
 
 
+def get_latency_health() -> Dict[str, Any]:
+    """Get streaming latency histogram summaries"""
+    try:
+        snapshot = get_latency_snapshot()
+        
+        return {
+            "status": "healthy" if snapshot else "no_data",
+            "windows": ["1m", "5m", "session"],
+            "histograms": snapshot,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Latency health check failed: {e}")
+        return {
+            "status": "unhealthy",
+            "error": str(e),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+def get_strategy_runtime_health() -> Dict[str, Any]:
+    """Get strategy runtime worker status"""
+    try:
+        runtime = get_strategy_runtime()
+        status = runtime.get_status()
+        workers = status["workers"]
+        
+        if not status["is_running"]:
+            overall = "stopped"
+        elif status["healthy_workers"] < len(workers):
+            overall = "degraded"
+        else:
+            overall = "healthy"
+        
+        return {
+            "status": overall,
+            **status,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Strategy runtime health check failed: {e}")
+        return {
+            "status": "unhealthy",
+            "error": str(e),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
 # Export router
 __all__ = ["health_router"] 
\ No newline at end of file
@@ -2,13 +2,14 @@
 API endpoints for Market Sentiment Analysis
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import asyncio
 
 from ..services.historical_data_service import historical_service, HistoricalSignal
 from ..services.calibration_service import calibration_service, CalibrationParams
+from ..worker.calibration_jobs import get_calibration_job_runner
 
 router = APIRouter(prefix="/sentiment", tags=["sentiment"])
 
@@ -127,20 +128,57 @@ async def get_regime_performance(regime: str, days: int = 30):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/calibrate")
-async def calibrate_parameters(background_tasks: BackgroundTasks, 
-                             lookback_days: int = 60):
-    """Run parameter calibration optimization"""
+async def calibrate_parameters(lookback_days: int = 60, n_folds: int = 4,
+                             max_iterations: int = 100):
+    """Submit a walk-forward calibration job to the worker pool"""
     try:
-        # Run calibration in background
-        background_tasks.add_task(run_calibration, lookback_days)
+        job = await get_calibration_job_runner().submit(
+            lookback_days=lookback_days,
+            n_folds=n_folds,
+            max_iterations=max_iterations
+        )
         
         return {
             "status": "started",
-            "message": f"Calibration started with {lookback_days} days of data"
+            "job_id": job.job_id,
+            "message": f"Calibration started with {lookback_days} days of data ({n_folds} walk-forward folds)"
         }
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/calibration-jobs")
+async def list_calibration_jobs():
+    """List calibration jobs, newest first"""
+    return [job.to_dict() for job in get_calibration_job_runner().list_jobs()]
+
+@router.get("/calibration-jobs/{job_id}")
+async def get_calibration_job(job_id: str):
+    """Get a calibration job's progress and best result so far"""
+    job = get_calibration_job_runner().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Calibration job {job_id} not found")
+    return job.to_dict()
+
+@router.post("/calibration-jobs/{job_id}/cancel")
+async def cancel_calibration_job(job_id: str):
+    """Cancel a pending or running calibration job"""
+    try:
+        job = await get_calibration_job_runner().cancel(job_id)
+        return job.to_dict()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/calibration-jobs/{job_id}/resume")
+async def resume_calibration_job(job_id: str):
+    """Resume a cancelled or failed calibration job from its checkpoint"""
+    try:
+        job = await get_calibration_job_runner().resume(job_id)
+        return job.to_dict()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/calibration-result")
 async def get_calibration_result():
     """Get latest calibration result"""
@@ -183,13 +221,3 @@ async def cleanup_old_data(keep_days: int = 90):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-async def run_calibration(lookback_days: int):
-    """Background task to run calibration"""
-    try:
-        print(f"Starting calibration with {lookback_days} days...")
-        result = calibration_service.optimize_parameters(lookback_days)
-        calibration_service.save_calibration_result(result)
-        print("Calibration completed successfully")
-    except Exception as e:
-        print(f"Calibration failed: {e}")
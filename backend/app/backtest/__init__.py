@@ -0,0 +1,69 @@
+"""
+Backtesting Module
+
+Deterministic, event-driven replay of recorded market data through the
+strategy engine:
+- Columnar event tapes from recorded ticks and option chain snapshots
+- Latency-delayed fills against recorded top-of-book with slippage
+- Real RiskManager and PositionLimitsManager gating on simulated orders
+- Multi-process parameter sweeps over memory-mapped tape snapshots
+"""
+
+from .events import (
+    TickTape,
+    option_symbol,
+    load_raw_ticks,
+    load_recorded_chains
+)
+
+from .fills import (
+    FillModelConfig,
+    FillSimulator,
+    SimulatedOrder,
+    SimulatedFill
+)
+
+from .engine import (
+    BacktestEngine,
+    BacktestConfig,
+    BacktestResult,
+    InMemoryStateStore,
+    EventBlock,
+    iter_event_blocks,
+    run_lockstep,
+    run_backtest
+)
+
+from .sweep import (
+    ParameterSweep,
+    SweepResults,
+    grid_search_space,
+    random_search_space,
+    snapshot_tape,
+    run_sweep_shard
+)
+
+__all__ = [
+    "TickTape",
+    "option_symbol",
+    "load_raw_ticks",
+    "load_recorded_chains",
+    "FillModelConfig",
+    "FillSimulator",
+    "SimulatedOrder",
+    "SimulatedFill",
+    "BacktestEngine",
+    "BacktestConfig",
+    "BacktestResult",
+    "InMemoryStateStore",
+    "EventBlock",
+    "iter_event_blocks",
+    "run_lockstep",
+    "run_backtest",
+    "ParameterSweep",
+    "SweepResults",
+    "grid_search_space",
+    "random_search_space",
+    "snapshot_tape",
+    "run_sweep_shard"
+]
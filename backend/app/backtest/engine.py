@@ -0,0 +1,673 @@
+"""
+Event-Driven Backtest Engine
+Replays a recorded event tape through a BaseStrategy with simulated execution
+
+Events are delivered in timestamp order on a simulated clock: each event
+first releases orders whose latency has elapsed against the prevailing
+book, then updates the book (filling resting orders it crosses), then is
+handed to the strategy's generate_signal. Signals pass through the real
+RiskManager and PositionLimitsManager before reaching the fill simulator,
+so the same limits that gate live orders gate backtest orders. Their daily
+counters roll over when the tape crosses an IST trading date. Given the
+same tape, strategy and config, a run is fully deterministic.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+from app.core.exceptions import ErrorCode, PositionLimitError, StrategyException
+from app.db.models.trade import Trade, TradeStatus, TradeType
+from app.db.models.position import Position, PositionStatus
+from app.risk.manager import RiskManager
+from app.risk.position_limits import PositionLimitsManager
+from app.strategies.base import BaseStrategy, MarketData, SignalType, TradingSignal
+from app.utils.market_hours import IST
+
+from .events import TickTape
+from .fills import FillModelConfig, FillSimulator, SimulatedFill, SimulatedOrder
+
+# Events decoded to Python objects at a time during replay
+DEFAULT_BLOCK_SIZE = 8192
+
+
+class InMemoryStateStore:
+    """
+    Process-local replacement for the Redis manager behind StateJournal
+
+    Backtests run the real risk components but must not read or write the
+    live trading state, so their journals and violation lists live here.
+    """
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.lists: Dict[str, List[Any]] = {}
+
+    async def get(self, key: str, *args, **kwargs) -> Any:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: Any, *args, **kwargs) -> bool:
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            removed += (self.values.pop(key, None) is not None) + (self.lists.pop(key, None) is not None)
+        return removed
+
+    async def rpush(self, key: str, *values: Any, **kwargs) -> int:
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def lpush(self, key: str, *values: Any, **kwargs) -> int:
+        self.lists[key] = list(reversed(values)) + self.lists.get(key, [])
+        return len(self.lists[key])
+
+    async def lrange(self, key: str, start: int = 0, end: int = -1) -> List[Any]:
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def llen(self, key: str) -> int:
+        return len(self.lists.get(key, []))
+
+
+@dataclass
+class BacktestConfig:
+    """Backtest run configuration"""
+    fill: FillModelConfig = field(default_factory=FillModelConfig)
+    mark_interval_seconds: float = 1.0      # Mark-to-market, risk P&L refresh and equity sampling
+    signal_price_as_limit: bool = False     # Treat TradingSignal.price as a limit price
+    flatten_at_end: bool = True
+    exchange: str = "NFO"
+
+
+@dataclass
+class BacktestPosition:
+    """Net position in lots with average entry price"""
+    net_lots: int = 0
+    average_price: float = 0.0
+    realized_pnl: float = 0.0
+    trades: int = 0
+
+
+@dataclass
+class BacktestResult:
+    """Outcome of one backtest run"""
+    strategy_name: str
+    start: float
+    end: float
+    events: int
+    signals: int
+    orders: int
+    rejected: Dict[str, int]
+    trades: List[Dict[str, Any]]
+    equity_timestamps: np.ndarray
+    equity: np.ndarray
+    realized_pnl: float
+    unrealized_pnl: float
+    max_drawdown: float
+    wall_seconds: float
+
+    @property
+    def total_pnl(self) -> float:
+        return self.realized_pnl + self.unrealized_pnl
+
+    @property
+    def simulated_seconds(self) -> float:
+        return max(self.end - self.start, 0.0)
+
+    @property
+    def speedup(self) -> float:
+        """Simulated time per wall-clock time"""
+        return self.simulated_seconds / self.wall_seconds if self.wall_seconds > 0 else math.inf
+
+    def summary(self) -> Dict[str, Any]:
+        closing = [t for t in self.trades if t["realized_pnl"] != 0]
+        wins = sum(1 for t in closing if t["realized_pnl"] > 0)
+        return {
+            "strategy_name": self.strategy_name,
+            "start": datetime.utcfromtimestamp(self.start).isoformat() if self.events else None,
+            "end": datetime.utcfromtimestamp(self.end).isoformat() if self.events else None,
+            "events": self.events,
+            "signals": self.signals,
+            "orders": self.orders,
+            "fills": len(self.trades),
+            "rejected": dict(self.rejected),
+            "realized_pnl": round(self.realized_pnl, 2),
+            "unrealized_pnl": round(self.unrealized_pnl, 2),
+            "total_pnl": round(self.total_pnl, 2),
+            "max_drawdown": round(self.max_drawdown, 2),
+            "win_rate": wins / len(closing) if closing else 0.0,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "speedup": round(self.speedup, 1) if math.isfinite(self.speedup) else None
+        }
+
+
+def _decimal(value: float) -> Optional[Decimal]:
+    return Decimal(repr(value)) if value == value else None  # NaN -> None
+
+
+@dataclass
+class EventBlock:
+    """
+    A contiguous slice of the tape decoded for replay
+
+    MarketData objects are built once per block and handed to every engine
+    replaying it, so strategies must treat them as read-only.
+    """
+    timestamps: List[float]
+    symbols: List[str]
+    ltp: List[float]
+    bid: List[float]
+    ask: List[float]
+    bid_qty: List[int]
+    ask_qty: List[int]
+    market_data: List[MarketData]
+
+
+def iter_event_blocks(tape: TickTape, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[EventBlock]:
+    """
+    Decode the tape block by block
+
+    Only one block of Python objects is alive at a time, so memory stays
+    flat however long the tape is; memory-mapped tapes are paged in as
+    they are read.
+    """
+    symbol_table = tape.symbols
+    for lo in range(0, len(tape), block_size):
+        hi = min(lo + block_size, len(tape))
+        timestamps = tape.timestamps[lo:hi].tolist()
+        symbols = [symbol_table[i] for i in tape.symbol_ids[lo:hi].tolist()]
+        columns = {name: values[lo:hi].tolist() for name, values in tape.columns.items()}
+        ltp, bid, ask = columns["ltp"], columns["bid"], columns["ask"]
+        bid_qty, ask_qty = columns["bid_qty"], columns["ask_qty"]
+        volume, oi = columns["volume"], columns["oi"]
+        delta, gamma, theta = columns["delta"], columns["gamma"], columns["theta"]
+        vega, iv = columns["vega"], columns["iv"]
+
+        market_data = [
+            MarketData(
+                symbol=symbols[i],
+                ltp=_decimal(ltp[i]),
+                volume=volume[i],
+                open_interest=oi[i],
+                bid=_decimal(bid[i]),
+                ask=_decimal(ask[i]),
+                bid_qty=bid_qty[i],
+                ask_qty=ask_qty[i],
+                delta=_decimal(delta[i]),
+                gamma=_decimal(gamma[i]),
+                theta=_decimal(theta[i]),
+                vega=_decimal(vega[i]),
+                iv=_decimal(iv[i]),
+                timestamp=datetime.utcfromtimestamp(timestamps[i])
+            )
+            for i in range(hi - lo)
+        ]
+        yield EventBlock(timestamps, symbols, ltp, bid, ask, bid_qty, ask_qty, market_data)
+
+
+class BacktestEngine:
+    """
+    Deterministic event-driven backtester for BaseStrategy subclasses
+
+    Quantities are in lots throughout; P&L is converted to rupees with
+    the fill model's lot size.
+    """
+
+    def __init__(
+        self,
+        strategy: BaseStrategy,
+        config: Optional[BacktestConfig] = None,
+        risk_manager: Optional[RiskManager] = None,
+        position_limits: Optional[PositionLimitsManager] = None
+    ):
+        self.logger = logger.bind(module="backtest")
+        self.strategy = strategy
+        self.config = config or BacktestConfig()
+        self.strategy_name = getattr(strategy, "strategy_name", None) or getattr(strategy, "strategy_id", "strategy")
+
+        # Fresh risk components with process-local state, unless supplied
+        self.state_store = InMemoryStateStore()
+        self.risk_manager = risk_manager or RiskManager(self.state_store)
+        self.position_limits = position_limits or PositionLimitsManager(self.state_store)
+
+        self.simulator = FillSimulator(self.config.fill)
+        self.simulator.on_drop = self._on_order_dropped
+        self.positions: Dict[str, BacktestPosition] = {}
+        self._pending_lots: Dict[str, int] = {}  # Signed unfilled lots per symbol
+        self.trades: List[Dict[str, Any]] = []
+        self.rejected: Dict[str, int] = {}
+        self.signals = 0
+        self.orders = 0
+        self.now = 0.0
+        self.wall_seconds = 0.0
+        self._start = 0.0
+        self._events = 0
+        self._next_mark = 0.0
+        self._trading_date = None
+        self._day_end = -math.inf  # Epoch seconds of the next IST midnight
+        self._day_start_pnl = 0.0  # Realized + unrealized P&L when the trading day began
+
+        self._realized_pnl = 0.0
+        self._equity_ts: List[float] = []
+        self._equity: List[float] = []
+        self._peak_equity = 0.0
+        self._max_drawdown = 0.0
+
+    async def run(self, tape: TickTape, block_size: int = DEFAULT_BLOCK_SIZE) -> BacktestResult:
+        """Replay the tape through the strategy and return the run's results"""
+        results = await run_lockstep([self], tape, block_size)
+        return results[0]
+
+    async def begin(self, tape: TickTape):
+        """Start the strategy and reset the clock ahead of the first replayed block"""
+        self.strategy.risk_manager = self.risk_manager
+        self.risk_manager.register_flatten_callback(self._on_risk_flatten)
+        if not await self.strategy.start():
+            raise StrategyException(
+                f"Strategy {self.strategy_name} failed to start for backtest",
+                ErrorCode.STRATEGY_ERROR
+            )
+
+        self._start = tape.start
+        self._events = 0
+        self._next_mark = tape.start
+        self._trading_date = None
+        self._day_end = -math.inf
+        self.wall_seconds = 0.0
+        self.logger.info(f"Backtesting {self.strategy_name} over {len(tape):,} events ({len(tape.symbols)} symbols)")
+
+    async def replay(self, block: EventBlock):
+        """Deliver one block of events in order"""
+        wall_start = time.perf_counter()
+        simulator = self.simulator
+        interval = self.config.mark_interval_seconds
+        next_mark = self._next_mark
+        timestamps, symbols = block.timestamps, block.symbols
+        ltp, bid, ask = block.ltp, block.bid, block.ask
+        bid_qty, ask_qty = block.bid_qty, block.ask_qty
+        market_data = block.market_data
+
+        for i in range(len(timestamps)):
+            now = self.now = timestamps[i]
+
+            if now >= self._day_end:
+                await self._roll_trading_day(now)
+
+            # Orders whose latency elapsed trade against the book before this event
+            if simulator._in_flight and simulator._in_flight[0][0] <= now:
+                await self._apply_fills(simulator.advance(now))
+
+            fills = simulator.on_book(symbols[i], now, ltp[i], bid[i], ask[i], bid_qty[i], ask_qty[i])
+            if fills:
+                await self._apply_fills(fills)
+
+            if now >= next_mark:
+                await self._mark_to_market(now)
+                next_mark = now + interval
+
+            signal = await self.strategy.generate_signal(market_data[i])
+            if signal is not None:
+                self.signals += 1
+                await self._handle_signal(signal, now)
+
+        self._next_mark = next_mark
+        self._events += len(timestamps)
+        self.wall_seconds += time.perf_counter() - wall_start
+
+    async def finish(self) -> BacktestResult:
+        """Flatten if configured, stop the strategy and collect the run's results"""
+        wall_start = time.perf_counter()
+        end = self.now if self._events else 0.0
+        if self.config.flatten_at_end:
+            await self._flatten(end, "end_of_data")
+            await self._apply_fills(self.simulator.advance(end))
+        self.simulator.cancel_all()
+        await self._mark_to_market(end)
+        self.wall_seconds += time.perf_counter() - wall_start
+
+        try:
+            await self.strategy.stop()
+        except Exception as e:
+            self.logger.warning(f"Strategy stop after backtest failed: {e}")
+
+        result = BacktestResult(
+            strategy_name=self.strategy_name,
+            start=self._start if self._events else 0.0,
+            end=end,
+            events=self._events,
+            signals=self.signals,
+            orders=self.orders,
+            rejected=self.rejected,
+            trades=self.trades,
+            equity_timestamps=np.array(self._equity_ts),
+            equity=np.array(self._equity),
+            realized_pnl=self._realized_pnl,
+            unrealized_pnl=self._unrealized_pnl(),
+            max_drawdown=self._max_drawdown,
+            wall_seconds=self.wall_seconds
+        )
+        self.logger.info(
+            f"Backtest {self.strategy_name}: P&L ₹{result.total_pnl:,.0f}, "
+            f"{len(self.trades)} fills, {result.speedup:,.0f}x real time"
+        )
+        return result
+
+    # ==================== Order Routing ====================
+
+    async def _handle_signal(self, signal: TradingSignal, now: float):
+        position = self.positions.get(signal.symbol)
+        projected = (position.net_lots if position else 0) + self._pending_lots.get(signal.symbol, 0)
+
+        if signal.signal_type in (SignalType.BUY, SignalType.SCALE_IN):
+            lots = signal.quantity
+        elif signal.signal_type == SignalType.SELL:
+            lots = -signal.quantity
+        elif signal.signal_type == SignalType.SCALE_OUT:
+            lots = -int(math.copysign(min(signal.quantity, abs(projected)), projected)) if projected else 0
+        else:  # EXIT
+            lots = -projected
+
+        limit = float(signal.price) if self.config.signal_price_as_limit and signal.price else None
+        await self._route(signal.symbol, lots, now, signal.signal_id, limit)
+
+        if signal.hedge_symbol and signal.hedge_quantity:
+            hedge_limit = float(signal.hedge_price) if self.config.signal_price_as_limit and signal.hedge_price else None
+            await self._route(signal.hedge_symbol, signal.hedge_quantity, now, signal.signal_id, hedge_limit)
+
+    async def _route(
+        self,
+        symbol: str,
+        lots: int,
+        now: float,
+        signal_id: Optional[str],
+        limit_price: Optional[float] = None,
+        reason: str = "signal",
+        immediate: bool = False
+    ) -> bool:
+        """Risk-check and submit a signed lot change; only exposure increases are gated"""
+        if lots == 0:
+            return False
+
+        position = self.positions.get(symbol)
+        projected = (position.net_lots if position else 0) + self._pending_lots.get(symbol, 0)
+        increase = abs(projected + lots) - abs(projected)
+
+        if increase > 0:
+            allowed, warnings = await self.risk_manager.check_position_limits(
+                increase, self.strategy_name, self._risk_positions()
+            )
+            if not allowed:
+                self._reject(f"risk_manager: {warnings[0].split(':')[0]}" if warnings else "risk_manager")
+                return False
+            try:
+                await self.position_limits.check_order_limits(
+                    increase, symbol, self.strategy_name, signal_id=signal_id
+                )
+            except PositionLimitError:
+                self._reject("position_limits")
+                return False
+
+        self.orders += 1
+        self.simulator.submit(
+            order_id=f"BT{self.orders:07d}",
+            symbol=symbol,
+            is_buy=lots > 0,
+            quantity=abs(lots),
+            now=now,
+            limit_price=limit_price,
+            signal_id=signal_id,
+            reason=reason,
+            immediate=immediate
+        )
+        self._pending_lots[symbol] = self._pending_lots.get(symbol, 0) + lots
+        return True
+
+    def _reject(self, reason: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def _risk_positions(self) -> List[Dict[str, Any]]:
+        lot_size = self.config.fill.lot_size
+        return [
+            {
+                "symbol": symbol,
+                "lots": abs(position.net_lots),
+                "market_value": abs(position.net_lots) * self._mark(symbol, position) * lot_size
+            }
+            for symbol, position in self.positions.items()
+            if position.net_lots
+        ]
+
+    async def _flatten(self, now: float, reason: str):
+        self.simulator.cancel_all()
+        for symbol, position in self.positions.items():
+            if position.net_lots:
+                await self._route(symbol, -position.net_lots, now, None, reason=reason, immediate=True)
+
+    async def _on_risk_flatten(self, reason: str, trigger_type: Any):
+        self.logger.warning(f"Risk flatten during backtest at {datetime.utcfromtimestamp(self.now)}: {reason}")
+        await self._flatten(self.now, "risk_flatten")
+
+    def _on_order_dropped(self, order: SimulatedOrder):
+        """Release the unfilled remainder of an expired or cancelled order"""
+        if order.remaining > 0:
+            lots = order.remaining if order.is_buy else -order.remaining
+            self._pending_lots[order.symbol] = self._pending_lots.get(order.symbol, 0) - lots
+
+    async def _roll_trading_day(self, now: float):
+        """Start the IST trading date of `now`: reset daily risk counters and intraday limits"""
+        trading_date = datetime.fromtimestamp(now, IST).date()
+        next_midnight = IST.localize(datetime.combine(trading_date + timedelta(days=1), dt_time()))
+        self._day_end = next_midnight.timestamp()
+        if trading_date == self._trading_date:
+            return
+
+        first_day = self._trading_date is None
+        self._trading_date = trading_date
+        self._day_start_pnl = self._realized_pnl + self._unrealized_pnl()
+        if not first_day:
+            await self.risk_manager._reset_daily_counters()
+        if await self.position_limits.roll_trading_day(trading_date):
+            # Positions carried overnight still count against the limits
+            for symbol, position in self.positions.items():
+                if position.net_lots:
+                    await self.position_limits.update_position(abs(position.net_lots), symbol, self.strategy_name)
+
+    # ==================== Fills and P&L ====================
+
+    async def _apply_fills(self, fills: List[SimulatedFill]):
+        for fill in fills:
+            await self._apply_fill(fill)
+
+    async def _apply_fill(self, fill: SimulatedFill):
+        order = fill.order
+        lot_size = self.config.fill.lot_size
+        lots = fill.quantity if order.is_buy else -fill.quantity
+        self._pending_lots[order.symbol] = self._pending_lots.get(order.symbol, 0) - lots
+
+        position = self.positions.setdefault(order.symbol, BacktestPosition())
+        before = position.net_lots
+        realized = 0.0
+
+        if before and (before > 0) != (lots > 0):
+            # Closing (part of) the position
+            closed = min(abs(lots), abs(before))
+            realized = closed * (fill.price - position.average_price) * lot_size * (1 if before > 0 else -1)
+        after = before + lots
+        if after == 0:
+            position.average_price = 0.0
+        elif before == 0 or (before > 0) != (after > 0):
+            position.average_price = fill.price  # Opened or flipped
+        elif abs(after) > abs(before):
+            position.average_price = (position.average_price * abs(before) + fill.price * abs(lots)) / abs(after)
+        position.net_lots = after
+        position.trades += 1
+
+        realized -= self.config.fill.fee_per_lot * fill.quantity
+        position.realized_pnl += realized
+        self._realized_pnl += realized
+
+        exposure_change = abs(after) - abs(before)
+        if exposure_change:
+            await self.position_limits.update_position(
+                exposure_change, order.symbol, self.strategy_name,
+                signal_id=order.signal_id, order_id=order.order_id
+            )
+
+        fill_time = datetime.utcfromtimestamp(fill.timestamp)
+        self.trades.append({
+            "order_id": order.order_id,
+            "signal_id": order.signal_id,
+            "symbol": order.symbol,
+            "side": "buy" if order.is_buy else "sell",
+            "lots": fill.quantity,
+            "price": fill.price,
+            "touch_price": fill.touch_price,
+            "timestamp": fill.timestamp,
+            "latency_ms": (fill.timestamp - order.submitted_at) * 1000.0,
+            "realized_pnl": realized,
+            "position_after": after,
+            "reason": order.reason
+        })
+
+        await self._notify_strategy(fill, realized, position, fill_time)
+        await self.risk_manager.update_daily_pnl(self._realized_pnl - self._day_start_pnl, self._unrealized_pnl())
+
+    async def _notify_strategy(self, fill: SimulatedFill, realized: float, position: BacktestPosition, fill_time: datetime):
+        order = fill.order
+        price = Decimal(repr(fill.price))
+        trade = Trade(
+            order_id=order.order_id,
+            symbol=order.symbol,
+            exchange=self.config.exchange,
+            trade_type=TradeType.BUY if order.is_buy else TradeType.SELL,
+            status=TradeStatus.FILLED if order.remaining == 0 else TradeStatus.PARTIALLY_FILLED,
+            quantity=order.quantity,
+            filled_quantity=order.filled,
+            price=price,
+            average_fill_price=price,
+            realized_pnl=Decimal(repr(round(realized, 2))),
+            strategy_name=self.strategy_name,
+            signal_id=order.signal_id,
+            order_timestamp=datetime.utcfromtimestamp(order.submitted_at),
+            fill_timestamp=fill_time,
+            latency_ms=int(round((fill.timestamp - order.submitted_at) * 1000.0)),
+            expected_price=Decimal(repr(fill.touch_price))
+        )
+        try:
+            await self.strategy.on_trade_fill(trade)
+            if realized:
+                self.strategy.update_performance_metrics(trade)
+
+            self.strategy.state.positions_count = sum(1 for p in self.positions.values() if p.net_lots)
+            self.strategy.state.last_trade_time = fill_time
+
+            await self.strategy.on_position_update(Position(
+                symbol=order.symbol,
+                exchange=self.config.exchange,
+                strategy_name=self.strategy_name,
+                status=PositionStatus.OPEN if position.net_lots else PositionStatus.CLOSED,
+                net_quantity=position.net_lots,
+                average_price=Decimal(repr(position.average_price)),
+                realized_pnl=Decimal(repr(round(position.realized_pnl, 2))),
+                current_price=price,
+                total_trades=position.trades,
+                last_trade_at=fill_time
+            ))
+        except Exception as e:
+            self.logger.error(f"Strategy fill callback failed for {order.order_id}: {e}")
+
+    def _mark(self, symbol: str, position: BacktestPosition) -> float:
+        book = self.simulator.books.get(symbol)
+        mark = book.mark if book is not None else math.nan
+        return mark if mark > 0 else position.average_price
+
+    def _unrealized_pnl(self) -> float:
+        lot_size = self.config.fill.lot_size
+        return sum(
+            position.net_lots * (self._mark(symbol, position) - position.average_price) * lot_size
+            for symbol, position in self.positions.items()
+            if position.net_lots
+        )
+
+    async def _mark_to_market(self, now: float):
+        unrealized = self._unrealized_pnl()
+        equity = self._realized_pnl + unrealized
+        self._equity_ts.append(now)
+        self._equity.append(equity)
+        self._peak_equity = max(self._peak_equity, equity)
+        self._max_drawdown = max(self._max_drawdown, self._peak_equity - equity)
+
+        if equity != self._day_start_pnl:
+            await self.risk_manager.update_daily_pnl(self._realized_pnl - self._day_start_pnl, unrealized)
+
+
+async def run_lockstep(
+    engines: Sequence[BacktestEngine],
+    tape: TickTape,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    return_exceptions: bool = False
+) -> List[Union[BacktestResult, BaseException]]:
+    """
+    Replay one tape through several independent engines
+
+    Each block is decoded once and replayed by every engine in turn, so
+    the per-event decoding cost is shared across a batch of strategy
+    configurations. Engines keep separate state, so each result is the
+    same as running that engine alone. Decoding time is split evenly
+    across the engines' wall_seconds.
+
+    With `return_exceptions`, an engine that raises is dropped from the
+    replay and its exception takes its place in the results, as with
+    asyncio.gather; otherwise the first error propagates.
+    """
+    results: List[Union[BacktestResult, BaseException, None]] = [None] * len(engines)
+    active = list(range(len(engines)))
+
+    async def guarded(index: int, step) -> Any:
+        try:
+            return await step
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            engines[index].logger.error(f"Backtest {engines[index].strategy_name} failed: {e}")
+            results[index] = e
+            active.remove(index)
+
+    for index in list(active):
+        await guarded(index, engines[index].begin(tape))
+
+    blocks = iter_event_blocks(tape, block_size)
+    while active:
+        decode_start = time.perf_counter()
+        block = next(blocks, None)
+        if block is None:
+            break
+        decode_share = (time.perf_counter() - decode_start) / len(active)
+        for index in list(active):
+            engines[index].wall_seconds += decode_share
+            await guarded(index, engines[index].replay(block))
+
+    for index in list(active):
+        result = await guarded(index, engines[index].finish())
+        if index in active:
+            results[index] = result
+    return results
+
+
+def run_backtest(
+    strategy: BaseStrategy,
+    tape: TickTape,
+    config: Optional[BacktestConfig] = None
+) -> BacktestResult:
+    """Run a backtest to completion on a fresh event loop"""
+    return asyncio.run(BacktestEngine(strategy, config).run(tape))
@@ -0,0 +1,344 @@
+"""
+Backtest Event Tape
+Columnar, time-ordered market events built from recorded ticks and chains
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.services.chain_store import ChainDay
+
+# Float columns carried per event; NaN means "not recorded"
+FLOAT_FIELDS = ("ltp", "bid", "ask", "delta", "gamma", "theta", "vega", "iv")
+INT_FIELDS = ("bid_qty", "ask_qty", "volume", "oi")
+
+# NSE weekly expiry month codes (Oct/Nov/Dec are letters)
+_MONTH_CODES = {10: "O", 11: "N", 12: "D"}
+
+
+def option_symbol(underlying: str, expiry: str, strike: float, option_type: str) -> str:
+    """Weekly option trading symbol, e.g. NIFTY2412524000CE for 2024-01-25"""
+    expiry_date = datetime.strptime(expiry[:10], "%Y-%m-%d")
+    month = _MONTH_CODES.get(expiry_date.month, str(expiry_date.month))
+    strike_text = f"{strike:g}" if strike != int(strike) else str(int(strike))
+    return f"{underlying}{expiry_date:%y}{month}{expiry_date:%d}{strike_text}{option_type.upper()}"
+
+
+@dataclass
+class TickTape:
+    """
+    Market events as parallel arrays sorted by timestamp
+
+    `symbol_ids` index into `symbols`. Timestamps are epoch seconds.
+    Merging tapes is a stable sort, so events with equal timestamps keep
+    their source order and replays are deterministic.
+    """
+    timestamps: np.ndarray
+    symbol_ids: np.ndarray
+    symbols: List[str]
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def start(self) -> float:
+        return float(self.timestamps[0]) if len(self) else 0.0
+
+    @property
+    def end(self) -> float:
+        return float(self.timestamps[-1]) if len(self) else 0.0
+
+    @classmethod
+    def empty(cls) -> "TickTape":
+        return cls(
+            timestamps=np.empty(0),
+            symbol_ids=np.empty(0, dtype=np.int32),
+            symbols=[],
+            columns={
+                **{name: np.empty(0) for name in FLOAT_FIELDS},
+                **{name: np.empty(0, dtype=np.int64) for name in INT_FIELDS}
+            }
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "TickTape":
+        """
+        Tape from tick rows: RawTickData models or dicts with the same names
+
+        Uses symbol, timestamp, ltp, bid_price, ask_price, bid_qty, ask_qty,
+        volume and open_interest; greeks and iv when present.
+        """
+        rows = [r if isinstance(r, dict) else vars(r) for r in records]
+        if not rows:
+            return cls.empty()
+
+        symbols = list(dict.fromkeys(row["symbol"] for row in rows))
+        symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+
+        def timestamp(value) -> float:
+            return value.timestamp() if isinstance(value, datetime) else float(value)
+
+        def number(row, *names) -> float:
+            for name in names:
+                value = row.get(name)
+                if value is not None:
+                    return float(value)
+            return np.nan
+
+        def count(row, name) -> int:
+            value = row.get(name)
+            return int(value) if value is not None else 0
+
+        columns = {
+            "ltp": [number(r, "ltp") for r in rows],
+            "bid": [number(r, "bid_price", "bid") for r in rows],
+            "ask": [number(r, "ask_price", "ask") for r in rows],
+            **{name: [number(r, name) for r in rows] for name in ("delta", "gamma", "theta", "vega", "iv")},
+            "bid_qty": [count(r, "bid_qty") for r in rows],
+            "ask_qty": [count(r, "ask_qty") for r in rows],
+            "volume": [count(r, "volume") for r in rows],
+            "oi": [count(r, "open_interest") if "open_interest" in r else count(r, "oi") for r in rows]
+        }
+        tape = cls(
+            timestamps=np.array([timestamp(r["timestamp"]) for r in rows], dtype=np.float64),
+            symbol_ids=np.array([symbol_index[r["symbol"]] for r in rows], dtype=np.int32),
+            symbols=symbols,
+            columns={
+                name: np.array(values, dtype=np.int64 if name in INT_FIELDS else np.float64)
+                for name, values in columns.items()
+            }
+        )
+        return tape.sorted()
+
+    @classmethod
+    def from_chain_day(
+        cls,
+        chain_day: ChainDay,
+        strike_range: Optional[float] = None,
+        include_underlying: bool = True
+    ) -> "TickTape":
+        """
+        Tape from one recorded chain partition
+
+        Every snapshot becomes one event per (strike, side) plus, optionally,
+        an underlying event carrying the spot. Chains have no displayed
+        sizes, so bid_qty/ask_qty are 0 (unknown).
+
+        Args:
+            chain_day: Partition loaded with ChainSnapshotReader.load_day
+            strike_range: Keep strikes within this many points of spot
+            include_underlying: Emit an event for the underlying per snapshot
+        """
+        if len(chain_day) == 0:
+            return cls.empty()
+
+        counts = np.diff(chain_day.offsets)
+        snapshot = np.repeat(np.arange(len(chain_day)), counts)
+        strikes = np.asarray(chain_day.columns["strike"], dtype=np.float64)
+        keep = np.ones(len(strikes), dtype=bool)
+        if strike_range is not None:
+            keep = np.abs(strikes - np.asarray(chain_day.spots)[snapshot]) <= strike_range
+        rows = np.flatnonzero(keep)
+
+        timestamps = np.asarray(chain_day.timestamps, dtype=np.float64)
+        expiries = np.asarray(chain_day.expiries)
+
+        # One symbol per (expiry, strike, side)
+        contract_keys = np.rec.fromarrays([expiries[snapshot[rows]], strikes[rows]])
+        unique_keys, contract_ids = np.unique(contract_keys, return_inverse=True)
+        symbols = [
+            option_symbol(chain_day.underlying, str(expiry), float(strike), option_type)
+            for option_type in ("CE", "PE")
+            for expiry, strike in unique_keys
+        ]
+
+        def side_column(side: str, name: str, dtype) -> np.ndarray:
+            column = chain_day.columns.get(f"{side}_{name}")
+            if column is None:
+                return np.full(len(rows), np.nan if dtype == np.float64 else 0, dtype=dtype)
+            return np.asarray(column, dtype=dtype)[rows]
+
+        parts_ts = [timestamps[snapshot[rows]]] * 2
+        parts_ids = [contract_ids, contract_ids + len(unique_keys)]
+        parts = {name: [] for name in FLOAT_FIELDS + INT_FIELDS}
+        for side in ("call", "put"):
+            for name in FLOAT_FIELDS:
+                parts[name].append(side_column(side, name, np.float64))
+            for name in ("volume", "oi"):
+                parts[name].append(side_column(side, name, np.int64))
+            for name in ("bid_qty", "ask_qty"):
+                parts[name].append(np.zeros(len(rows), dtype=np.int64))
+
+        if include_underlying:
+            spots = np.asarray(chain_day.spots, dtype=np.float64)
+            parts_ts.append(timestamps)
+            parts_ids.append(np.full(len(chain_day), len(symbols)))
+            symbols.append(chain_day.underlying)
+            for name in FLOAT_FIELDS:
+                parts[name].append(spots if name == "ltp" else np.full(len(chain_day), np.nan))
+            for name in INT_FIELDS:
+                parts[name].append(np.zeros(len(chain_day), dtype=np.int64))
+
+        tape = cls(
+            timestamps=np.concatenate(parts_ts),
+            symbol_ids=np.concatenate(parts_ids).astype(np.int32),
+            symbols=symbols,
+            columns={name: np.concatenate(values) for name, values in parts.items()}
+        )
+        return tape.sorted()
+
+    def sorted(self) -> "TickTape":
+        order = np.argsort(self.timestamps, kind="stable")
+        return TickTape(
+            timestamps=self.timestamps[order],
+            symbol_ids=self.symbol_ids[order],
+            symbols=self.symbols,
+            columns={name: values[order] for name, values in self.columns.items()}
+        )
+
+    def select(self, symbols: Sequence[str]) -> "TickTape":
+        """Only events for the given symbols"""
+        symbols = set(symbols)
+        wanted = np.array([symbol in symbols for symbol in self.symbols], dtype=bool)
+        mask = wanted[self.symbol_ids] if len(self) else np.zeros(0, dtype=bool)
+        return TickTape(
+            timestamps=self.timestamps[mask],
+            symbol_ids=self.symbol_ids[mask],
+            symbols=self.symbols,
+            columns={name: values[mask] for name, values in self.columns.items()}
+        )
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> "TickTape":
+        """Events with start <= timestamp < end (epoch seconds)"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side="left"))
+        return TickTape(
+            timestamps=self.timestamps[lo:hi],
+            symbol_ids=self.symbol_ids[lo:hi],
+            symbols=self.symbols,
+            columns={name: values[lo:hi] for name, values in self.columns.items()}
+        )
+
+    @classmethod
+    def merge(cls, tapes: Sequence["TickTape"]) -> "TickTape":
+        """Merge tapes into one time-ordered tape with a shared symbol table"""
+        tapes = [tape for tape in tapes if len(tape)]
+        if not tapes:
+            return cls.empty()
+        if len(tapes) == 1:
+            return tapes[0]
+
+        symbols: List[str] = []
+        symbol_index: Dict[str, int] = {}
+        remapped = []
+        for tape in tapes:
+            mapping = np.array([
+                symbol_index.setdefault(symbol, len(symbol_index)) for symbol in tape.symbols
+            ], dtype=np.int32)
+            remapped.append(mapping[tape.symbol_ids])
+        symbols = list(symbol_index)
+
+        merged = cls(
+            timestamps=np.concatenate([tape.timestamps for tape in tapes]),
+            symbol_ids=np.concatenate(remapped),
+            symbols=symbols,
+            columns={
+                name: np.concatenate([tape.columns[name] for tape in tapes])
+                for name in FLOAT_FIELDS + INT_FIELDS
+            }
+        )
+        return merged.sorted()
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """
+        Write the tape as a snapshot directory of one .npy file per array
+
+        The symbol table goes last and marks the snapshot complete, so a
+        half-written directory is never loaded.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "timestamps.npy", np.ascontiguousarray(self.timestamps, dtype=np.float64))
+        np.save(directory / "symbol_ids.npy", np.ascontiguousarray(self.symbol_ids, dtype=np.int32))
+        for name, values in self.columns.items():
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(values))
+
+        tmp_path = directory / "symbols.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"symbols": self.symbols, "columns": list(self.columns), "events": len(self)}, f)
+        os.replace(tmp_path, directory / "symbols.json")
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True) -> "TickTape":
+        """
+        Tape from a snapshot written by save()
+
+        With `mmap` the arrays are read-only memory maps: processes loading
+        the same snapshot share the OS page cache instead of each holding a
+        copy, and only the slices being replayed are paged in.
+        """
+        directory = Path(directory)
+        with open(directory / "symbols.json") as f:
+            meta = json.load(f)
+
+        mode = "r" if mmap else None
+        return cls(
+            timestamps=np.load(directory / "timestamps.npy", mmap_mode=mode),
+            symbol_ids=np.load(directory / "symbol_ids.npy", mmap_mode=mode),
+            symbols=meta["symbols"],
+            columns={name: np.load(directory / f"{name}.npy", mmap_mode=mode) for name in meta["columns"]}
+        )
+
+
+def load_raw_ticks(
+    session,
+    symbols: Sequence[str],
+    start: datetime,
+    end: datetime
+) -> TickTape:
+    """Tape from RawTickData rows stored in the database"""
+    from sqlmodel import select
+    from app.db.models.market_data import RawTickData
+
+    statement = (
+        select(RawTickData)
+        .where(RawTickData.symbol.in_(list(symbols)))
+        .where(RawTickData.timestamp >= start)
+        .where(RawTickData.timestamp < end)
+        .order_by(RawTickData.timestamp)
+    )
+    return TickTape.from_records(
+        {
+            "symbol": tick.symbol,
+            "timestamp": tick.timestamp,
+            "ltp": tick.ltp,
+            "bid_price": tick.bid_price,
+            "ask_price": tick.ask_price,
+            "bid_qty": tick.bid_qty,
+            "ask_qty": tick.ask_qty,
+            "volume": tick.volume,
+            "open_interest": tick.open_interest
+        }
+        for tick in session.exec(statement)
+    )
+
+
+def load_recorded_chains(
+    underlying: str,
+    day: str,
+    strike_range: Optional[float] = None,
+    reader=None
+) -> TickTape:
+    """Tape from the chain snapshots recorded for one day"""
+    if reader is None:
+        from app.services.chain_store import chain_snapshot_reader as reader
+    columns = [f"{side}_{name}" for side in ("call", "put") for name in FLOAT_FIELDS + ("volume", "oi")]
+    return TickTape.from_chain_day(reader.load_day(underlying, day, columns), strike_range)
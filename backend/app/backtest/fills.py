@@ -0,0 +1,252 @@
+"""
+Backtest Fill Simulation
+Latency-delayed fills against recorded top-of-book with configurable slippage
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class FillModelConfig:
+    """Execution assumptions for simulated orders"""
+    latency_ms: float = 50.0            # Signal to exchange arrival
+    latency_jitter_ms: float = 0.0      # Uniform +/- jitter, drawn from a seeded RNG
+    slippage_bps: float = 5.0           # Paid beyond the touch on marketable orders
+    slippage_ticks: int = 0             # Extra ticks beyond the touch
+    tick_size: float = 0.05
+    lot_size: int = 75
+    respect_displayed_size: bool = True  # Cap each fill at the displayed touch size
+    limit_timeout_seconds: float = 60.0  # Resting limit orders cancel after this
+    fee_per_lot: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class Book:
+    """Latest recorded top-of-book for one symbol"""
+    ltp: float = math.nan
+    bid: float = math.nan
+    ask: float = math.nan
+    bid_qty: int = 0
+    ask_qty: int = 0
+    timestamp: float = 0.0
+
+    def touch(self, is_buy: bool) -> Tuple[float, int]:
+        """Price and displayed size an aggressive order would hit (falls back to LTP)"""
+        price, size = (self.ask, self.ask_qty) if is_buy else (self.bid, self.bid_qty)
+        if not price > 0:
+            return self.ltp, 0
+        return price, size
+
+    @property
+    def mark(self) -> float:
+        if self.bid > 0 and self.ask > 0:
+            return 0.5 * (self.bid + self.ask)
+        return self.ltp
+
+
+@dataclass
+class SimulatedOrder:
+    """Order working in the simulator; quantities are in lots"""
+    order_id: str
+    symbol: str
+    is_buy: bool
+    quantity: int
+    limit_price: Optional[float]
+    submitted_at: float
+    arrives_at: float
+    signal_id: Optional[str] = None
+    reason: str = "signal"
+    filled: int = 0
+    expires_at: Optional[float] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled
+
+
+@dataclass
+class SimulatedFill:
+    order: SimulatedOrder
+    quantity: int
+    price: float
+    touch_price: float
+    timestamp: float
+
+
+class FillSimulator:
+    """
+    Matches simulated orders against the recorded book
+
+    Orders become live `latency` after submission and first trade against
+    the book prevailing at that moment. Marketable orders take the touch
+    plus slippage, capped at the displayed size when known; any remainder
+    and non-marketable limit orders rest and fill when a later book for
+    the symbol crosses their limit, until they time out. `on_drop` is
+    called with every order that leaves unfilled or part-filled, by
+    timeout or cancellation.
+    """
+
+    def __init__(self, config: Optional[FillModelConfig] = None):
+        self.config = config or FillModelConfig()
+        self.books: Dict[str, Book] = {}
+        self._in_flight: List[Tuple[float, int, SimulatedOrder]] = []  # Heap by arrival
+        self._resting: Dict[str, List[SimulatedOrder]] = {}
+        self._sequence = 0
+        self._rng = np.random.default_rng(self.config.seed)
+        self.stats = {"submitted": 0, "filled_orders": 0, "partial_fills": 0, "expired": 0}
+        self.on_drop: Optional[Callable[[SimulatedOrder], None]] = None
+
+    def submit(
+        self,
+        order_id: str,
+        symbol: str,
+        is_buy: bool,
+        quantity: int,
+        now: float,
+        limit_price: Optional[float] = None,
+        signal_id: Optional[str] = None,
+        reason: str = "signal",
+        immediate: bool = False
+    ) -> SimulatedOrder:
+        """Queue an order; `immediate` skips latency (e.g. risk flatten)"""
+        latency = 0.0 if immediate else self._latency_seconds()
+        order = SimulatedOrder(
+            order_id=order_id,
+            symbol=symbol,
+            is_buy=is_buy,
+            quantity=quantity,
+            limit_price=limit_price,
+            submitted_at=now,
+            arrives_at=now + latency,
+            signal_id=signal_id,
+            reason=reason
+        )
+        self._sequence += 1
+        heapq.heappush(self._in_flight, (order.arrives_at, self._sequence, order))
+        self.stats["submitted"] += 1
+        return order
+
+    def _latency_seconds(self) -> float:
+        jitter = self.config.latency_jitter_ms
+        offset = self._rng.uniform(-jitter, jitter) if jitter > 0 else 0.0
+        return max(self.config.latency_ms + offset, 0.0) / 1000.0
+
+    def advance(self, now: float) -> List[SimulatedFill]:
+        """Activate orders arriving by `now` against the prevailing books"""
+        fills: List[SimulatedFill] = []
+        while self._in_flight and self._in_flight[0][0] <= now:
+            arrives_at, _, order = heapq.heappop(self._in_flight)
+            book = self.books.get(order.symbol)
+            if book is not None:
+                fill = self._match(order, book, arrives_at, aggressive=True)
+                if fill:
+                    fills.append(fill)
+            if order.remaining > 0:
+                order.expires_at = arrives_at + self.config.limit_timeout_seconds
+                self._resting.setdefault(order.symbol, []).append(order)
+        return fills
+
+    def on_book(
+        self,
+        symbol: str,
+        timestamp: float,
+        ltp: float,
+        bid: float,
+        ask: float,
+        bid_qty: int,
+        ask_qty: int
+    ) -> List[SimulatedFill]:
+        """Apply a book update and fill resting orders it crosses"""
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = Book()
+        book.ltp, book.bid, book.ask = ltp, bid, ask
+        book.bid_qty, book.ask_qty, book.timestamp = bid_qty, ask_qty, timestamp
+
+        resting = self._resting.get(symbol)
+        if not resting:
+            return []
+
+        fills = []
+        still_resting = []
+        for order in resting:
+            if order.expires_at is not None and timestamp >= order.expires_at:
+                self.stats["expired"] += 1
+                self._drop(order)
+                continue
+            fill = self._match(order, book, timestamp, aggressive=False)
+            if fill:
+                fills.append(fill)
+            if order.remaining > 0:
+                still_resting.append(order)
+        self._resting[symbol] = still_resting
+        return fills
+
+    def _match(self, order: SimulatedOrder, book: Book, now: float, aggressive: bool) -> Optional[SimulatedFill]:
+        touch, displayed = book.touch(order.is_buy)
+        if not touch > 0:
+            return None
+
+        if order.limit_price is not None:
+            crosses = touch <= order.limit_price if order.is_buy else touch >= order.limit_price
+            if not crosses:
+                return None
+
+        quantity = order.remaining
+        if self.config.respect_displayed_size and displayed > 0:
+            quantity = min(quantity, max(displayed // self.config.lot_size, 1))
+
+        if aggressive or order.limit_price is None:
+            price = self._slipped_price(touch, order.is_buy)
+            if order.limit_price is not None:
+                price = min(price, order.limit_price) if order.is_buy else max(price, order.limit_price)
+        else:
+            # Resting limit filled by the market coming through it
+            price = order.limit_price
+
+        order.filled += quantity
+        if order.remaining == 0:
+            self.stats["filled_orders"] += 1
+        else:
+            self.stats["partial_fills"] += 1
+        return SimulatedFill(order=order, quantity=quantity, price=price, touch_price=touch, timestamp=now)
+
+    def _slipped_price(self, touch: float, is_buy: bool) -> float:
+        slip = touch * self.config.slippage_bps / 10000.0 + self.config.slippage_ticks * self.config.tick_size
+        price = touch + slip if is_buy else touch - slip
+        ticks = price / self.config.tick_size
+        # Round away from the trader to whole ticks
+        ticks = math.ceil(ticks - 1e-9) if is_buy else math.floor(ticks + 1e-9)
+        return max(ticks * self.config.tick_size, self.config.tick_size)
+
+    def cancel_all(self, symbol: Optional[str] = None) -> int:
+        """Drop resting and in-flight orders (all, or one symbol's)"""
+        dropped = []
+        for key in list(self._resting):
+            if symbol is None or key == symbol:
+                dropped.extend(self._resting.pop(key))
+        kept = []
+        for entry in self._in_flight:
+            if symbol is not None and entry[2].symbol != symbol:
+                kept.append(entry)
+            else:
+                dropped.append(entry[2])
+        self._in_flight = kept
+        heapq.heapify(self._in_flight)
+        for order in dropped:
+            self._drop(order)
+        return len(dropped)
+
+    def _drop(self, order: SimulatedOrder):
+        if self.on_drop is not None:
+            self.on_drop(order)
+
+    @property
+    def open_orders(self) -> int:
+        return len(self._in_flight) + sum(len(orders) for orders in self._resting.values())
@@ -0,0 +1,313 @@
+"""
+Backtest Parameter Sweeps
+Grid and random searches over a registered strategy's config, sharded across worker processes
+
+The tape is written once as a memory-mapped snapshot; every worker maps
+the same files read-only, so the OS page cache holds one copy of the
+market data however many workers run. Each shard replays the tape once
+for a batch of configurations in lockstep (see run_lockstep), which
+shares the per-event decoding cost across the batch.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from app.strategies.registry import strategy_registry
+
+from .engine import DEFAULT_BLOCK_SIZE, BacktestConfig, BacktestEngine, BacktestResult, run_lockstep
+from .events import TickTape
+
+# Per-run metrics, in results table order after run_id and the parameters
+METRIC_COLUMNS = [
+    "total_pnl",
+    "realized_pnl",
+    "max_drawdown",
+    "pnl_to_drawdown",
+    "fills",
+    "closed_trades",
+    "win_rate",
+    "avg_trade_pnl",
+    "profit_factor",
+    "signals",
+    "orders",
+    "rejected",
+    "events",
+    "wall_seconds",
+    "error"
+]
+
+
+def grid_search_space(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the given parameter values, in a stable order"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(list(grid[name]) for name in names))]
+
+
+def random_search_space(space: Dict[str, Any], n_samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Independent random draws from a search space
+
+    Each parameter is one of:
+    - a (low, high) tuple: uniform over the range, integers if both ends are ints
+    - a list: uniform choice among the values
+    - anything else: held fixed
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(n_samples):
+        sample = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple) and len(spec) == 2:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    sample[name] = int(rng.integers(low, high, endpoint=True))
+                else:
+                    sample[name] = float(rng.uniform(float(low), float(high)))
+            elif isinstance(spec, list):
+                sample[name] = spec[int(rng.integers(len(spec)))]
+            else:
+                sample[name] = spec
+        samples.append(sample)
+    return samples
+
+
+def snapshot_tape(tape: TickTape, snapshot_dir: Union[str, Path]) -> Path:
+    """Save the tape under a content hash, reusing an existing identical snapshot"""
+    digest = hashlib.sha1()
+    digest.update("\n".join(tape.symbols).encode())
+    for values in (tape.timestamps, tape.symbol_ids, *tape.columns.values()):
+        digest.update(np.ascontiguousarray(values).data)
+
+    path = Path(snapshot_dir) / digest.hexdigest()[:16]
+    if not (path / "symbols.json").exists():
+        tape.save(path)
+    return path
+
+
+class SweepResults:
+    """
+    One row per configuration: run_id, the swept parameters, then METRIC_COLUMNS
+
+    Failed runs keep their row with the error message and NaN metrics.
+    """
+
+    def __init__(self, param_names: List[str], rows: List[Dict[str, Any]]):
+        self.param_names = param_names
+        self.rows = sorted(rows, key=lambda row: row["run_id"])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def columns(self) -> List[str]:
+        return ["run_id"] + self.param_names + METRIC_COLUMNS
+
+    def to_frame(self):
+        """Results as a pandas DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(self.rows, columns=self.columns)
+
+    def best(self, metric: str = "total_pnl", n: int = 10, ascending: bool = False) -> List[Dict[str, Any]]:
+        """Top `n` successful runs by `metric`"""
+        ok = [row for row in self.rows if row["error"] is None and not math.isnan(row[metric])]
+        return sorted(ok, key=lambda row: row[metric], reverse=not ascending)[:n]
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the results table as CSV"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_frame().to_csv(path, index=False)
+        return path
+
+
+def _result_row(run_id: int, params: Dict[str, Any], result: Union[BacktestResult, BaseException]) -> Dict[str, Any]:
+    row = {"run_id": run_id, **params}
+    if isinstance(result, BaseException):
+        row.update({name: math.nan for name in METRIC_COLUMNS})
+        row["error"] = str(result) or type(result).__name__
+        return row
+
+    closing = [trade["realized_pnl"] for trade in result.trades if trade["realized_pnl"] != 0]
+    gross_profit = sum(pnl for pnl in closing if pnl > 0)
+    gross_loss = -sum(pnl for pnl in closing if pnl < 0)
+    row.update({
+        "total_pnl": result.total_pnl,
+        "realized_pnl": result.realized_pnl,
+        "max_drawdown": result.max_drawdown,
+        "pnl_to_drawdown": result.total_pnl / result.max_drawdown if result.max_drawdown > 0 else math.nan,
+        "fills": len(result.trades),
+        "closed_trades": len(closing),
+        "win_rate": sum(1 for pnl in closing if pnl > 0) / len(closing) if closing else math.nan,
+        "avg_trade_pnl": sum(closing) / len(closing) if closing else math.nan,
+        "profit_factor": gross_profit / gross_loss if gross_loss > 0 else math.nan,
+        "signals": result.signals,
+        "orders": result.orders,
+        "rejected": sum(result.rejected.values()),
+        "events": result.events,
+        "wall_seconds": result.wall_seconds,
+        "error": None
+    })
+    return row
+
+
+def _init_worker(strategy_modules: Sequence[str], log_level: str):
+    """Pool initializer: register strategies and quieten per-signal logging"""
+    for module in ("app.strategies", *strategy_modules):
+        importlib.import_module(module)
+    logger.remove()
+    logger.add(sys.stderr, level=log_level)
+
+
+def run_sweep_shard(
+    snapshot_path: str,
+    strategy_name: str,
+    base_config: Dict[str, Any],
+    backtest_config: BacktestConfig,
+    runs: List[Tuple[int, Dict[str, Any]]],
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Backtest a batch of configurations against a tape snapshot
+
+    Runs in a worker process; the snapshot is memory-mapped, not copied.
+    Returns one results row per (run_id, params) in `runs`.
+    """
+    tape = TickTape.load(snapshot_path, mmap=True)
+    return asyncio.run(_run_shard(tape, strategy_name, base_config, backtest_config, runs, block_size))
+
+
+async def _run_shard(
+    tape: TickTape,
+    strategy_name: str,
+    base_config: Dict[str, Any],
+    backtest_config: BacktestConfig,
+    runs: List[Tuple[int, Dict[str, Any]]],
+    block_size: int
+) -> List[Dict[str, Any]]:
+    rows = []
+    batch = []
+    for run_id, params in runs:
+        strategy = await strategy_registry.create_strategy_instance(strategy_name, {**base_config, **params})
+        if strategy is None:
+            rows.append(_result_row(run_id, params, RuntimeError(f"Could not create strategy {strategy_name}")))
+            continue
+        batch.append((run_id, params, BacktestEngine(strategy, backtest_config)))
+
+    if batch:
+        results = await run_lockstep([engine for _, _, engine in batch], tape, block_size, return_exceptions=True)
+        rows.extend(_result_row(run_id, params, result) for (run_id, params, _), result in zip(batch, results))
+    return rows
+
+
+class ParameterSweep:
+    """
+    Backtests a registered strategy across many configurations
+
+    Example:
+        sweep = ParameterSweep("volume_oi_confirm", base_config={"probe_quantity": 2})
+        results = sweep.run(tape, grid_search_space({
+            "volume_spike_threshold_sigma": [2.5, 3.0, 3.5],
+            "oi_confirmation_window_seconds": [120, 240]
+        }))
+        results.best("pnl_to_drawdown", n=5)
+
+    Strategies are created in the workers through the strategy registry, so
+    strategies registered outside app.strategies must be importable from
+    one of `strategy_modules`.
+    """
+
+    def __init__(
+        self,
+        strategy_name: str,
+        base_config: Optional[Dict[str, Any]] = None,
+        backtest_config: Optional[BacktestConfig] = None,
+        max_workers: Optional[int] = None,
+        runs_per_shard: int = 8,
+        strategy_modules: Sequence[str] = (),
+        snapshot_dir: str = "data/backtest_snapshots",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        worker_log_level: str = "WARNING"
+    ):
+        self.logger = logger.bind(module="backtest_sweep")
+        self.strategy_name = strategy_name
+        self.base_config = dict(base_config or {})
+        self.backtest_config = backtest_config or BacktestConfig()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.runs_per_shard = max(1, runs_per_shard)
+        self.strategy_modules = list(strategy_modules)
+        self.snapshot_dir = snapshot_dir
+        self.block_size = block_size
+        self.worker_log_level = worker_log_level
+
+    def run(self, tape: Union[TickTape, str, Path], configs: Sequence[Dict[str, Any]]) -> SweepResults:
+        """
+        Backtest every configuration and return the results table
+
+        Args:
+            tape: Tape to replay, or the path of a snapshot written by TickTape.save
+            configs: Parameter overrides per run, applied over base_config
+        """
+        snapshot = Path(tape) if isinstance(tape, (str, Path)) else snapshot_tape(tape, self.snapshot_dir)
+        param_names = list(dict.fromkeys(name for params in configs for name in params))
+        runs = list(enumerate(configs))
+        shards = [runs[i:i + self.runs_per_shard] for i in range(0, len(runs), self.runs_per_shard)]
+        wall_start = time.perf_counter()
+
+        self.logger.info(
+            f"Sweeping {self.strategy_name}: {len(runs)} configs in {len(shards)} shards "
+            f"over {self.max_workers} worker(s)"
+        )
+
+        rows: List[Dict[str, Any]] = []
+        if self.max_workers == 1:
+            # In-process, for debugging and single-core hosts
+            for module in ("app.strategies", *self.strategy_modules):
+                importlib.import_module(module)
+            for shard in shards:
+                rows.extend(run_sweep_shard(
+                    str(snapshot), self.strategy_name, self.base_config,
+                    self.backtest_config, shard, self.block_size
+                ))
+                self._log_progress(len(rows), len(runs), wall_start)
+            return SweepResults(param_names, rows)
+
+        # Spawned workers do not inherit the caller's event loop or open sockets
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.strategy_modules, self.worker_log_level)
+        ) as pool:
+            futures = {
+                pool.submit(
+                    run_sweep_shard, str(snapshot), self.strategy_name, self.base_config,
+                    self.backtest_config, shard, self.block_size
+                ): shard
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                try:
+                    rows.extend(future.result())
+                except Exception as e:
+                    self.logger.error(f"Sweep shard failed: {e}")
+                    rows.extend(_result_row(run_id, params, e) for run_id, params in futures[future])
+                self._log_progress(len(rows), len(runs), wall_start)
+
+        return SweepResults(param_names, rows)
+
+    def _log_progress(self, done: int, total: int, wall_start: float):
+        elapsed = time.perf_counter() - wall_start
+        self.logger.info(f"Sweep {self.strategy_name}: {done}/{total} runs done ({elapsed:.1f}s)")
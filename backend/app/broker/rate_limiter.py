@@ -4,6 +4,7 @@ Rate limiter for Dhan-Tradehull API operations.
 This module implements rate limiting to comply with Dhan API limits:
 - 20 orders per second
 - 20 modifications per order
+- Reserved emergency lane for kill switch flattening
 - Sliding window algorithm for smooth rate limiting
 """
 
@@ -60,12 +61,14 @@ class RateLimiter:
             f"(burst: +{burst_allowance})"
         )
 
-    async def acquire(self, timeout: Optional[float] = None) -> bool:
+    async def acquire(self, timeout: Optional[float] = None, limit: Optional[int] = None) -> bool:
         """
         Acquire permission to make a request.
         
         Args:
             timeout: Maximum time to wait for permission (None = no timeout)
+            limit: Window occupancy this caller may fill up to (defaults to the
+                effective limit); lower values leave headroom for other callers
             
         Returns:
             True if permission granted, False if timeout exceeded
@@ -74,19 +77,23 @@ class RateLimiter:
             asyncio.TimeoutError: If timeout exceeded
         """
         start_time = time.time()
+        limit = self.effective_limit if limit is None else min(limit, self.effective_limit)
         
-        async with self._lock:
-            while True:
+        while True:
+            # The lock only guards the window check; waiting happens outside
+            # it so a caller with a higher limit (the emergency lane) is never
+            # queued behind a regular caller sleeping for a slot
+            async with self._lock:
                 current_time = time.time()
                 
                 # Remove old requests from sliding window
                 self._cleanup_old_requests(current_time)
                 
                 # Check if we can make a request
-                if len(self._requests) < self.effective_limit:
+                if len(self._requests) < limit:
                     self._requests.append(current_time)
                     logger.debug(
-                        f"Rate limit acquired: {len(self._requests)}/{self.effective_limit}"
+                        f"Rate limit acquired: {len(self._requests)}/{limit}"
                     )
                     return True
                 
@@ -100,11 +107,11 @@ class RateLimiter:
                 
                 logger.debug(
                     f"Rate limit hit, waiting {wait_time:.3f}s "
-                    f"({len(self._requests)}/{self.effective_limit})"
+                    f"({len(self._requests)}/{limit})"
                 )
-                
-                # Wait for next slot
-                await asyncio.sleep(wait_time)
+            
+            # Wait for next slot, then re-check the window
+            await asyncio.sleep(wait_time)
 
     def _cleanup_old_requests(self, current_time: float):
         """Remove requests outside the sliding window."""
@@ -158,16 +165,34 @@ class OrderRateLimiter:
     Implements the Dhan API specific limits:
     - 20 orders per second
     - 20 modifications per order
+    
+    Regular and emergency orders share one sliding window, since the exchange
+    counts both against the same budget. Regular orders may only fill the
+    window up to `max_orders - emergency_reserve`, so the kill switch always
+    finds free slots; while the emergency lane is open, regular order
+    permissions are refused and flatten orders own the full budget.
     """
 
-    def __init__(self):
-        """Initialize order rate limiter."""
-        # Main order rate limiter (20/sec)
-        self.order_limiter = RateLimiter(max_requests=20, time_window=1.0)
+    def __init__(self, max_orders_per_second: int = 20, emergency_reserve: int = 4):
+        """
+        Initialize order rate limiter.
+        
+        Args:
+            max_orders_per_second: Exchange order budget
+            emergency_reserve: Slots per window regular orders may never use
+        """
+        # Shared order window (20/sec)
+        self.order_limiter = RateLimiter(max_requests=max_orders_per_second, time_window=1.0)
+        self.emergency_reserve = min(max(emergency_reserve, 0), max_orders_per_second - 1)
+        self.regular_limit = max_orders_per_second - self.emergency_reserve
         
         # Modification rate limiter (20/sec globally)
         self.modification_limiter = RateLimiter(max_requests=20, time_window=1.0)
         
+        # Emergency lane state (kill switch only)
+        self._emergency_lane_open = False
+        self._emergency_orders = 0
+        
         # Per-order modification tracking
         self._order_modifications: Dict[str, int] = {}
         self._modification_lock = asyncio.Lock()
@@ -178,13 +203,50 @@ class OrderRateLimiter:
         """
         Acquire permission to place a new order.
         
+        Args:
+            timeout: Maximum time to wait for permission
+            
+        Returns:
+            True if permission granted, False while the emergency lane is open
+        """
+        if self._emergency_lane_open:
+            logger.warning("Order permission refused - emergency lane is open")
+            return False
+        
+        return await self.order_limiter.acquire(timeout=timeout, limit=self.regular_limit)
+
+    async def acquire_emergency_permission(self, timeout: Optional[float] = None) -> bool:
+        """
+        Acquire permission on the reserved emergency lane.
+        
+        Uses the full shared window, including the slots regular orders
+        cannot take.
+        
         Args:
             timeout: Maximum time to wait for permission
             
         Returns:
             True if permission granted
         """
-        return await self.order_limiter.acquire(timeout=timeout)
+        granted = await self.order_limiter.acquire(timeout=timeout)
+        if granted:
+            self._emergency_orders += 1
+        return granted
+
+    def open_emergency_lane(self):
+        """Reserve the order budget for emergency flattening."""
+        self._emergency_lane_open = True
+        logger.warning("Emergency order lane opened - regular orders suspended")
+
+    def close_emergency_lane(self):
+        """Release the order budget back to regular orders."""
+        self._emergency_lane_open = False
+        logger.info("Emergency order lane closed - regular orders resumed")
+
+    @property
+    def emergency_lane_open(self) -> bool:
+        """Whether the emergency lane currently owns the order budget."""
+        return self._emergency_lane_open
 
     async def acquire_modification_permission(
         self,
@@ -249,6 +311,10 @@ class OrderRateLimiter:
         return {
             "order_limiter": self.order_limiter.get_current_usage(),
             "modification_limiter": self.modification_limiter.get_current_usage(),
+            "regular_limit": self.regular_limit,
+            "emergency_reserve": self.emergency_reserve,
+            "emergency_lane_open": self._emergency_lane_open,
+            "emergency_orders": self._emergency_orders,
             "tracked_orders": len(self._order_modifications),
             "order_modifications": dict(self._order_modifications)
         }
@@ -257,6 +323,8 @@ class OrderRateLimiter:
         """Reset all rate limiters and tracking."""
         self.order_limiter.reset()
         self.modification_limiter.reset()
+        self._emergency_lane_open = False
+        self._emergency_orders = 0
         self._order_modifications.clear()
         logger.info("All order rate limiters reset")
 
@@ -24,7 +24,7 @@ from loguru import logger
 from app.core.config import settings
 from app.core.exceptions import TradingException
 from app.broker.enums import TransactionType, OrderType, Validity, ExchangeSegment
-from app.broker.rate_limiter import RateLimiter
+from app.broker.rate_limiter import RateLimiter, OrderRateLimiter
 from app.broker.token_manager import TokenManager
 
 
@@ -62,7 +62,9 @@ class DhanTradehullClient:
         self._sync_client = dhanhq(client_id, access_token)
         
         # Rate limiters for different operations
-        self.order_rate_limiter = RateLimiter(max_requests=20, time_window=1.0)
+        # Shared with the kill switch and the order slicer so every order
+        # placement counts against one exchange budget
+        self.order_rate_limiter = OrderRateLimiter()
         self.modification_rate_limiter = RateLimiter(max_requests=20, time_window=1.0)
         self.data_rate_limiter = RateLimiter(max_requests=10, time_window=1.0)
         
@@ -260,7 +262,8 @@ class DhanTradehullClient:
         trigger_price: float = 0.0,
         after_market_order: bool = False,
         amo_time: str = "OPEN",
-        bolt_id: Optional[str] = None
+        bolt_id: Optional[str] = None,
+        permission_acquired: bool = False
     ) -> Dict[str, Any]:
         """
         Place a new order with comprehensive validation and rate limiting.
@@ -280,10 +283,19 @@ class DhanTradehullClient:
             after_market_order: Whether it's an AMO
             amo_time: AMO timing (OPEN, OPEN_30, OPEN_60)
             bolt_id: Optional bolt ID for bracket orders
+            permission_acquired: The caller already holds a permission from
+                order_rate_limiter (kill switch emergency lane, order slicer)
             
         Returns:
             Order placement response
         """
+        if not permission_acquired and not await self.order_rate_limiter.acquire_order_permission():
+            raise TradingException(
+                message="Order refused - emergency flatten in progress",
+                error_code="RATE_LIMITED",
+                details={"trading_symbol": trading_symbol}
+            )
+        
         order_data = {
             "transactionType": transaction_type.value,
             "exchangeSegment": exchange_segment.value,
@@ -311,8 +323,7 @@ class DhanTradehullClient:
         response = await self._make_request(
             method="POST",
             endpoint="/v2/orders",
-            data=order_data,
-            rate_limiter=self.order_rate_limiter
+            data=order_data
         )
         
         order_id = response.get("data", {}).get("orderId")
@@ -597,6 +608,48 @@ class DhanTradehullClient:
         )
         return response
 
+    async def get_margin_requirement(
+        self,
+        security_id: str,
+        exchange_segment: ExchangeSegment,
+        transaction_type: TransactionType,
+        quantity: int,
+        product_type: str,
+        price: float,
+        trigger_price: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Get the broker's margin requirement for a single order.
+        
+        Args:
+            security_id: Dhan security ID
+            exchange_segment: NSE_FNO, etc.
+            transaction_type: BUY or SELL
+            quantity: Order quantity
+            product_type: CNC, MIS, NRML
+            price: Order price
+            trigger_price: Trigger price (for SL orders)
+            
+        Returns:
+            Margin breakdown (totalMargin, spanMargin, exposureMargin, ...)
+        """
+        response = await self._make_request(
+            method="POST",
+            endpoint="/v2/margincalculator",
+            data={
+                "dhanClientId": self.client_id,
+                "exchangeSegment": exchange_segment.value,
+                "transactionType": transaction_type.value,
+                "quantity": quantity,
+                "productType": product_type,
+                "securityId": security_id,
+                "price": price,
+                "triggerPrice": trigger_price
+            },
+            rate_limiter=self.data_rate_limiter
+        )
+        return response.get("data", response)
+
     async def get_holdings(self) -> List[Dict[str, Any]]:
         """
         Get current holdings.
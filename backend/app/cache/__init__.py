@@ -17,6 +17,7 @@ from .redis import (
     cache_position_summary,
     get_cached_position_summary
 )
+from .state_journal import StateJournal
 
 __all__ = [
     "RedisCache",
@@ -30,5 +31,6 @@ __all__ = [
     "cache_strategy_state",
     "get_cached_strategy_state",
     "cache_position_summary",
-    "get_cached_position_summary"
+    "get_cached_position_summary",
+    "StateJournal"
 ] 
\ No newline at end of file
@@ -390,6 +390,10 @@ class RedisCache:
 # Global cache instance
 cache = RedisCache()
 
+# Names the risk, order and audit modules use for the shared client
+RedisManager = RedisCache
+redis_client = cache
+
 
 # Convenience functions
 async def init_redis() -> None:
@@ -172,6 +172,11 @@ ENVIRONMENT = settings.ENVIRONMENT
 
 
 # Utility functions
+def get_settings() -> Settings:
+    """Get the global settings instance"""
+    return settings
+
+
 def is_development() -> bool:
     """Check if running in development environment"""
     return settings.ENVIRONMENT.lower() in ("development", "dev")
@@ -98,6 +98,37 @@ class OrderException(TradingException):
     pass
 
 
+class OrderExecutionError(OrderException):
+    """Order could not be executed"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.ORDER_REJECTED, details)
+
+
+class RequoteError(OrderException):
+    """Re-quote attempt could not be made"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.ORDER_REJECTED, details)
+
+
+class MaxRetriesExceededError(RequoteError):
+    """Re-quote retries exhausted"""
+    pass
+
+
+class KillSwitchError(OrderException):
+    """Kill switch refused or failed to run"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.TRADING_DISABLED, details)
+
+
+class EmergencyError(KillSwitchError):
+    """Emergency flatten failed"""
+    pass
+
+
 class StrategyException(TradingException):
     """Strategy execution exceptions"""
     pass
@@ -113,6 +144,20 @@ class RiskManagementException(TradingException):
     pass
 
 
+class PositionLimitError(RiskManagementException):
+    """Order would exceed a position limit"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.POSITION_LIMIT_EXCEEDED, details)
+
+
+class RiskLimitExceededError(RiskManagementException):
+    """Order would exceed a risk limit"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.RISK_LIMIT_EXCEEDED, details)
+
+
 class DhanAPIException(TradingException):
     """Dhan API related exceptions"""
     pass
@@ -123,6 +168,13 @@ class ValidationException(TradingException):
     pass
 
 
+class AuditError(TradingException):
+    """Audit trail could not be read or written"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, ErrorCode.INTERNAL_ERROR, details)
+
+
 # Custom HTTP exceptions with standardized format
 class TradingHTTPException(HTTPException):
     """Custom HTTP exception with standardized error format"""
@@ -345,6 +397,8 @@ __all__ = [
     "StrategyException",
     "MarketDataException",
     "RiskManagementException",
+    "PositionLimitError",
+    "RiskLimitExceededError",
     "DhanAPIException",
     "ValidationException",
     "TradingHTTPException",
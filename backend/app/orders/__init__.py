@@ -11,6 +11,9 @@ This module provides comprehensive order management functionality including:
 - Re-quote system (max 3 retries, ≤₹0.10 price chase)
 - Emergency kill switch with 2-second flatten target
 - Order status tracking and fill notifications
+- Freeze-limit order slicing with concurrent child dispatch
+- Shared indexed order store
+- Microstructure-driven adaptive re-quoting
 """
 
 from .models import (
@@ -28,6 +31,11 @@ from .models import (
     ExecutionReport
 )
 
+from .store import (
+    OrderStore,
+    order_store
+)
+
 from .manager import (
     OrderManager,
     SlippageConfig,
@@ -51,6 +59,15 @@ from .requote import (
     RequoteContext
 )
 
+from .microstructure import (
+    AdaptiveRequoteEngine,
+    AdaptiveRequoteConfig,
+    MicrostructureModel,
+    TopOfBook,
+    WorkingOrder,
+    RequoteDecision
+)
+
 from .kill_switch import (
     EmergencyKillSwitch,
     KillSwitchTrigger,
@@ -60,6 +77,13 @@ from .kill_switch import (
     KillSwitchExecution
 )
 
+from .slicing import (
+    OrderSlicer,
+    ChildOrder,
+    SliceExecution,
+    DEFAULT_FREEZE_LIMITS
+)
+
 from .tracking import (
     OrderTrackingManager,
     FillType,
@@ -84,6 +108,10 @@ __all__ = [
     "OrderBook",
     "ExecutionReport",
     
+    # Store
+    "OrderStore",
+    "order_store",
+    
     # Manager
     "OrderManager",
     "SlippageConfig",
@@ -104,6 +132,14 @@ __all__ = [
     "RequoteAttempt",
     "RequoteContext",
     
+    # Adaptive re-quote
+    "AdaptiveRequoteEngine",
+    "AdaptiveRequoteConfig",
+    "MicrostructureModel",
+    "TopOfBook",
+    "WorkingOrder",
+    "RequoteDecision",
+    
     # Kill Switch (Task 4.9)
     "EmergencyKillSwitch",
     "KillSwitchTrigger",
@@ -118,5 +154,11 @@ __all__ = [
     "NotificationType",
     "FillInfo",
     "OrderTracker",
-    "NotificationEvent"
+    "NotificationEvent",
+    
+    # Slicing
+    "OrderSlicer",
+    "ChildOrder",
+    "SliceExecution",
+    "DEFAULT_FREEZE_LIMITS"
 ] 
\ No newline at end of file
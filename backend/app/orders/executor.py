@@ -8,20 +8,24 @@ execution analytics, and detailed performance metrics.
 import asyncio
 import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from typing import Dict, List, Optional, Callable, Any
 from uuid import uuid4
 
 from loguru import logger
-from app.broker.tradehull_client import TradehullClient
+from app.broker.tradehull_client import DhanTradehullClient
 from app.broker.enums import TransactionType, ProductType, OrderType, Validity
 from app.orders.models import (
-    OrderRequest, OrderResponse, ExecutionReport, 
+    Order, OrderRequest, OrderResponse, ExecutionReport, 
     LatencyMetrics, OrderStatus
 )
-from app.core.exceptions import OrderExecutionError
+from app.orders.slicing import OrderSlicer
+from app.core.exceptions import OrderExecutionError, RiskLimitExceededError
+from app.risk.pretrade import pretrade_gate
+from app.orders.manager import OrderManager, order_manager as default_order_manager, resolve_lot_size
 from app.cache.redis import RedisManager
+from app.utils.latency_histogram import LatencyHistogramSet, register_histogram_set
 
 
 class ExecutionPriority(Enum):
@@ -76,26 +80,33 @@ class OrderExecutor:
     - Real-time performance monitoring
     - Execution retry logic with exponential backoff
     - Order routing optimization
+    - Freeze-limit slicing with concurrent child dispatch
     """
     
     def __init__(
         self,
-        broker_client: TradehullClient,
+        broker_client: DhanTradehullClient,
         redis_manager: RedisManager,
-        target_latency_ms: float = 150.0
+        target_latency_ms: float = 150.0,
+        order_slicer: Optional[OrderSlicer] = None,
+        slice_poll_interval_s: float = 0.5,
+        order_manager: Optional[OrderManager] = None
     ):
         self.broker_client = broker_client
         self.redis = redis_manager
         self.target_latency_ms = target_latency_ms
+        # Children count against the same exchange window as every other order
+        self.order_slicer = order_slicer or OrderSlicer(rate_limiter=broker_client.order_rate_limiter)
+        self.slice_poll_interval_s = slice_poll_interval_s
+        # Positions the pre-trade gate weighs each order's direction against
+        self.order_manager = order_manager or default_order_manager
         
-        # Performance tracking
-        self.execution_metrics: Dict[str, List[float]] = {
-            "total_latency": [],
-            "validation_latency": [],
-            "risk_check_latency": [],
-            "broker_latency": [],
-            "network_latency": []
-        }
+        # Sliced parents whose children are still working at the exchange
+        self.slice_settlers: Dict[str, asyncio.Task] = {}
+        
+        # Performance tracking (constant-memory histograms per stage and priority)
+        self.latency_histograms = LatencyHistogramSet()
+        register_histogram_set("order_executor", self.latency_histograms)
         
         # Execution queues by priority
         self.execution_queues: Dict[ExecutionPriority, asyncio.Queue] = {
@@ -142,13 +153,15 @@ class OrderExecutor:
         """Stop the order execution engine."""
         self.is_running = False
         
-        # Cancel all worker tasks
-        for task in self.worker_tasks:
+        # Cancel all worker and slice settlement tasks
+        settlers = list(self.slice_settlers.values())
+        for task in self.worker_tasks + settlers:
             task.cancel()
         
         # Wait for tasks to complete
-        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        await asyncio.gather(*self.worker_tasks, *settlers, return_exceptions=True)
         self.worker_tasks.clear()
+        self.slice_settlers.clear()
         
         logger.info("Order executor stopped")
     
@@ -190,6 +203,10 @@ class OrderExecutor:
         )
         
         try:
+            # Orders above the freeze limit bypass the queue and go out as slices
+            if self.order_slicer.needs_slicing(order_request):
+                return await self._execute_sliced_order(context, order_request)
+            
             # Add to execution queue
             await self.execution_queues[priority].put((context, order_request))
             
@@ -244,6 +261,134 @@ class OrderExecutor:
             # Clean up active execution tracking
             self.active_executions.pop(order_id, None)
     
+    async def _execute_sliced_order(
+        self,
+        context: ExecutionContext,
+        order_request: OrderRequest
+    ) -> OrderResponse:
+        """Split an order by freeze limit and dispatch all children concurrently."""
+        await self._validate_order(order_request)
+        await self._perform_risk_checks(order_request, context.strategy_id)
+        
+        parent = Order(
+            order_id=context.order_id,
+            request=order_request,
+            status=OrderStatus.SUBMITTED,
+            submitted_at=datetime.now(timezone.utc),
+            submitted_price=order_request.price
+        )
+        # Children stay in whole lots of the size the risk checks sized the order with
+        children = self.order_slicer.create_children(parent, resolve_lot_size(order_request))
+        execution = await self.order_slicer.dispatch(
+            parent, children, self._submit_child_order
+        )
+        
+        if parent.is_terminal():
+            self.order_slicer.release(parent.order_id)
+        else:
+            self.slice_settlers[parent.order_id] = asyncio.create_task(
+                self._settle_sliced_order(parent),
+                name=f"slice_settler_{parent.order_id}"
+            )
+        
+        execution_time = time.perf_counter() - context.request_time
+        
+        logger.info(
+            "Sliced order executed: {} children ({} rejected) for {} in {:.2f}ms",
+            execution.total_children,
+            execution.rejected_children,
+            context.order_id,
+            execution_time * 1000,
+            extra={
+                "order_id": context.order_id,
+                "strategy_id": context.strategy_id,
+                "child_order_ids": [c.broker_order_id for c in children]
+            }
+        )
+        
+        return OrderResponse(
+            order_id=context.order_id,
+            status=parent.status,
+            broker_order_id=None,
+            message=(
+                f"Sliced into {execution.total_children} child orders "
+                f"({execution.rejected_children} rejected)"
+            ),
+            execution_time_ms=execution_time * 1000,
+            latency_metrics=LatencyMetrics(
+                total_latency_ms=execution_time * 1000,
+                validation_latency_ms=0.0,
+                broker_latency_ms=execution.dispatch_time_ms,
+                network_latency_ms=0.0
+            )
+        )
+    
+    async def _submit_child_order(self, order_request: OrderRequest) -> Dict[str, Any]:
+        """Place a single sliced child order with the broker."""
+        # The slicer already took this order's slot from the shared limiter
+        response = await self.broker_client.place_order(
+            symbol=order_request.symbol,
+            quantity=order_request.quantity,
+            price=order_request.price,
+            transaction_type=order_request.transaction_type,
+            product_type=order_request.product_type,
+            order_type=order_request.order_type,
+            validity=order_request.validity,
+            permission_acquired=True
+        )
+        return self._parse_child_response(response)
+    
+    async def _settle_sliced_order(self, parent: Order) -> None:
+        """Poll working children until the sliced parent reaches a terminal state."""
+        try:
+            while not parent.is_terminal():
+                await asyncio.sleep(self.slice_poll_interval_s)
+                for child in self.order_slicer.get_children(parent.order_id):
+                    if child.is_terminal() or not child.broker_order_id:
+                        continue
+                    try:
+                        update = self._parse_child_response(
+                            await self.broker_client.get_order_status(child.broker_order_id)
+                        )
+                    except Exception as e:
+                        logger.warning(
+                            "Status poll failed for child {} of {}: {}",
+                            child.child_id, parent.order_id, str(e)
+                        )
+                        continue
+                    self.order_slicer.apply_child_update(
+                        child.broker_order_id,
+                        status=self.order_slicer.parse_status(update.get("status")),
+                        filled_quantity=update.get("filled_quantity", child.filled_quantity),
+                        average_price=update.get("average_price"),
+                        message=update.get("message", "")
+                    )
+            
+            logger.info(
+                "Sliced order {} settled: {} ({}/{} filled)",
+                parent.order_id,
+                parent.status.value,
+                parent.filled_quantity,
+                parent.request.quantity
+            )
+        finally:
+            self.order_slicer.release(parent.order_id)
+            self.slice_settlers.pop(parent.order_id, None)
+    
+    @staticmethod
+    def _parse_child_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize a broker order payload to the fields the slicer reads."""
+        data = (response or {}).get("data", response) or {}
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        return {
+            "order_id": data.get("orderId", data.get("order_id")),
+            "status": data.get("orderStatus", data.get("status")),
+            "filled_quantity": data.get("filledQty", data.get("filled_quantity", 0)),
+            "average_price": data.get("averageTradedPrice", data.get("average_price")),
+            "message": data.get("omsErrorDescription", data.get("message", ""))
+        }
+    
     async def _execution_worker(self, priority: ExecutionPriority) -> None:
         """Worker task for processing orders of specific priority."""
         queue = self.execution_queues[priority]
@@ -388,10 +533,25 @@ class OrderExecutor:
             raise ValueError("Order symbol cannot be empty")
     
     async def _perform_risk_checks(self, order_request: OrderRequest, strategy_id: str) -> None:
-        """Perform risk checks for the order."""
-        # TODO: Integrate with risk manager
-        # For now, just a placeholder
-        await asyncio.sleep(0.001)  # Simulate risk check time
+        """Run the consolidated in-memory pre-trade risk gate."""
+        lot_size = resolve_lot_size(order_request)
+        result = pretrade_gate.evaluate(self.order_manager.build_pretrade_check(
+            order_request, lot_size, order_request.price or 0.0, strategy_id=strategy_id
+        ))
+        
+        # Per-rule timing breakdown
+        now = time.monotonic()
+        for rule, elapsed_us in result.rule_timings_us.items():
+            self.latency_histograms.record(f"risk_rule_{rule}", elapsed_us / 1000, now)
+        
+        if not result.allowed:
+            raise RiskLimitExceededError(
+                f"Pre-trade risk check failed: {'; '.join(result.reasons)}",
+                details={
+                    "failed_rule": result.failed_rule.value,
+                    "rule_timings_us": result.rule_timings_us
+                }
+            )
     
     async def _log_execution_metrics(
         self,
@@ -418,17 +578,15 @@ class OrderExecutor:
             ttl=timedelta(hours=24)
         )
         
-        # Update running averages
-        self.execution_metrics["total_latency"].append(breakdown.total_time * 1000)
-        self.execution_metrics["validation_latency"].append(breakdown.validation_time * 1000)
-        self.execution_metrics["risk_check_latency"].append(breakdown.risk_check_time * 1000)
-        self.execution_metrics["broker_latency"].append(breakdown.broker_submit_time * 1000)
-        self.execution_metrics["network_latency"].append(breakdown.network_time * 1000)
-        
-        # Keep only last 1000 metrics for memory management
-        for key in self.execution_metrics:
-            if len(self.execution_metrics[key]) > 1000:
-                self.execution_metrics[key] = self.execution_metrics[key][-1000:]
+        # Update latency histograms
+        now = time.monotonic()
+        total_ms = breakdown.total_time * 1000
+        self.latency_histograms.record("total_latency", total_ms, now)
+        self.latency_histograms.record("validation_latency", breakdown.validation_time * 1000, now)
+        self.latency_histograms.record("risk_check_latency", breakdown.risk_check_time * 1000, now)
+        self.latency_histograms.record("broker_latency", breakdown.broker_submit_time * 1000, now)
+        self.latency_histograms.record("network_latency", breakdown.network_time * 1000, now)
+        self.latency_histograms.record(f"priority_{context.priority.value}", total_ms, now)
     
     async def _store_execution_metrics(
         self,
@@ -463,30 +621,37 @@ class OrderExecutor:
             try:
                 await asyncio.sleep(30.0)  # Check every 30 seconds
                 
-                if not self.execution_metrics["total_latency"]:
+                histogram = self.latency_histograms.get("total_latency")
+                if not histogram:
+                    continue
+                
+                # Calculate recent performance metrics (last minute)
+                recent = histogram.summary(window_seconds=60)
+                if recent["count"] == 0:
                     continue
                 
-                # Calculate recent performance metrics
-                recent_latencies = self.execution_metrics["total_latency"][-100:]  # Last 100 executions
-                avg_latency = sum(recent_latencies) / len(recent_latencies)
-                max_latency = max(recent_latencies)
+                avg_latency = recent["mean_ms"]
+                max_latency = recent["max_ms"]
                 
                 # Calculate success rate (target latency met)
-                target_met_count = sum(1 for latency in recent_latencies if latency <= self.target_latency_ms)
-                success_rate = target_met_count / len(recent_latencies) * 100
+                success_rate = histogram.fraction_at_or_below(
+                    self.target_latency_ms, window_seconds=60
+                ) * 100
                 
                 # Log performance summary
                 logger.info(
-                    "Execution performance: avg={:.2f}ms, max={:.2f}ms, success_rate={:.1f}%",
+                    "Execution performance: avg={:.2f}ms, p99={:.2f}ms, max={:.2f}ms, success_rate={:.1f}%",
                     avg_latency,
+                    recent["p99_ms"],
                     max_latency,
                     success_rate,
                     extra={
                         "avg_latency_ms": avg_latency,
+                        "p99_latency_ms": recent["p99_ms"],
                         "max_latency_ms": max_latency,
                         "success_rate_pct": success_rate,
                         "target_latency_ms": self.target_latency_ms,
-                        "sample_size": len(recent_latencies)
+                        "sample_size": recent["count"]
                     }
                 )
                 
@@ -517,18 +682,24 @@ class OrderExecutor:
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get current performance statistics."""
-        if not self.execution_metrics["total_latency"]:
+        histogram = self.latency_histograms.get("total_latency")
+        if not histogram:
             return {"status": "no_data"}
         
-        total_latencies = self.execution_metrics["total_latency"]
+        session = histogram.summary()
         
         return {
-            "total_executions": len(total_latencies),
-            "avg_latency_ms": sum(total_latencies) / len(total_latencies),
-            "min_latency_ms": min(total_latencies),
-            "max_latency_ms": max(total_latencies),
+            "total_executions": session["count"],
+            "avg_latency_ms": session["mean_ms"],
+            "min_latency_ms": session["min_ms"],
+            "max_latency_ms": session["max_ms"],
+            "p50_latency_ms": session["p50_ms"],
+            "p95_latency_ms": session["p95_ms"],
+            "p99_latency_ms": session["p99_ms"],
+            "p999_latency_ms": session["p999_ms"],
             "target_latency_ms": self.target_latency_ms,
-            "success_rate_pct": sum(1 for lat in total_latencies if lat <= self.target_latency_ms) / len(total_latencies) * 100,
+            "success_rate_pct": histogram.fraction_at_or_below(self.target_latency_ms) * 100,
+            "latency_histograms": self.latency_histograms.snapshot(),
             "active_executions": len(self.active_executions),
             "queue_sizes": {
                 priority.value: self.execution_queues[priority].qsize()
@@ -3,24 +3,58 @@ Emergency kill switch system for rapid position flattening.
 
 This module provides emergency "Kill All" functionality with sub-2-second
 execution target, position flattening, and comprehensive safety controls.
+
+Flatten orders are pre-computed: the kill switch keeps a flatten plan that is
+refreshed incrementally on every fill (via the order manager's fill listeners)
+and on broker position syncs, so a trigger only has to dispatch the plan
+through the emergency lane of the broker client's shared order rate limiter.
 """
 
 import asyncio
+import re
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Callable, Any, Set
 from uuid import uuid4
 
 from loguru import logger
-from app.broker.tradehull_client import TradehullClient
-from app.broker.enums import TransactionType, OrderType, ProductType, Validity
-from app.orders.models import OrderRequest, OrderResponse, OrderStatus
+from app.broker.tradehull_client import DhanTradehullClient
+from app.broker.rate_limiter import OrderRateLimiter
+from app.broker.enums import TransactionType, ProductType
+from app.orders.models import ContractKey, OrderRequest, OrderResponse, OrderStatus, OrderType
 from app.cache.redis import RedisManager
 from app.core.exceptions import KillSwitchError, EmergencyError
 
 
+# Dhan position productType -> order product type
+BROKER_PRODUCT_TYPES = {
+    "INTRADAY": ProductType.MIS,
+    "MIS": ProductType.MIS,
+    "MARGIN": ProductType.NRML,
+    "NRML": ProductType.NRML,
+    "CNC": ProductType.CNC
+}
+BROKER_OPTION_TYPES = {"CALL": "CE", "PUT": "PE", "CE": "CE", "PE": "PE"}
+
+
+def broker_position_contract(row: Dict[str, Any]) -> Optional[ContractKey]:
+    """
+    Contract of a broker position row, in the same form as OrderRequest fields.
+    
+    The underlying is the leading name of the trading symbol (e.g. NIFTY
+    in "NIFTY-Jan2024-24000-CE"); strike, option type and expiry come from
+    the derivative fields. Returns None for rows that are not options.
+    """
+    option_type = BROKER_OPTION_TYPES.get(str(row.get("drvOptionType") or "").upper())
+    match = re.match(r"[A-Z&]+", str(row.get("tradingSymbol") or "").upper())
+    expiry = str(row.get("drvExpiryDate") or "")[:10]
+    if option_type is None or match is None or not expiry:
+        return None
+    return match.group(0), float(row.get("drvStrikePrice") or 0.0), option_type, expiry
+
+
 class KillSwitchTrigger(Enum):
     """Types of kill switch triggers."""
     MANUAL = "manual"
@@ -51,7 +85,16 @@ class PositionSnapshot:
     current_price: float
     unrealized_pnl: float
     market_value: float
+    strike: float = 0.0
+    option_type: str = ""
+    expiry: str = ""
+    product_type: ProductType = ProductType.MIS
+    security_id: Optional[str] = None
     timestamp: datetime = field(default_factory=datetime.utcnow)
+    
+    @property
+    def contract(self) -> ContractKey:
+        return (self.symbol, self.strike, self.option_type, self.expiry)
 
 
 @dataclass
@@ -84,6 +127,8 @@ class KillSwitchExecution:
     successful_flattens: int = 0
     failed_flattens: int = 0
     total_execution_time_ms: float = 0.0
+    trigger_to_last_ack_ms: float = 0.0
+    used_precomputed_plan: bool = False
     target_time_ms: float = 2000.0  # 2-second target
     status: KillSwitchStatus = KillSwitchStatus.INACTIVE
     start_time: datetime = field(default_factory=datetime.utcnow)
@@ -96,6 +141,8 @@ class EmergencyKillSwitch:
     
     Features:
     - Sub-2-second execution target for all positions
+    - Pre-computed flatten plan maintained on fills and position updates
+    - Reserved emergency rate-limit lane for flatten dispatch
     - Parallel order execution for maximum speed
     - Position snapshot and rollback capabilities
     - Multi-trigger support (manual, risk, system)
@@ -106,14 +153,20 @@ class EmergencyKillSwitch:
     
     def __init__(
         self,
-        broker_client: TradehullClient,
+        broker_client: DhanTradehullClient,
         redis_manager: RedisManager,
         target_execution_time_ms: float = 2000.0,
         max_concurrent_orders: int = 50,
-        require_confirmation: bool = True
+        require_confirmation: bool = True,
+        rate_limiter: Optional[OrderRateLimiter] = None,
+        order_manager=None
     ):
         self.broker_client = broker_client
         self.redis = redis_manager
+        # Regular orders count against the broker client's limiter, so the
+        # emergency lane must be taken on that same limiter
+        self.rate_limiter = rate_limiter or broker_client.order_rate_limiter
+        self.order_manager = order_manager
         self.target_execution_time_ms = target_execution_time_ms
         self.max_concurrent_orders = max_concurrent_orders
         self.require_confirmation = require_confirmation
@@ -123,10 +176,18 @@ class EmergencyKillSwitch:
         self.current_execution: Optional[KillSwitchExecution] = None
         self.execution_history: List[KillSwitchExecution] = []
         
-        # Position tracking
-        self.active_positions: Dict[str, PositionSnapshot] = {}
+        # Position tracking, one entry per contract
+        self.active_positions: Dict[ContractKey, PositionSnapshot] = {}
         self.position_callbacks: List[Callable[[List[PositionSnapshot]], None]] = []
         
+        # Pre-computed flatten plan (contract -> ready-to-send flatten order)
+        self.flatten_plan: Dict[ContractKey, FlattenOrder] = {}
+        self.plan_updated_at: Optional[datetime] = None
+        
+        # Keep the plan current with every fill the order manager sees
+        if order_manager is not None:
+            order_manager.register_fill_listener(self.on_fill)
+        
         # Safety controls
         self.safety_checks_enabled = True
         self.last_execution_time: Optional[datetime] = None
@@ -139,7 +200,10 @@ class EmergencyKillSwitch:
             "failed_executions": 0,
             "average_execution_time_ms": 0.0,
             "fastest_execution_ms": float('inf'),
-            "slowest_execution_ms": 0.0
+            "slowest_execution_ms": 0.0,
+            "last_trigger_to_ack_ms": 0.0,
+            "average_trigger_to_ack_ms": 0.0,
+            "worst_trigger_to_ack_ms": 0.0
         }
         
         logger.info(
@@ -164,8 +228,9 @@ class EmergencyKillSwitch:
         
         self.is_armed = True
         
-        # Take position snapshot
-        await self._capture_position_snapshot()
+        # Seed the flatten plan if it is not being maintained yet
+        if not self.active_positions:
+            await self._capture_position_snapshot()
         
         logger.warning(
             "🔴 KILL SWITCH ARMED - {} positions ready for emergency flatten",
@@ -271,17 +336,30 @@ class EmergencyKillSwitch:
                 }
             )
             
-            # Step 1: Capture current position snapshot (< 100ms target)
-            snapshot_start = time.perf_counter()
-            await self._capture_position_snapshot()
+            # Step 1: Take the pre-computed flatten plan, re-syncing positions
+            # from the broker first if it is missing or older than the last fill
+            plan_start = time.perf_counter()
+            if self.flatten_plan and self.is_plan_current():
+                flatten_orders = self._take_flatten_plan()
+                execution.used_precomputed_plan = True
+            else:
+                try:
+                    await self._capture_position_snapshot()
+                except Exception as e:
+                    if not self.flatten_plan:
+                        raise
+                    logger.error("Position sync failed, flattening from last known plan: {}", str(e))
+                flatten_orders = self._take_flatten_plan()
             execution.positions_snapshot = list(self.active_positions.values())
             execution.total_positions = len(execution.positions_snapshot)
-            snapshot_time = (time.perf_counter() - snapshot_start) * 1000
+            execution.flatten_orders = flatten_orders
+            plan_time = (time.perf_counter() - plan_start) * 1000
             
             logger.info(
-                "Position snapshot captured: {} positions in {:.2f}ms",
-                execution.total_positions,
-                snapshot_time
+                "Flatten plan ready: {} orders in {:.2f}ms (precomputed: {})",
+                len(flatten_orders),
+                plan_time,
+                execution.used_precomputed_plan
             )
             
             if execution.total_positions == 0:
@@ -291,22 +369,13 @@ class EmergencyKillSwitch:
                 execution.total_execution_time_ms = (time.perf_counter() - start_time) * 1000
                 return execution
             
-            # Step 2: Generate flatten orders (< 200ms target)
-            orders_start = time.perf_counter()
-            flatten_orders = await self._generate_flatten_orders(execution.positions_snapshot)
-            execution.flatten_orders = flatten_orders
-            orders_time = (time.perf_counter() - orders_start) * 1000
-            
-            logger.info(
-                "Flatten orders generated: {} orders in {:.2f}ms",
-                len(flatten_orders),
-                orders_time
-            )
-            
-            # Step 3: Execute all flatten orders in parallel (< 1.7s target)
-            execution_start = time.perf_counter()
+            # Step 2: Dispatch all flatten orders in parallel on the emergency lane
             results = await self._execute_flatten_orders_parallel(flatten_orders)
-            execution_time = (time.perf_counter() - execution_start) * 1000
+            
+            # Trigger-to-last-ack latency (last broker response of the batch)
+            ack_times = [r["ack_at"] for r in results if "ack_at" in r]
+            if ack_times:
+                execution.trigger_to_last_ack_ms = (max(ack_times) - start_time) * 1000
             
             # Analyze results
             successful_orders = [r for r in results if r.get("success", False)]
@@ -342,6 +411,7 @@ class EmergencyKillSwitch:
                         "success_rate": success_rate,
                         "target_met": True,
                         "total_time_ms": execution.total_execution_time_ms,
+                        "trigger_to_last_ack_ms": execution.trigger_to_last_ack_ms,
                         "successful_flattens": execution.successful_flattens,
                         "failed_flattens": execution.failed_flattens
                     }
@@ -358,6 +428,7 @@ class EmergencyKillSwitch:
                         "success_rate": success_rate,
                         "target_met": False,
                         "total_time_ms": execution.total_execution_time_ms,
+                        "trigger_to_last_ack_ms": execution.trigger_to_last_ack_ms,
                         "successful_flattens": execution.successful_flattens,
                         "failed_flattens": execution.failed_flattens
                     }
@@ -369,8 +440,10 @@ class EmergencyKillSwitch:
             # Store execution record
             await self._store_execution_record(execution)
             
-            # Clear positions cache
+            # Clear positions cache and flatten plan
             self.active_positions.clear()
+            self.flatten_plan.clear()
+            self.plan_updated_at = datetime.utcnow()
             
             return execution
             
@@ -400,83 +473,183 @@ class EmergencyKillSwitch:
             self.last_execution_time = datetime.utcnow()
     
     async def _capture_position_snapshot(self) -> None:
-        """Capture snapshot of all current positions."""
-        # TODO: Integrate with position manager to get actual positions
-        # For now, create mock positions for testing
-        
-        mock_positions = {
-            "NIFTY2412524000CE": PositionSnapshot(
-                symbol="NIFTY2412524000CE",
-                strategy_id="vol_oi_strategy",
-                current_quantity=10,
-                average_price=25.50,
-                current_price=28.75,
-                unrealized_pnl=325.0,
-                market_value=2875.0
-            ),
-            "NIFTY2412524000PE": PositionSnapshot(
-                symbol="NIFTY2412524000PE",
-                strategy_id="vol_oi_strategy",
-                current_quantity=-8,
-                average_price=22.30,
-                current_price=19.60,
-                unrealized_pnl=216.0,
-                market_value=-1568.0
-            )
-        }
+        """Capture snapshot of all current positions from the broker."""
+        await self.sync_positions(await self.broker_client.get_positions())
+        logger.debug("Position snapshot captured: {} positions", len(self.active_positions))
+    
+    async def sync_positions(self, broker_positions: List[Dict[str, Any]]) -> None:
+        """
+        Reconcile tracked positions and the flatten plan with broker positions.
         
-        self.active_positions = mock_positions
+        Args:
+            broker_positions: Position rows as returned by the broker client
+        """
+        seen: Set[ContractKey] = set()
+        for row in broker_positions:
+            contract = broker_position_contract(row)
+            if contract is None:
+                logger.warning("Kill switch ignoring non-option broker position {}", row.get("tradingSymbol"))
+                continue
+            seen.add(contract)
+            symbol, strike, option_type, expiry = contract
+            quantity = int(row.get("netQty", 0))
+            known = self.active_positions.get(contract)
+            average_price = float(row.get("costPrice") or row.get("buyAvg") or 0.0)
+            current_price = float(row.get("lastTradedPrice") or (known.current_price if known else average_price))
+            self.on_position_update(PositionSnapshot(
+                symbol=symbol,
+                strategy_id=known.strategy_id if known else "unassigned",
+                current_quantity=quantity,
+                average_price=average_price,
+                current_price=current_price,
+                unrealized_pnl=float(row.get("unrealizedProfit", 0.0)),
+                market_value=current_price * quantity,
+                strike=strike,
+                option_type=option_type,
+                expiry=expiry,
+                product_type=BROKER_PRODUCT_TYPES.get(str(row.get("productType", "")).upper(), ProductType.MIS),
+                security_id=str(row["securityId"]) if row.get("securityId") else (known.security_id if known else None)
+            ))
+        
+        # Positions the broker no longer reports are flat
+        for contract in [contract for contract in self.active_positions if contract not in seen]:
+            self.active_positions.pop(contract)
+            self.flatten_plan.pop(contract, None)
+        self.plan_updated_at = datetime.utcnow()
+    
+    def is_plan_current(self) -> bool:
+        """Whether the flatten plan reflects every fill the order manager has seen."""
+        if self.plan_updated_at is None:
+            return False
+        last_fill_at = getattr(self.order_manager, "last_fill_at", None)
+        if last_fill_at is None:
+            return True
+        return last_fill_at.replace(tzinfo=None) <= self.plan_updated_at
+    
+    def on_position_update(self, position: PositionSnapshot) -> None:
+        """
+        Refresh the flatten plan entry for a single position.
         
-        logger.debug("Position snapshot captured: {} positions", len(self.active_positions))
+        Args:
+            position: Latest state of the position (zero quantity removes it)
+        """
+        contract = position.contract
+        if position.current_quantity == 0:
+            self.active_positions.pop(contract, None)
+            self.flatten_plan.pop(contract, None)
+        else:
+            self.active_positions[contract] = position
+            self.flatten_plan[contract] = self._build_flatten_order(position)
+        
+        self.plan_updated_at = datetime.utcnow()
+    
+    def on_fill(
+        self,
+        request: OrderRequest,
+        quantity: int,
+        price: float
+    ) -> None:
+        """
+        Apply a fill to the tracked position and its flatten order.
+        
+        Args:
+            request: Request of the filled order; identifies the contract
+            quantity: Signed fill quantity (positive for buys, negative for sells)
+            price: Fill price
+        """
+        position = self.active_positions.get(request.contract)
+        old_quantity = position.current_quantity if position else 0
+        new_quantity = old_quantity + quantity
+        
+        if old_quantity == 0 or (old_quantity > 0) != (new_quantity > 0):
+            average_price = price
+        elif abs(new_quantity) > abs(old_quantity):
+            average_price = (
+                position.average_price * abs(old_quantity) + price * abs(quantity)
+            ) / abs(new_quantity)
+        else:
+            average_price = position.average_price
+        
+        self.on_position_update(PositionSnapshot(
+            symbol=request.symbol,
+            strategy_id=position.strategy_id if position else request.strategy_name,
+            current_quantity=new_quantity,
+            average_price=average_price,
+            current_price=price,
+            unrealized_pnl=(price - average_price) * new_quantity,
+            market_value=price * new_quantity,
+            strike=request.strike,
+            option_type=request.option_type,
+            expiry=request.expiry,
+            product_type=position.product_type if position else request.product_type,
+            security_id=request.metadata.get("security_id") or (position.security_id if position else None)
+        ))
+    
+    def rebuild_flatten_plan(self) -> None:
+        """Rebuild the whole flatten plan from the tracked positions."""
+        self.flatten_plan = {
+            contract: self._build_flatten_order(position)
+            for contract, position in self.active_positions.items()
+            if position.current_quantity != 0
+        }
+        self.plan_updated_at = datetime.utcnow()
+    
+    def _take_flatten_plan(self) -> List[FlattenOrder]:
+        """Copy the maintained plan into fresh flatten orders for dispatch."""
+        now = datetime.utcnow()
+        return [
+            replace(order, flatten_id=str(uuid4()), timestamp=now)
+            for order in self.flatten_plan.values()
+        ]
+    
+    def _build_flatten_order(self, position: PositionSnapshot) -> FlattenOrder:
+        """Build the market order that flattens a single position."""
+        # Determine transaction type (opposite of current position)
+        if position.current_quantity > 0:
+            transaction_type = TransactionType.SELL
+            flatten_quantity = position.current_quantity
+        else:
+            transaction_type = TransactionType.BUY
+            flatten_quantity = abs(position.current_quantity)
+        
+        # Create market order for immediate execution, in the position's own product
+        order_request = OrderRequest(
+            symbol=position.symbol,
+            strike=position.strike,
+            option_type=position.option_type,
+            expiry=position.expiry,
+            transaction_type=transaction_type,
+            order_type=OrderType.MARKET,
+            product_type=position.product_type,
+            quantity=flatten_quantity,
+            price=position.current_price,  # Last known price, for reference only
+            strategy_name=position.strategy_id,
+            tag="kill_switch",
+            metadata={"security_id": position.security_id} if position.security_id else {}
+        )
+        
+        return FlattenOrder(
+            flatten_id=str(uuid4()),
+            symbol=position.symbol,
+            strategy_id=position.strategy_id,
+            original_quantity=position.current_quantity,
+            flatten_quantity=flatten_quantity,
+            market_price=position.current_price,
+            order_request=order_request
+        )
     
     async def _generate_flatten_orders(
         self,
         positions: List[PositionSnapshot]
     ) -> List[FlattenOrder]:
         """Generate market orders to flatten all positions."""
-        flatten_orders = []
-        
-        for position in positions:
-            flatten_id = str(uuid4())
-            
-            # Determine transaction type (opposite of current position)
-            if position.current_quantity > 0:
-                transaction_type = TransactionType.SELL
-                flatten_quantity = position.current_quantity
-            else:
-                transaction_type = TransactionType.BUY
-                flatten_quantity = abs(position.current_quantity)
-            
-            # Create market order for immediate execution
-            order_request = OrderRequest(
-                symbol=position.symbol,
-                quantity=flatten_quantity,
-                price=position.current_price,  # Market price
-                transaction_type=transaction_type,
-                product_type=ProductType.INTRADAY,
-                order_type=OrderType.MARKET,
-                validity=Validity.DAY
-            )
-            
-            flatten_order = FlattenOrder(
-                flatten_id=flatten_id,
-                symbol=position.symbol,
-                strategy_id=position.strategy_id,
-                original_quantity=position.current_quantity,
-                flatten_quantity=flatten_quantity,
-                market_price=position.current_price,
-                order_request=order_request
-            )
-            
-            flatten_orders.append(flatten_order)
-        
-        return flatten_orders
+        return [self._build_flatten_order(position) for position in positions]
     
     async def _execute_flatten_orders_parallel(
         self,
         flatten_orders: List[FlattenOrder]
     ) -> List[Dict[str, Any]]:
-        """Execute all flatten orders in parallel for maximum speed."""
+        """Execute all flatten orders in parallel on the reserved emergency lane."""
         # Create semaphore to limit concurrent orders
         semaphore = asyncio.Semaphore(self.max_concurrent_orders)
         
@@ -485,7 +658,12 @@ class EmergencyKillSwitch:
                 start_time = time.perf_counter()
                 
                 try:
-                    # Submit order to broker
+                    if not await self.rate_limiter.acquire_emergency_permission(
+                        timeout=self.target_execution_time_ms / 1000
+                    ):
+                        raise KillSwitchError("Emergency rate-limit lane timeout")
+                    
+                    # Submit order to broker (permission already held on the emergency lane)
                     broker_response = await self.broker_client.place_order(
                         symbol=order.order_request.symbol,
                         quantity=order.order_request.quantity,
@@ -493,10 +671,12 @@ class EmergencyKillSwitch:
                         transaction_type=order.order_request.transaction_type,
                         product_type=order.order_request.product_type,
                         order_type=order.order_request.order_type,
-                        validity=order.order_request.validity
+                        validity=order.order_request.validity,
+                        permission_acquired=True
                     )
                     
-                    execution_time = (time.perf_counter() - start_time) * 1000
+                    ack_at = time.perf_counter()
+                    execution_time = (ack_at - start_time) * 1000
                     
                     order.status = OrderStatus.SUBMITTED
                     order.broker_order_id = broker_response.get("order_id")
@@ -507,11 +687,13 @@ class EmergencyKillSwitch:
                         "symbol": order.symbol,
                         "success": True,
                         "broker_order_id": order.broker_order_id,
-                        "execution_time_ms": execution_time
+                        "execution_time_ms": execution_time,
+                        "ack_at": ack_at
                     }
                     
                 except Exception as e:
-                    execution_time = (time.perf_counter() - start_time) * 1000
+                    ack_at = time.perf_counter()
+                    execution_time = (ack_at - start_time) * 1000
                     
                     order.status = OrderStatus.FAILED
                     order.error_message = str(e)
@@ -522,12 +704,17 @@ class EmergencyKillSwitch:
                         "symbol": order.symbol,
                         "success": False,
                         "error": str(e),
-                        "execution_time_ms": execution_time
+                        "execution_time_ms": execution_time,
+                        "ack_at": ack_at
                     }
         
-        # Execute all orders in parallel
-        tasks = [execute_single_order(order) for order in flatten_orders]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Execute all orders in parallel with the order budget reserved
+        self.rate_limiter.open_emergency_lane()
+        try:
+            tasks = [execute_single_order(order) for order in flatten_orders]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self.rate_limiter.close_emergency_lane()
         
         # Process results
         processed_results = []
@@ -600,6 +787,18 @@ class EmergencyKillSwitch:
             self.execution_metrics["average_execution_time_ms"] = (
                 (current_avg * (total_successful - 1) + exec_time) / total_successful
             )
+        
+        # Update trigger-to-last-ack metrics
+        ack_time = execution.trigger_to_last_ack_ms
+        total_executions = self.execution_metrics["total_executions"]
+        current_ack_avg = self.execution_metrics["average_trigger_to_ack_ms"]
+        self.execution_metrics["last_trigger_to_ack_ms"] = ack_time
+        self.execution_metrics["worst_trigger_to_ack_ms"] = max(
+            self.execution_metrics["worst_trigger_to_ack_ms"], ack_time
+        )
+        self.execution_metrics["average_trigger_to_ack_ms"] = (
+            (current_ack_avg * (total_executions - 1) + ack_time) / total_executions
+        )
     
     async def _store_execution_record(self, execution: KillSwitchExecution) -> None:
         """Store execution record for audit trail."""
@@ -613,6 +812,8 @@ class EmergencyKillSwitch:
                 "successful_flattens": execution.successful_flattens,
                 "failed_flattens": execution.failed_flattens,
                 "total_execution_time_ms": execution.total_execution_time_ms,
+                "trigger_to_last_ack_ms": execution.trigger_to_last_ack_ms,
+                "used_precomputed_plan": execution.used_precomputed_plan,
                 "target_time_ms": execution.target_time_ms,
                 "status": execution.status.value,
                 "start_time": execution.start_time.isoformat(),
@@ -663,6 +864,15 @@ class EmergencyKillSwitch:
                 "start_time": self.current_execution.start_time.isoformat()
             } if self.current_execution else None,
             "active_positions_count": len(self.active_positions),
+            "flatten_plan": {
+                "orders": len(self.flatten_plan),
+                "updated_at": self.plan_updated_at.isoformat() if self.plan_updated_at else None
+            },
+            "emergency_lane": {
+                "open": self.rate_limiter.emergency_lane_open,
+                "reserve": self.rate_limiter.emergency_reserve,
+                "order_window": self.rate_limiter.order_limiter.get_current_usage()
+            },
             "safety_checks_enabled": self.safety_checks_enabled,
             "require_confirmation": self.require_confirmation,
             "target_execution_time_ms": self.target_execution_time_ms,
@@ -681,6 +891,7 @@ class EmergencyKillSwitch:
                 "total_positions": exec.total_positions,
                 "successful_flattens": exec.successful_flattens,
                 "total_execution_time_ms": exec.total_execution_time_ms,
+                "trigger_to_last_ack_ms": exec.trigger_to_last_ack_ms,
                 "target_met": exec.total_execution_time_ms <= exec.target_time_ms,
                 "start_time": exec.start_time.isoformat(),
                 "end_time": exec.end_time.isoformat() if exec.end_time else None
@@ -21,12 +21,20 @@ import json
 from loguru import logger
 
 from app.core.config import get_settings
+from app.core.exceptions import RiskLimitExceededError
 from app.cache.redis import redis_client
-from app.risk import risk_manager, circuit_breaker
+from app.broker.rate_limiter import OrderRateLimiter
+from app.risk.pretrade import pretrade_gate, PreTradeCheck, PreTradeRule
+from app.risk.span import span_margin_engine
+from app.risk.position_limits import PositionLimitsManager
+from app.risk.sizing import greeks_sizer, SizingCandidate
+from app.risk.portfolio import portfolio_risk_engine
 from .models import (
     Order, OrderRequest, OrderStatus, OrderType, SlippageStatus, RejectReason,
-    PriceData, SlippageMetrics, Fill, ExecutionReport, OrderBook
+    PriceData, SlippageMetrics, Fill, ExecutionReport, OrderBook, ContractKey
 )
+from .slicing import OrderSlicer
+from .store import OrderStore, order_store
 
 
 @dataclass
@@ -48,12 +56,33 @@ class OrderValidationResult:
     warnings: List[str] = None
     slippage_check: Optional[SlippageMetrics] = None
     spread_check: Optional[PriceData] = None
+    risk_timings_us: Optional[Dict[str, float]] = None
     
     def __post_init__(self):
         if self.warnings is None:
             self.warnings = []
 
 
+def resolve_lot_size(request: OrderRequest) -> int:
+    """
+    Lot size from the request metadata, else the underlying's exchange lot size
+    
+    Raises:
+        RiskLimitExceededError: If neither is known; exposure cannot be
+            measured in lots without it
+    """
+    lot_size = request.metadata.get("lot_size")
+    if lot_size:
+        return lot_size
+    try:
+        return span_margin_engine.lot_size(request.symbol)
+    except KeyError:
+        raise RiskLimitExceededError(
+            f"Unknown lot size for {request.symbol}",
+            details={"symbol": request.symbol, "strategy": request.strategy_name}
+        )
+
+
 class OrderManager:
     """
     Comprehensive order management system
@@ -65,24 +94,33 @@ class OrderManager:
     - Order lifecycle tracking
     - Fill monitoring and reporting
     - Retry and modification logic
+    - Freeze-limit slicing with concurrent child dispatch
     """
     
-    def __init__(self):
+    def __init__(self, store: Optional[OrderStore] = None):
         self.settings = get_settings()
         self.logger = logger.bind(module="order_manager")
         
         # Configuration
         self.slippage_config = SlippageConfig()
         
-        # Order tracking
-        self.active_orders: Dict[str, Order] = {}
-        self.completed_orders: Dict[str, Order] = {}
+        # Order tracking (shared indexed store)
+        self.order_store = store or order_store
         self.order_history: List[Order] = []
         
         # Market data cache for slippage calculation
         self.market_data_cache: Dict[str, PriceData] = {}
         self.order_books: Dict[str, OrderBook] = {}
         
+        # Freeze-limit slicing
+        self.order_slicer = OrderSlicer()
+        self.child_order_submitter: Optional[Callable] = None
+        
+        # Consolidated in-memory pre-trade risk checks
+        self.pretrade_gate = pretrade_gate
+        self.pretrade_gate.register_open_orders_source(lambda: len(self.order_store.active_orders))
+        self.position_limits: Optional[PositionLimitsManager] = None
+        
         # Statistics
         self.daily_stats = {
             "orders_submitted": 0,
@@ -97,14 +135,37 @@ class OrderManager:
         # Callbacks
         self.execution_callback: Optional[Callable] = None
         self.alert_callback: Optional[Callable] = None
+        self.fill_listeners: List[Callable] = []
+        self.last_fill_at: Optional[datetime] = None
+        
+        # Net filled quantity per (contract, strategy), signed (short < 0)
+        self.net_positions: Dict[Tuple[ContractKey, str], int] = {}
         
         # Redis keys
         self.redis_prefix = "order_manager"
         self.stats_key = f"{self.redis_prefix}:daily_stats"
         
-    async def initialize(self):
-        """Initialize order manager"""
+    @property
+    def active_orders(self) -> Dict[str, Order]:
+        """Active orders keyed by order ID"""
+        return self.order_store.active_orders
+    
+    @property
+    def completed_orders(self) -> Dict[str, Order]:
+        """Completed orders keyed by order ID"""
+        return self.order_store.completed_orders
+    
+    async def initialize(self, position_limits: Optional[PositionLimitsManager] = None):
+        """
+        Initialize order manager
+        
+        Args:
+            position_limits: Position limits the pre-trade gate checks and fills update
+        """
         try:
+            if position_limits is not None:
+                self.attach_position_limits(position_limits)
+            
             # Load daily stats
             stored_stats = await redis_client.get(self.stats_key)
             if stored_stats:
@@ -223,14 +284,47 @@ class OrderManager:
             # Create symbol for market data lookup
             symbol = f"{order_request.symbol}_{order_request.strike}_{order_request.option_type}_{order_request.expiry}"
             
-            # Check circuit breakers first
-            trading_allowed, circuit_reasons = circuit_breaker.is_trading_allowed()
-            if not trading_allowed:
+            # Risk state, circuit breakers, limits and price sanity in one in-memory pass
+            risk_check = self.pretrade_gate.evaluate(
+                self.build_pretrade_check(order_request, lot_size, expected_price)
+            )
+            
+            if not risk_check.allowed:
                 return OrderValidationResult(
                     is_valid=False,
-                    rejection_reason=RejectReason.CIRCUIT_BREAKER,
-                    warnings=[f"Circuit breaker active: {', '.join(circuit_reasons)}"]
+                    rejection_reason=self._pretrade_reject_reason(risk_check.failed_rule),
+                    warnings=risk_check.reasons,
+                    risk_timings_us=risk_check.rule_timings_us
+                )
+            
+            warnings.extend(risk_check.warnings)
+            
+            # Greeks-aware size cap for orders that carry their per-lot legs
+            candidate = order_request.metadata.get("sizing_candidate")
+            if isinstance(candidate, SizingCandidate):
+                snapshot = portfolio_risk_engine.last_snapshot
+                sizing = greeks_sizer.size(
+                    candidate,
+                    order_request.metadata.get(
+                        "available_margin", snapshot.margin_available if snapshot else float("inf")
+                    ),
+                    self.pretrade_gate.strategy_lots.get(order_request.strategy_name, 0)
                 )
+                requested_lots = order_request.quantity // lot_size
+                binding = sizing.binding_constraint.value if sizing.binding_constraint else "none"
+                if sizing.recommended_lots == 0:
+                    return OrderValidationResult(
+                        is_valid=False,
+                        rejection_reason=RejectReason.RISK_LIMITS,
+                        warnings=[f"Greeks-aware sizing allows 0 lots (bound by {binding})"] + sizing.warnings,
+                        risk_timings_us=risk_check.rule_timings_us
+                    )
+                if sizing.recommended_lots < requested_lots:
+                    order_request.quantity = sizing.recommended_lots * lot_size
+                    warnings.append(
+                        f"Resized from {requested_lots} to {sizing.recommended_lots} lots (bound by {binding})"
+                    )
+                warnings.extend(sizing.warnings)
             
             # Get market data for slippage validation
             market_data = self.market_data_cache.get(symbol)
@@ -284,40 +378,13 @@ class OrderManager:
                     elif slippage_check.status == SlippageStatus.HIGH_WARNING:
                         warnings.append(f"High slippage warning: ₹{slippage_check.slippage_points:.2f}")
             
-            # Check risk limits
-            risk_allowed, risk_warnings = await risk_manager.check_position_limits(
-                order_request.quantity // lot_size,
-                order_request.strategy_name,
-                []  # Would pass current positions in real implementation
-            )
-            
-            if not risk_allowed:
-                return OrderValidationResult(
-                    is_valid=False,
-                    rejection_reason=RejectReason.RISK_LIMITS,
-                    warnings=risk_warnings,
-                    slippage_check=slippage_check,
-                    spread_check=spread_check
-                )
-            
-            warnings.extend(risk_warnings)
-            
-            # Validate price sanity
-            if order_request.price is not None and order_request.price <= 0:
-                return OrderValidationResult(
-                    is_valid=False,
-                    rejection_reason=RejectReason.INVALID_PRICE,
-                    warnings=["Invalid price: must be positive"],
-                    slippage_check=slippage_check,
-                    spread_check=spread_check
-                )
-            
             # Order passes all validations
             return OrderValidationResult(
                 is_valid=True,
                 warnings=warnings,
                 slippage_check=slippage_check,
-                spread_check=spread_check
+                spread_check=spread_check,
+                risk_timings_us=risk_check.rule_timings_us
             )
             
         except Exception as e:
@@ -328,11 +395,41 @@ class OrderManager:
                 warnings=[f"Validation error: {str(e)}"]
             )
     
+    def build_pretrade_check(
+        self,
+        order_request: OrderRequest,
+        lot_size: int,
+        expected_price: float,
+        strategy_id: Optional[str] = None
+    ) -> PreTradeCheck:
+        """Pre-trade check carrying the order's side and the strategy's position in the contract"""
+        strategy_id = strategy_id or order_request.strategy_name
+        net_quantity = self.net_positions.get((order_request.contract, strategy_id), 0)
+        return PreTradeCheck(
+            symbol=order_request.symbol,
+            strategy_id=strategy_id,
+            lots=order_request.quantity // lot_size,
+            price=order_request.price,
+            signal_id=order_request.signal_id,
+            order_value=order_request.quantity * expected_price,
+            side=1 if order_request.transaction_type.value == "BUY" else -1,
+            position_lots=int(net_quantity / lot_size)
+        )
+    
+    @staticmethod
+    def _pretrade_reject_reason(rule: Optional[PreTradeRule]) -> RejectReason:
+        """Map a failed pre-trade rule onto an order rejection reason"""
+        return {
+            PreTradeRule.CIRCUIT_BREAKER: RejectReason.CIRCUIT_BREAKER,
+            PreTradeRule.PRICE: RejectReason.INVALID_PRICE,
+            PreTradeRule.MARGIN: RejectReason.INSUFFICIENT_MARGIN
+        }.get(rule, RejectReason.RISK_LIMITS)
+    
     async def submit_order(
         self,
         order_request: OrderRequest,
         expected_price: Optional[float] = None,
-        lot_size: int = 75  # Default NIFTY lot size
+        lot_size: Optional[int] = None
     ) -> Tuple[Order, bool]:
         """
         Submit order with comprehensive validation
@@ -340,12 +437,17 @@ class OrderManager:
         Args:
             order_request: Order details
             expected_price: Expected execution price for slippage calculation
-            lot_size: Lot size for the instrument
+            lot_size: Lot size for the instrument (resolved from the request if omitted)
             
         Returns:
             Tuple of (Order object, was_submitted_successfully)
         """
         try:
+            # Fills are converted to lots with the same size the order was checked with
+            if lot_size is None:
+                lot_size = resolve_lot_size(order_request)
+            order_request.metadata["lot_size"] = lot_size
+            
             # Generate order ID
             order_id = f"ORD_{uuid.uuid4().hex[:8].upper()}"
             
@@ -393,7 +495,7 @@ class OrderManager:
                     )
                     
                     # Store in completed orders
-                    self.completed_orders[order_id] = order
+                    self.order_store.add(order)
                     return order, False
                 
                 # Add validation warnings to order
@@ -410,7 +512,7 @@ class OrderManager:
             order.market_data_at_submission = self.market_data_cache.get(symbol)
             
             # Add to active orders
-            self.active_orders[order_id] = order
+            self.order_store.add(order)
             
             # Update statistics
             self.daily_stats["orders_submitted"] += 1
@@ -429,6 +531,19 @@ class OrderManager:
                 }
             )
             
+            # Slice orders above the exchange freeze limit
+            if self.order_slicer.needs_slicing(order_request):
+                children = self.order_slicer.create_children(order, lot_size)
+                order.broker_response["child_order_ids"] = [c.child_id for c in children]
+                
+                if self.child_order_submitter:
+                    execution = await self.order_slicer.dispatch(
+                        order, children, self.child_order_submitter
+                    )
+                    if order.is_terminal():
+                        await self._complete_order(order)
+                    return order, execution.accepted_children > 0
+            
             # Here you would integrate with the actual broker API
             # For now, we'll simulate successful submission
             
@@ -456,6 +571,35 @@ class OrderManager:
             report: Execution report with fill details
         """
         try:
+            # Child slices are aggregated into their parent order; broker
+            # reports carry the child's broker order ID
+            child_key = next(
+                (key for key in (report.external_order_id, report.order_id)
+                 if key and self.order_slicer.resolve_child(key)),
+                None
+            )
+            if child_key:
+                parent = self.order_slicer.get_parent_for_child(child_key)
+                filled_before = parent.filled_quantity
+                value_before = parent.filled_value
+                order = self.order_slicer.apply_child_update(
+                    child_key,
+                    status=report.status,
+                    filled_quantity=report.filled_quantity,
+                    average_price=report.average_price,
+                    message=report.message
+                )
+                await self._apply_fill_exposure(
+                    order,
+                    order.filled_quantity - filled_before,
+                    order.filled_value - value_before
+                )
+                if order.is_terminal() and order.order_id in self.active_orders:
+                    await self._complete_order(order)
+                if self.execution_callback:
+                    await self.execution_callback(order, report)
+                return
+            
             order = self.active_orders.get(report.order_id)
             if not order:
                 self.logger.warning(f"Received execution report for unknown order: {report.order_id}")
@@ -463,19 +607,20 @@ class OrderManager:
             
             # Update order status
             order.update_status(report.status, report.message)
-            order.external_order_id = report.external_order_id
+            self.order_store.set_broker_order_id(order.order_id, report.external_order_id)
             
             # Process fill if present
             if report.fill_details:
                 order.add_fill(report.fill_details)
+                await self._apply_fill_exposure(
+                    order, report.fill_details.quantity, report.fill_details.value
+                )
                 
                 # Calculate slippage if this is the first fill
                 if len(order.fills) == 1 and order.request:
                     expected_price = order.submitted_price or order.market_data_at_submission.ltp if order.market_data_at_submission else None
                     if expected_price:
-                        # Estimate lot size based on symbol
-                        lot_size = 75 if "NIFTY" in order.request.symbol else 15  # NIFTY vs BANKNIFTY
-                        order.calculate_slippage(expected_price, lot_size)
+                        order.calculate_slippage(expected_price, resolve_lot_size(order.request))
                         
                         # Update slippage statistics
                         if order.slippage_metrics:
@@ -483,8 +628,7 @@ class OrderManager:
             
             # Move to completed if terminal
             if order.is_terminal():
-                self.completed_orders[order.order_id] = order
-                del self.active_orders[order.order_id]
+                self.order_store.complete(order.order_id)
                 
                 if order.status == OrderStatus.FILLED:
                     self.daily_stats["orders_filled"] += 1
@@ -520,6 +664,66 @@ class OrderManager:
         except Exception as e:
             self.logger.error(f"Error processing execution report: {e}")
     
+    async def _apply_fill_exposure(self, order: Order, quantity: int, value: float):
+        """Update the pre-trade exposure snapshot (and attached position limits) with a fill"""
+        if quantity <= 0 or not order.request:
+            return
+        
+        request = order.request
+        self.last_fill_at = datetime.now(timezone.utc)
+        signed_quantity = quantity if request.transaction_type.value == "BUY" else -quantity
+        for listener in self.fill_listeners:
+            try:
+                listener(request, signed_quantity, value / quantity)
+            except Exception as e:
+                self.logger.error(f"Fill listener failed for {order.order_id}: {e}")
+        
+        # Gross exposure follows the size of the net position, so opening a
+        # short adds exposure just like opening a long; each contract is its
+        # own position, so the legs of a spread never net against each other
+        key = (request.contract, request.strategy_name)
+        before = self.net_positions.get(key, 0)
+        after = before + signed_quantity
+        if after:
+            self.net_positions[key] = after
+        else:
+            self.net_positions.pop(key, None)
+        
+        lot_size = resolve_lot_size(request)
+        lots_change = abs(after) // lot_size - abs(before) // lot_size
+        self.pretrade_gate.on_fill(
+            request.symbol,
+            request.strategy_name,
+            lots_change,
+            (abs(after) - abs(before)) * value / quantity,
+            signal_id=request.signal_id
+        )
+        
+        # Attached limits are read in place by the gate, so they must move with fills
+        if self.position_limits is not None and lots_change:
+            try:
+                await self.position_limits.update_position(
+                    lots_change,
+                    request.symbol,
+                    request.strategy_name,
+                    signal_id=request.signal_id,
+                    order_id=order.order_id
+                )
+            except Exception as e:
+                self.logger.error(f"Position limits update failed for {order.order_id}: {e}")
+    
+    async def _complete_order(self, order: Order):
+        """Move a sliced parent order to completed orders"""
+        self.order_store.complete(order.order_id)
+        self.order_slicer.release(order.order_id)
+        
+        if order.status == OrderStatus.FILLED:
+            self.daily_stats["orders_filled"] += 1
+        elif order.status == OrderStatus.REJECTED:
+            self.daily_stats["orders_rejected"] += 1
+        
+        await self._persist_daily_stats()
+    
     async def cancel_order(self, order_id: str, reason: str = "User request") -> bool:
         """
         Cancel an active order
@@ -545,8 +749,7 @@ class OrderManager:
             order.update_status(OrderStatus.CANCELLED, f"Cancelled: {reason}")
             
             # Move to completed
-            self.completed_orders[order_id] = order
-            del self.active_orders[order_id]
+            self.order_store.complete(order_id)
             
             self.logger.info(f"Order {order_id} cancelled: {reason}")
             
@@ -603,6 +806,27 @@ class OrderManager:
         self.execution_callback = callback
         self.logger.info("Execution callback registered")
     
+    def register_child_order_submitter(self, submitter: Callable, rate_limiter: Optional[OrderRateLimiter] = None):
+        """
+        Register coroutine used to place sliced child orders with the broker
+        
+        The slicer takes each child's permission from `rate_limiter` (the
+        broker client's shared order limiter) before calling `submitter`, so
+        the submitter must not acquire it again.
+        """
+        self.child_order_submitter = submitter
+        if rate_limiter is not None:
+            self.order_slicer.rate_limiter = rate_limiter
+    
+    def attach_position_limits(self, position_limits: PositionLimitsManager):
+        """Check orders against, and apply fills to, a PositionLimitsManager"""
+        self.position_limits = position_limits
+        self.pretrade_gate.attach_limits_manager(position_limits)
+    
+    def register_fill_listener(self, listener: Callable):
+        """Register listener(request, signed_quantity, price) called on every fill"""
+        self.fill_listeners.append(listener)
+    
     def register_alert_callback(self, callback: Callable):
         """Register callback for alerts"""
         self.alert_callback = callback
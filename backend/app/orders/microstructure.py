@@ -0,0 +1,523 @@
+"""
+Top-of-book microstructure model and adaptive re-quote engine.
+
+This module keeps a rolling model per contract (spread, level depletion
+rates and queue position of working orders) fed by live top-of-book
+updates, and re-quotes working orders only when the expected fill
+improvement outweighs the price concession plus the modification cost.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Any
+
+from loguru import logger
+from app.broker.enums import TransactionType, OrderType
+from app.broker.rate_limiter import OrderRateLimiter
+
+
+@dataclass(slots=True)
+class TopOfBook:
+    """Best bid/ask snapshot for a contract."""
+    symbol: str
+    bid: float
+    ask: float
+    bid_qty: int
+    ask_qty: int
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class AdaptiveRequoteConfig:
+    """Configuration for the adaptive re-quote engine."""
+    tick_size: float = 0.05               # Option tick size
+    horizon_seconds: float = 5.0          # Fill-probability horizon
+    spread_ewma_alpha: float = 0.1
+    depletion_ewma_alpha: float = 0.2
+    fill_value_rs_per_unit: float = 0.20  # Value of filling within the horizon (per unit)
+    modification_cost_rs: float = 1.0     # Base cost charged per modification
+    modification_cap: int = 20            # Dhan per-order modification cap
+    min_probability_gain: float = 0.05    # Ignore marginal improvements
+    max_price_chase_rs: float = 0.10      # ₹0.10 maximum price chase
+    min_requote_interval_ms: int = 250    # Minimum gap between modifications
+
+
+@dataclass(slots=True)
+class ContractState:
+    """Rolling microstructure estimates for one contract."""
+    symbol: str
+    book: Optional[TopOfBook] = None
+    spread_ewma: float = 0.0
+    bid_depletion_rate: float = 0.0  # Units/second consumed at the best bid
+    ask_depletion_rate: float = 0.0  # Units/second consumed at the best ask
+    updates: int = 0
+
+
+@dataclass
+class WorkingOrder:
+    """Resting limit order managed by the adaptive engine."""
+    order_id: str
+    broker_order_id: str
+    symbol: str
+    side: TransactionType
+    price: float
+    quantity: int
+    original_price: float
+    queue_ahead: float = 0.0
+    last_requote_at: float = 0.0
+    requotes: int = 0
+
+
+@dataclass
+class RequoteDecision:
+    """Outcome of evaluating a working order against the current book."""
+    order_id: str
+    should_requote: bool
+    current_price: float
+    new_price: float
+    current_fill_probability: float
+    new_fill_probability: float
+    expected_gain_rs: float = 0.0
+    expected_cost_rs: float = 0.0
+    reason: str = ""
+
+
+class MicrostructureModel:
+    """
+    Rolling per-contract top-of-book model.
+
+    Depletion rates are EWMA estimates of how fast the best bid/ask level
+    is consumed; fill probability over the horizon treats the volume
+    traded at a level as exponentially distributed with that mean.
+    """
+
+    def __init__(self, config: Optional[AdaptiveRequoteConfig] = None):
+        self.config = config or AdaptiveRequoteConfig()
+        self.contracts: Dict[str, ContractState] = {}
+
+    def on_top_of_book(self, book: TopOfBook) -> ContractState:
+        """Update the contract model with a new top-of-book snapshot."""
+        state = self.contracts.get(book.symbol)
+        if state is None:
+            state = self.contracts[book.symbol] = ContractState(symbol=book.symbol)
+
+        previous = state.book
+        spread = max(0.0, book.ask - book.bid)
+
+        if previous is None:
+            state.spread_ewma = spread
+        else:
+            alpha = self.config.spread_ewma_alpha
+            state.spread_ewma = alpha * spread + (1 - alpha) * state.spread_ewma
+
+            elapsed = book.timestamp - previous.timestamp
+            if elapsed > 0:
+                beta = self.config.depletion_ewma_alpha
+
+                # Bid consumed: same level shrank, or the level was taken out
+                if book.bid == previous.bid:
+                    bid_consumed = max(0, previous.bid_qty - book.bid_qty)
+                elif book.bid < previous.bid:
+                    bid_consumed = previous.bid_qty
+                else:
+                    bid_consumed = 0
+
+                # Ask consumed: same level shrank, or the level was lifted
+                if book.ask == previous.ask:
+                    ask_consumed = max(0, previous.ask_qty - book.ask_qty)
+                elif book.ask > previous.ask:
+                    ask_consumed = previous.ask_qty
+                else:
+                    ask_consumed = 0
+
+                state.bid_depletion_rate = (
+                    beta * bid_consumed / elapsed + (1 - beta) * state.bid_depletion_rate
+                )
+                state.ask_depletion_rate = (
+                    beta * ask_consumed / elapsed + (1 - beta) * state.ask_depletion_rate
+                )
+
+        state.book = book
+        state.updates += 1
+        return state
+
+    def queue_ahead_at(self, symbol: str, side: TransactionType, price: float) -> float:
+        """Estimated quantity queued ahead of a new order at a price."""
+        state = self.contracts.get(symbol)
+        if not state or not state.book:
+            return 0.0
+
+        book = state.book
+        tick = self.config.tick_size
+
+        if side == TransactionType.BUY:
+            if price >= book.ask or price > book.bid:
+                return 0.0
+            ticks_behind = round((book.bid - price) / tick)
+            return book.bid_qty * (1 + ticks_behind)
+
+        if price <= book.bid or price < book.ask:
+            return 0.0
+        ticks_behind = round((price - book.ask) / tick)
+        return book.ask_qty * (1 + ticks_behind)
+
+    def fill_probability(
+        self,
+        symbol: str,
+        side: TransactionType,
+        price: float,
+        quantity: int,
+        queue_ahead: Optional[float] = None
+    ) -> float:
+        """Probability that an order at `price` fills within the horizon."""
+        state = self.contracts.get(symbol)
+        if not state or not state.book:
+            return 0.0
+
+        book = state.book
+
+        # Marketable orders fill immediately
+        if (side == TransactionType.BUY and price >= book.ask) or \
+           (side == TransactionType.SELL and price <= book.bid):
+            return 1.0
+
+        if queue_ahead is None:
+            queue_ahead = self.queue_ahead_at(symbol, side, price)
+
+        rate = state.bid_depletion_rate if side == TransactionType.BUY else state.ask_depletion_rate
+        expected_volume = rate * self.config.horizon_seconds
+        if expected_volume <= 0:
+            return 0.0
+
+        return math.exp(-(queue_ahead + quantity) / expected_volume)
+
+    def get_contract_summary(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get rolling estimates for a contract."""
+        state = self.contracts.get(symbol)
+        if not state or not state.book:
+            return None
+
+        return {
+            "symbol": symbol,
+            "bid": state.book.bid,
+            "ask": state.book.ask,
+            "spread": state.book.ask - state.book.bid,
+            "spread_ewma": state.spread_ewma,
+            "bid_depletion_rate": state.bid_depletion_rate,
+            "ask_depletion_rate": state.ask_depletion_rate,
+            "updates": state.updates
+        }
+
+
+class AdaptiveRequoteEngine:
+    """
+    Live-book driven re-quote engine for working limit orders.
+
+    Features:
+    - Fed top-of-book from the market data cycle (any source with
+      register_tick_listener, e.g. the strategy runtime)
+    - Tracks queue position of each working order
+    - Re-quotes only when expected fill gain beats concession + modification cost
+    - Modification cost rises as the per-order cap (20) is consumed
+    - Modifications go through the broker client's OrderRateLimiter, so
+      they share per-order counts with every other modification
+    """
+
+    def __init__(
+        self,
+        broker_client,
+        rate_limiter: Optional[OrderRateLimiter] = None,
+        config: Optional[AdaptiveRequoteConfig] = None,
+        model: Optional[MicrostructureModel] = None,
+        quote_source=None
+    ):
+        self.broker_client = broker_client
+        self.rate_limiter = rate_limiter or broker_client.order_rate_limiter
+        self.config = config or AdaptiveRequoteConfig()
+        self.model = model or MicrostructureModel(self.config)
+
+        self.working_orders: Dict[str, WorkingOrder] = {}
+        self.orders_by_symbol: Dict[str, Set[str]] = {}
+
+        # Keep the model current with every market data cycle
+        if quote_source is not None:
+            quote_source.register_tick_listener(self.on_market_data)
+
+        self.stats = {
+            "book_updates": 0,
+            "evaluations": 0,
+            "requotes": 0,
+            "skipped_not_worth_it": 0,
+            "modification_cap_hits": 0,
+            "modification_failures": 0
+        }
+
+        logger.info(
+            "Adaptive re-quote engine initialized (horizon: {}s, modification cost: ₹{})",
+            self.config.horizon_seconds,
+            self.config.modification_cost_rs
+        )
+
+    @property
+    def subscribed_symbols(self) -> List[str]:
+        """Contracts whose top-of-book the engine needs."""
+        return list(self.orders_by_symbol.keys())
+
+    def register_working_order(
+        self,
+        order_id: str,
+        broker_order_id: str,
+        symbol: str,
+        side: TransactionType,
+        price: float,
+        quantity: int
+    ) -> WorkingOrder:
+        """Start managing a resting limit order."""
+        order = WorkingOrder(
+            order_id=order_id,
+            broker_order_id=broker_order_id,
+            symbol=symbol,
+            side=side,
+            price=price,
+            quantity=quantity,
+            original_price=price,
+            queue_ahead=self.model.queue_ahead_at(symbol, side, price)
+        )
+
+        self.working_orders[order_id] = order
+        self.orders_by_symbol.setdefault(symbol, set()).add(order_id)
+        self.rate_limiter.register_new_order(broker_order_id)
+
+        logger.debug(
+            "Working order registered: {} {} {} @ ₹{:.2f} (queue ahead: {:.0f})",
+            order_id,
+            side.value,
+            symbol,
+            price,
+            order.queue_ahead
+        )
+
+        return order
+
+    def unregister_working_order(self, order_id: str) -> None:
+        """Stop managing an order (filled, cancelled or rejected)."""
+        order = self.working_orders.pop(order_id, None)
+        if not order:
+            return
+
+        symbol_orders = self.orders_by_symbol.get(order.symbol)
+        if symbol_orders is not None:
+            symbol_orders.discard(order_id)
+            if not symbol_orders:
+                del self.orders_by_symbol[order.symbol]
+
+        self.rate_limiter.unregister_order(order.broker_order_id)
+
+    def on_fill(self, order_id: str, filled_quantity: int) -> None:
+        """Reduce working quantity after a fill."""
+        order = self.working_orders.get(order_id)
+        if not order:
+            return
+
+        order.quantity -= filled_quantity
+        if order.quantity <= 0:
+            self.unregister_working_order(order_id)
+
+    async def on_market_data(self, ticks: Sequence[Any]) -> List[RequoteDecision]:
+        """
+        Feed a market data cycle (ticks with bid/ask and their quantities).
+
+        Every quoted contract updates the model, so depletion rates are
+        warm before an order starts working; ticks without a full top of
+        book are skipped.
+        """
+        executed = []
+        for tick in ticks:
+            if tick.bid is None or tick.ask is None or tick.bid_qty is None or tick.ask_qty is None:
+                continue
+            executed.extend(await self.on_top_of_book(TopOfBook(
+                symbol=tick.symbol,
+                bid=float(tick.bid),
+                ask=float(tick.ask),
+                bid_qty=int(tick.bid_qty),
+                ask_qty=int(tick.ask_qty)
+            )))
+        return executed
+
+    async def on_top_of_book(self, book: TopOfBook) -> List[RequoteDecision]:
+        """
+        Process a top-of-book update and re-quote orders where worthwhile.
+
+        Returns:
+            Decisions that resulted in a re-quote
+        """
+        self.model.on_top_of_book(book)
+        self.stats["book_updates"] += 1
+
+        executed = []
+        for order_id in list(self.orders_by_symbol.get(book.symbol, ())):
+            order = self.working_orders.get(order_id)
+            if not order:
+                continue
+
+            self._update_queue_position(order, book)
+            decision = self.evaluate(order, now=book.timestamp)
+
+            if decision.should_requote and await self._modify(order, decision, book.timestamp):
+                executed.append(decision)
+
+        return executed
+
+    def evaluate(self, order: WorkingOrder, now: Optional[float] = None) -> RequoteDecision:
+        """Pick the best re-quote price for an order (or decide to hold)."""
+        now = time.monotonic() if now is None else now
+        self.stats["evaluations"] += 1
+
+        current_probability = self.model.fill_probability(
+            order.symbol, order.side, order.price, order.quantity, order.queue_ahead
+        )
+        hold = RequoteDecision(
+            order_id=order.order_id,
+            should_requote=False,
+            current_price=order.price,
+            new_price=order.price,
+            current_fill_probability=current_probability,
+            new_fill_probability=current_probability
+        )
+
+        modifications_used = self.rate_limiter.get_order_modification_count(order.broker_order_id)
+        if modifications_used >= self.config.modification_cap:
+            hold.reason = "modification_cap_reached"
+            return hold
+
+        if (now - order.last_requote_at) * 1000 < self.config.min_requote_interval_ms:
+            hold.reason = "requote_interval"
+            return hold
+
+        # Modification cost rises as the per-order cap is consumed
+        modification_cost = self.config.modification_cost_rs * (
+            1 + modifications_used / self.config.modification_cap
+        )
+        fill_value = self.config.fill_value_rs_per_unit * order.quantity
+
+        best = hold
+        best_net = 0.0
+        for price in self._candidate_prices(order):
+            probability = self.model.fill_probability(
+                order.symbol, order.side, price, order.quantity
+            )
+            gain = (probability - current_probability) * fill_value
+            concession = abs(price - order.price) * order.quantity * probability
+            cost = concession + modification_cost
+            net = gain - cost
+
+            if net > best_net and probability - current_probability >= self.config.min_probability_gain:
+                best_net = net
+                best = RequoteDecision(
+                    order_id=order.order_id,
+                    should_requote=True,
+                    current_price=order.price,
+                    new_price=price,
+                    current_fill_probability=current_probability,
+                    new_fill_probability=probability,
+                    expected_gain_rs=gain,
+                    expected_cost_rs=cost,
+                    reason="expected_gain_exceeds_cost"
+                )
+
+        if not best.should_requote:
+            hold.reason = "not_worth_modifying"
+            self.stats["skipped_not_worth_it"] += 1
+
+        return best
+
+    def _candidate_prices(self, order: WorkingOrder) -> List[float]:
+        """Tick-aligned prices toward the opposite side within the chase limit."""
+        tick = self.config.tick_size
+        direction = 1 if order.side == TransactionType.BUY else -1
+        limit = order.original_price + direction * self.config.max_price_chase_rs
+
+        prices = []
+        price = order.price
+        for _ in range(int(self.config.max_price_chase_rs / tick) + 1):
+            price = round((price + direction * tick) / tick) * tick
+            if direction * (price - limit) > 1e-9:
+                break
+            prices.append(price)
+        return prices
+
+    def _update_queue_position(self, order: WorkingOrder, book: TopOfBook) -> None:
+        """Advance queue position as the order's level is consumed."""
+        if order.side == TransactionType.BUY:
+            best_price, level_qty = book.bid, book.bid_qty
+            behind_best = order.price < best_price
+        else:
+            best_price, level_qty = book.ask, book.ask_qty
+            behind_best = order.price > best_price
+
+        if abs(order.price - best_price) < 1e-9:
+            # Visible level includes our own quantity
+            order.queue_ahead = min(order.queue_ahead, max(0.0, level_qty - order.quantity))
+        elif behind_best:
+            order.queue_ahead = self.model.queue_ahead_at(order.symbol, order.side, order.price)
+        else:
+            # Best level moved through our price; we are alone at the front
+            order.queue_ahead = 0.0
+
+    async def _modify(self, order: WorkingOrder, decision: RequoteDecision, now: float) -> bool:
+        """Send the price modification within the per-order modification cap."""
+        try:
+            permitted = await self.rate_limiter.acquire_modification_permission(order.broker_order_id)
+        except ValueError as e:
+            self.stats["modification_cap_hits"] += 1
+            logger.warning("Re-quote skipped for {}: {}", order.order_id, str(e))
+            return False
+
+        if not permitted:
+            return False
+
+        try:
+            await self.broker_client.modify_order(
+                order_id=order.broker_order_id,
+                order_type=OrderType.LIMIT,
+                leg_name="ENTRY_LEG",
+                quantity=order.quantity,
+                price=decision.new_price
+            )
+        except Exception as e:
+            self.stats["modification_failures"] += 1
+            logger.error("Adaptive re-quote failed for {}: {}", order.order_id, str(e))
+            return False
+
+        order.price = decision.new_price
+        order.queue_ahead = self.model.queue_ahead_at(order.symbol, order.side, order.price)
+        order.last_requote_at = now
+        order.requotes += 1
+        self.stats["requotes"] += 1
+
+        logger.info(
+            "Adaptive re-quote: {} ₹{:.2f} -> ₹{:.2f} (fill prob {:.2f} -> {:.2f}, gain ₹{:.2f} vs cost ₹{:.2f})",
+            order.order_id,
+            decision.current_price,
+            decision.new_price,
+            decision.current_fill_probability,
+            decision.new_fill_probability,
+            decision.expected_gain_rs,
+            decision.expected_cost_rs,
+            extra={
+                "order_id": order.order_id,
+                "symbol": order.symbol,
+                "requotes": order.requotes
+            }
+        )
+
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get engine statistics."""
+        return {
+            **self.stats,
+            "working_orders": len(self.working_orders),
+            "subscribed_symbols": len(self.orders_by_symbol)
+        }
@@ -7,10 +7,13 @@ Comprehensive order models for the trading system including:
 - Slippage monitoring
 - Fill details
 - Latency auditing
+
+Hot-path models (PriceData, SlippageMetrics, Fill, LatencyMetrics, Order)
+use slotted dataclasses to keep per-order allocations small.
 """
 
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal, ROUND_HALF_UP
@@ -62,7 +65,11 @@ class RejectReason(Enum):
     SYSTEM_ERROR = "system_error"
 
 
-@dataclass
+# One tradable contract: (underlying symbol, strike, option type, expiry)
+ContractKey = Tuple[str, float, str, str]
+
+
+@dataclass(slots=True)
 class PriceData:
     """Market price data for slippage calculation"""
     bid: float
@@ -83,7 +90,7 @@ class PriceData:
             self.spread_percentage = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class SlippageMetrics:
     """Slippage calculation metrics"""
     expected_price: float
@@ -112,7 +119,7 @@ class SlippageMetrics:
             self.status = SlippageStatus.ACCEPTABLE
 
 
-@dataclass
+@dataclass(slots=True)
 class Fill:
     """Individual fill details"""
     fill_id: str
@@ -128,7 +135,7 @@ class Fill:
         self.value = self.quantity * self.price
 
 
-@dataclass
+@dataclass(slots=True)
 class LatencyMetrics:
     """Order latency tracking"""
     order_created: datetime
@@ -190,9 +197,27 @@ class OrderRequest:
     parent_order_id: Optional[str] = None
     tag: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def contract(self) -> ContractKey:
+        """Contract this order trades: (symbol, strike, option type, expiry)"""
+        return (self.symbol, self.strike, self.option_type, self.expiry)
 
 
 @dataclass
+class OrderResponse:
+    """Result of submitting an order through the executor, re-quoter or kill switch"""
+    order_id: str
+    status: OrderStatus
+    broker_order_id: Optional[str] = None
+    message: str = ""
+    execution_time_ms: float = 0.0
+    latency_metrics: Optional[Any] = None
+    requote_attempt: Optional[int] = None
+    total_price_movement: Optional[float] = None
+
+
+@dataclass(slots=True)
 class Order:
     """Complete order representation"""
     # Core order details
@@ -208,6 +233,7 @@ class Order:
     submitted_price: Optional[float] = None
     average_price: Optional[float] = None
     filled_quantity: int = 0
+    filled_value: float = 0.0
     remaining_quantity: int = 0
     
     # Fills and execution details
@@ -246,12 +272,12 @@ class Order:
         """Add a fill to the order"""
         self.fills.append(fill)
         self.filled_quantity += fill.quantity
+        self.filled_value += fill.value
         self.remaining_quantity = self.request.quantity - self.filled_quantity if self.request else 0
         
         # Update average price
-        total_value = sum(f.value for f in self.fills)
         if self.filled_quantity > 0:
-            self.average_price = total_value / self.filled_quantity
+            self.average_price = self.filled_value / self.filled_quantity
         
         # Update status
         if self.remaining_quantity == 0:
@@ -7,16 +7,18 @@ maximum retry limits, and adaptive pricing strategies.
 
 import asyncio
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Callable, Any, Tuple
 from uuid import uuid4
 
 from loguru import logger
-from app.broker.tradehull_client import TradehullClient
+from app.broker.tradehull_client import DhanTradehullClient
 from app.broker.enums import TransactionType, OrderType
 from app.orders.models import OrderRequest, OrderResponse, OrderStatus
+from app.orders.store import OrderStore, order_store
+from app.orders.microstructure import MicrostructureModel
 from app.core.exceptions import RequoteError, MaxRetriesExceededError
 
 
@@ -74,6 +76,14 @@ class RequoteContext:
     start_time: datetime = field(default_factory=datetime.utcnow)
     is_active: bool = True
     
+    @property
+    def current_price(self) -> float:
+        """Price of the latest successful re-quote (the original price before any)"""
+        for attempt in reversed(self.attempts):
+            if attempt.success:
+                return attempt.new_price
+        return self.original_request.price
+    
 
 class OrderRequoter:
     """
@@ -89,11 +99,15 @@ class OrderRequoter:
     
     def __init__(
         self,
-        broker_client: TradehullClient,
-        default_config: Optional[RequoteConfig] = None
+        broker_client: DhanTradehullClient,
+        default_config: Optional[RequoteConfig] = None,
+        store: Optional[OrderStore] = None,
+        microstructure: Optional[MicrostructureModel] = None
     ):
         self.broker_client = broker_client
         self.default_config = default_config or RequoteConfig()
+        self.order_store = store or order_store
+        self.microstructure = microstructure
         
         # Active re-quote sessions
         self.active_requotes: Dict[str, RequoteContext] = {}
@@ -166,8 +180,8 @@ class OrderRequoter:
                 context, reason, market_data or {}, config
             )
             
-            # Validate price chase limits
-            price_movement = abs(new_price - context.original_request.price)
+            # Validate price chase limits (each step moves from the last re-quote)
+            price_movement = abs(new_price - context.current_price)
             total_movement = context.total_price_movement + price_movement
             
             if total_movement > config.max_price_chase_rs:
@@ -206,8 +220,7 @@ class OrderRequoter:
                 await asyncio.sleep(config.retry_delay_ms / 1000.0)
             
             # Create modified order request
-            modified_request = context.original_request.model_copy()
-            modified_request.price = new_price
+            modified_request = replace(context.original_request, price=new_price)
             
             # Submit re-quote to broker
             logger.info(
@@ -246,6 +259,13 @@ class OrderRequoter:
             context.attempts.append(attempt)
             context.total_price_movement = total_movement
             
+            # Re-quoted broker order resolves to the same shared order
+            order = self.order_store.set_broker_order_id(
+                original_order_id, broker_response.get("order_id")
+            )
+            if order:
+                order.retry_count += 1
+            
             # Update statistics
             self.requote_stats["total_attempts"] += 1
             self.requote_stats["successful_requotes"] += 1
@@ -317,12 +337,19 @@ class OrderRequoter:
         self,
         original_order_id: str,
         strategy_id: str,
-        original_request: OrderRequest,
+        original_request: Optional[OrderRequest] = None,
         config: Optional[RequoteConfig] = None
     ) -> str:
         """Start a new re-quote session for an order."""
         session_config = config or self.default_config
         
+        # Resolve the request from the shared order store when not supplied
+        if original_request is None:
+            order = self.order_store.get(original_order_id)
+            if not order or not order.request:
+                raise RequoteError(f"Unknown order for re-quote session: {original_order_id}")
+            original_request = order.request
+        
         context = RequoteContext(
             original_order_id=original_order_id,
             strategy_id=strategy_id,
@@ -363,13 +390,19 @@ class OrderRequoter:
         config: RequoteConfig
     ) -> float:
         """Calculate the new price for re-quote based on strategy and market conditions."""
-        original_price = context.original_request.price
+        base_price = context.current_price
         transaction_type = context.original_request.transaction_type
         
+        # Prefer the live microstructure model when it covers this contract
+        if self.microstructure and self.microstructure.get_contract_summary(context.symbol):
+            model_price = self._calculate_model_price(context, config)
+            if model_price is not None:
+                return model_price
+        
         # Get current market prices
-        bid_price = market_data.get("bid", original_price)
-        ask_price = market_data.get("ask", original_price)
-        ltp = market_data.get("ltp", original_price)
+        bid_price = market_data.get("bid", base_price)
+        ask_price = market_data.get("ask", base_price)
+        ltp = market_data.get("ltp", base_price)
         
         # Calculate market volatility for adaptive pricing
         volatility = self._calculate_market_volatility(market_data)
@@ -395,17 +428,17 @@ class OrderRequoter:
         if transaction_type == TransactionType.BUY:
             if reason in [RequoteReason.REJECTION, RequoteReason.TIMEOUT]:
                 # For buy orders, increase price (chase higher)
-                new_price = min(ask_price, original_price + price_improvement)
+                new_price = min(ask_price, base_price + price_improvement)
             else:
                 # For partial fills, be more conservative
-                new_price = min(ltp + 0.05, original_price + price_improvement * 0.5)
+                new_price = min(ltp + 0.05, base_price + price_improvement * 0.5)
         else:  # SELL
             if reason in [RequoteReason.REJECTION, RequoteReason.TIMEOUT]:
                 # For sell orders, decrease price (chase lower)
-                new_price = max(bid_price, original_price - price_improvement)
+                new_price = max(bid_price, base_price - price_improvement)
             else:
                 # For partial fills, be more conservative
-                new_price = max(ltp - 0.05, original_price - price_improvement * 0.5)
+                new_price = max(ltp - 0.05, base_price - price_improvement * 0.5)
         
         # Ensure we don't go below minimum tick size (₹0.05 for options)
         min_tick = 0.05
@@ -413,22 +446,22 @@ class OrderRequoter:
         
         # Validate price movement doesn't exceed remaining chase limit
         remaining_chase = config.max_price_chase_rs - context.total_price_movement
-        price_movement = abs(new_price - original_price)
+        price_movement = abs(new_price - base_price)
         
         if price_movement > remaining_chase:
             # Scale back to remaining limit
             if transaction_type == TransactionType.BUY:
-                new_price = original_price + remaining_chase
+                new_price = base_price + remaining_chase
             else:
-                new_price = original_price - remaining_chase
+                new_price = base_price - remaining_chase
             
             new_price = round(new_price / min_tick) * min_tick
         
         logger.debug(
             "Calculated re-quote price: ₹{:.2f} -> ₹{:.2f} (movement: ₹{:.3f}, strategy: {})",
-            original_price,
+            base_price,
             new_price,
-            abs(new_price - original_price),
+            abs(new_price - base_price),
             strategy.value,
             extra={
                 "reason": reason.value,
@@ -441,6 +474,39 @@ class OrderRequoter:
         
         return new_price
     
+    def _calculate_model_price(
+        self,
+        context: RequoteContext,
+        config: RequoteConfig
+    ) -> Optional[float]:
+        """Pick the price with the best expected fill gain net of price concession."""
+        request = context.original_request
+        current_price = context.current_price
+        model_config = self.microstructure.config
+        tick = model_config.tick_size
+        direction = 1 if request.transaction_type == TransactionType.BUY else -1
+        remaining_chase = config.max_price_chase_rs - context.total_price_movement
+        fill_value = model_config.fill_value_rs_per_unit * request.quantity
+        
+        base_probability = self.microstructure.fill_probability(
+            context.symbol, request.transaction_type, current_price, request.quantity
+        )
+        
+        best_price, best_net = None, 0.0
+        for ticks in range(1, int(remaining_chase / tick + 1e-9) + 1):
+            price = round((current_price + direction * ticks * tick) / tick) * tick
+            probability = self.microstructure.fill_probability(
+                context.symbol, request.transaction_type, price, request.quantity
+            )
+            net = (
+                (probability - base_probability) * fill_value
+                - abs(price - current_price) * request.quantity * probability
+            )
+            if net > best_net:
+                best_price, best_net = price, net
+        
+        return best_price
+    
     def _calculate_market_volatility(self, market_data: Dict[str, Any]) -> float:
         """Calculate market volatility from market data."""
         # Simple volatility calculation based on bid-ask spread
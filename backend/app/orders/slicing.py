@@ -0,0 +1,382 @@
+"""
+Order slicing engine for large F&O quantities.
+
+This module splits parent orders into child orders that respect exchange
+freeze-quantity limits, dispatches the children concurrently within the
+order rate budget, and aggregates child fills and rejects back into the
+parent order.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Callable, Awaitable, Any
+from uuid import uuid4
+
+from loguru import logger
+from app.broker.rate_limiter import OrderRateLimiter
+from app.orders.models import Order, OrderRequest, OrderStatus, Fill, RejectReason
+
+
+# NSE F&O freeze quantities (contracts per order)
+DEFAULT_FREEZE_LIMITS: Dict[str, int] = {
+    "NIFTY": 1800,
+    "BANKNIFTY": 900,
+    "FINNIFTY": 1800,
+    "MIDCPNIFTY": 2800,
+    "SENSEX": 1000,
+}
+
+# Broker order states that do not spell an OrderStatus value
+BROKER_STATUS_MAP: Dict[str, OrderStatus] = {
+    "TRANSIT": OrderStatus.SUBMITTED,
+    "PART_TRADED": OrderStatus.PARTIALLY_FILLED,
+    "TRADED": OrderStatus.FILLED,
+}
+
+
+@dataclass
+class ChildOrder:
+    """Single freeze-limit slice of a parent order."""
+    child_id: str
+    parent_order_id: str
+    sequence: int
+    request: OrderRequest
+    status: OrderStatus = OrderStatus.PENDING
+    broker_order_id: Optional[str] = None
+    filled_quantity: int = 0
+    average_price: Optional[float] = None
+    error_message: Optional[str] = None
+    ack_latency_ms: float = 0.0
+
+    def is_terminal(self) -> bool:
+        """Check if child order is in terminal state"""
+        return self.status in [
+            OrderStatus.FILLED,
+            OrderStatus.CANCELLED,
+            OrderStatus.REJECTED,
+            OrderStatus.EXPIRED
+        ]
+
+
+@dataclass
+class SliceExecution:
+    """Result of dispatching all children of a parent order."""
+    parent_order_id: str
+    children: List[ChildOrder] = field(default_factory=list)
+    accepted_children: int = 0
+    rejected_children: int = 0
+    dispatch_time_ms: float = 0.0
+
+    @property
+    def total_children(self) -> int:
+        return len(self.children)
+
+
+class OrderSlicer:
+    """
+    Freeze-limit order slicer with concurrent child dispatch.
+
+    Features:
+    - Per-underlying freeze limits, rounded down to whole lots
+    - Concurrent child dispatch gated by the order rate limiter (pass the
+      broker client's shared limiter so children count against the same
+      exchange window as every other order)
+    - Child reports routed by child ID or broker order ID
+    - Child fills aggregated into the parent via Order.add_fill
+    - Parent settled once every child is terminal; partial rejects tracked
+    """
+
+    def __init__(
+        self,
+        rate_limiter: Optional[OrderRateLimiter] = None,
+        freeze_limits: Optional[Dict[str, int]] = None,
+        max_concurrent_children: int = 20,
+        permission_timeout_s: float = 1.0
+    ):
+        self.rate_limiter = rate_limiter or OrderRateLimiter()
+        self.freeze_limits = dict(freeze_limits or DEFAULT_FREEZE_LIMITS)
+        self.max_concurrent_children = max_concurrent_children
+        self.permission_timeout_s = permission_timeout_s
+
+        # Longest prefix first so BANKNIFTY is not matched as NIFTY
+        self._freeze_prefixes = sorted(self.freeze_limits, key=len, reverse=True)
+
+        # Child routing
+        self.children: Dict[str, ChildOrder] = {}
+        self.parents: Dict[str, Order] = {}
+        self.children_by_parent: Dict[str, List[str]] = {}
+        self.children_by_broker_id: Dict[str, str] = {}
+
+        logger.info(
+            "Order slicer initialized ({} freeze limits, max {} concurrent children)",
+            len(self.freeze_limits),
+            max_concurrent_children
+        )
+
+    def get_freeze_limit(self, symbol: str) -> Optional[int]:
+        """Get the freeze quantity for a symbol (None if unlimited)."""
+        symbol = symbol.upper()
+        for prefix in self._freeze_prefixes:
+            if symbol.startswith(prefix):
+                return self.freeze_limits[prefix]
+        return None
+
+    def needs_slicing(self, request: OrderRequest) -> bool:
+        """Check whether an order request exceeds its freeze limit."""
+        freeze_limit = self.get_freeze_limit(request.symbol)
+        return freeze_limit is not None and request.quantity > freeze_limit
+
+    def create_children(self, parent: Order, lot_size: Optional[int] = None) -> List[ChildOrder]:
+        """
+        Split a parent order into freeze-limit child orders.
+
+        Args:
+            parent: Parent order (must carry a request)
+            lot_size: Lot size used to keep child quantities in whole lots
+
+        Returns:
+            List of child orders, registered for fill routing
+        """
+        request = parent.request
+        slice_quantity = self.get_freeze_limit(request.symbol) or request.quantity
+        if lot_size and slice_quantity >= lot_size:
+            slice_quantity -= slice_quantity % lot_size
+
+        children = []
+        remaining = request.quantity
+        sequence = 0
+
+        while remaining > 0:
+            quantity = min(slice_quantity, remaining)
+            sequence += 1
+            child = ChildOrder(
+                child_id=f"{parent.order_id}_S{sequence:02d}",
+                parent_order_id=parent.order_id,
+                sequence=sequence,
+                request=replace(
+                    request,
+                    quantity=quantity,
+                    parent_order_id=parent.order_id,
+                    metadata={**request.metadata, "slice": sequence}
+                )
+            )
+            children.append(child)
+            remaining -= quantity
+
+        self.parents[parent.order_id] = parent
+        self.children_by_parent[parent.order_id] = [child.child_id for child in children]
+        for child in children:
+            self.children[child.child_id] = child
+
+        logger.debug(
+            "Order {} sliced into {} children of up to {}",
+            parent.order_id,
+            len(children),
+            slice_quantity
+        )
+
+        return children
+
+    async def dispatch(
+        self,
+        parent: Order,
+        children: List[ChildOrder],
+        submit: Callable[[OrderRequest], Awaitable[Dict[str, Any]]]
+    ) -> SliceExecution:
+        """
+        Dispatch child orders concurrently within the order rate budget.
+
+        Args:
+            parent: Parent order receiving aggregated fills
+            children: Child orders created by create_children
+            submit: Coroutine placing one child request, returning the broker response
+
+        Returns:
+            SliceExecution summary
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_children)
+        start_time = time.perf_counter()
+
+        async def dispatch_child(child: ChildOrder) -> None:
+            async with semaphore:
+                child_start = time.perf_counter()
+                try:
+                    if not await self.rate_limiter.acquire_order_permission(
+                        timeout=self.permission_timeout_s
+                    ):
+                        raise RuntimeError("Order rate budget exhausted")
+
+                    response = await submit(child.request) or {}
+                    child.ack_latency_ms = (time.perf_counter() - child_start) * 1000
+                    broker_order_id = response.get("order_id")
+                    if not broker_order_id:
+                        raise RuntimeError(response.get("message") or "No broker order ID returned")
+                    child.broker_order_id = broker_order_id
+                    self.children_by_broker_id[broker_order_id] = child.child_id
+
+                    self.apply_child_update(
+                        child.child_id,
+                        status=self.parse_status(response.get("status")),
+                        filled_quantity=response.get("filled_quantity", 0),
+                        average_price=response.get("average_price"),
+                        message=response.get("message", "")
+                    )
+
+                except Exception as e:
+                    child.ack_latency_ms = (time.perf_counter() - child_start) * 1000
+                    self.apply_child_update(
+                        child.child_id,
+                        status=OrderStatus.REJECTED,
+                        message=str(e)
+                    )
+
+        await asyncio.gather(*(dispatch_child(child) for child in children))
+
+        execution = SliceExecution(
+            parent_order_id=parent.order_id,
+            children=children,
+            accepted_children=sum(1 for c in children if c.status != OrderStatus.REJECTED),
+            rejected_children=sum(1 for c in children if c.status == OrderStatus.REJECTED),
+            dispatch_time_ms=(time.perf_counter() - start_time) * 1000
+        )
+
+        log = logger.warning if execution.rejected_children else logger.info
+        log(
+            "Sliced order {} dispatched: {}/{} children accepted in {:.2f}ms",
+            parent.order_id,
+            execution.accepted_children,
+            execution.total_children,
+            execution.dispatch_time_ms,
+            extra={
+                "parent_order_id": parent.order_id,
+                "rejected_children": execution.rejected_children,
+                "filled_quantity": parent.filled_quantity
+            }
+        )
+
+        return execution
+
+    def resolve_child(self, order_id: Optional[str]) -> Optional[str]:
+        """Child ID for a child ID or a child's broker order ID (None if neither)."""
+        if order_id in self.children:
+            return order_id
+        return self.children_by_broker_id.get(order_id)
+
+    def apply_child_update(
+        self,
+        order_id: str,
+        status: OrderStatus,
+        filled_quantity: int = 0,
+        average_price: Optional[float] = None,
+        message: str = ""
+    ) -> Optional[Order]:
+        """
+        Apply a child order update to the child and its parent.
+
+        Args:
+            order_id: Child order ID or the child's broker order ID
+            status: Latest child status
+            filled_quantity: Cumulative filled quantity of the child
+            average_price: Average fill price of the child
+            message: Broker message
+
+        Returns:
+            The parent order, or None if the child is unknown
+        """
+        child_id = self.resolve_child(order_id)
+        if child_id is None:
+            return None
+        child = self.children[child_id]
+        parent = self.parents[child.parent_order_id]
+
+        # Aggregate new fill quantity into the parent
+        fill_delta = filled_quantity - child.filled_quantity
+        if fill_delta > 0 and average_price is not None:
+            # Price of the incremental fill given the child's running average
+            previous_value = child.filled_quantity * (child.average_price or 0.0)
+            fill_price = (filled_quantity * average_price - previous_value) / fill_delta
+
+            parent.add_fill(Fill(
+                fill_id=str(uuid4()),
+                timestamp=datetime.now(timezone.utc),
+                quantity=fill_delta,
+                price=fill_price,
+                value=0.0,  # Calculated in __post_init__
+                trade_id=child.broker_order_id
+            ))
+            child.filled_quantity = filled_quantity
+            child.average_price = average_price
+
+        child.status = status
+        if status == OrderStatus.REJECTED:
+            child.error_message = message
+            parent.error_details.setdefault("rejected_children", {})[child_id] = message
+
+        self._finalize_parent(parent)
+        return parent
+
+    def get_parent_for_child(self, order_id: str) -> Optional[Order]:
+        """Get the parent order of a child order (by child ID or broker order ID)."""
+        child = self.children.get(self.resolve_child(order_id))
+        return self.parents.get(child.parent_order_id) if child else None
+
+    def get_children(self, parent_order_id: str) -> List[ChildOrder]:
+        """Get all child orders of a parent order."""
+        return [self.children[cid] for cid in self.children_by_parent.get(parent_order_id, [])]
+
+    def release(self, parent_order_id: str) -> None:
+        """Stop tracking a parent order and its children."""
+        for child_id in self.children_by_parent.pop(parent_order_id, []):
+            child = self.children.pop(child_id, None)
+            if child and child.broker_order_id:
+                self.children_by_broker_id.pop(child.broker_order_id, None)
+        self.parents.pop(parent_order_id, None)
+
+    @staticmethod
+    def parse_status(raw_status: Optional[str]) -> OrderStatus:
+        """Map a broker status string onto OrderStatus (acknowledged by default)."""
+        if not raw_status:
+            return OrderStatus.SUBMITTED
+        raw_status = str(raw_status)
+        if raw_status.upper() in BROKER_STATUS_MAP:
+            return BROKER_STATUS_MAP[raw_status.upper()]
+        try:
+            return OrderStatus(raw_status.lower())
+        except ValueError:
+            return OrderStatus.SUBMITTED
+
+    def _finalize_parent(self, parent: Order) -> None:
+        """Settle parent status once every child has reached a terminal state."""
+        children = self.get_children(parent.order_id)
+        if parent.is_terminal() or not children or not all(child.is_terminal() for child in children):
+            return
+
+        if parent.filled_quantity >= parent.request.quantity:
+            parent.update_status(OrderStatus.FILLED, f"All {len(children)} child orders filled")
+            return
+
+        rejected = [child for child in children if child.status == OrderStatus.REJECTED]
+        unfilled = [child for child in children if child.status != OrderStatus.FILLED]
+        if rejected:
+            parent.rejection_reason = RejectReason.EXCHANGE_ERROR
+
+        if parent.filled_quantity == 0 and len(rejected) == len(children):
+            parent.update_status(
+                OrderStatus.REJECTED,
+                f"All {len(children)} child orders rejected"
+            )
+        elif parent.filled_quantity == 0 and all(child.status == OrderStatus.EXPIRED for child in children):
+            parent.update_status(
+                OrderStatus.EXPIRED,
+                f"All {len(children)} child orders expired"
+            )
+        else:
+            # Unfilled remainder of rejected, cancelled or expired slices is abandoned
+            parent.update_status(
+                OrderStatus.CANCELLED,
+                f"{len(unfilled)}/{len(children)} child orders unfilled "
+                f"({len(rejected)} rejected); "
+                f"filled {parent.filled_quantity}/{parent.request.quantity}"
+            )
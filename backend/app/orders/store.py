@@ -0,0 +1,171 @@
+"""
+Shared in-memory order store.
+
+This module keeps a single copy of every Order used by the order manager,
+tracking manager and re-quoter, indexed by order ID, broker order ID,
+strategy and symbol. Completed orders are retained up to a fixed bound so
+memory stays flat across a trading day.
+"""
+
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Any
+
+from loguru import logger
+from app.orders.models import Order
+
+
+class OrderStore:
+    """
+    Indexed order store shared across the order path.
+
+    Features:
+    - O(1) lookup by order ID and broker order ID
+    - Strategy and symbol indexes for bulk queries
+    - Active/completed partitioning
+    - Bounded retention of completed orders
+    """
+
+    def __init__(self, max_completed_orders: int = 5000):
+        self.max_completed_orders = max_completed_orders
+
+        # Primary storage
+        self.active_orders: Dict[str, Order] = {}
+        self.completed_orders: "OrderedDict[str, Order]" = OrderedDict()
+
+        # Secondary indexes
+        self._by_broker_id: Dict[str, str] = {}
+        self._broker_ids: Dict[str, List[str]] = defaultdict(list)
+        self._by_strategy: Dict[str, Set[str]] = defaultdict(set)
+        self._by_symbol: Dict[str, Set[str]] = defaultdict(set)
+
+        self.evicted_orders = 0
+
+        logger.info("Order store initialized (max completed orders: {})", max_completed_orders)
+
+    def add(self, order: Order) -> None:
+        """Add an order (terminal orders go straight to completed)."""
+        order_id = order.order_id
+
+        if order.external_order_id:
+            self._link_broker_id(order_id, order.external_order_id)
+        if order.request:
+            self._by_strategy[order.request.strategy_name].add(order_id)
+            self._by_symbol[order.request.symbol].add(order_id)
+
+        if order.is_terminal():
+            self.active_orders.pop(order_id, None)
+            self._add_completed(order)
+        else:
+            self.active_orders[order_id] = order
+
+    def get(self, order_id: str) -> Optional[Order]:
+        """Get an order by internal order ID."""
+        return self.active_orders.get(order_id) or self.completed_orders.get(order_id)
+
+    def get_by_broker_order_id(self, broker_order_id: str) -> Optional[Order]:
+        """Get an order by broker order ID."""
+        order_id = self._by_broker_id.get(broker_order_id)
+        return self.get(order_id) if order_id else None
+
+    def set_broker_order_id(self, order_id: str, broker_order_id: str) -> Optional[Order]:
+        """
+        Link a broker order ID to an order.
+
+        Re-quotes link each new broker order ID to the same order, so fills
+        on any of them resolve to a single Order.
+        """
+        order = self.get(order_id)
+        if not order or not broker_order_id:
+            return order
+
+        order.external_order_id = broker_order_id
+        self._link_broker_id(order_id, broker_order_id)
+        return order
+
+    def get_by_strategy(self, strategy_name: str, active_only: bool = False) -> List[Order]:
+        """Get orders placed by a strategy."""
+        return self._resolve(self._by_strategy.get(strategy_name, ()), active_only)
+
+    def get_by_symbol(self, symbol: str, active_only: bool = False) -> List[Order]:
+        """Get orders for a symbol."""
+        return self._resolve(self._by_symbol.get(symbol, ()), active_only)
+
+    def complete(self, order_id: str) -> Optional[Order]:
+        """Move an order from active to completed."""
+        order = self.active_orders.pop(order_id, None)
+        if order:
+            self._add_completed(order)
+        return order
+
+    def remove(self, order_id: str) -> Optional[Order]:
+        """Remove an order and all its index entries."""
+        order = self.active_orders.pop(order_id, None) or self.completed_orders.pop(order_id, None)
+        if order:
+            self._unindex(order)
+        return order
+
+    def clear(self) -> None:
+        """Remove all orders."""
+        self.active_orders.clear()
+        self.completed_orders.clear()
+        self._by_broker_id.clear()
+        self._broker_ids.clear()
+        self._by_strategy.clear()
+        self._by_symbol.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store size statistics."""
+        return {
+            "active_orders": len(self.active_orders),
+            "completed_orders": len(self.completed_orders),
+            "broker_ids_indexed": len(self._by_broker_id),
+            "strategies_indexed": len(self._by_strategy),
+            "symbols_indexed": len(self._by_symbol),
+            "evicted_orders": self.evicted_orders,
+            "max_completed_orders": self.max_completed_orders
+        }
+
+    def _resolve(self, order_ids, active_only: bool) -> List[Order]:
+        """Resolve a set of order IDs to orders."""
+        if active_only:
+            return [self.active_orders[oid] for oid in order_ids if oid in self.active_orders]
+        return [order for order in (self.get(oid) for oid in order_ids) if order]
+
+    def _link_broker_id(self, order_id: str, broker_order_id: str) -> None:
+        """Index a broker order ID against an order."""
+        if self._by_broker_id.get(broker_order_id) != order_id:
+            self._by_broker_id[broker_order_id] = order_id
+            self._broker_ids[order_id].append(broker_order_id)
+
+    def _add_completed(self, order: Order) -> None:
+        """Append to completed orders, evicting the oldest beyond the bound."""
+        self.completed_orders[order.order_id] = order
+        self.completed_orders.move_to_end(order.order_id)
+
+        while len(self.completed_orders) > self.max_completed_orders:
+            _, evicted = self.completed_orders.popitem(last=False)
+            self._unindex(evicted)
+            self.evicted_orders += 1
+
+    def _unindex(self, order: Order) -> None:
+        """Drop an order from the secondary indexes."""
+        order_id = order.order_id
+
+        for broker_id in self._broker_ids.pop(order_id, []):
+            if self._by_broker_id.get(broker_id) == order_id:
+                del self._by_broker_id[broker_id]
+
+        if order.request:
+            for index, key in (
+                (self._by_strategy, order.request.strategy_name),
+                (self._by_symbol, order.request.symbol)
+            ):
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(order_id)
+                    if not ids:
+                        del index[key]
+
+
+# Global order store instance
+order_store = OrderStore()
@@ -6,17 +6,21 @@ status updates, fill notifications, and execution analytics.
 """
 
 import asyncio
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional, Callable, Any, Set
 from uuid import uuid4
 
 from loguru import logger
-from app.broker.tradehull_client import TradehullClient
-from app.orders.models import OrderStatus, OrderRequest, OrderResponse
+from app.broker.tradehull_client import DhanTradehullClient
+from app.broker.enums import TransactionType, ProductType
+from app.orders.models import OrderStatus, OrderRequest, OrderResponse, OrderType
+from app.orders.store import OrderStore, order_store
 from app.cache.redis import RedisManager
-from app.websockets.events import WebSocketEventManager
+from app.cache.state_journal import StateJournal
+from app.websockets.socket_manager import SocketManager
 
 
 class FillType(Enum):
@@ -37,7 +41,7 @@ class NotificationType(Enum):
     ORDER_EXPIRED = "order_expired"
 
 
-@dataclass
+@dataclass(slots=True)
 class FillInfo:
     """Information about an order fill."""
     fill_id: str
@@ -56,7 +60,7 @@ class FillInfo:
     taxes: float = 0.0
     
 
-@dataclass
+@dataclass(slots=True)
 class OrderTracker:
     """Tracks a single order through its lifecycle."""
     order_id: str
@@ -101,30 +105,43 @@ class OrderTrackingManager:
     - WebSocket notifications for real-time updates
     - Fill analytics and execution quality metrics
     - Automated status polling and updates
+    - Warm restart from snapshot + journal, then broker reconciliation
     """
     
+    TERMINAL_STATUSES = (
+        OrderStatus.FILLED,
+        OrderStatus.CANCELLED,
+        OrderStatus.REJECTED,
+        OrderStatus.EXPIRED
+    )
+    
     def __init__(
         self,
-        broker_client: TradehullClient,
+        broker_client: DhanTradehullClient,
         redis_manager: RedisManager,
-        websocket_manager: Optional[WebSocketEventManager] = None,
+        websocket_manager: Optional[SocketManager] = None,
         status_poll_interval_seconds: int = 1,
-        enable_notifications: bool = True
+        enable_notifications: bool = True,
+        store: Optional[OrderStore] = None
     ):
         self.broker_client = broker_client
         self.redis = redis_manager
+        self.order_store = store or order_store
         self.websocket_manager = websocket_manager
         self.status_poll_interval_seconds = status_poll_interval_seconds
         self.enable_notifications = enable_notifications
         
         # Order tracking
         self.active_orders: Dict[str, OrderTracker] = {}
-        self.completed_orders: Dict[str, OrderTracker] = {}
+        self.completed_orders: "OrderedDict[str, OrderTracker]" = OrderedDict()
         
         # Notification system
         self.notification_callbacks: List[Callable[[NotificationEvent], None]] = []
         self.pending_notifications: List[NotificationEvent] = []
         
+        # Warm-restart persistence (snapshot + journal of tracker updates)
+        self.journal = StateJournal(redis_manager, "order_tracking")
+        
         # Status polling
         self.is_polling = False
         self.poll_task: Optional[asyncio.Task] = None
@@ -152,8 +169,9 @@ class OrderTrackingManager:
         
         self.is_polling = True
         
-        # Load existing orders from Redis
+        # Load existing orders from Redis, then confirm them with the broker
         await self._load_orders_from_redis()
+        await self._reconcile_with_broker()
         
         # Start status polling task
         self.poll_task = asyncio.create_task(
@@ -207,6 +225,10 @@ class OrderTrackingManager:
         
         self.active_orders[order_id] = tracker
         self.tracking_stats["total_orders_tracked"] += 1
+        
+        # Index broker order ID on the shared order
+        if broker_order_id:
+            self.order_store.set_broker_order_id(order_id, broker_order_id)
         self.tracking_stats["active_orders"] += 1
         
         logger.info(
@@ -275,7 +297,7 @@ class OrderTrackingManager:
             await self._process_fill(tracker, fill_info)
         
         # Handle status transitions
-        if new_status in [OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED, OrderStatus.EXPIRED]:
+        if new_status in self.TERMINAL_STATUSES:
             await self._complete_order(tracker)
         
         logger.info(
@@ -322,16 +344,18 @@ class OrderTrackingManager:
     async def _process_fill(self, tracker: OrderTracker, fill_info: FillInfo) -> None:
         """Process an order fill and update tracker state."""
         # Add fill to tracker
+        previous_value = tracker.total_filled_quantity * tracker.average_fill_price
         tracker.fills.append(fill_info)
         tracker.total_filled_quantity += fill_info.filled_quantity
         tracker.remaining_quantity = max(0, tracker.original_request.quantity - tracker.total_filled_quantity)
         tracker.total_commission += fill_info.commission
         tracker.total_taxes += fill_info.taxes
         
-        # Calculate average fill price
+        # Update running average fill price
         if tracker.total_filled_quantity > 0:
-            total_value = sum(fill.filled_quantity * fill.fill_price for fill in tracker.fills)
-            tracker.average_fill_price = total_value / tracker.total_filled_quantity
+            tracker.average_fill_price = (
+                previous_value + fill_info.filled_quantity * fill_info.fill_price
+            ) / tracker.total_filled_quantity
         
         # Update global stats
         self.tracking_stats["total_fills"] += 1
@@ -358,9 +382,11 @@ class OrderTrackingManager:
         """Move order from active to completed tracking."""
         tracker.completion_time = datetime.utcnow()
         
-        # Move to completed orders
+        # Move to completed orders (bounded like the shared order store)
         self.completed_orders[tracker.order_id] = tracker
         self.active_orders.pop(tracker.order_id, None)
+        while len(self.completed_orders) > self.order_store.max_completed_orders:
+            self.completed_orders.popitem(last=False)
         
         # Update stats
         self.tracking_stats["active_orders"] -= 1
@@ -447,8 +473,7 @@ class OrderTrackingManager:
         # Send via WebSocket if available
         if self.websocket_manager:
             try:
-                await self.websocket_manager.broadcast_event(
-                    "order_update",
+                await self.websocket_manager.broadcast_order_update(
                     {
                         "notification_type": notification_type.value,
                         "order_id": tracker.order_id,
@@ -561,69 +586,168 @@ class OrderTrackingManager:
         return status_mapping.get(broker_status, OrderStatus.UNKNOWN)
     
     async def _load_orders_from_redis(self) -> None:
-        """Load existing orders from Redis."""
+        """Restore trackers from the latest snapshot and replay the journal."""
         try:
-            # TODO: Implement Redis loading
-            pass
+            state, entries = await self.journal.load()
+            
+            restored: Dict[str, Dict[str, Any]] = {
+                data["order_id"]: data for data in (state or {}).get("trackers", [])
+            }
+            for op, data in entries:
+                if op == "tracker":
+                    restored[data["order_id"]] = data
+            
+            for data in restored.values():
+                tracker = self._deserialize_tracker(data)
+                if tracker.current_status in self.TERMINAL_STATUSES:
+                    self.completed_orders[tracker.order_id] = tracker
+                else:
+                    self.active_orders[tracker.order_id] = tracker
+                if tracker.broker_order_id:
+                    self.order_store.set_broker_order_id(tracker.order_id, tracker.broker_order_id)
+            
+            self.tracking_stats["active_orders"] = len(self.active_orders)
+            self.tracking_stats["completed_orders"] = len(self.completed_orders)
+            
+            logger.info(
+                "Order trackers restored: {} active, {} completed ({} journal entries replayed)",
+                len(self.active_orders),
+                len(self.completed_orders),
+                len(entries)
+            )
+            
         except Exception as e:
             logger.warning("Failed to load orders from Redis: {}", str(e))
     
+    async def _reconcile_with_broker(self) -> None:
+        """Poll the broker once for every restored active order."""
+        if not self.active_orders:
+            return
+        
+        await asyncio.gather(
+            *(self._poll_single_order_status(order_id) for order_id in list(self.active_orders)),
+            return_exceptions=True
+        )
+        
+        logger.info(
+            "Restored orders reconciled with broker: {} still active",
+            len(self.active_orders)
+        )
+    
     async def _save_orders_to_redis(self) -> None:
-        """Save all orders to Redis."""
+        """Write a compact snapshot of all trackers (supersedes the journal)."""
         try:
-            # Save active orders
-            active_data = {
-                order_id: {
-                    "order_id": tracker.order_id,
-                    "broker_order_id": tracker.broker_order_id,
-                    "strategy_id": tracker.strategy_id,
-                    "symbol": tracker.symbol,
-                    "current_status": tracker.current_status.value,
-                    "total_filled_quantity": tracker.total_filled_quantity,
-                    "remaining_quantity": tracker.remaining_quantity,
-                    "average_fill_price": tracker.average_fill_price,
-                    "created_at": tracker.created_at.isoformat(),
-                    "last_updated": tracker.last_updated.isoformat()
-                }
-                for order_id, tracker in self.active_orders.items()
-            }
-            
-            await self.redis.set("active_orders", active_data, ttl=timedelta(hours=24))
-            
+            await self.journal.snapshot(self._capture_state())
         except Exception as e:
             logger.error("Failed to save orders to Redis: {}", str(e))
     
     async def _save_order_to_redis(self, tracker: OrderTracker) -> None:
-        """Save a single order to Redis."""
+        """Append a tracker update to the journal, snapshotting when due."""
         try:
-            order_data = {
-                "order_id": tracker.order_id,
-                "broker_order_id": tracker.broker_order_id,
-                "strategy_id": tracker.strategy_id,
-                "symbol": tracker.symbol,
-                "current_status": tracker.current_status.value,
-                "total_filled_quantity": tracker.total_filled_quantity,
-                "remaining_quantity": tracker.remaining_quantity,
-                "average_fill_price": tracker.average_fill_price,
-                "fills": [
-                    {
-                        "fill_id": fill.fill_id,
-                        "filled_quantity": fill.filled_quantity,
-                        "fill_price": fill.fill_price,
-                        "fill_time": fill.fill_time.isoformat(),
-                        "fill_type": fill.fill_type.value
-                    }
-                    for fill in tracker.fills
-                ],
-                "last_updated": tracker.last_updated.isoformat()
-            }
-            
-            key = f"order_tracker:{tracker.order_id}"
-            await self.redis.set(key, order_data, ttl=timedelta(days=7))
-            
+            await self.journal.append("tracker", self._serialize_tracker(tracker))
+            await self.journal.maybe_snapshot(self._capture_state)
         except Exception as e:
             logger.error("Failed to save order tracker to Redis: {}", str(e))
     
+    def _capture_state(self) -> Dict[str, Any]:
+        # completed_orders is already capped by the store, which keeps snapshots small
+        return {
+            "trackers": [
+                self._serialize_tracker(tracker)
+                for tracker in (*self.active_orders.values(), *self.completed_orders.values())
+            ]
+        }
+    
+    @staticmethod
+    def _serialize_tracker(tracker: OrderTracker) -> Dict[str, Any]:
+        request = tracker.original_request
+        return {
+            "order_id": tracker.order_id,
+            "broker_order_id": tracker.broker_order_id,
+            "strategy_id": tracker.strategy_id,
+            "symbol": tracker.symbol,
+            "original_request": {
+                f.name: getattr(request, f.name).value
+                if isinstance(getattr(request, f.name), Enum) else getattr(request, f.name)
+                for f in fields(request)
+            },
+            "current_status": tracker.current_status.value,
+            "total_filled_quantity": tracker.total_filled_quantity,
+            "remaining_quantity": tracker.remaining_quantity,
+            "average_fill_price": tracker.average_fill_price,
+            "total_commission": tracker.total_commission,
+            "total_taxes": tracker.total_taxes,
+            "fills": [
+                {
+                    "fill_id": fill.fill_id,
+                    "filled_quantity": fill.filled_quantity,
+                    "fill_price": fill.fill_price,
+                    "fill_time": fill.fill_time.isoformat(),
+                    "fill_type": fill.fill_type.value
+                }
+                for fill in tracker.fills
+            ],
+            "created_at": tracker.created_at.isoformat(),
+            "last_updated": tracker.last_updated.isoformat(),
+            "completion_time": tracker.completion_time.isoformat() if tracker.completion_time else None,
+            "rejection_reason": tracker.rejection_reason
+        }
+    
+    @staticmethod
+    def _deserialize_tracker(data: Dict[str, Any]) -> OrderTracker:
+        request_data = dict(data["original_request"])
+        request_data["transaction_type"] = TransactionType(request_data["transaction_type"])
+        request_data["order_type"] = OrderType(request_data["order_type"])
+        request_data["product_type"] = ProductType(request_data["product_type"])
+        request = OrderRequest(**request_data)
+        
+        tracker = OrderTracker(
+            order_id=data["order_id"],
+            broker_order_id=data["broker_order_id"],
+            strategy_id=data["strategy_id"],
+            symbol=data["symbol"],
+            original_request=request,
+            current_status=OrderStatus(data["current_status"]),
+            total_filled_quantity=data["total_filled_quantity"],
+            remaining_quantity=data["remaining_quantity"],
+            average_fill_price=data["average_fill_price"],
+            total_commission=data.get("total_commission", 0.0),
+            total_taxes=data.get("total_taxes", 0.0),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            last_updated=datetime.fromisoformat(data["last_updated"]),
+            completion_time=(
+                datetime.fromisoformat(data["completion_time"]) if data.get("completion_time") else None
+            ),
+            rejection_reason=data.get("rejection_reason")
+        )
+        
+        # Individual fills are summarized; cumulative figures above are authoritative
+        cumulative = 0
+        for fill in data.get("fills", []):
+            cumulative += fill["filled_quantity"]
+            tracker.fills.append(FillInfo(
+                fill_id=fill["fill_id"],
+                order_id=tracker.order_id,
+                broker_order_id=tracker.broker_order_id or "",
+                symbol=tracker.symbol,
+                filled_quantity=fill["filled_quantity"],
+                fill_price=fill["fill_price"],
+                fill_time=datetime.fromisoformat(fill["fill_time"]),
+                remaining_quantity=max(0, request.quantity - cumulative),
+                cumulative_quantity=cumulative,
+                average_fill_price=tracker.average_fill_price,
+                fill_type=FillType(fill["fill_type"])
+            ))
+        
+        return tracker
+    
+    def get_tracker_by_broker_order_id(self, broker_order_id: str) -> Optional[OrderTracker]:
+        """Resolve a broker order ID to its tracker via the shared order store."""
+        order = self.order_store.get_by_broker_order_id(broker_order_id)
+        if not order:
+            return None
+        return self.active_orders.get(order.order_id) or self.completed_orders.get(order.order_id)
+    
     def add_notification_callback(self, callback: Callable[[NotificationEvent], None]) -> None:
         """Add a callback for order notifications."""
         self.notification_callbacks.append(callback)
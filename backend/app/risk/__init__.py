@@ -4,7 +4,11 @@ Risk Management Module
 This module provides comprehensive risk management functionality including:
 - Dynamic lot sizing based on margin utilization
 - Margin calculations for options strategies
+- Local SPAN-style portfolio margin with hedge offsets
 - Portfolio risk monitoring
+- Vectorized full-book greeks, scenario P&L and margin utilization
+- Consolidated in-memory pre-trade risk gate
+- Greeks-aware batch lot sizing with binding-constraint reporting
 - Position limits validation
 """
 
@@ -17,6 +21,21 @@ from .calculator import (
     risk_calculator
 )
 
+from .span import (
+    SpanMarginEngine,
+    MarginLeg,
+    BasketMargin,
+    RiskParameterSet,
+    UnderlyingRiskParameters,
+    span_margin_engine
+)
+
+from .portfolio import (
+    PortfolioRiskEngine,
+    PortfolioRiskSnapshot,
+    portfolio_risk_engine
+)
+
 from .manager import (
     RiskManager,
     RiskStatus,
@@ -37,6 +56,24 @@ from .circuit_breaker import (
     circuit_breaker
 )
 
+from .pretrade import (
+    PreTradeRiskGate,
+    PreTradeRule,
+    PreTradeCheck,
+    PreTradeResult,
+    pretrade_gate
+)
+
+from .sizing import (
+    GreeksAwareSizer,
+    GreeksLimits,
+    SizingCandidate,
+    SizingConstraint,
+    SizingLeg,
+    SizingResult,
+    greeks_sizer
+)
+
 __all__ = [
     "RiskCalculator",
     "RiskLevel", 
@@ -44,6 +81,15 @@ __all__ = [
     "PositionSizing",
     "PortfolioRisk",
     "risk_calculator",
+    "SpanMarginEngine",
+    "MarginLeg",
+    "BasketMargin",
+    "RiskParameterSet",
+    "UnderlyingRiskParameters",
+    "span_margin_engine",
+    "PortfolioRiskEngine",
+    "PortfolioRiskSnapshot",
+    "portfolio_risk_engine",
     "RiskManager",
     "RiskStatus",
     "StopLossType", 
@@ -57,5 +103,17 @@ __all__ = [
     "VIXData",
     "CircuitBreakerEvent",
     "VIXStats",
-    "circuit_breaker"
-] 
\ No newline at end of file
+    "circuit_breaker",
+    "PreTradeRiskGate",
+    "PreTradeRule",
+    "PreTradeCheck",
+    "PreTradeResult",
+    "pretrade_gate",
+    "GreeksAwareSizer",
+    "GreeksLimits",
+    "SizingCandidate",
+    "SizingConstraint",
+    "SizingLeg",
+    "SizingResult",
+    "greeks_sizer"
+]
@@ -4,7 +4,8 @@ Risk Calculator Module
 This module provides margin calculation and dynamic lot sizing functionality.
 Key features:
 - Dynamic lot sizing based on 40% margin utilization target
-- Margin requirement calculations for options strategies
+- Margin requirement calculations for options strategies (local SPAN-style
+  engine with hedge offsets, percentage approximations as fallback)
 - Position size validation and limits
 - Portfolio-level risk calculations
 """
@@ -17,10 +18,12 @@ from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
 from loguru import logger
 
 from app.broker.enums import TransactionType, ProductType
 from app.core.config import get_settings
+from .span import SpanMarginEngine, MarginLeg, BasketMargin, span_margin_engine
 
 
 class RiskLevel(Enum):
@@ -87,7 +90,10 @@ class RiskCalculator:
         self.max_lots_per_signal = 10           # Per PRD: 10 lots/signal
         self.max_total_lots = 50                # Per PRD: 50 lots total/strategy
         
-        # Indian options typical margin requirements (approximate)
+        # Local SPAN-style engine (no broker round-trips)
+        self.span_engine: SpanMarginEngine = span_margin_engine
+        
+        # Indian options typical margin requirements (fallback approximation)
         self.margin_multipliers = {
             "nifty": {
                 "span_pct": 0.12,      # 12% of notional
@@ -110,11 +116,16 @@ class RiskCalculator:
         lot_size: int,
         lots: int,
         ltp: float,
-        underlying_price: float
+        underlying_price: float,
+        expiry: Optional[str] = None,
+        iv: Optional[float] = None
     ) -> MarginRequirement:
         """
         Calculate margin requirement for an options position
         
+        Uses the local SPAN engine when the expiry is known and risk
+        parameters exist for the symbol, otherwise percentage approximations.
+        
         Args:
             symbol: Underlying symbol (NIFTY, BANKNIFTY)
             strike: Strike price
@@ -124,12 +135,30 @@ class RiskCalculator:
             lots: Number of lots
             ltp: Last traded price of option
             underlying_price: Current price of underlying
+            expiry: Option expiry (ISO date), enables SPAN margining
+            iv: Implied volatility (decimal), defaults to the parameter file
             
         Returns:
             MarginRequirement with detailed breakdown
         """
         
         try:
+            if expiry and self.span_engine.has_parameters(symbol):
+                quantity = lot_size * lots
+                basket = self.span_engine.calculate_basket_margin(
+                    [MarginLeg(
+                        symbol=symbol,
+                        strike=strike,
+                        option_type=option_type,
+                        expiry=expiry,
+                        quantity=quantity if transaction_type == TransactionType.BUY else -quantity,
+                        ltp=ltp,
+                        iv=iv
+                    )],
+                    {symbol.upper(): underlying_price}
+                )
+                return self.margin_from_basket(basket)
+            
             # Normalize symbol for lookup
             symbol_key = symbol.lower().replace("_", "")
             if "nifty" in symbol_key and "bank" not in symbol_key:
@@ -190,13 +219,106 @@ class RiskCalculator:
                 total_margin=conservative_margin
             )
     
+    def calculate_basket_margin(
+        self,
+        legs: List[MarginLeg],
+        spot_prices: Dict[str, float]
+    ) -> BasketMargin:
+        """Portfolio margin for a multi-leg basket, computed locally"""
+        return self.span_engine.calculate_basket_margin(legs, spot_prices)
+    
+    async def cross_check_margin(
+        self,
+        local_margin: MarginRequirement,
+        broker_client,
+        security_id: str,
+        exchange_segment,
+        transaction_type: TransactionType,
+        quantity: int,
+        product_type: str,
+        price: float,
+        tolerance_pct: float = 0.15
+    ) -> Optional[float]:
+        """
+        Compare a single-leg local margin with the broker's margin calculator
+        
+        The broker quotes one order at a time, so only unhedged single legs
+        are comparable; baskets keep the local figure.
+        
+        Returns:
+            Broker total margin, or None if the broker call failed
+        """
+        try:
+            response = await broker_client.get_margin_requirement(
+                security_id, exchange_segment, transaction_type, quantity, product_type, price
+            )
+            broker_margin = float(response["totalMargin"])
+        except Exception as e:
+            self.logger.warning(f"Broker margin cross-check failed for {security_id}: {e}")
+            return None
+        
+        if broker_margin > 0:
+            divergence = abs(local_margin.total_margin - broker_margin) / broker_margin
+            if divergence > tolerance_pct:
+                self.logger.warning(
+                    f"Local margin ₹{local_margin.total_margin:,.0f} differs from broker "
+                    f"₹{broker_margin:,.0f} by {divergence:.1%} for {security_id}",
+                    extra={
+                        "security_id": security_id,
+                        "local_margin": local_margin.total_margin,
+                        "broker_margin": broker_margin
+                    }
+                )
+        return broker_margin
+    
+    @staticmethod
+    def margin_from_basket(basket: BasketMargin) -> MarginRequirement:
+        return MarginRequirement(
+            span_margin=basket.span_margin,
+            exposure_margin=basket.exposure_margin,
+            premium_margin=basket.premium_margin,
+            total_margin=basket.total_margin
+        )
+    
+    def _max_lots_by_basket_margin(
+        self,
+        target_margin: float,
+        basket: List[MarginLeg],
+        spot_prices: Dict[str, float],
+        max_lots: int,
+        existing_legs: Optional[List[MarginLeg]] = None
+    ) -> Tuple[int, float]:
+        """
+        Largest lot count whose incremental margin fits the target
+        
+        Margin is evaluated for existing + k baskets over every k in one
+        vectorized pass, so hedges against the current book reduce the
+        requirement.
+        
+        Returns:
+            Tuple of (lots, incremental margin at that lot count)
+        """
+        lots = np.arange(max(max_lots, 0) + 1)
+        margins = self.span_engine.calculate_margin_grid(
+            existing_legs or [], basket, lots, spot_prices
+        )
+        incremental = margins - margins[0]
+        
+        # First lot count over target bounds the size (margin need not be monotone)
+        over = np.nonzero(incremental > target_margin)[0]
+        best = int(over[0]) - 1 if len(over) else int(lots[-1])
+        return best, float(incremental[best])
+    
     async def calculate_dynamic_lot_sizing(
         self,
         available_margin: float,
-        margin_per_lot: float,
+        margin_per_lot: Optional[float] = None,
         current_positions: int = 0,
         risk_level: RiskLevel = RiskLevel.MODERATE,
-        strategy_name: str = "default"
+        strategy_name: str = "default",
+        basket: Optional[List[MarginLeg]] = None,
+        spot_prices: Optional[Dict[str, float]] = None,
+        existing_legs: Optional[List[MarginLeg]] = None
     ) -> PositionSizing:
         """
         Calculate optimal lot sizing based on margin utilization
@@ -207,6 +329,11 @@ class RiskCalculator:
             current_positions: Current number of lots in portfolio
             risk_level: Risk level for margin utilization
             strategy_name: Name of strategy for logging
+            basket: Legs for one lot of a multi-leg strategy; when given, lot
+                counts are searched with the local margin engine instead of
+                margin_per_lot
+            spot_prices: Underlying spot prices (required with basket)
+            existing_legs: Current book, so hedges against it are credited
             
         Returns:
             PositionSizing with recommended lots and risk metrics
@@ -225,8 +352,29 @@ class RiskCalculator:
             # Calculate target margin to use
             target_margin_amount = available_margin * target_utilization
             
+            # Apply position limits
+            remaining_capacity = self.max_total_lots - current_positions
+            max_lots_by_limits = min(self.max_lots_per_signal, remaining_capacity)
+            
+            basket_margin = None
+            if basket:
+                # Search over the remaining total capacity so max_lots_by_margin stays informative
+                max_lots_by_margin, basket_margin = self._max_lots_by_basket_margin(
+                    target_margin_amount,
+                    basket,
+                    spot_prices or {},
+                    max(remaining_capacity, 0),
+                    existing_legs
+                )
+                if max_lots_by_margin > 0:
+                    margin_per_lot = basket_margin / max_lots_by_margin
+                else:
+                    _, margin_per_lot = self._max_lots_by_basket_margin(
+                        float("inf"), basket, spot_prices or {}, 1, existing_legs
+                    )
+            
             # Calculate lots that can be afforded
-            if margin_per_lot <= 0:
+            if margin_per_lot is None:
                 warnings.append("Invalid margin per lot")
                 return PositionSizing(
                     recommended_lots=0,
@@ -238,11 +386,12 @@ class RiskCalculator:
                     warnings=warnings
                 )
             
-            max_lots_by_margin = int(target_margin_amount / margin_per_lot)
-            
-            # Apply position limits
-            remaining_capacity = self.max_total_lots - current_positions
-            max_lots_by_limits = min(self.max_lots_per_signal, remaining_capacity)
+            if basket_margin is None:
+                if margin_per_lot > 0:
+                    max_lots_by_margin = int(target_margin_amount / margin_per_lot)
+                else:
+                    # Hedges release margin: only position limits bound the size
+                    max_lots_by_margin = max(remaining_capacity, 0)
             
             # Take minimum of margin and limit constraints
             recommended_lots = min(max_lots_by_margin, max_lots_by_limits)
@@ -256,7 +405,13 @@ class RiskCalculator:
                 recommended_lots = 0
             
             # Calculate final metrics
-            total_margin_required = recommended_lots * margin_per_lot
+            if basket and 0 < recommended_lots < max_lots_by_margin:
+                # Margin is not linear in lots for hedged baskets; price the final count
+                _, total_margin_required = self._max_lots_by_basket_margin(
+                    float("inf"), basket, spot_prices or {}, recommended_lots, existing_legs
+                )
+            else:
+                total_margin_required = max(recommended_lots * margin_per_lot, 0.0)
             final_utilization = (total_margin_required / available_margin) * 100 if available_margin > 0 else 0
             
             # Add warnings for edge cases
@@ -9,7 +9,6 @@ Monitors market conditions and triggers circuit breakers when:
 """
 
 import asyncio
-import statistics
 from datetime import datetime, timezone, time, date
 from typing import Dict, List, Optional, Set, Tuple, Any, Callable
 from dataclasses import dataclass, field
@@ -22,6 +21,7 @@ from loguru import logger
 
 from app.core.config import get_settings
 from app.cache.redis import redis_client
+from app.utils.rolling_stats import MultiHorizonStats
 
 
 class CircuitBreakerType(Enum):
@@ -85,6 +85,7 @@ class VIXStats:
     threshold_3sigma: float
     samples_count: int
     last_updated: datetime
+    horizon_z_scores: Dict[str, float] = field(default_factory=dict)
 
 
 class CircuitBreaker:
@@ -108,6 +109,13 @@ class CircuitBreaker:
         self.vix_threshold_sigma = 3.0  # 3 standard deviations
         self.vix_buffer: deque = deque(maxlen=self.vix_window_size)
         
+        # O(1) rolling/EWMA statistics; "baseline" drives the 3σ threshold
+        self.vix_stats = MultiHorizonStats(
+            windows={"baseline": self.vix_window_size, "intraday": 75},
+            halflives={"ewma_fast": 20, "ewma_slow": 120}
+        )
+        self.vix_min_samples = 30  # Minimum samples for meaningful stats
+        
         # Circuit breaker state
         self.status = CircuitBreakerStatus.NORMAL
         self.active_breakers: Set[CircuitBreakerType] = set()
@@ -119,10 +127,20 @@ class CircuitBreaker:
         
         # Redis keys for persistence
         self.redis_prefix = "circuit_breaker"
-        self.vix_data_key = f"{self.redis_prefix}:vix_data"
+        self.vix_data_key = f"{self.redis_prefix}:vix_data"  # Legacy full-buffer blob
+        self.vix_samples_key = f"{self.redis_prefix}:vix_samples"
         self.status_key = f"{self.redis_prefix}:status"
         self.events_key = f"{self.redis_prefix}:events"
         
+        # Incremental VIX persistence: new samples are batched and appended
+        self.vix_flush_batch_size = 50
+        self.vix_flush_interval_seconds = 5.0
+        self.vix_persist_limit = 1000
+        self._pending_vix: List[str] = []
+        self._persisted_vix_count = 0
+        self._last_vix_flush = datetime.now(timezone.utc)
+        self._flush_task: Optional[asyncio.Task] = None
+        
         # Callbacks
         self.halt_callback: Optional[Callable] = None
         self.alert_callback: Optional[Callable] = None
@@ -157,16 +175,24 @@ class CircuitBreaker:
     async def initialize(self):
         """Initialize circuit breaker system"""
         try:
-            # Load persisted VIX data
-            stored_vix = await redis_client.get(self.vix_data_key)
-            if stored_vix:
-                vix_data = json.loads(stored_vix)
-                for item in vix_data:
-                    self.vix_buffer.append(VIXData(
-                        timestamp=datetime.fromisoformat(item["timestamp"]),
-                        value=item["value"],
-                        source=item.get("source", "stored")
-                    ))
+            # Load persisted VIX samples (append-only list, legacy blob as fallback)
+            self._persisted_vix_count = await redis_client.llen(self.vix_samples_key)
+            if self._persisted_vix_count:
+                vix_data = [
+                    json.loads(raw) for raw in
+                    await redis_client.lrange(self.vix_samples_key, -self.vix_window_size, -1)
+                ]
+            else:
+                stored_vix = await redis_client.get(self.vix_data_key)
+                vix_data = json.loads(stored_vix) if stored_vix else []
+            
+            for item in vix_data[-self.vix_window_size:]:
+                self.vix_buffer.append(VIXData(
+                    timestamp=datetime.fromisoformat(item["timestamp"]),
+                    value=item["value"],
+                    source=item.get("source", "stored")
+                ))
+                self.vix_stats.update(item["value"])
             
             # Load status
             stored_status = await redis_client.get(self.status_key)
@@ -206,17 +232,16 @@ class CircuitBreaker:
                 source=source
             )
             self.vix_buffer.append(vix_data)
+            self.vix_stats.update(vix_value)
+            self._queue_vix_sample(vix_data)
             
             # Calculate statistics if we have enough data
-            if len(self.vix_buffer) >= 30:  # Minimum 30 samples for meaningful stats
+            if len(self.vix_buffer) >= self.vix_min_samples:
                 stats = self._calculate_vix_stats()
                 
                 # Check for circuit breaker trigger
                 await self._check_vix_circuit_breaker(stats)
                 
-                # Persist VIX data
-                await self._persist_vix_data()
-                
                 self.logger.debug(
                     f"VIX updated: {vix_value:.2f} (Z-score: {stats.z_score:.2f}, "
                     f"Threshold: {stats.threshold_3sigma:.2f})",
@@ -230,6 +255,13 @@ class CircuitBreaker:
             else:
                 self.logger.debug(f"VIX updated: {vix_value:.2f} (insufficient data for stats)")
             
+            # Persist new samples in batches
+            if (
+                len(self._pending_vix) >= self.vix_flush_batch_size
+                or (vix_data.timestamp - self._last_vix_flush).total_seconds() >= self.vix_flush_interval_seconds
+            ):
+                await self._persist_vix_data()
+            
             self.last_vix_check = datetime.now(timezone.utc)
             
         except Exception as e:
@@ -238,15 +270,15 @@ class CircuitBreaker:
     def _calculate_vix_stats(self) -> VIXStats:
         """Calculate VIX statistics for circuit breaker evaluation"""
         try:
-            values = [item.value for item in self.vix_buffer]
-            current_value = values[-1]
+            baseline = self.vix_stats.get("baseline")
+            current_value = baseline.last
             
-            # Calculate rolling statistics
-            rolling_mean = statistics.mean(values)
-            rolling_std = statistics.stdev(values) if len(values) > 1 else 0
+            # Rolling statistics are maintained incrementally in update_vix
+            rolling_mean = baseline.mean
+            rolling_std = baseline.std
             
             # Calculate Z-score
-            z_score = (current_value - rolling_mean) / rolling_std if rolling_std > 0 else 0
+            z_score = baseline.z_score(current_value)
             
             # Calculate threshold
             threshold_3sigma = rolling_mean + (self.vix_threshold_sigma * rolling_std)
@@ -257,8 +289,9 @@ class CircuitBreaker:
                 rolling_std=rolling_std,
                 z_score=z_score,
                 threshold_3sigma=threshold_3sigma,
-                samples_count=len(values),
-                last_updated=datetime.now(timezone.utc)
+                samples_count=baseline.count,
+                last_updated=datetime.now(timezone.utc),
+                horizon_z_scores=self.vix_stats.z_scores(current_value)
             )
             
         except Exception as e:
@@ -550,29 +583,67 @@ class CircuitBreaker:
             self.logger.error(f"Error checking trading allowance: {e}")
             return False, ["Circuit breaker check error"]
     
+    def _queue_vix_sample(self, item: VIXData):
+        """Queue a VIX sample for the next batched append"""
+        self._pending_vix.append(json.dumps({
+            "timestamp": item.timestamp.isoformat(),
+            "value": item.value,
+            "source": item.source
+        }))
+    
     async def _persist_vix_data(self):
-        """Persist VIX data to Redis"""
+        """Append pending VIX samples to Redis and trim the list"""
+        if not self._pending_vix:
+            return
+        
+        pending = self._pending_vix
+        self._pending_vix = []
+        self._last_vix_flush = datetime.now(timezone.utc)
+        
         try:
-            # Keep last 1000 data points
-            data_to_store = list(self.vix_buffer)[-1000:]
-            serializable_data = [
-                {
-                    "timestamp": item.timestamp.isoformat(),
-                    "value": item.value,
-                    "source": item.source
-                }
-                for item in data_to_store
-            ]
+            self._persisted_vix_count = await redis_client.rpush(self.vix_samples_key, *pending)
             
-            await redis_client.set(
-                self.vix_data_key,
-                json.dumps(serializable_data),
-                ex=86400 * 7  # Keep for 7 days
-            )
+            # Trim in bulk once the list runs well past the retention limit
+            excess = self._persisted_vix_count - self.vix_persist_limit
+            if excess >= self.vix_flush_batch_size:
+                await redis_client.lpop(self.vix_samples_key, excess)
+                self._persisted_vix_count -= excess
+            
+            await redis_client.expire(self.vix_samples_key, 86400 * 7)  # Keep for 7 days
             
         except Exception as e:
+            # Keep samples for the next flush rather than dropping them
+            self._pending_vix = pending + self._pending_vix
             self.logger.error(f"Error persisting VIX data: {e}")
     
+    async def flush_vix_data(self):
+        """Persist any VIX samples still waiting for a batch (call on shutdown)"""
+        await self._persist_vix_data()
+    
+    async def start(self):
+        """Restore state and start the periodic VIX flush"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._vix_flush_loop(), name="vix_flush")
+        await self.initialize()
+    
+    async def stop(self):
+        """Stop the periodic VIX flush and persist whatever is still pending"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush_vix_data()
+    
+    async def _vix_flush_loop(self):
+        """Flush samples left below the batch size once they are a flush interval old"""
+        while True:
+            await asyncio.sleep(self.vix_flush_interval_seconds)
+            if self._pending_vix:
+                await self.flush_vix_data()
+    
     async def _persist_events(self):
         """Persist circuit breaker events to Redis"""
         try:
@@ -615,7 +686,7 @@ class CircuitBreaker:
         """Get current circuit breaker status summary"""
         try:
             vix_stats = None
-            if len(self.vix_buffer) >= 30:
+            if len(self.vix_buffer) >= self.vix_min_samples:
                 vix_stats = self._calculate_vix_stats()
             
             trading_allowed, reasons = self.is_trading_allowed()
@@ -629,7 +700,10 @@ class CircuitBreaker:
                     "current": vix_stats.current_value if vix_stats else None,
                     "z_score": vix_stats.z_score if vix_stats else None,
                     "threshold": vix_stats.threshold_3sigma if vix_stats else None,
-                    "samples": len(self.vix_buffer)
+                    "samples": len(self.vix_buffer),
+                    "horizon_z_scores": vix_stats.horizon_z_scores if vix_stats else {},
+                    "horizons": self.vix_stats.summary(),
+                    "pending_persist": len(self._pending_vix)
                 },
                 "last_vix_update": self.last_vix_check.isoformat(),
                 "recent_events": len(self.events),
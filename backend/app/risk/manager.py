@@ -21,7 +21,9 @@ from loguru import logger
 
 from app.core.config import get_settings
 from app.cache.redis import redis_client
+from app.cache.state_journal import StateJournal
 from .calculator import risk_calculator, PortfolioRisk, RiskLevel
+from .portfolio import portfolio_risk_engine, PortfolioRiskEngine, PortfolioRiskSnapshot
 
 
 class RiskStatus(Enum):
@@ -80,7 +82,7 @@ class RiskManager:
     - Real-time risk alerts
     """
     
-    def __init__(self):
+    def __init__(self, store=None):
         self.settings = get_settings()
         self.logger = logger.bind(module="risk_manager")
         
@@ -101,24 +103,40 @@ class RiskManager:
         self.last_risk_check = datetime.now(timezone.utc)
         self.risk_events: List[RiskEvent] = []
         
-        # Redis keys for persistence
+        # Full-book greeks, scenarios and margin (refreshed per tick)
+        self.portfolio_engine: PortfolioRiskEngine = portfolio_risk_engine
+        self.is_margin_breached = False
+        
+        # Redis keys for persistence; `store` replaces the global Redis client (e.g. in backtests)
+        self.store = store if store is not None else redis_client
         self.redis_prefix = "risk_manager"
         self.daily_pnl_key = f"{self.redis_prefix}:daily_pnl"
         self.risk_status_key = f"{self.redis_prefix}:status"
         self.risk_events_key = f"{self.redis_prefix}:events"
         
+        # Warm-restart persistence: daily counters and halt flags
+        self.journal = StateJournal(self.store, self.redis_prefix, snapshot_every=200)
+        
     async def initialize(self):
         """Initialize risk manager and load persisted state"""
         try:
-            # Load persisted daily P&L
-            stored_pnl = await redis_client.get(self.daily_pnl_key)
-            if stored_pnl:
-                self.daily_pnl = float(stored_pnl)
-            
-            # Load risk status
-            stored_status = await redis_client.get(self.risk_status_key)
-            if stored_status:
-                self.current_status = RiskStatus(stored_status)
+            # Restore daily P&L, status and halt flags from snapshot + journal
+            state, entries = await self.journal.load()
+            for op, data in entries:
+                if op == "state":
+                    state = data
+            
+            if state:
+                self._restore_state(state)
+            else:
+                # Fall back to the plain keys written by older versions
+                stored_pnl = await self.store.get(self.daily_pnl_key)
+                if stored_pnl:
+                    self.daily_pnl = float(stored_pnl)
+                
+                stored_status = await self.store.get(self.risk_status_key)
+                if stored_status:
+                    self.current_status = RiskStatus(stored_status)
             
             # Check if we need to reset daily counters
             await self._check_daily_reset()
@@ -147,7 +165,7 @@ class RiskManager:
             # Check if it's a new trading day (after 9:15 AM IST)
             market_open_time = time(3, 45)  # 9:15 AM IST in UTC (assuming UTC+5:30)
             last_reset_key = f"{self.redis_prefix}:last_reset"
-            last_reset = await redis_client.get(last_reset_key)
+            last_reset = await self.store.get(last_reset_key)
             
             if last_reset:
                 last_reset_date = datetime.fromisoformat(last_reset).date()
@@ -156,10 +174,10 @@ class RiskManager:
                 # Reset if it's a new day and past market open
                 if current_date > last_reset_date and ist_now.time() >= market_open_time:
                     await self._reset_daily_counters()
-                    await redis_client.set(last_reset_key, ist_now.isoformat())
+                    await self.store.set(last_reset_key, ist_now.isoformat())
             else:
                 # First time setup
-                await redis_client.set(last_reset_key, ist_now.isoformat())
+                await self.store.set(last_reset_key, ist_now.isoformat())
                 
         except Exception as e:
             self.logger.error(f"Error checking daily reset: {e}")
@@ -172,10 +190,11 @@ class RiskManager:
             self.is_trading_halted = False
             self.risk_events.clear()
             
-            # Clear Redis keys
-            await redis_client.delete(self.daily_pnl_key)
-            await redis_client.delete(self.risk_status_key)
-            await redis_client.delete(self.risk_events_key)
+            # Clear Redis keys; the fresh snapshot supersedes the old journal
+            await self.store.delete(self.daily_pnl_key)
+            await self.store.delete(self.risk_status_key)
+            await self.store.delete(self.risk_events_key)
+            await self.journal.snapshot(self._capture_state())
             
             self.logger.info("Daily risk counters reset for new trading day")
             
@@ -194,11 +213,9 @@ class RiskManager:
             # Update daily P&L (realized + unrealized)
             self.daily_pnl = realized_pnl + unrealized_pnl
             
-            # Persist to Redis
-            await redis_client.set(self.daily_pnl_key, str(self.daily_pnl))
-            
-            # Check risk limits
+            # Check risk limits, then journal the resulting state
             await self._check_daily_loss_limit()
+            await self._journal_state()
             
             self.logger.debug(
                 f"Daily P&L updated: ₹{self.daily_pnl:,.0f} "
@@ -247,9 +264,6 @@ class RiskManager:
                     f"Risk status changed from {previous_status.value} to {self.current_status.value}",
                     "status_change"
                 )
-                
-                # Update Redis
-                await redis_client.set(self.risk_status_key, self.current_status.value)
             
         except Exception as e:
             self.logger.error(f"Error checking daily loss limit: {e}")
@@ -270,6 +284,7 @@ class RiskManager:
             self.is_flatten_in_progress = True
             self.current_status = RiskStatus.EMERGENCY
             self.is_trading_halted = True
+            await self._journal_state()
             
             # Log critical risk event
             await self._log_risk_event(
@@ -323,6 +338,7 @@ class RiskManager:
         except Exception as e:
             self.logger.error(f"Error in auto-flatten: {e}")
             self.is_flatten_in_progress = False
+            await self._journal_state()
             raise
     
     async def check_position_limits(
@@ -400,6 +416,40 @@ class RiskManager:
             self.logger.error(f"Error checking position limits: {e}")
             return False, [f"Position check error: {str(e)}"]
     
+    async def refresh_portfolio_risk(self, available_margin: float) -> PortfolioRiskSnapshot:
+        """
+        Refresh full-book risk and flag margin utilization breaches
+        
+        Cheap enough to call on every tick; a MARGIN_BREACH event is logged
+        only when utilization crosses the limit.
+        
+        Args:
+            available_margin: Free margin reported by the broker
+            
+        Returns:
+            Latest portfolio risk snapshot
+        """
+        snapshot = self.portfolio_engine.refresh(available_margin)
+        self.last_risk_check = snapshot.timestamp
+        
+        breached = snapshot.margin_utilization_pct > self.limits.max_margin_utilization * 100
+        if breached != self.is_margin_breached:
+            self.is_margin_breached = breached
+            await self._log_risk_event(
+                StopLossType.MARGIN_BREACH,
+                RiskStatus.DANGER if breached else self.current_status,
+                f"Margin utilization {snapshot.margin_utilization_pct:.1f}% "
+                f"{'above' if breached else 'back within'} {self.limits.max_margin_utilization:.0%} limit",
+                "margin_breach" if breached else "margin_recovered",
+                metadata={
+                    "margin_used": snapshot.margin_used,
+                    "worst_case_pnl": snapshot.worst_case_pnl,
+                    "net_delta": snapshot.net_delta
+                }
+            )
+        
+        return snapshot
+    
     async def manual_flatten_all(self, reason: str = "Manual override"):
         """
         Manually trigger flatten all positions
@@ -424,6 +474,7 @@ class RiskManager:
         try:
             self.is_trading_halted = True
             self.current_status = RiskStatus.EMERGENCY
+            await self._journal_state()
             
             await self._log_risk_event(
                 StopLossType.EMERGENCY,
@@ -455,6 +506,7 @@ class RiskManager:
             
             self.is_trading_halted = False
             self.is_flatten_in_progress = False
+            await self._journal_state()
             
             await self._log_risk_event(
                 StopLossType.MANUAL,
@@ -496,21 +548,9 @@ class RiskManager:
             self.risk_events.append(event)
             
             # Persist to Redis (keep last 100 events)
-            events_data = [
-                {
-                    "timestamp": e.timestamp.isoformat(),
-                    "event_type": e.event_type.value,
-                    "severity": e.severity.value,
-                    "description": e.description,
-                    "current_pnl": e.current_pnl,
-                    "action_taken": e.action_taken,
-                    "strategy_name": e.strategy_name,
-                    "metadata": e.metadata
-                }
-                for e in self.risk_events[-100:]
-            ]
+            events_data = [self._serialize_event(e) for e in self.risk_events[-100:]]
             
-            await redis_client.set(
+            await self.store.set(
                 self.risk_events_key,
                 json.dumps(events_data),
                 ex=86400 * 7  # Keep for 7 days
@@ -519,6 +559,64 @@ class RiskManager:
         except Exception as e:
             self.logger.error(f"Error logging risk event: {e}")
     
+    async def _journal_state(self):
+        """Append the current daily counters to the state journal"""
+        try:
+            state = self._capture_state()
+            state.pop("events")
+            await self.journal.append("state", state)
+            await self.journal.maybe_snapshot(self._capture_state)
+        except Exception as e:
+            self.logger.error(f"Error journaling risk state: {e}")
+    
+    def _capture_state(self) -> Dict[str, Any]:
+        return {
+            "daily_pnl": self.daily_pnl,
+            "status": self.current_status.value,
+            "is_trading_halted": self.is_trading_halted,
+            "is_flatten_in_progress": self.is_flatten_in_progress,
+            "is_margin_breached": self.is_margin_breached,
+            "events": [self._serialize_event(e) for e in self.risk_events[-100:]]
+        }
+    
+    def _restore_state(self, state: Dict[str, Any]):
+        self.daily_pnl = float(state.get("daily_pnl", 0.0))
+        self.current_status = RiskStatus(state.get("status", RiskStatus.NORMAL.value))
+        self.is_trading_halted = state.get("is_trading_halted", False)
+        # A flatten interrupted by a restart is not running anymore; the halt stays
+        self.is_flatten_in_progress = False
+        self.is_margin_breached = state.get("is_margin_breached", False)
+        
+        if state.get("events") and not self.risk_events:
+            self.risk_events = [
+                RiskEvent(
+                    timestamp=datetime.fromisoformat(e["timestamp"]),
+                    event_type=StopLossType(e["event_type"]),
+                    severity=RiskStatus(e["severity"]),
+                    description=e["description"],
+                    current_pnl=e["current_pnl"],
+                    action_taken=e["action_taken"],
+                    position_count=e.get("position_count", 0),
+                    strategy_name=e.get("strategy_name"),
+                    metadata=e.get("metadata", {})
+                )
+                for e in state["events"]
+            ]
+    
+    @staticmethod
+    def _serialize_event(event: RiskEvent) -> Dict[str, Any]:
+        return {
+            "timestamp": event.timestamp.isoformat(),
+            "event_type": event.event_type.value,
+            "severity": event.severity.value,
+            "description": event.description,
+            "current_pnl": event.current_pnl,
+            "action_taken": event.action_taken,
+            "position_count": event.position_count,
+            "strategy_name": event.strategy_name,
+            "metadata": event.metadata
+        }
+    
     def register_flatten_callback(self, callback: Callable):
         """Register callback for auto-flatten execution"""
         self.flatten_callback = callback
@@ -546,7 +644,11 @@ class RiskManager:
                 "is_flatten_in_progress": self.is_flatten_in_progress,
                 "limits": self.limits.__dict__,
                 "last_update": self.last_risk_check.isoformat(),
-                "recent_events": len(self.risk_events)
+                "recent_events": len(self.risk_events),
+                "portfolio": (
+                    self.portfolio_engine.last_snapshot.to_dict()
+                    if self.portfolio_engine.last_snapshot else None
+                )
             }
             
         except Exception as e:
@@ -0,0 +1,436 @@
+"""
+Portfolio Risk Engine Module
+
+Vectorized full-book risk for option positions.
+Key features:
+- Positions held as column arrays (quantity, strike, expiry, greeks, margin)
+- Net delta/gamma/vega/theta per underlying in one pass
+- Scenario P&L grid over spot (±N%) and IV (±M vol points) shocks
+- Margin utilization with vectorized SPAN-style estimates
+- Sub-millisecond refresh suitable for every market tick
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+from loguru import logger
+
+from .calculator import risk_calculator
+from .span import MarginLeg
+
+
+# Default scenario shocks
+DEFAULT_SPOT_SHOCKS_PCT = np.linspace(-0.05, 0.05, 11)  # Spot ±5% in 1% steps
+DEFAULT_IV_SHOCKS = np.linspace(-5.0, 5.0, 5)           # IV ±5 vol points
+
+# Column arrays kept per position
+_FLOAT_COLUMNS = (
+    "quantity", "strike", "expiry", "ltp", "average_price", "iv",
+    "delta", "gamma", "vega", "theta", "margin", "span_pct", "exposure_pct"
+)
+
+
+@dataclass
+class PortfolioRiskSnapshot:
+    """Result of a full-book risk refresh"""
+    timestamp: datetime
+    position_count: int
+    net_delta: float
+    net_gamma: float
+    net_vega: float
+    net_theta: float
+    delta_notional: float
+    unrealized_pnl: float
+    margin_used: float
+    margin_available: float
+    margin_utilization_pct: float
+    by_underlying: Dict[str, Dict[str, float]]
+    spot_shocks_pct: np.ndarray
+    iv_shocks: np.ndarray
+    scenario_pnl: np.ndarray  # Shape (len(spot_shocks_pct), len(iv_shocks))
+    worst_case_pnl: float
+    worst_case_scenario: Dict[str, float]
+    compute_time_ms: float
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view for APIs and logs"""
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "position_count": self.position_count,
+            "net_delta": self.net_delta,
+            "net_gamma": self.net_gamma,
+            "net_vega": self.net_vega,
+            "net_theta": self.net_theta,
+            "delta_notional": self.delta_notional,
+            "unrealized_pnl": self.unrealized_pnl,
+            "margin_used": self.margin_used,
+            "margin_available": self.margin_available,
+            "margin_utilization_pct": self.margin_utilization_pct,
+            "by_underlying": self.by_underlying,
+            "spot_shocks_pct": (self.spot_shocks_pct * 100).round(2).tolist(),
+            "iv_shocks": self.iv_shocks.tolist(),
+            "scenario_pnl": self.scenario_pnl.round(2).tolist(),
+            "worst_case_pnl": self.worst_case_pnl,
+            "worst_case_scenario": self.worst_case_scenario,
+            "compute_time_ms": self.compute_time_ms,
+            "warnings": self.warnings
+        }
+
+
+class PortfolioRiskEngine:
+    """
+    Array-backed portfolio risk engine
+
+    Positions live in preallocated column arrays indexed by row; a
+    position ID maps to its row and removals swap the last row in, so
+    every refresh is a handful of numpy reductions over contiguous data.
+
+    Greeks are per unit of underlying: delta in underlying units, gamma per
+    point, vega per 1 vol point, theta per day. Scenario P&L uses a
+    delta-gamma-vega expansion around the current marks.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 256,
+        spot_shocks_pct: Optional[np.ndarray] = None,
+        iv_shocks: Optional[np.ndarray] = None,
+        max_margin_utilization: float = 0.80
+    ):
+        self.logger = logger.bind(module="portfolio_risk")
+
+        self.spot_shocks_pct = np.asarray(
+            DEFAULT_SPOT_SHOCKS_PCT if spot_shocks_pct is None else spot_shocks_pct, dtype=float
+        )
+        self.iv_shocks = np.asarray(
+            DEFAULT_IV_SHOCKS if iv_shocks is None else iv_shocks, dtype=float
+        )
+        self.max_margin_utilization = max_margin_utilization
+
+        # Row bookkeeping
+        self.size = 0
+        self.position_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+        # Column storage
+        self._capacity = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self.underlying_index = np.zeros(0, dtype=np.int32)
+        self.is_call = np.zeros(0, dtype=bool)
+        self.margin_estimated = np.zeros(0, dtype=bool)
+        self._allocate(initial_capacity)
+
+        # Underlyings
+        self.underlyings: List[str] = []
+        self.underlying_rows: Dict[str, int] = {}
+        self.spots = np.zeros(0, dtype=float)
+
+        self.last_snapshot: Optional[PortfolioRiskSnapshot] = None
+
+    def upsert_position(
+        self,
+        position_id: str,
+        underlying: str,
+        strike: float,
+        expiry: datetime,
+        option_type: str,
+        quantity: int,
+        ltp: float,
+        average_price: float,
+        delta: float = 0.0,
+        gamma: float = 0.0,
+        vega: float = 0.0,
+        theta: float = 0.0,
+        iv: float = 0.0,
+        margin: Optional[float] = None
+    ) -> int:
+        """
+        Add or replace a position
+
+        Args:
+            position_id: Unique position identifier
+            underlying: Underlying symbol (NIFTY, BANKNIFTY)
+            strike: Strike price
+            expiry: Expiry datetime
+            option_type: "CE" or "PE"
+            quantity: Signed quantity in units (negative for shorts)
+            ltp: Last traded price of the option
+            average_price: Average entry price
+            delta, gamma, vega, theta: Per-unit greeks
+            iv: Implied volatility (vol points)
+            margin: Broker-reported margin (estimated when omitted)
+
+        Returns:
+            Row index of the position
+        """
+        row = self.rows.get(position_id)
+        if row is None:
+            if self.size == self._capacity:
+                self._allocate(self._capacity * 2)
+            row = self.size
+            self.size += 1
+            self.rows[position_id] = row
+            self.position_ids.append(position_id)
+
+        underlying_row = self._underlying_row(underlying)
+        multipliers = self._margin_multipliers(underlying)
+        columns = self._columns
+
+        columns["quantity"][row] = quantity
+        columns["strike"][row] = strike
+        columns["expiry"][row] = expiry.timestamp()
+        columns["ltp"][row] = ltp
+        columns["average_price"][row] = average_price
+        columns["iv"][row] = iv
+        columns["delta"][row] = delta
+        columns["gamma"][row] = gamma
+        columns["vega"][row] = vega
+        columns["theta"][row] = theta
+        columns["margin"][row] = 0.0 if margin is None else margin
+        columns["span_pct"][row] = multipliers["span_pct"]
+        columns["exposure_pct"][row] = multipliers["exposure_pct"]
+        self.underlying_index[row] = underlying_row
+        self.is_call[row] = option_type.upper() == "CE"
+        self.margin_estimated[row] = margin is None
+
+        return row
+
+    def update_marks(
+        self,
+        position_id: str,
+        ltp: float,
+        delta: Optional[float] = None,
+        gamma: Optional[float] = None,
+        vega: Optional[float] = None,
+        theta: Optional[float] = None,
+        iv: Optional[float] = None
+    ) -> bool:
+        """Update price and greeks of an existing position"""
+        row = self.rows.get(position_id)
+        if row is None:
+            return False
+
+        columns = self._columns
+        columns["ltp"][row] = ltp
+        for name, value in (("delta", delta), ("gamma", gamma), ("vega", vega), ("theta", theta), ("iv", iv)):
+            if value is not None:
+                columns[name][row] = value
+        return True
+
+    def update_spot(self, underlying: str, spot: float) -> None:
+        """Update the underlying price used for notional and scenarios"""
+        row = self._underlying_row(underlying)  # May grow self.spots
+        self.spots[row] = spot
+
+    def remove_position(self, position_id: str) -> bool:
+        """Remove a position, moving the last row into its slot"""
+        row = self.rows.pop(position_id, None)
+        if row is None:
+            return False
+
+        last = self.size - 1
+        if row != last:
+            for column in self._columns.values():
+                column[row] = column[last]
+            self.underlying_index[row] = self.underlying_index[last]
+            self.is_call[row] = self.is_call[last]
+            self.margin_estimated[row] = self.margin_estimated[last]
+
+            moved_id = self.position_ids[last]
+            self.position_ids[row] = moved_id
+            self.rows[moved_id] = row
+
+        self.position_ids.pop()
+        self.size = last
+        return True
+
+    def clear(self) -> None:
+        """Remove all positions"""
+        self.size = 0
+        self.position_ids.clear()
+        self.rows.clear()
+
+    def refresh(self, available_margin: float) -> PortfolioRiskSnapshot:
+        """
+        Recompute full-book risk in one vectorized pass
+
+        Args:
+            available_margin: Free margin reported by the broker
+
+        Returns:
+            PortfolioRiskSnapshot (also kept as last_snapshot)
+        """
+        start = time.perf_counter()
+        n = self.size
+        c = {name: column[:n] for name, column in self._columns.items()}
+        underlying_index = self.underlying_index[:n]
+        spot = self.spots[underlying_index]
+        qty = c["quantity"]
+
+        # Position-level exposures
+        delta_exposure = qty * c["delta"]
+        gamma_exposure = qty * c["gamma"]
+        vega_exposure = qty * c["vega"]
+        theta_exposure = qty * c["theta"]
+        pnl = qty * (c["ltp"] - c["average_price"])
+        margin = self._margin(c, spot, qty)
+
+        # Net greeks per underlying
+        k = len(self.underlyings)
+        by_underlying_delta = np.bincount(underlying_index, delta_exposure, minlength=k)
+        by_underlying_gamma = np.bincount(underlying_index, gamma_exposure, minlength=k)
+        by_underlying_vega = np.bincount(underlying_index, vega_exposure, minlength=k)
+        by_underlying_theta = np.bincount(underlying_index, theta_exposure, minlength=k)
+        by_underlying_pnl = np.bincount(underlying_index, pnl, minlength=k)
+        by_underlying_margin = np.bincount(underlying_index, margin, minlength=k)
+
+        # Scenario grid: dP = delta*dS + 0.5*gamma*dS^2 + vega*dIV, with dS = spot*shock
+        delta_cash = float(np.dot(delta_exposure, spot))
+        gamma_cash = float(np.dot(gamma_exposure, spot * spot))
+        net_vega = float(vega_exposure.sum())
+        shocks = self.spot_shocks_pct
+        scenario_pnl = (
+            (delta_cash * shocks + 0.5 * gamma_cash * shocks * shocks)[:, None]
+            + net_vega * self.iv_shocks[None, :]
+        )
+
+        worst_flat = int(np.argmin(scenario_pnl))
+        worst_spot, worst_iv = np.unravel_index(worst_flat, scenario_pnl.shape)
+
+        margin_used = float(margin.sum())
+        margin_total = available_margin + margin_used
+        utilization = margin_used / margin_total * 100 if margin_total > 0 else 0.0
+
+        warnings = []
+        if utilization > self.max_margin_utilization * 100:
+            warnings.append(f"Margin utilization {utilization:.1f}% above {self.max_margin_utilization:.0%}")
+        if n and np.any(spot[self.margin_estimated[:n]] <= 0):
+            warnings.append("Missing spot price for estimated margin")
+
+        snapshot = PortfolioRiskSnapshot(
+            timestamp=datetime.now(timezone.utc),
+            position_count=n,
+            net_delta=float(delta_exposure.sum()),
+            net_gamma=float(gamma_exposure.sum()),
+            net_vega=net_vega,
+            net_theta=float(theta_exposure.sum()),
+            delta_notional=delta_cash,
+            unrealized_pnl=float(pnl.sum()),
+            margin_used=margin_used,
+            margin_available=available_margin,
+            margin_utilization_pct=utilization,
+            by_underlying={
+                name: {
+                    "spot": float(self.spots[i]),
+                    "net_delta": float(by_underlying_delta[i]),
+                    "net_gamma": float(by_underlying_gamma[i]),
+                    "net_vega": float(by_underlying_vega[i]),
+                    "net_theta": float(by_underlying_theta[i]),
+                    "unrealized_pnl": float(by_underlying_pnl[i]),
+                    "margin_used": float(by_underlying_margin[i])
+                }
+                for i, name in enumerate(self.underlyings)
+            },
+            spot_shocks_pct=shocks,
+            iv_shocks=self.iv_shocks,
+            scenario_pnl=scenario_pnl,
+            worst_case_pnl=float(scenario_pnl[worst_spot, worst_iv]),
+            worst_case_scenario={
+                "spot_shock_pct": round(float(shocks[worst_spot] * 100), 2),
+                "iv_shock": float(self.iv_shocks[worst_iv])
+            },
+            compute_time_ms=(time.perf_counter() - start) * 1000,
+            warnings=warnings
+        )
+
+        self.last_snapshot = snapshot
+        return snapshot
+
+    def margin_legs(self, underlying: str) -> List[MarginLeg]:
+        """Open positions of one underlying as margin legs (for hedge-aware sizing)"""
+        row = self.underlying_rows.get(underlying)
+        if row is None:
+            return []
+
+        n = self.size
+        c = self._columns
+        rows = np.nonzero(self.underlying_index[:n] == row)[0]
+        return [
+            MarginLeg(
+                symbol=underlying,
+                strike=float(c["strike"][i]),
+                option_type="CE" if self.is_call[i] else "PE",
+                expiry=datetime.fromtimestamp(c["expiry"][i], tz=timezone.utc).date().isoformat(),
+                quantity=int(c["quantity"][i]),
+                ltp=float(c["ltp"][i]),
+                iv=float(c["iv"][i]) / 100 if c["iv"][i] > 0 else None
+            )
+            for i in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine size and last refresh timing"""
+        return {
+            "positions": self.size,
+            "capacity": self._capacity,
+            "underlyings": list(self.underlyings),
+            "last_refresh_ms": self.last_snapshot.compute_time_ms if self.last_snapshot else None
+        }
+
+    def _margin(self, c: Dict[str, np.ndarray], spot: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        """Reported margin, or SPAN + exposure + premium for shorts and premium for longs"""
+        estimated = self.margin_estimated[:self.size]
+        if not estimated.any():
+            return c["margin"]
+
+        units = np.abs(qty)
+        premium = units * c["ltp"]
+        short = qty < 0
+        estimate = np.where(
+            short,
+            units * spot * (c["span_pct"] + c["exposure_pct"]) + premium,
+            premium
+        )
+        return np.where(estimated, estimate, c["margin"])
+
+    def _margin_multipliers(self, underlying: str) -> Dict[str, float]:
+        """Margin percentages shared with RiskCalculator"""
+        key = underlying.lower().replace("_", "")
+        if "bank" in key and "nifty" in key:
+            return risk_calculator.margin_multipliers["banknifty"]
+        return risk_calculator.margin_multipliers["nifty"]
+
+    def _underlying_row(self, underlying: str) -> int:
+        row = self.underlying_rows.get(underlying)
+        if row is None:
+            row = len(self.underlyings)
+            self.underlyings.append(underlying)
+            self.underlying_rows[underlying] = row
+            self.spots = np.append(self.spots, 0.0)
+        return row
+
+    def _allocate(self, capacity: int) -> None:
+        """Grow column arrays to at least `capacity` rows"""
+        capacity = max(capacity, 1)
+        n = self.size
+
+        for name in _FLOAT_COLUMNS:
+            column = np.zeros(capacity, dtype=float)
+            if name in self._columns:
+                column[:n] = self._columns[name][:n]
+            self._columns[name] = column
+
+        for attr, dtype in (("underlying_index", np.int32), ("is_call", bool), ("margin_estimated", bool)):
+            column = np.zeros(capacity, dtype=dtype)
+            column[:n] = getattr(self, attr)[:n]
+            setattr(self, attr, column)
+
+        self._capacity = capacity
+
+
+# Global instance
+portfolio_risk_engine = PortfolioRiskEngine()
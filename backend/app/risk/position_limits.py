@@ -6,15 +6,19 @@ and per-strategy controls, real-time monitoring, and violation alerts.
 """
 
 import asyncio
+import heapq
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Set, Any, Tuple
 from uuid import uuid4
 
 from loguru import logger
 from app.cache.redis import RedisManager
+from app.cache.state_journal import StateJournal
 from app.core.exceptions import PositionLimitError, RiskLimitExceededError
+from app.risk.span import span_margin_engine
+from app.utils.market_hours import IST
 
 
 class LimitType(Enum):
@@ -91,6 +95,7 @@ class PositionLimitsManager:
     - Soft/hard/emergency limit thresholds
     - Violation tracking and alerts
     - Automatic position reduction on violations
+    - Utilization heap with immediate emergency detection on updates
     """
     
     def __init__(
@@ -99,9 +104,11 @@ class PositionLimitsManager:
         default_per_signal_limit: int = 10,
         default_per_strategy_limit: int = 50,
         default_per_symbol_limit: int = 100,
-        default_portfolio_limit: int = 500
+        default_portfolio_limit: int = 500,
+        broker_client: Optional[Any] = None
     ):
         self.redis = redis_manager
+        self.broker_client = broker_client
         
         # Default limits from PRD requirements
         self.default_limits = {
@@ -126,6 +133,17 @@ class PositionLimitsManager:
         self.violations: List[LimitViolation] = []
         self.violation_callbacks: List[Any] = []
         
+        # Utilization index: max-heap of (-utilization, version, limit_key) with lazy deletion
+        self._utilization_heap: List[Tuple[float, int, str]] = []
+        self._heap_versions: Dict[str, int] = {}
+        self._emergency_breached: Set[str] = set()
+        
+        # Warm-restart persistence (snapshot + journal of limit deltas)
+        self.journal = StateJournal(redis_manager, "position_limits")
+        
+        # IST trading date the current quantities belong to
+        self.trading_date: Optional[date] = None
+        
         # Monitoring
         self.is_monitoring = False
         self.monitor_task: Optional[asyncio.Task] = None
@@ -145,8 +163,12 @@ class PositionLimitsManager:
         
         self.is_monitoring = True
         
-        # Load existing limits from Redis
+        # Load existing limits from Redis; quantities from an earlier trading
+        # day are reset, then open positions are re-read from the broker
         await self._load_limits_from_redis()
+        await self.roll_trading_day(datetime.now(IST).date())
+        if self.broker_client:
+            await self.reconcile_from_broker()
         
         # Start monitoring task
         self.monitor_task = asyncio.create_task(
@@ -360,24 +382,28 @@ class PositionLimitsManager:
                 signal_limit.current_quantity = max(0, signal_limit.current_quantity + quantity_change)
                 signal_limit.updated_at = datetime.utcnow()
                 self.current_positions["by_signal"][signal_id] = signal_limit.current_quantity
+                await self._on_limit_updated(signal_limit, order_id)
             
             # Update per-strategy position
             strategy_limit = await self._get_or_create_limit(LimitType.PER_STRATEGY, strategy_id)
             strategy_limit.current_quantity = max(0, strategy_limit.current_quantity + quantity_change)
             strategy_limit.updated_at = datetime.utcnow()
             self.current_positions["by_strategy"][strategy_id] = strategy_limit.current_quantity
+            await self._on_limit_updated(strategy_limit, order_id)
             
             # Update per-symbol position
             symbol_limit = await self._get_or_create_limit(LimitType.PER_SYMBOL, symbol)
             symbol_limit.current_quantity = max(0, symbol_limit.current_quantity + quantity_change)
             symbol_limit.updated_at = datetime.utcnow()
             self.current_positions["by_symbol"][symbol] = symbol_limit.current_quantity
+            await self._on_limit_updated(symbol_limit, order_id)
             
             # Update total portfolio position
             portfolio_limit = await self._get_or_create_limit(LimitType.TOTAL_PORTFOLIO, "total")
             portfolio_limit.current_quantity = max(0, portfolio_limit.current_quantity + quantity_change)
             portfolio_limit.updated_at = datetime.utcnow()
             self.current_positions["total_portfolio"]["total"] = portfolio_limit.current_quantity
+            await self._on_limit_updated(portfolio_limit, order_id)
             
             logger.info(
                 "Position updated: {} lots {} (signal: {}, strategy: {}, symbol: {})",
@@ -397,8 +423,11 @@ class PositionLimitsManager:
                 }
             )
             
-            # Save updated positions to Redis
-            await self._save_positions_to_redis()
+            # Journal the touched limits for warm restart
+            touched = [strategy_limit, symbol_limit, portfolio_limit]
+            if signal_id:
+                touched.append(signal_limit)
+            await self._journal_limits(touched, order_id)
             
         except Exception as e:
             logger.error(
@@ -441,6 +470,7 @@ class PositionLimitsManager:
         )
         
         self.position_limits[limit_key] = limit
+        await self._on_limit_updated(limit)
         
         logger.info(
             "Custom limit set: {} {} = {} lots (soft: {:.1%}, hard: {:.1%})",
@@ -451,7 +481,7 @@ class PositionLimitsManager:
             hard_threshold
         )
         
-        await self._save_limits_to_redis()
+        await self._journal_limits([limit])
     
     async def _get_or_create_limit(self, limit_type: LimitType, entity_id: str) -> PositionLimit:
         """Get existing limit or create with default values."""
@@ -509,47 +539,147 @@ class PositionLimitsManager:
             except Exception as e:
                 logger.error("Violation callback error: {}", str(e))
     
+    @staticmethod
+    def _limit_key(limit: PositionLimit) -> str:
+        return f"{limit.limit_type.value}:{limit.entity_id}"
+    
+    @staticmethod
+    def _utilization(limit: PositionLimit) -> float:
+        return limit.current_quantity / limit.max_quantity if limit.max_quantity > 0 else 0.0
+    
+    def _index_limit(self, limit_key: str, limit: PositionLimit) -> float:
+        """Push a limit's current utilization onto the heap (older entries go stale)."""
+        utilization = self._utilization(limit)
+        version = self._heap_versions.get(limit_key, 0) + 1
+        self._heap_versions[limit_key] = version
+        heapq.heappush(self._utilization_heap, (-utilization, version, limit_key))
+        
+        # Compact once stale entries dominate
+        if len(self._utilization_heap) > 4 * len(self._heap_versions) + 64:
+            self._rebuild_utilization_heap()
+        
+        return utilization
+    
+    def _rebuild_utilization_heap(self) -> None:
+        """Rebuild the heap from current limits, dropping stale entries."""
+        self._heap_versions = {key: 1 for key in self.position_limits}
+        self._utilization_heap = [
+            (-self._utilization(limit), 1, key)
+            for key, limit in self.position_limits.items()
+        ]
+        heapq.heapify(self._utilization_heap)
+    
+    def get_top_utilization(self, count: int = 5) -> List[Tuple[str, float]]:
+        """Most utilized active limits, highest first."""
+        top = []
+        seen = set()
+        # Enough entries to skip every stale one
+        window = count + len(self._utilization_heap) - len(self._heap_versions)
+        for negative_utilization, version, limit_key in heapq.nsmallest(
+            window, self._utilization_heap
+        ):
+            limit = self.position_limits.get(limit_key)
+            if (
+                limit_key in seen
+                or limit is None
+                or not limit.is_active
+                or self._heap_versions.get(limit_key) != version
+            ):
+                continue
+            seen.add(limit_key)
+            top.append((limit_key, -negative_utilization))
+            if len(top) == count:
+                break
+        return top
+    
+    async def _on_limit_updated(self, limit: PositionLimit, order_id: Optional[str] = None) -> None:
+        """Re-index a limit and fire emergency handling the moment it crosses the threshold."""
+        limit_key = self._limit_key(limit)
+        utilization = self._index_limit(limit_key, limit)
+        
+        if not limit.is_active or utilization < limit.emergency_threshold:
+            # Re-arm once back below the emergency threshold
+            self._emergency_breached.discard(limit_key)
+            return
+        
+        if limit_key in self._emergency_breached:
+            return
+        
+        self._emergency_breached.add(limit_key)
+        await self._handle_emergency(limit, utilization, order_id)
+    
+    async def _handle_emergency(
+        self,
+        limit: PositionLimit,
+        utilization: float,
+        order_id: Optional[str] = None
+    ) -> None:
+        """Log and record an emergency-threshold breach."""
+        logger.critical(
+            "EMERGENCY: {} limit {} at {:.1%} utilization ({} / {})",
+            limit.limit_type.value,
+            limit.entity_id,
+            utilization,
+            limit.current_quantity,
+            limit.max_quantity,
+            extra={
+                "type": limit.limit_type.value,
+                "entity": limit.entity_id,
+                "current": limit.current_quantity,
+                "limit": limit.max_quantity,
+                "utilization": utilization,
+                "order_id": order_id
+            }
+        )
+        
+        await self._record_violation(
+            violation_type=LimitViolationType.EMERGENCY_LIMIT,
+            limit_type=limit.limit_type,
+            entity_id=limit.entity_id,
+            current_quantity=limit.current_quantity,
+            limit_quantity=limit.max_quantity,
+            order_id=order_id
+        )
+    
     async def _monitoring_loop(self) -> None:
-        """Main monitoring loop for position limits."""
+        """
+        Consistency sweep for position limits.
+        
+        Emergency breaches fire from update_position; this loop only
+        rebuilds the utilization heap and catches any breach missed by the
+        update path (e.g. limits edited in place).
+        """
         logger.info("Position limits monitoring started")
         
         while self.is_monitoring:
             try:
-                await asyncio.sleep(60.0)  # Check every minute
+                await asyncio.sleep(60.0)  # Sweep every minute
                 
-                # Check for emergency violations
-                emergency_violations = []
+                if await self.roll_trading_day(datetime.now(IST).date()) and self.broker_client:
+                    await self.reconcile_from_broker()
                 
+                self._rebuild_utilization_heap()
+                
+                missed = 0
                 for limit_key, limit in self.position_limits.items():
-                    if not limit.is_active:
-                        continue
-                    
-                    utilization = limit.current_quantity / limit.max_quantity
-                    
-                    if utilization >= limit.emergency_threshold:
-                        emergency_violations.append({
-                            "limit": limit,
-                            "utilization": utilization
-                        })
+                    utilization = self._utilization(limit)
+                    if not limit.is_active or utilization < limit.emergency_threshold:
+                        self._emergency_breached.discard(limit_key)
+                    elif limit_key not in self._emergency_breached:
+                        self._emergency_breached.add(limit_key)
+                        await self._handle_emergency(limit, utilization)
+                        missed += 1
                 
-                if emergency_violations:
-                    logger.critical(
-                        "EMERGENCY: {} position limits exceeded emergency threshold",
-                        len(emergency_violations),
-                        extra={
-                            "violations": [
-                                {
-                                    "type": v["limit"].limit_type.value,
-                                    "entity": v["limit"].entity_id,
-                                    "current": v["limit"].current_quantity,
-                                    "limit": v["limit"].max_quantity,
-                                    "utilization": v["utilization"]
-                                }
-                                for v in emergency_violations
-                            ]
-                        }
+                if missed:
+                    logger.warning(
+                        "Consistency sweep found {} emergency breaches missed by the update path",
+                        missed
                     )
                 
+                # Compact the journal into a snapshot
+                if self.journal.entries_since_snapshot:
+                    await self._save_limits_to_redis()
+                
                 # Log position utilization summary
                 summary = self._get_utilization_summary()
                 logger.debug("Position limits utilization: {}", summary)
@@ -577,53 +707,239 @@ class PositionLimitsManager:
         return summary
     
     async def _load_limits_from_redis(self) -> None:
-        """Load position limits from Redis."""
+        """Restore limits from the latest snapshot and replay the journal."""
         try:
-            limits_data = await self.redis.get("position_limits")
-            if limits_data:
-                # TODO: Deserialize and load limits
-                pass
+            state, entries = await self.journal.load()
+            
+            trading_date = (state or {}).get("trading_date")
+            self.trading_date = date.fromisoformat(trading_date) if trading_date else None
+            
+            # Mutate in place: the pre-trade gate may share this dict
+            self.position_limits.clear()
+            for data in (state or {}).get("limits", []):
+                limit = self._deserialize_limit(data)
+                self.position_limits[self._limit_key(limit)] = limit
+            
+            for op, data in entries:
+                if op == "limits":
+                    for limit_data in data["limits"]:
+                        limit = self._deserialize_limit(limit_data)
+                        self.position_limits[self._limit_key(limit)] = limit
+            
+            self._rebuild_current_positions()
+            self._rebuild_utilization_heap()
+            
+            # Breaches carried over from before the restart are already known
+            self._emergency_breached = {
+                key for key, limit in self.position_limits.items()
+                if limit.is_active and self._utilization(limit) >= limit.emergency_threshold
+            }
+            if self._emergency_breached:
+                logger.warning(
+                    "Restored {} limits above emergency threshold: {}",
+                    len(self._emergency_breached),
+                    sorted(self._emergency_breached)
+                )
+            
+            logger.info(
+                "Position limits restored: {} limits ({} journal entries replayed)",
+                len(self.position_limits),
+                len(entries)
+            )
             
-            positions_data = await self.redis.get("current_positions")
-            if positions_data:
-                # TODO: Deserialize and load positions
-                pass
-                
         except Exception as e:
             logger.warning("Failed to load limits from Redis: {}", str(e))
     
     async def _save_limits_to_redis(self) -> None:
-        """Save position limits to Redis."""
+        """Write a compact snapshot of all limits (supersedes the journal)."""
         try:
-            limits_data = {
-                limit_key: {
-                    "limit_type": limit.limit_type.value,
-                    "entity_id": limit.entity_id,
-                    "max_quantity": limit.max_quantity,
-                    "current_quantity": limit.current_quantity,
-                    "soft_limit_threshold": limit.soft_limit_threshold,
-                    "hard_limit_threshold": limit.hard_limit_threshold,
-                    "is_active": limit.is_active,
-                    "updated_at": limit.updated_at.isoformat()
-                }
-                for limit_key, limit in self.position_limits.items()
-            }
-            
-            await self.redis.set("position_limits", limits_data, ttl=timedelta(days=7))
-            
+            await self.journal.snapshot(self._capture_state())
         except Exception as e:
             logger.error("Failed to save limits to Redis: {}", str(e))
     
-    async def _save_positions_to_redis(self) -> None:
-        """Save current positions to Redis."""
+    async def _journal_limits(self, limits: List[PositionLimit], order_id: Optional[str] = None) -> None:
+        """Append changed limits to the journal, snapshotting when due."""
         try:
-            await self.redis.set(
-                "current_positions",
-                self.current_positions,
-                ttl=timedelta(days=1)
-            )
+            await self.journal.append("limits", {
+                "limits": [self._serialize_limit(limit) for limit in limits],
+                "order_id": order_id
+            })
+            await self.journal.maybe_snapshot(self._capture_state)
         except Exception as e:
-            logger.error("Failed to save positions to Redis: {}", str(e))
+            logger.error("Failed to journal position limits: {}", str(e))
+    
+    async def roll_trading_day(self, trading_date: date) -> bool:
+        """
+        Start a new trading day, resetting intraday quantities on every limit.
+        
+        Configured maxima and thresholds are kept; carried-over positions are
+        restored by reconcile_from_broker.
+        
+        Args:
+            trading_date: IST trading date now in effect
+            
+        Returns:
+            True if the day rolled over
+        """
+        if self.trading_date == trading_date:
+            return False
+        
+        previous_date = self.trading_date
+        self.trading_date = trading_date
+        if not self.position_limits:
+            return previous_date is not None
+        
+        now = datetime.utcnow()
+        for limit in self.position_limits.values():
+            limit.current_quantity = 0
+            limit.updated_at = now
+        self._emergency_breached.clear()
+        self._rebuild_current_positions()
+        self._rebuild_utilization_heap()
+        await self._save_limits_to_redis()
+        
+        logger.info(
+            "Position limits rolled to {} (quantities from {} reset)",
+            trading_date,
+            previous_date or "an undated snapshot"
+        )
+        return True
+    
+    async def reconcile_from_broker(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Reconcile per-symbol quantities with the broker's open positions.
+        
+        Broker rows name contracts (e.g. "NIFTY-Jan2024-24000-CE"); their lots
+        are summed per underlying, the symbol update_position is keyed by.
+        
+        Raises:
+            PositionLimitError: If an open position's underlying has no known lot size
+        """
+        try:
+            positions = await self.broker_client.get_positions()
+        except Exception as e:
+            logger.error("Failed to fetch broker positions for reconciliation: {}", str(e))
+            return {}
+        
+        quantities: Dict[str, int] = {}
+        for position in positions:
+            trading_symbol = position.get("tradingSymbol")
+            net_quantity = abs(int(position.get("netQty", 0)))
+            if not (trading_symbol and net_quantity):
+                continue
+            try:
+                symbol = span_margin_engine.resolve_underlying(trading_symbol)
+                lot_size = span_margin_engine.lot_size(symbol)
+            except KeyError:
+                raise PositionLimitError(
+                    f"Cannot reconcile {trading_symbol}: unknown lot size",
+                    details={"trading_symbol": trading_symbol, "net_quantity": net_quantity}
+                )
+            quantities[symbol] = quantities.get(symbol, 0) + net_quantity // lot_size
+        
+        return await self.reconcile_with_broker(quantities)
+    
+    async def reconcile_with_broker(self, broker_symbol_quantities: Dict[str, int]) -> Dict[str, Tuple[int, int]]:
+        """
+        Correct per-symbol and portfolio quantities after a warm restart.
+        
+        Args:
+            broker_symbol_quantities: Open lots per symbol reported by the broker
+            
+        Returns:
+            Corrections as {symbol: (restored_quantity, broker_quantity)}
+        """
+        corrections = {}
+        symbols = set(broker_symbol_quantities) | set(self.current_positions["by_symbol"])
+        
+        for symbol in symbols:
+            broker_quantity = broker_symbol_quantities.get(symbol, 0)
+            restored_quantity = self.current_positions["by_symbol"].get(symbol, 0)
+            if broker_quantity != restored_quantity:
+                corrections[symbol] = (restored_quantity, broker_quantity)
+        
+        if not corrections:
+            logger.info("Position limits reconciled with broker: no differences")
+            return corrections
+        
+        touched = []
+        for symbol, (_, broker_quantity) in corrections.items():
+            symbol_limit = await self._get_or_create_limit(LimitType.PER_SYMBOL, symbol)
+            symbol_limit.current_quantity = broker_quantity
+            symbol_limit.updated_at = datetime.utcnow()
+            touched.append(symbol_limit)
+        
+        portfolio_limit = await self._get_or_create_limit(LimitType.TOTAL_PORTFOLIO, "total")
+        portfolio_limit.current_quantity = sum(
+            limit.current_quantity for limit in self.position_limits.values()
+            if limit.limit_type == LimitType.PER_SYMBOL
+        )
+        portfolio_limit.updated_at = datetime.utcnow()
+        touched.append(portfolio_limit)
+        
+        for limit in touched:
+            await self._on_limit_updated(limit)
+        self._rebuild_current_positions()
+        await self._journal_limits(touched)
+        
+        logger.warning(
+            "Position limits reconciled with broker: {} symbol corrections",
+            len(corrections),
+            extra={"corrections": corrections}
+        )
+        
+        return corrections
+    
+    def _capture_state(self) -> Dict[str, Any]:
+        return {
+            "limits": [self._serialize_limit(limit) for limit in self.position_limits.values()],
+            "trading_date": self.trading_date.isoformat() if self.trading_date else None
+        }
+    
+    def _rebuild_current_positions(self) -> None:
+        """Derive the current_positions view from limit quantities."""
+        by_type = {
+            LimitType.PER_SIGNAL: "by_signal",
+            LimitType.PER_STRATEGY: "by_strategy",
+            LimitType.PER_SYMBOL: "by_symbol"
+        }
+        positions = {"by_signal": {}, "by_strategy": {}, "by_symbol": {}, "total_portfolio": {"total": 0}}
+        for limit in self.position_limits.values():
+            if limit.limit_type in by_type:
+                positions[by_type[limit.limit_type]][limit.entity_id] = limit.current_quantity
+            elif limit.limit_type == LimitType.TOTAL_PORTFOLIO:
+                positions["total_portfolio"]["total"] = limit.current_quantity
+        self.current_positions = positions
+    
+    @staticmethod
+    def _serialize_limit(limit: PositionLimit) -> Dict[str, Any]:
+        return {
+            "limit_type": limit.limit_type.value,
+            "entity_id": limit.entity_id,
+            "max_quantity": limit.max_quantity,
+            "current_quantity": limit.current_quantity,
+            "soft_limit_threshold": limit.soft_limit_threshold,
+            "hard_limit_threshold": limit.hard_limit_threshold,
+            "emergency_threshold": limit.emergency_threshold,
+            "is_active": limit.is_active,
+            "created_at": limit.created_at.isoformat(),
+            "updated_at": limit.updated_at.isoformat()
+        }
+    
+    @staticmethod
+    def _deserialize_limit(data: Dict[str, Any]) -> PositionLimit:
+        return PositionLimit(
+            limit_type=LimitType(data["limit_type"]),
+            entity_id=data["entity_id"],
+            max_quantity=data["max_quantity"],
+            current_quantity=data["current_quantity"],
+            soft_limit_threshold=data["soft_limit_threshold"],
+            hard_limit_threshold=data["hard_limit_threshold"],
+            emergency_threshold=data.get("emergency_threshold", 1.2),
+            is_active=data.get("is_active", True),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"])
+        )
     
     def add_violation_callback(self, callback: Any) -> None:
         """Add a callback for limit violations."""
@@ -636,5 +952,7 @@ class PositionLimitsManager:
             "total_violations": len(self.violations),
             "current_positions": self.current_positions,
             "utilization_summary": self._get_utilization_summary(),
+            "top_utilization": self.get_top_utilization(),
+            "emergency_breaches": sorted(self._emergency_breached),
             "default_limits": {k.value: v for k, v in self.default_limits.items()}
         } 
\ No newline at end of file
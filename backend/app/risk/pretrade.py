@@ -0,0 +1,363 @@
+"""
+Pre-Trade Risk Gate Module
+
+Consolidated, synchronous pre-trade risk checks.
+Key features:
+- Single call evaluating every pre-trade rule against in-memory state
+- Position limits shared with PositionLimitsManager (no Redis on the hot path)
+- Exposure updated incrementally on fills
+- Per-rule timing breakdown in microseconds
+"""
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Callable, Any, Tuple
+
+from loguru import logger
+
+from .calculator import risk_calculator
+from .circuit_breaker import circuit_breaker
+from .manager import risk_manager, RiskStatus
+from .portfolio import portfolio_risk_engine
+from .position_limits import LimitType, PositionLimit
+
+
+class PreTradeRule(Enum):
+    """Rules evaluated by the pre-trade gate (in evaluation order)"""
+    TRADING_STATE = "trading_state"
+    CIRCUIT_BREAKER = "circuit_breaker"
+    DAILY_LOSS = "daily_loss"
+    PRICE = "price"
+    LOTS_PER_SIGNAL = "lots_per_signal"
+    STRATEGY_LOTS = "strategy_lots"
+    POSITION_LIMITS = "position_limits"
+    OPEN_ORDERS = "open_orders"
+    CONCENTRATION = "concentration"
+    MARGIN = "margin"
+
+
+@dataclass(slots=True)
+class PreTradeCheck:
+    """Order attributes needed by the pre-trade gate"""
+    symbol: str
+    strategy_id: str
+    lots: int
+    price: Optional[float] = None
+    signal_id: Optional[str] = None
+    order_value: float = 0.0
+    side: int = 1  # 1 for buys, -1 for sells
+    position_lots: int = 0  # Signed lots the strategy already holds in this contract
+
+    @property
+    def exposure_lots(self) -> int:
+        """Change in gross lots if the order fills (negative when it reduces the position)"""
+        return abs(self.position_lots + self.side * self.lots) - abs(self.position_lots)
+
+
+@dataclass
+class PreTradeResult:
+    """Outcome of a pre-trade evaluation"""
+    allowed: bool
+    failed_rule: Optional[PreTradeRule] = None
+    reasons: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    rule_timings_us: Dict[str, float] = field(default_factory=dict)
+    total_time_us: float = 0.0
+
+
+class PreTradeRiskGate:
+    """
+    In-memory pre-trade risk gate
+
+    Features:
+    - Trading halt, risk status and circuit breaker checks
+    - Daily loss, price sanity and lot-size rules from RiskCalculator
+    - Signal/strategy/symbol/portfolio limits from PositionLimitsManager
+    - Open order, concentration and margin utilization rules
+    - Size, limit, concentration and margin rules only bind orders that
+      add exposure, so reduce-only exits always pass them
+    - Every rule timed; all rules evaluated so the breakdown is complete
+    """
+
+    def __init__(self):
+        self.logger = logger.bind(module="pretrade_gate")
+
+        # Position limits (shared with PositionLimitsManager once attached)
+        self.limits_manager = None
+        self.position_limits: Dict[str, PositionLimit] = {}
+        self.default_limits: Dict[LimitType, int] = {
+            LimitType.PER_SIGNAL: risk_calculator.max_lots_per_signal,
+            LimitType.PER_STRATEGY: risk_calculator.max_total_lots,
+            LimitType.PER_SYMBOL: 100,
+            LimitType.TOTAL_PORTFOLIO: 500
+        }
+
+        # Exposure snapshot (updated on fills)
+        self.strategy_lots: Dict[str, int] = defaultdict(int)
+        self.symbol_value: Dict[str, float] = defaultdict(float)
+        self.total_value = 0.0
+
+        # Open order count source (e.g. the order store)
+        self.open_orders_source: Optional[Callable[[], int]] = None
+
+        self.stats = {
+            "evaluations": 0,
+            "rejections": 0,
+            "total_time_us": 0.0,
+            "max_time_us": 0.0
+        }
+        self.rejections_by_rule: Dict[str, int] = defaultdict(int)
+
+        self._rules: Tuple[Tuple[PreTradeRule, Callable], ...] = (
+            (PreTradeRule.TRADING_STATE, self._check_trading_state),
+            (PreTradeRule.CIRCUIT_BREAKER, self._check_circuit_breaker),
+            (PreTradeRule.DAILY_LOSS, self._check_daily_loss),
+            (PreTradeRule.PRICE, self._check_price),
+            (PreTradeRule.LOTS_PER_SIGNAL, self._check_lots_per_signal),
+            (PreTradeRule.STRATEGY_LOTS, self._check_strategy_lots),
+            (PreTradeRule.POSITION_LIMITS, self._check_position_limits),
+            (PreTradeRule.OPEN_ORDERS, self._check_open_orders),
+            (PreTradeRule.CONCENTRATION, self._check_concentration),
+            (PreTradeRule.MARGIN, self._check_margin),
+        )
+
+    def attach_limits_manager(self, limits_manager) -> None:
+        """
+        Share limits with a PositionLimitsManager
+
+        The manager's limit objects are read in place, so position updates
+        and custom limits are visible to the gate without any copying.
+        """
+        self.limits_manager = limits_manager
+        self.position_limits = limits_manager.position_limits
+        self.default_limits = limits_manager.default_limits
+        self.logger.info(f"Pre-trade gate attached to position limits ({len(self.position_limits)} limits)")
+
+    def register_open_orders_source(self, source: Callable[[], int]) -> None:
+        """Register a callable returning the current open order count"""
+        self.open_orders_source = source
+
+    def on_fill(
+        self,
+        symbol: str,
+        strategy_id: str,
+        lots_change: int,
+        value_change: float = 0.0,
+        signal_id: Optional[str] = None
+    ) -> None:
+        """
+        Apply a fill to the exposure snapshot
+
+        Args:
+            symbol: Trading symbol
+            strategy_id: Strategy ID
+            lots_change: Lots added (positive) or closed (negative)
+            value_change: Change in absolute position value
+            signal_id: Signal ID (if applicable)
+        """
+        self.strategy_lots[strategy_id] = max(0, self.strategy_lots[strategy_id] + lots_change)
+
+        symbol_value = max(0.0, self.symbol_value[symbol] + value_change)
+        self.total_value += symbol_value - self.symbol_value[symbol]
+        self.symbol_value[symbol] = symbol_value
+
+        # Without a limits manager the gate keeps limit quantities itself
+        if self.limits_manager is None:
+            for limit in self._limits_for(symbol, strategy_id, signal_id):
+                limit.current_quantity = max(0, limit.current_quantity + lots_change)
+
+    def evaluate(self, check: PreTradeCheck) -> PreTradeResult:
+        """
+        Evaluate all pre-trade rules synchronously
+
+        Args:
+            check: Order attributes
+
+        Returns:
+            PreTradeResult with the first failing rule, reasons, warnings and timings
+        """
+        result = PreTradeResult(allowed=True)
+        perf_counter_ns = time.perf_counter_ns
+        start = perf_counter_ns()
+
+        for rule, rule_check in self._rules:
+            rule_start = perf_counter_ns()
+            reason = rule_check(check, result.warnings)
+            result.rule_timings_us[rule.value] = (perf_counter_ns() - rule_start) / 1000
+
+            if reason:
+                if result.allowed:
+                    result.allowed = False
+                    result.failed_rule = rule
+                result.reasons.append(reason)
+
+        result.total_time_us = (perf_counter_ns() - start) / 1000
+
+        self.stats["evaluations"] += 1
+        self.stats["total_time_us"] += result.total_time_us
+        self.stats["max_time_us"] = max(self.stats["max_time_us"], result.total_time_us)
+
+        if not result.allowed:
+            self.stats["rejections"] += 1
+            self.rejections_by_rule[result.failed_rule.value] += 1
+            self.logger.warning(
+                f"Pre-trade check failed for {check.strategy_id} {check.symbol} "
+                f"{check.lots} lots: {'; '.join(result.reasons)}",
+                extra={
+                    "strategy": check.strategy_id,
+                    "symbol": check.symbol,
+                    "lots": check.lots,
+                    "failed_rule": result.failed_rule.value,
+                    "rule_timings_us": result.rule_timings_us
+                }
+            )
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Evaluation counts and timing"""
+        evaluations = self.stats["evaluations"]
+        return {
+            **self.stats,
+            "avg_time_us": self.stats["total_time_us"] / evaluations if evaluations else 0.0,
+            "rejections_by_rule": dict(self.rejections_by_rule),
+            "limits_attached": self.limits_manager is not None
+        }
+
+    # Rules return a rejection reason, or None to pass (warnings are appended)
+
+    def _check_trading_state(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        if risk_manager.is_trading_halted:
+            return "Trading is halted due to risk limits"
+        if risk_manager.current_status in (RiskStatus.EMERGENCY, RiskStatus.LOCKED):
+            return f"Trading blocked due to risk status: {risk_manager.current_status.value}"
+        if risk_manager.current_status == RiskStatus.DANGER:
+            warnings.append("Trading in DANGER zone - position will be monitored closely")
+        return None
+
+    def _check_circuit_breaker(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        allowed, reasons = circuit_breaker.is_trading_allowed()
+        if not allowed:
+            return f"Circuit breaker active: {', '.join(reasons)}"
+        return None
+
+    def _check_daily_loss(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        if risk_manager.daily_pnl <= -risk_manager.limits.daily_loss_limit:
+            return f"Daily loss limit reached: ₹{risk_manager.daily_pnl:,.0f}"
+        return None
+
+    def _check_price(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        if check.price is not None and check.price <= 0:
+            return "Invalid price: must be positive"
+        return None
+
+    def _check_lots_per_signal(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        if check.exposure_lots <= 0:
+            return None
+        if check.lots > risk_calculator.max_lots_per_signal:
+            return f"Exceeds max lots per signal: {check.lots} > {risk_calculator.max_lots_per_signal}"
+        if 0 < check.lots < risk_calculator.min_lots_per_signal:
+            return f"Below minimum lots per signal: {check.lots} < {risk_calculator.min_lots_per_signal}"
+        return None
+
+    def _check_strategy_lots(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        added_lots = check.exposure_lots
+        if added_lots <= 0:
+            return None
+        total = self.strategy_lots.get(check.strategy_id, 0) + added_lots
+        if total > risk_calculator.max_total_lots:
+            return f"Exceeds total lots limit: {total} > {risk_calculator.max_total_lots}"
+        return None
+
+    def _check_position_limits(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        added_lots = check.exposure_lots
+        if added_lots <= 0:
+            return None
+        violations = []
+        for limit_type, entity_id in self._limit_keys(check.symbol, check.strategy_id, check.signal_id):
+            limit = self.position_limits.get(f"{limit_type.value}:{entity_id}")
+            if limit is None:
+                current, max_quantity, soft, hard = 0, self.default_limits.get(limit_type, 100), 0.8, 1.0
+            elif not limit.is_active:
+                continue
+            else:
+                current, max_quantity = limit.current_quantity, limit.max_quantity
+                soft, hard = limit.soft_limit_threshold, limit.hard_limit_threshold
+
+            proposed = current + added_lots
+            if proposed > max_quantity * hard:
+                violations.append(f"{limit_type.value}: {proposed} > {max_quantity} ({entity_id})")
+            elif proposed > max_quantity * soft:
+                warnings.append(f"Approaching {limit_type.value} limit: {proposed}/{max_quantity} ({entity_id})")
+
+        if violations:
+            return f"Order would exceed position limits: {'; '.join(violations)}"
+        return None
+
+    def _check_open_orders(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        if self.open_orders_source is None:
+            return None
+        open_orders = self.open_orders_source()
+        if open_orders >= risk_manager.limits.max_open_orders:
+            return f"Too many open orders: {open_orders} >= {risk_manager.limits.max_open_orders}"
+        return None
+
+    def _check_concentration(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        # Only the order's own symbol is judged, and only when its share grows
+        added_lots = check.exposure_lots
+        if added_lots <= 0 or check.lots <= 0:
+            return None
+
+        # A single-symbol book is trivially concentrated; only compare across symbols
+        held = sum(1 for value in self.symbol_value.values() if value > 0)
+        if held == 0 or (held == 1 and self.symbol_value.get(check.symbol, 0.0) > 0):
+            return None
+
+        added_value = check.order_value * added_lots / check.lots
+        symbol_value = self.symbol_value.get(check.symbol, 0.0) + added_value
+        concentration = symbol_value / (self.total_value + added_value)
+        if concentration > 0.50:  # Hard limit at 50%
+            return f"Concentration too high: {concentration:.1%}"
+        if concentration > risk_manager.limits.position_concentration_limit:
+            warnings.append(f"High concentration risk: {concentration:.1%}")
+        return None
+
+    def _check_margin(self, check: PreTradeCheck, warnings: List[str]) -> Optional[str]:
+        snapshot = portfolio_risk_engine.last_snapshot
+        if snapshot is None or check.exposure_lots <= 0:
+            return None
+        if snapshot.margin_utilization_pct > risk_manager.limits.max_margin_utilization * 100:
+            return f"Margin utilization too high: {snapshot.margin_utilization_pct:.1f}%"
+        return None
+
+    @staticmethod
+    def _limit_keys(symbol: str, strategy_id: str, signal_id: Optional[str]) -> List[Tuple[LimitType, str]]:
+        keys = [
+            (LimitType.PER_STRATEGY, strategy_id),
+            (LimitType.PER_SYMBOL, symbol),
+            (LimitType.TOTAL_PORTFOLIO, "total")
+        ]
+        if signal_id:
+            keys.insert(0, (LimitType.PER_SIGNAL, signal_id))
+        return keys
+
+    def _limits_for(self, symbol: str, strategy_id: str, signal_id: Optional[str]) -> List[PositionLimit]:
+        """Get or create locally kept limits touched by a fill"""
+        limits = []
+        for limit_type, entity_id in self._limit_keys(symbol, strategy_id, signal_id):
+            key = f"{limit_type.value}:{entity_id}"
+            limit = self.position_limits.get(key)
+            if limit is None:
+                limit = self.position_limits[key] = PositionLimit(
+                    limit_type=limit_type,
+                    entity_id=entity_id,
+                    max_quantity=self.default_limits.get(limit_type, 100)
+                )
+            limits.append(limit)
+        return limits
+
+
+# Global instance
+pretrade_gate = PreTradeRiskGate()
@@ -0,0 +1,287 @@
+"""
+Greeks-Aware Position Sizing Module
+
+Sizes a candidate signal against the current book in one vectorized pass.
+Key features:
+- Grid of lot counts evaluated together (no per-size loop)
+- Incremental delta/gamma/vega against per-underlying limits
+- Hedge-aware incremental margin from the local SPAN engine
+- Worst-case scenario loss on the portfolio's spot/IV grid
+- Daily loss headroom from the risk manager
+- Best size plus the constraint that bound it
+"""
+
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+from loguru import logger
+
+from .calculator import risk_calculator, RiskLevel
+from .manager import risk_manager
+from .portfolio import portfolio_risk_engine
+from .span import MarginLeg
+
+
+class SizingConstraint(Enum):
+    """Constraints evaluated for each candidate size"""
+    LOT_LIMIT = "lot_limit"
+    STRATEGY_CAPACITY = "strategy_capacity"
+    MARGIN = "margin"
+    DELTA = "delta"
+    GAMMA = "gamma"
+    VEGA = "vega"
+    SCENARIO_LOSS = "scenario_loss"
+    DAILY_LOSS_HEADROOM = "daily_loss_headroom"
+    MIN_LOTS = "min_lots"
+
+
+@dataclass(slots=True)
+class SizingLeg:
+    """One leg of a candidate, per lot (signed units; greeks per unit)"""
+    strike: float
+    option_type: str  # "CE" or "PE"
+    expiry: str       # ISO date
+    quantity: int
+    ltp: float
+    delta: float = 0.0
+    gamma: float = 0.0
+    vega: float = 0.0
+    theta: float = 0.0
+    iv: Optional[float] = None  # Decimal volatility
+
+
+@dataclass
+class SizingCandidate:
+    """Signal to be sized"""
+    underlying: str
+    spot: float
+    legs: List[SizingLeg]
+    strategy_name: str = "default"
+    signal_id: Optional[str] = None
+
+
+@dataclass
+class GreeksLimits:
+    """Per-underlying net greek and loss limits applied after the trade"""
+    max_abs_delta: float = 2500.0        # Underlying units (~33 NIFTY lots of pure delta)
+    max_abs_gamma: float = 10.0          # Delta units per point
+    max_abs_vega: float = 30000.0        # Rupees per vol point
+    max_scenario_loss: float = 50000.0   # Worst case on the spot/IV grid
+    headroom_fraction: float = 1.0       # Share of remaining daily loss a worst case may use
+
+
+@dataclass
+class SizingResult:
+    """Best size and the constraint that limited it"""
+    recommended_lots: int
+    binding_constraint: Optional[SizingConstraint]
+    max_lots_by_constraint: Dict[str, int]
+    incremental_delta: float
+    incremental_gamma: float
+    incremental_vega: float
+    incremental_margin: float
+    worst_case_pnl: float
+    compute_time_us: float
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "recommended_lots": self.recommended_lots,
+            "binding_constraint": self.binding_constraint.value if self.binding_constraint else None,
+            "max_lots_by_constraint": self.max_lots_by_constraint,
+            "incremental_delta": self.incremental_delta,
+            "incremental_gamma": self.incremental_gamma,
+            "incremental_vega": self.incremental_vega,
+            "incremental_margin": self.incremental_margin,
+            "worst_case_pnl": self.worst_case_pnl,
+            "compute_time_us": self.compute_time_us,
+            "warnings": self.warnings
+        }
+
+
+class GreeksAwareSizer:
+    """
+    Batch lot-size search for the order hot path
+
+    Every candidate size k in 0..max is evaluated at once: post-trade
+    greeks are existing + k * per-lot greeks, scenario P&L is the book's
+    grid + k * the candidate's grid, and margin comes from a single SPAN
+    grid evaluation. The recommendation is the largest k before the first
+    size that breaks any constraint; constraints that were already
+    breached before the trade only bind if the trade makes them worse.
+    """
+
+    def __init__(self, limits: Optional[GreeksLimits] = None, time_budget_us: float = 2000.0):
+        self.logger = logger.bind(module="greeks_sizer")
+        self.limits = limits or GreeksLimits()
+        self.time_budget_us = time_budget_us
+
+        self.stats = {
+            "sizings": 0,
+            "over_budget": 0,
+            "binding": {constraint.value: 0 for constraint in SizingConstraint}
+        }
+
+    def size(
+        self,
+        candidate: SizingCandidate,
+        available_margin: float,
+        current_positions: int = 0,
+        risk_level: RiskLevel = RiskLevel.MODERATE
+    ) -> SizingResult:
+        """
+        Find the best lot count for a candidate signal
+
+        Args:
+            candidate: Per-lot legs, underlying and spot
+            available_margin: Free margin reported by the broker
+            current_positions: Lots already held by the strategy
+            risk_level: Margin utilization target
+
+        Returns:
+            SizingResult with the recommended lots and binding constraint
+        """
+        start = time.perf_counter()
+        calculator = risk_calculator
+        warnings: List[str] = []
+
+        max_lots = max(min(calculator.max_lots_per_signal, calculator.max_total_lots - current_positions), 0)
+        lots = np.arange(max_lots + 1, dtype=float)
+
+        # Per-lot candidate exposures
+        qty = np.array([leg.quantity for leg in candidate.legs], dtype=float)
+        lot_delta = float(qty @ [leg.delta for leg in candidate.legs])
+        lot_gamma = float(qty @ [leg.gamma for leg in candidate.legs])
+        lot_vega = float(qty @ [leg.vega for leg in candidate.legs])
+
+        # Current book for the same underlying
+        engine = portfolio_risk_engine
+        snapshot = engine.last_snapshot
+        book = snapshot.by_underlying.get(candidate.underlying, {}) if snapshot else {}
+        book_delta = book.get("net_delta", 0.0)
+        book_gamma = book.get("net_gamma", 0.0)
+        book_vega = book.get("net_vega", 0.0)
+
+        feasible: Dict[SizingConstraint, np.ndarray] = {}
+        limits = self.limits
+        for constraint, base, per_lot, limit in (
+            (SizingConstraint.DELTA, book_delta, lot_delta, limits.max_abs_delta),
+            (SizingConstraint.GAMMA, book_gamma, lot_gamma, limits.max_abs_gamma),
+            (SizingConstraint.VEGA, book_vega, lot_vega, limits.max_abs_vega)
+        ):
+            post = np.abs(base + lots * per_lot)
+            feasible[constraint] = (post <= limit) | (post <= abs(base))
+
+        # Scenario grid: book P&L + k * candidate P&L on the same shocks
+        spot_shocks = engine.spot_shocks_pct
+        iv_shocks = engine.iv_shocks
+        move = candidate.spot * spot_shocks
+        candidate_grid = (lot_delta * move + 0.5 * lot_gamma * move * move)[:, None] + lot_vega * iv_shocks[None, :]
+        book_grid = snapshot.scenario_pnl if snapshot is not None else np.zeros_like(candidate_grid)
+        worst = (book_grid[None, :, :] + lots[:, None, None] * candidate_grid[None, :, :]).min(axis=(1, 2))
+        not_worse = worst >= worst[0]
+        feasible[SizingConstraint.SCENARIO_LOSS] = (-worst <= limits.max_scenario_loss) | not_worse
+
+        headroom = max(risk_manager.limits.daily_loss_limit + min(risk_manager.daily_pnl, 0.0), 0.0)
+        feasible[SizingConstraint.DAILY_LOSS_HEADROOM] = (
+            (-worst <= headroom * limits.headroom_fraction) | not_worse
+        )
+
+        # Hedge-aware incremental margin against the same underlying's positions
+        target_margin = available_margin * {
+            RiskLevel.CONSERVATIVE: 0.20,
+            RiskLevel.MODERATE: 0.40,
+            RiskLevel.AGGRESSIVE: 0.60
+        }.get(risk_level, 0.40)
+        try:
+            basket = [
+                MarginLeg(
+                    symbol=candidate.underlying,
+                    strike=leg.strike,
+                    option_type=leg.option_type,
+                    expiry=leg.expiry,
+                    quantity=leg.quantity,
+                    ltp=leg.ltp,
+                    iv=leg.iv
+                )
+                for leg in candidate.legs
+            ]
+            margins = calculator.span_engine.calculate_margin_grid(
+                engine.margin_legs(candidate.underlying),
+                basket,
+                lots,
+                {candidate.underlying: candidate.spot}
+            )
+            incremental_margin = margins - margins[0]
+        except (KeyError, ValueError) as e:
+            # No risk parameters for this underlying: premium/notional approximation
+            warnings.append(f"Margin engine unavailable ({e}), using approximation")
+            multipliers = calculator.margin_multipliers["nifty"]
+            short_pct = multipliers["span_pct"] + multipliers["exposure_pct"]
+            per_lot = sum(
+                abs(leg.quantity) * (leg.ltp if leg.quantity > 0 else candidate.spot * short_pct)
+                for leg in candidate.legs
+            )
+            incremental_margin = lots * per_lot
+        feasible[SizingConstraint.MARGIN] = incremental_margin <= target_margin
+
+        # Largest size before the first failure; the earliest failing constraint binds
+        first_failure = {
+            constraint.value: (max(int(np.argmin(ok)) - 1, 0) if not ok.all() else max_lots)
+            for constraint, ok in feasible.items()
+        }
+        recommended = min(first_failure.values()) if first_failure else max_lots
+        binding: Optional[SizingConstraint] = None
+        if recommended < max_lots:
+            binding = next(c for c in feasible if first_failure[c.value] == recommended)
+        elif max_lots < calculator.max_lots_per_signal:
+            binding = SizingConstraint.STRATEGY_CAPACITY
+        else:
+            binding = SizingConstraint.LOT_LIMIT
+
+        if 0 < recommended < calculator.min_lots_per_signal:
+            warnings.append(
+                f"Best size {recommended} below minimum {calculator.min_lots_per_signal} lots "
+                f"(bound by {binding.value})"
+            )
+            recommended = 0
+            binding = SizingConstraint.MIN_LOTS
+
+        compute_time_us = (time.perf_counter() - start) * 1_000_000
+        if compute_time_us > self.time_budget_us:
+            self.stats["over_budget"] += 1
+            warnings.append(f"Sizing took {compute_time_us:.0f}us (budget {self.time_budget_us:.0f}us)")
+
+        self.stats["sizings"] += 1
+        self.stats["binding"][binding.value] += 1
+
+        result = SizingResult(
+            recommended_lots=recommended,
+            binding_constraint=binding,
+            max_lots_by_constraint=first_failure,
+            incremental_delta=recommended * lot_delta,
+            incremental_gamma=recommended * lot_gamma,
+            incremental_vega=recommended * lot_vega,
+            incremental_margin=float(incremental_margin[recommended]),
+            worst_case_pnl=float(worst[recommended]),
+            compute_time_us=compute_time_us,
+            warnings=warnings
+        )
+
+        self.logger.debug(
+            f"Sized {candidate.strategy_name} {candidate.underlying}: {recommended} lots "
+            f"(bound by {binding.value}, {compute_time_us:.0f}us)",
+            extra={"signal_id": candidate.signal_id, **result.to_dict()}
+        )
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "time_budget_us": self.time_budget_us}
+
+
+# Global instance
+greeks_sizer = GreeksAwareSizer()
@@ -0,0 +1,505 @@
+"""
+SPAN-style Margin Engine
+
+Computes options portfolio margin in-process from exchange risk parameters:
+- Daily risk-parameter files (price/volatility scan ranges, short option
+  minimum, exposure) with optional precomputed 16-scenario risk arrays
+- Per-trade-date parameter cache
+- Scanning risk over the standard 16 SPAN scenarios, netted across every
+  leg of an underlying so spreads and hedges get their offset
+- Short option minimum charge, exposure margin and long premium
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+from loguru import logger
+
+from app.utils.option_pricing import price as option_price
+
+
+# Standard SPAN scenarios: (fraction of price scan range, volatility direction, weight)
+SPAN_SCENARIOS = np.array([
+    (0.0, 1, 1.0), (0.0, -1, 1.0),
+    (1 / 3, 1, 1.0), (1 / 3, -1, 1.0),
+    (-1 / 3, 1, 1.0), (-1 / 3, -1, 1.0),
+    (2 / 3, 1, 1.0), (2 / 3, -1, 1.0),
+    (-2 / 3, 1, 1.0), (-2 / 3, -1, 1.0),
+    (1.0, 1, 1.0), (1.0, -1, 1.0),
+    (-1.0, 1, 1.0), (-1.0, -1, 1.0),
+    (2.0, 0, 0.35), (-2.0, 0, 0.35),  # Extreme moves, partially covered
+])
+
+DEFAULT_PARAMETER_DIR = Path(__file__).parent / "span_params"
+
+# Index display names used by the data feeds -> parameter file keys
+UNDERLYING_ALIASES = {
+    "NIFTY 50": "NIFTY",
+    "NIFTY BANK": "BANKNIFTY",
+    "NIFTYBANK": "BANKNIFTY",
+    "NIFTY FIN SERVICE": "FINNIFTY",
+    "NIFTY MID SELECT": "MIDCPNIFTY",
+    "BSE SENSEX": "SENSEX"
+}
+
+
+@dataclass
+class UnderlyingRiskParameters:
+    """Exchange risk parameters for one underlying"""
+    symbol: str
+    lot_size: int
+    price_scan_pct: float          # Price scan range as a fraction of spot
+    volatility_scan: float         # Absolute volatility shift (0.04 = 4 vol points)
+    short_option_min_pct: float    # Short option minimum charge, fraction of spot per unit
+    exposure_pct: float            # Exposure margin, fraction of short notional
+    default_volatility: float = 0.15
+    risk_free_rate: float = 0.06
+    extreme_move_multiple: float = 2.0
+    extreme_move_cover: float = 0.35
+
+
+@dataclass
+class RiskParameterSet:
+    """All risk parameters for one trade date"""
+    trade_date: date
+    underlyings: Dict[str, UnderlyingRiskParameters]
+    risk_arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    source: str = "defaults"
+
+
+@dataclass(slots=True)
+class MarginLeg:
+    """One option leg of a basket (quantity in units, positive long, negative short)"""
+    symbol: str
+    strike: float
+    option_type: str  # "CE" or "PE"
+    expiry: str       # ISO date
+    quantity: int
+    ltp: float
+    iv: Optional[float] = None
+
+
+@dataclass
+class BasketMargin:
+    """Portfolio margin for a basket of legs"""
+    span_margin: float
+    exposure_margin: float
+    premium_margin: float
+    total_margin: float
+    scanning_risk: float
+    short_option_minimum: float
+    hedge_benefit: float
+    by_underlying: Dict[str, float] = field(default_factory=dict)
+    worst_scenario: Dict[str, int] = field(default_factory=dict)
+    parameters_date: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_margin": self.span_margin,
+            "exposure_margin": self.exposure_margin,
+            "premium_margin": self.premium_margin,
+            "total_margin": self.total_margin,
+            "scanning_risk": self.scanning_risk,
+            "short_option_minimum": self.short_option_minimum,
+            "hedge_benefit": self.hedge_benefit,
+            "by_underlying": self.by_underlying,
+            "worst_scenario": self.worst_scenario,
+            "parameters_date": self.parameters_date
+        }
+
+
+def contract_key(symbol: str, expiry: str, strike: float, option_type: str) -> str:
+    """Key used for precomputed risk arrays in parameter files"""
+    return f"{symbol.upper()}|{expiry}|{strike:g}|{option_type.upper()}"
+
+
+class SpanMarginEngine:
+    """
+    Local SPAN-style margin calculator
+
+    Parameter files are JSON named `risk_parameters_YYYYMMDD.json` in the
+    parameter directory (see span_params/risk_parameters_sample.json):
+
+        {
+            "trade_date": "2024-01-15",
+            "underlyings": {"NIFTY": {"lot_size": 75, "price_scan_pct": 0.06, ...}},
+            "risk_arrays": {"NIFTY|2024-01-25|21500|CE": [16 losses per long unit]}
+        }
+
+    Contracts without a precomputed array are repriced with Black-Scholes
+    across the 16 scenarios. Parameters are cached per trade date.
+    """
+
+    def __init__(self, parameter_dir: Optional[Path] = None, cache_days: int = 2):
+        self.logger = logger.bind(module="span_margin")
+        self.parameter_dir = Path(parameter_dir) if parameter_dir else DEFAULT_PARAMETER_DIR
+        self.cache_days = cache_days
+
+        self._cache: Dict[date, RiskParameterSet] = {}
+
+        self.stats = {
+            "baskets_calculated": 0,
+            "legs_calculated": 0,
+            "precomputed_arrays_used": 0,
+            "parameter_loads": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Parameter loading
+    # ------------------------------------------------------------------
+
+    def get_parameters(self, trade_date: Optional[date] = None) -> RiskParameterSet:
+        """Risk parameters for a trade date, loading and caching on first use"""
+        trade_date = trade_date or datetime.now(timezone.utc).date()
+        parameters = self._cache.get(trade_date)
+        if parameters is None:
+            path = self.parameter_dir / f"risk_parameters_{trade_date:%Y%m%d}.json"
+            if path.exists():
+                parameters = self.load_parameter_file(path, trade_date)
+            else:
+                parameters = self._default_parameters(trade_date)
+                self.logger.warning(
+                    f"No risk parameter file for {trade_date}, using default scan ranges"
+                )
+            self._store(parameters)
+        return parameters
+
+    def load_parameter_file(self, path: Path, trade_date: Optional[date] = None) -> RiskParameterSet:
+        """Parse a risk parameter file and cache it under its trade date"""
+        with open(path) as f:
+            raw = json.load(f)
+
+        trade_date = trade_date or date.fromisoformat(raw["trade_date"])
+        underlyings = {
+            symbol.upper(): UnderlyingRiskParameters(symbol=symbol.upper(), **values)
+            for symbol, values in raw["underlyings"].items()
+        }
+        risk_arrays = {
+            key: np.asarray(values, dtype=float)
+            for key, values in raw.get("risk_arrays", {}).items()
+            if len(values) == len(SPAN_SCENARIOS)
+        }
+
+        parameters = RiskParameterSet(
+            trade_date=trade_date,
+            underlyings=underlyings,
+            risk_arrays=risk_arrays,
+            source=str(path)
+        )
+        self._store(parameters)
+        self.stats["parameter_loads"] += 1
+
+        self.logger.info(
+            f"Risk parameters loaded for {trade_date}: {len(underlyings)} underlyings, "
+            f"{len(risk_arrays)} precomputed arrays"
+        )
+        return parameters
+
+    def _store(self, parameters: RiskParameterSet) -> None:
+        self._cache[parameters.trade_date] = parameters
+        for stale in sorted(self._cache)[:-self.cache_days]:
+            del self._cache[stale]
+
+    @staticmethod
+    def _default_parameters(trade_date: date) -> RiskParameterSet:
+        return RiskParameterSet(
+            trade_date=trade_date,
+            underlyings={
+                "NIFTY": UnderlyingRiskParameters(
+                    symbol="NIFTY", lot_size=75, price_scan_pct=0.06,
+                    volatility_scan=0.04, short_option_min_pct=0.03, exposure_pct=0.02
+                ),
+                "BANKNIFTY": UnderlyingRiskParameters(
+                    symbol="BANKNIFTY", lot_size=15, price_scan_pct=0.075,
+                    volatility_scan=0.05, short_option_min_pct=0.035, exposure_pct=0.02,
+                    default_volatility=0.18
+                ),
+                "FINNIFTY": UnderlyingRiskParameters(
+                    symbol="FINNIFTY", lot_size=65, price_scan_pct=0.07,
+                    volatility_scan=0.045, short_option_min_pct=0.03, exposure_pct=0.02,
+                    default_volatility=0.16
+                ),
+                "MIDCPNIFTY": UnderlyingRiskParameters(
+                    symbol="MIDCPNIFTY", lot_size=120, price_scan_pct=0.08,
+                    volatility_scan=0.05, short_option_min_pct=0.035, exposure_pct=0.025,
+                    default_volatility=0.2
+                ),
+                "SENSEX": UnderlyingRiskParameters(
+                    symbol="SENSEX", lot_size=20, price_scan_pct=0.06,
+                    volatility_scan=0.04, short_option_min_pct=0.03, exposure_pct=0.02
+                )
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Margin calculation
+    # ------------------------------------------------------------------
+
+    def calculate_basket_margin(
+        self,
+        legs: List[MarginLeg],
+        spot_prices: Dict[str, float],
+        trade_date: Optional[date] = None
+    ) -> BasketMargin:
+        """
+        Portfolio margin for a basket of option legs
+
+        Args:
+            legs: Option legs (signed unit quantities)
+            spot_prices: Underlying spot price by symbol
+            trade_date: Risk parameter date (today by default)
+
+        Returns:
+            BasketMargin with SPAN, exposure and premium components
+        """
+        parameters = self.get_parameters(trade_date)
+
+        by_underlying: Dict[str, List[MarginLeg]] = {}
+        for leg in legs:
+            if leg.quantity:
+                by_underlying.setdefault(self.resolve_underlying(leg.symbol, parameters), []).append(leg)
+
+        span_total = exposure_total = premium_total = 0.0
+        scanning_total = somc_total = standalone_total = 0.0
+        margins: Dict[str, float] = {}
+        worst: Dict[str, int] = {}
+
+        for underlying, group in by_underlying.items():
+            params = parameters.underlyings[underlying]
+            spot = spot_prices.get(underlying) or spot_prices.get(group[0].symbol)
+            if not spot:
+                raise ValueError(f"No spot price for {underlying}")
+
+            qty = np.array([leg.quantity for leg in group], dtype=float)
+            ltp = np.array([leg.ltp for leg in group], dtype=float)
+            risk = self._risk_arrays(group, params, parameters, spot)
+
+            # Scenario losses netted across legs give spread/hedge offsets
+            scenario_losses = qty @ risk
+            worst_index = int(np.argmax(scenario_losses))
+            scanning_risk = max(float(scenario_losses[worst_index]), 0.0)
+
+            short_units = float(-qty[qty < 0].sum())
+            somc = short_units * spot * params.short_option_min_pct
+            span = max(scanning_risk, somc)
+
+            exposure = short_units * spot * params.exposure_pct
+            premium = float((qty[qty > 0] * ltp[qty > 0]).sum())
+
+            # Same legs margined one at a time, for the offset report
+            leg_losses = np.maximum((qty[:, None] * risk).max(axis=1), 0.0)
+            leg_somc = np.where(qty < 0, -qty * spot * params.short_option_min_pct, 0.0)
+            standalone_total += float(np.maximum(leg_losses, leg_somc).sum())
+
+            span_total += span
+            exposure_total += exposure
+            premium_total += premium
+            scanning_total += scanning_risk
+            somc_total += somc
+            margins[underlying] = round(span + exposure + premium, 2)
+            worst[underlying] = worst_index + 1
+
+        self.stats["baskets_calculated"] += 1
+        self.stats["legs_calculated"] += len(legs)
+
+        total = span_total + exposure_total + premium_total
+        return BasketMargin(
+            span_margin=round(span_total, 2),
+            exposure_margin=round(exposure_total, 2),
+            premium_margin=round(premium_total, 2),
+            total_margin=round(total, 2),
+            scanning_risk=round(scanning_total, 2),
+            short_option_minimum=round(somc_total, 2),
+            hedge_benefit=round(max(standalone_total - span_total, 0.0), 2),
+            by_underlying=margins,
+            worst_scenario=worst,
+            parameters_date=parameters.trade_date.isoformat()
+        )
+
+    def calculate_margin_grid(
+        self,
+        existing_legs: List[MarginLeg],
+        basket: List[MarginLeg],
+        lots: np.ndarray,
+        spot_prices: Dict[str, float],
+        trade_date: Optional[date] = None
+    ) -> np.ndarray:
+        """
+        Total margin of existing + k * basket for every k in `lots`, in one pass
+
+        Legs are merged per contract, so the quantity matrix is
+        (len(lots) x contracts) and scanning risk is a single matmul per
+        underlying against the contracts' risk arrays.
+        """
+        parameters = self.get_parameters(trade_date)
+        lots = np.asarray(lots, dtype=float)
+
+        contracts: Dict[str, MarginLeg] = {}
+        base_qty: Dict[str, float] = {}
+        per_lot_qty: Dict[str, float] = {}
+        for legs, target in ((existing_legs, base_qty), (basket, per_lot_qty)):
+            for leg in legs:
+                key = contract_key(leg.symbol, leg.expiry, leg.strike, leg.option_type)
+                contracts.setdefault(key, leg)
+                target[key] = target.get(key, 0.0) + leg.quantity
+
+        by_underlying: Dict[str, List[str]] = {}
+        for key, leg in contracts.items():
+            by_underlying.setdefault(self.resolve_underlying(leg.symbol, parameters), []).append(key)
+
+        total = np.zeros(len(lots))
+        for underlying, keys in by_underlying.items():
+            params = parameters.underlyings[underlying]
+            group = [contracts[key] for key in keys]
+            spot = spot_prices.get(underlying) or spot_prices.get(group[0].symbol)
+            if not spot:
+                raise ValueError(f"No spot price for {underlying}")
+
+            qty = (
+                np.array([base_qty.get(key, 0.0) for key in keys])[None, :]
+                + lots[:, None] * np.array([per_lot_qty.get(key, 0.0) for key in keys])[None, :]
+            )
+            ltp = np.array([leg.ltp for leg in group], dtype=float)
+            risk = self._risk_arrays(group, params, parameters, spot)
+
+            scanning_risk = np.maximum((qty @ risk).max(axis=1), 0.0)
+            short_units = -np.minimum(qty, 0.0).sum(axis=1)
+            span = np.maximum(scanning_risk, short_units * spot * params.short_option_min_pct)
+            exposure = short_units * spot * params.exposure_pct
+            premium = (np.maximum(qty, 0.0) * ltp).sum(axis=1)
+            total += span + exposure + premium
+
+        self.stats["baskets_calculated"] += len(lots)
+        return total
+
+    def resolve_underlying(self, symbol: str, parameters: Optional[RiskParameterSet] = None) -> str:
+        """
+        Map a trading symbol to the underlying key used in the parameter file
+
+        Exact keys and index aliases match directly. Otherwise an underlying
+        only matches as a prefix followed by a digit, a separator or the end
+        of the symbol (NIFTY2412524000CE, NIFTY-Jan2024-24000-CE), so
+        FINNIFTY or NIFTYNXT50 are never taken for NIFTY.
+
+        Raises:
+            KeyError: If the underlying has no risk parameters
+        """
+        parameters = parameters or self.get_parameters()
+        key = symbol.upper().strip()
+        key = UNDERLYING_ALIASES.get(key, key)
+        if key in parameters.underlyings:
+            return key
+        for underlying in sorted(parameters.underlyings, key=len, reverse=True):
+            rest = key[len(underlying):]
+            if key.startswith(underlying) and (not rest or rest[0].isdigit() or rest[0] in "-_ "):
+                return underlying
+        raise KeyError(f"No risk parameters for {symbol}")
+
+    def lot_size(self, symbol: str, default: Optional[int] = None, trade_date: Optional[date] = None) -> int:
+        """
+        Exchange lot size of a symbol's underlying
+
+        Raises KeyError when the underlying has no parameters and no
+        `default` is given; sizing in lots of 1 would understate exposure.
+        """
+        parameters = self.get_parameters(trade_date)
+        try:
+            return parameters.underlyings[self.resolve_underlying(symbol, parameters)].lot_size
+        except KeyError:
+            if default is None:
+                raise
+            return default
+
+    def has_parameters(self, symbol: str, trade_date: Optional[date] = None) -> bool:
+        try:
+            self.resolve_underlying(symbol, self.get_parameters(trade_date))
+            return True
+        except KeyError:
+            return False
+
+    def _risk_arrays(
+        self,
+        legs: List[MarginLeg],
+        params: UnderlyingRiskParameters,
+        parameters: RiskParameterSet,
+        spot: float
+    ) -> np.ndarray:
+        """(legs x 16) loss per long unit; precomputed where the file provides it"""
+        risk = np.empty((len(legs), len(SPAN_SCENARIOS)))
+        missing: List[int] = []
+
+        for i, leg in enumerate(legs):
+            array = parameters.risk_arrays.get(
+                contract_key(params.symbol, leg.expiry, leg.strike, leg.option_type)
+            )
+            if array is not None:
+                risk[i] = array
+                self.stats["precomputed_arrays_used"] += 1
+            else:
+                missing.append(i)
+
+        if missing:
+            group = [legs[i] for i in missing]
+            strike = np.array([leg.strike for leg in group], dtype=float)
+            is_call = np.array([leg.option_type.upper() == "CE" for leg in group])
+            vol = np.array([leg.iv or params.default_volatility for leg in group], dtype=float)
+            t = np.array(
+                [self._time_to_expiry(leg.expiry, parameters.trade_date) for leg in group],
+                dtype=float
+            )
+            risk[missing] = self._scenario_losses(spot, strike, is_call, vol, t, params)
+
+        return risk
+
+    @staticmethod
+    def _scenario_losses(
+        spot: float,
+        strike: np.ndarray,
+        is_call: np.ndarray,
+        vol: np.ndarray,
+        t: np.ndarray,
+        params: UnderlyingRiskParameters
+    ) -> np.ndarray:
+        """Reprice every leg under all scenarios (loss per long unit, positive = loss)"""
+        price_move, vol_direction, weight = SPAN_SCENARIOS.T
+        price_move = np.where(
+            np.abs(price_move) > 1.0,
+            np.sign(price_move) * params.extreme_move_multiple,
+            price_move
+        )
+        weight = np.where(SPAN_SCENARIOS[:, 2] < 1.0, params.extreme_move_cover, weight)
+
+        scenario_spot = spot * (1.0 + price_move * params.price_scan_pct)          # (16,)
+        scenario_vol = np.maximum(
+            vol[:, None] + vol_direction[None, :] * params.volatility_scan, 0.01
+        )                                                                          # (n, 16)
+
+        base = option_price(spot, strike, t, vol, is_call, params.risk_free_rate)
+        shocked = option_price(
+            scenario_spot[None, :], strike[:, None], t[:, None],
+            scenario_vol, is_call[:, None], params.risk_free_rate
+        )
+        return (base[:, None] - shocked) * weight[None, :]
+
+    @staticmethod
+    def _time_to_expiry(expiry: str, trade_date: date) -> float:
+        try:
+            days = (date.fromisoformat(str(expiry)[:10]) - trade_date).days
+        except ValueError:
+            days = 7
+        return max(days, 0.5) / 365.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_dates": [d.isoformat() for d in sorted(self._cache)],
+            "parameter_dir": str(self.parameter_dir)
+        }
+
+
+# Global instance
+span_margin_engine = SpanMarginEngine()
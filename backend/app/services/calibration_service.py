@@ -5,14 +5,24 @@ Optimizes thresholds and weights for maximum trading performance
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+import hashlib
+import os
+import time
+from typing import Callable, Dict, List, Tuple, Optional
+from dataclasses import dataclass, fields, astuple
 from datetime import datetime, timedelta
-from scipy.optimize import minimize
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import differential_evolution
 from sklearn.metrics import classification_report, confusion_matrix
 import json
 
-from .historical_data_service import HistoricalDataService, HistoricalSignal
+from .historical_data_service import HistoricalDataService, HistoricalSignal, ZScoreStats
+
+REGIME_LABELS = ['Bullish', 'Bearish', 'Sideways', 'Balanced']
+BULLISH, BEARISH, SIDEWAYS, BALANCED = range(4)
+
+# Below this many signal x candidate evaluations per batch, process start-up costs more than it saves
+PARALLEL_MIN_WORK = 200_000
 
 @dataclass
 class CalibrationParams:
@@ -32,6 +42,284 @@ class CalibrationParams:
     db_weight: float = 0.6
     tp_weight: float = 0.8
     pr_weight: float = 0.6
+    
+    def to_vector(self) -> np.ndarray:
+        return np.array(astuple(self), dtype=float)
+    
+    @classmethod
+    def from_vector(cls, x) -> "CalibrationParams":
+        return cls(*(float(v) for v in x))
+
+# Search bounds, in CalibrationParams field order
+PARAM_BOUNDS = [
+    (0.5, 2.5),    # rr25_bullish_threshold
+    (-2.5, -0.5),  # rr25_bearish_threshold
+    (0.3, 1.0),    # ndt_zscore_threshold
+    (-2.0, -0.5),  # gex_zscore_short_gamma
+    (0.5, 2.0),    # gex_zscore_long_gamma
+    (0.1, 0.5),    # pin_distance_expiry
+    (0.2, 0.7),    # pin_distance_normal
+    (0.3, 1.0),    # charm_zscore_threshold
+    (2.0, 5.0),    # iv_rv_threshold
+    (1.05, 1.3),   # fb_ratio_threshold
+    (0.4, 0.8),    # db_weight
+    (0.6, 1.0),    # tp_weight
+    (0.4, 0.8),    # pr_weight
+]
+_P = {f.name: i for i, f in enumerate(fields(CalibrationParams))}
+
+@dataclass
+class SignalArrays:
+    """Historical signals as column arrays (z-scores precomputed)"""
+    ndt_z: np.ndarray
+    gex_z: np.ndarray
+    charm_z: np.ndarray
+    rr25: np.ndarray
+    fb_ratio: np.ndarray
+    vanna_tilt: np.ndarray
+    pin_distance: np.ndarray
+    iv_rv_spread: np.ndarray
+    gex_atm: np.ndarray
+    returns: np.ndarray
+    actual: np.ndarray  # Regime codes, -1 for unknown labels
+    
+    def __len__(self) -> int:
+        return len(self.returns)
+    
+    def to_columns(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        return {prefix + f.name: getattr(self, f.name) for f in fields(self)}
+    
+    @classmethod
+    def from_columns(cls, columns, prefix: str = "") -> "SignalArrays":
+        return cls(**{f.name: np.asarray(columns[prefix + f.name]) for f in fields(cls)})
+
+def classify_batch(arrays: SignalArrays, param_matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify every signal under every parameter set at once
+    
+    Args:
+        arrays: Signals as columns (N,)
+        param_matrix: Parameter vectors (P, 13) in CalibrationParams order
+    
+    Returns:
+        (regime codes (P, N), confidences (P, N))
+    """
+    p = np.atleast_2d(param_matrix)
+    col = lambda name: p[:, _P[name]][:, None]
+    
+    # 1) Directional Bias (DB)
+    rr_bull = arrays.rr25 >= col('rr25_bullish_threshold')
+    rr_bear = arrays.rr25 <= col('rr25_bearish_threshold')
+    ndt_thr = col('ndt_zscore_threshold')
+    db = (
+        np.where(rr_bull, 1, np.where(rr_bear, -1, 0))
+        + np.where(arrays.ndt_z >= ndt_thr, 1, np.where(arrays.ndt_z <= -ndt_thr, -1, 0))
+        + np.where(arrays.fb_ratio >= col('fb_ratio_threshold'), np.sign(arrays.vanna_tilt).astype(int), 0)
+    )
+    
+    # 2) Trend Propensity (TP)
+    tp = np.where(
+        arrays.gex_z <= col('gex_zscore_short_gamma'), 2,
+        np.where(arrays.gex_z >= col('gex_zscore_long_gamma'), 1, 0)
+    )
+    
+    # 3) Pinning/Range (PR)
+    pr = (arrays.pin_distance <= col('pin_distance_expiry')).astype(int) + (
+        (arrays.charm_z >= col('charm_zscore_threshold'))
+        | ((arrays.iv_rv_spread >= col('iv_rv_threshold')) & (arrays.gex_atm > 0))
+    )
+    
+    spot_above_zg = arrays.gex_atm < 0
+    trending = (tp >= 1) & (pr <= 1)
+    regime = np.select(
+        [
+            (db >= 1) & trending & spot_above_zg,
+            (db <= -1) & trending & ~spot_above_zg,
+            (pr >= 2) | ((tp == 0) & (np.abs(db) <= 1))
+        ],
+        [BULLISH, BEARISH, SIDEWAYS],
+        default=BALANCED
+    )
+    
+    confidence = 1 / (1 + np.exp(-(
+        col('db_weight') * np.abs(db)
+        + col('tp_weight') * (tp >= 1)
+        + col('pr_weight') * (regime == SIDEWAYS)
+    )))
+    return regime, confidence
+
+def regime_returns_batch(regime: np.ndarray, confidence: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """Strategy returns per parameter set (P, N) from regime predictions"""
+    weighted = returns * confidence
+    return np.select(
+        [regime == BULLISH, regime == BEARISH, regime == SIDEWAYS],
+        [weighted, -weighted, np.abs(weighted) * 0.5],
+        default=0.0
+    )
+
+def score_batch(arrays: SignalArrays, param_matrix: np.ndarray) -> np.ndarray:
+    """Calibration objective (0.4 * accuracy + 0.3 * Sharpe) for each parameter set"""
+    regime, confidence = classify_batch(arrays, param_matrix)
+    accuracy = (regime == arrays.actual).mean(axis=1)
+    
+    strategy = regime_returns_batch(regime, confidence, arrays.returns)
+    std = strategy.std(axis=1)
+    sharpe = np.divide(strategy.mean(axis=1), std, out=np.zeros_like(std), where=std > 0) * np.sqrt(252)
+    return accuracy * 0.4 + (sharpe / 2.0) * 0.6
+
+@dataclass
+class OptimizationOutcome:
+    """Best parameter vector found by optimize_arrays"""
+    x: np.ndarray
+    score: float
+    evaluations: int
+    message: str
+    stopped: bool
+
+def optimize_arrays(arrays: SignalArrays, max_iterations: int = 100, population_size: int = 15,
+                    workers: int = 1, seed: Optional[int] = None,
+                    should_stop: Optional[Callable[[], bool]] = None) -> OptimizationOutcome:
+    """
+    Differential evolution over PARAM_BOUNDS on preloaded signal arrays
+    
+    The objective is piecewise constant in the thresholds, so gradients
+    are useless. Each generation's whole population is scored in one
+    batched NumPy pass, split across processes when the batch is large
+    enough to benefit. `should_stop` is polled once per generation.
+    """
+    workers = (os.cpu_count() or 1) if workers == -1 else max(1, workers)
+    population = population_size * len(PARAM_BOUNDS)
+    if workers > 1 and population * len(arrays) < PARALLEL_MIN_WORK:
+        workers = 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    evaluations = 0
+    stopped = False
+    
+    # Objective to minimize: x is (13, S) for S candidate parameter sets
+    def objective(x):
+        nonlocal evaluations
+        candidates = np.asarray(x).T
+        evaluations += len(candidates)
+        if executor is None:
+            return -score_batch(arrays, candidates)
+        chunks = np.array_split(candidates, workers)
+        return -np.concatenate(list(executor.map(score_batch, [arrays] * len(chunks), chunks)))
+    
+    def callback(intermediate_result):
+        nonlocal stopped
+        stopped = bool(should_stop and should_stop())
+        return stopped
+    
+    try:
+        result = differential_evolution(
+            objective,
+            PARAM_BOUNDS,
+            x0=CalibrationParams().to_vector(),  # Seed with the current defaults
+            popsize=population_size,
+            maxiter=max_iterations,
+            tol=1e-6,
+            seed=seed,
+            polish=False,
+            updating='deferred',
+            vectorized=True,
+            callback=callback
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    return OptimizationOutcome(
+        x=result.x,
+        score=float(-result.fun),
+        evaluations=evaluations,
+        message=str(result.message),
+        stopped=stopped
+    )
+
+
+def zscore_stats_from_signals(signals: List[HistoricalSignal]) -> Dict[str, ZScoreStats]:
+    """Z-score statistics computed from the given signals only"""
+    now = datetime.now().isoformat()
+    stats = {}
+    for metric in ('ndt', 'gex_atm', 'charm_sum', 'rr25', 'vanna_tilt', 'pin_distance'):
+        values = np.array([getattr(s, metric) for s in signals], dtype=float)
+        stats[metric] = ZScoreStats(float(values.mean()), float(values.std()), len(values), now)
+    return stats
+
+def walk_forward_split(ordered: List[HistoricalSignal], n_folds: int,
+                       fold: int) -> Tuple[List[HistoricalSignal], List[HistoricalSignal]]:
+    """Training and test windows of one expanding-window fold over time-ordered signals"""
+    bounds = np.linspace(0, len(ordered), n_folds + 2).astype(int)
+    return ordered[:bounds[fold + 1]], ordered[bounds[fold + 1]:bounds[fold + 2]]
+
+def build_walk_forward_folds(service: "CalibrationService", signals: List[HistoricalSignal],
+                             n_folds: int, cache_dir: str) -> List[str]:
+    """
+    Precompute expanding-window walk-forward folds as cached .npz files
+    
+    Signals are ordered by time and split into n_folds + 1 blocks; fold i
+    trains on blocks 0..i and tests on block i + 1. Z-scores for both
+    sides use statistics from the training window only, so test data never
+    leaks into the thresholds. Folds are keyed by a hash of the signals
+    and fold count and reused across jobs.
+    
+    Returns:
+        Fold file paths in fold order
+    """
+    ordered = sorted(signals, key=lambda s: s.timestamp)
+    digest = hashlib.sha1(f"{n_folds}".encode())
+    for signal in ordered:
+        digest.update(repr(astuple(signal)).encode())
+    fold_dir = os.path.join(cache_dir, digest.hexdigest()[:16])
+    os.makedirs(fold_dir, exist_ok=True)
+    
+    paths = []
+    for fold in range(n_folds):
+        path = os.path.join(fold_dir, f"fold_{fold:02d}.npz")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        
+        train, test = walk_forward_split(ordered, n_folds, fold)
+        stats = zscore_stats_from_signals(train)
+        columns = {
+            **service.signals_to_arrays(train, stats).to_columns("train_"),
+            **service.signals_to_arrays(test, stats).to_columns("test_")
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+    
+    return paths
+
+def run_walk_forward_fold(fold_path: str, stop_flags: List[str], max_iterations: int = 100,
+                          population_size: int = 15, seed: Optional[int] = None) -> Dict:
+    """
+    Optimize on one cached fold's training window and score its test window
+    
+    Runs in a worker process; the search stops early once any of the
+    `stop_flags` files exists.
+    """
+    start = time.perf_counter()
+    with np.load(fold_path) as columns:
+        train = SignalArrays.from_columns(columns, "train_")
+        test = SignalArrays.from_columns(columns, "test_")
+    
+    outcome = optimize_arrays(
+        train, max_iterations, population_size, workers=1, seed=seed,
+        should_stop=lambda: any(os.path.exists(flag) for flag in stop_flags)
+    )
+    return {
+        'params': outcome.x.tolist(),
+        'train_score': outcome.score,
+        'test_score': float(score_batch(test, outcome.x)[0]) if len(test) else 0.0,
+        'train_size': len(train),
+        'test_size': len(test),
+        'evaluations': outcome.evaluations,
+        'stopped': outcome.stopped,
+        'elapsed_s': time.perf_counter() - start
+    }
 
 @dataclass
 class CalibrationResult:
@@ -52,6 +340,32 @@ class CalibrationService:
     def __init__(self, historical_service: HistoricalDataService):
         self.historical_service = historical_service
     
+    def signals_to_arrays(self, signals: List[HistoricalSignal], zscore_stats: Dict) -> SignalArrays:
+        """Column arrays for signals with a known forward return"""
+        usable = [s for s in signals if s.next_6h_return is not None]
+        column = lambda attr: np.array([getattr(s, attr) for s in usable], dtype=float)
+        
+        def zscores(attr: str, metric: str) -> np.ndarray:
+            stat = zscore_stats.get(metric)
+            if stat is None or stat.std == 0:
+                return np.zeros(len(usable))
+            return (column(attr) - stat.mean) / stat.std
+        
+        codes = {label: i for i, label in enumerate(REGIME_LABELS)}
+        return SignalArrays(
+            ndt_z=zscores('ndt', 'ndt'),
+            gex_z=zscores('gex_atm', 'gex_atm'),
+            charm_z=zscores('charm_sum', 'charm_sum'),
+            rr25=column('rr25'),
+            fb_ratio=column('fb_ratio'),
+            vanna_tilt=column('vanna_tilt'),
+            pin_distance=column('pin_distance'),
+            iv_rv_spread=column('iv_front_atm') - column('rv_30m'),
+            gex_atm=column('gex_atm'),
+            returns=column('next_6h_return'),
+            actual=np.array([codes.get(s.regime, -1) for s in usable], dtype=int)
+        )
+    
     def classify_regime_with_params(self, signal: HistoricalSignal, 
                                   params: CalibrationParams,
                                   zscore_stats: Dict) -> Tuple[str, float]:
@@ -128,23 +442,13 @@ class CalibrationService:
                           zscore_stats: Dict) -> CalibrationResult:
         """Evaluate parameter set on test data"""
         
-        predictions = []
-        actual_regimes = []
-        returns = []
-        confidences = []
-        
-        for signal in test_data:
-            if signal.next_6h_return is None:
-                continue
-                
-            predicted_regime, confidence = self.classify_regime_with_params(
-                signal, params, zscore_stats
-            )
-            
-            predictions.append(predicted_regime)
-            actual_regimes.append(signal.regime)
-            returns.append(signal.next_6h_return)
-            confidences.append(confidence)
+        arrays = self.signals_to_arrays(test_data, zscore_stats)
+        regime_codes, confidence_rows = classify_batch(arrays, params.to_vector())
+        
+        predictions = [REGIME_LABELS[code] for code in regime_codes[0]]
+        actual_regimes = [s.regime for s in test_data if s.next_6h_return is not None]
+        returns = arrays.returns.tolist()
+        confidences = confidence_rows[0].tolist()
         
         if not predictions:
             return CalibrationResult(
@@ -239,10 +543,13 @@ class CalibrationService:
         drawdown = (cumulative - running_max) / running_max
         return float(np.min(drawdown))
     
-    def optimize_parameters(self, lookback_days: int = 60) -> CalibrationResult:
-        """Optimize parameters using historical data"""
+    def optimize_parameters(self, lookback_days: int = 60, max_iterations: int = 100,
+                            population_size: int = 15, workers: int = -1,
+                            seed: Optional[int] = None) -> CalibrationResult:
+        """Optimize parameters using historical data (see optimize_arrays)"""
         
         print(f"Starting parameter optimization with {lookback_days} days of data...")
+        start = time.perf_counter()
         
         # Get historical data
         cutoff_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
@@ -260,70 +567,15 @@ class CalibrationService:
                 regime_performance={}
             )
         
-        # Define parameter bounds for optimization
-        bounds = [
-            (0.5, 2.5),    # rr25_bullish_threshold
-            (-2.5, -0.5),  # rr25_bearish_threshold
-            (0.3, 1.0),    # ndt_zscore_threshold
-            (-2.0, -0.5),  # gex_zscore_short_gamma
-            (0.5, 2.0),    # gex_zscore_long_gamma
-            (0.1, 0.5),    # pin_distance_expiry
-            (0.2, 0.7),    # pin_distance_normal
-            (0.3, 1.0),    # charm_zscore_threshold
-            (2.0, 5.0),    # iv_rv_threshold
-            (1.05, 1.3),   # fb_ratio_threshold
-            (0.4, 0.8),    # db_weight
-            (0.6, 1.0),    # tp_weight
-            (0.4, 0.8),    # pr_weight
-        ]
-        
-        # Objective function to maximize
-        def objective(x):
-            params = CalibrationParams(
-                rr25_bullish_threshold=x[0],
-                rr25_bearish_threshold=x[1],
-                ndt_zscore_threshold=x[2],
-                gex_zscore_short_gamma=x[3],
-                gex_zscore_long_gamma=x[4],
-                pin_distance_expiry=x[5],
-                pin_distance_normal=x[6],
-                charm_zscore_threshold=x[7],
-                iv_rv_threshold=x[8],
-                fb_ratio_threshold=x[9],
-                db_weight=x[10],
-                tp_weight=x[11],
-                pr_weight=x[12]
-            )
-            
-            result = self.evaluate_parameters(params, test_data, zscore_stats)
-            
-            # Optimize for combination of accuracy and Sharpe ratio
-            score = result.accuracy * 0.4 + (result.sharpe_ratio / 2.0) * 0.6
-            return -score  # Minimize negative score
-        
-        # Initial guess (current default parameters)
-        x0 = [1.0, -1.0, 0.5, -1.0, 1.0, 0.3, 0.45, 0.5, 3.0, 1.15, 0.6, 0.8, 0.6]
+        # Load signals into arrays once for every evaluation
+        arrays = self.signals_to_arrays(test_data, zscore_stats)
         
-        # Optimize
-        print("Running optimization...")
-        result = minimize(objective, x0, bounds=bounds, method='L-BFGS-B')
+        print(f"Running optimization ({population_size * len(PARAM_BOUNDS)} candidates per generation)...")
+        outcome = optimize_arrays(arrays, max_iterations, population_size, workers, seed)
         
         # Create optimized parameters
-        optimized_params = CalibrationParams(
-            rr25_bullish_threshold=result.x[0],
-            rr25_bearish_threshold=result.x[1],
-            ndt_zscore_threshold=result.x[2],
-            gex_zscore_short_gamma=result.x[3],
-            gex_zscore_long_gamma=result.x[4],
-            pin_distance_expiry=result.x[5],
-            pin_distance_normal=result.x[6],
-            charm_zscore_threshold=result.x[7],
-            iv_rv_threshold=result.x[8],
-            fb_ratio_threshold=result.x[9],
-            db_weight=result.x[10],
-            tp_weight=result.x[11],
-            pr_weight=result.x[12]
-        )
+        optimized_params = CalibrationParams.from_vector(outcome.x)
+        print(f"Search finished: {outcome.evaluations} evaluations in {time.perf_counter() - start:.2f}s ({outcome.message})")
         
         # Evaluate final result
         final_result = self.evaluate_parameters(optimized_params, test_data, zscore_stats)
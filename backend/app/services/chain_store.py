@@ -0,0 +1,410 @@
+"""
+Option Chain Snapshot Store
+Records every chain refresh as compressed columnar partitions for replay
+"""
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Any
+
+import numpy as np
+from loguru import logger
+
+from app.utils.market_hours import IST
+
+# Per-strike columns, one value per side ("call_ltp", "put_ltp", ...)
+SIDE_FLOAT_FIELDS = ("ltp", "bid", "ask", "iv", "delta", "gamma", "theta", "vega", "vanna", "charm")
+SIDE_INT_FIELDS = ("volume", "oi", "oi_change")
+SIDES = ("call", "put")
+
+ROW_COLUMNS = ("strike",) + tuple(
+    f"{side}_{name}" for side in SIDES for name in SIDE_FLOAT_FIELDS + SIDE_INT_FIELDS
+)
+SNAPSHOT_COLUMNS = ("snap_ts", "snap_spot", "snap_expiry", "snap_offset")
+
+INDEX_FILE = "index.json"
+CACHE_DIR = ".cache"
+
+
+def _column_dtype(name: str):
+    if name == "strike" or name in ("snap_ts", "snap_spot"):
+        return np.float64
+    if name == "snap_offset":
+        return np.int64
+    if name == "snap_expiry":
+        return "U10"
+    if name.split("_", 1)[1] in SIDE_INT_FIELDS:
+        return np.int64
+    return np.float32
+
+
+@dataclass
+class ChainDay:
+    """One partition's snapshots; row columns are grouped by snapshot offsets"""
+    underlying: str
+    date: str
+    timestamps: np.ndarray  # Epoch seconds per snapshot
+    spots: np.ndarray
+    expiries: np.ndarray
+    offsets: np.ndarray     # Row start per snapshot, plus a final end offset
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def snapshot_rows(self, index: int) -> slice:
+        return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+
+class ChainSnapshotRecorder:
+    """
+    Buffers chain refreshes and writes them as compressed segments
+
+    Layout: {base_dir}/{underlying}/{YYYY-MM-DD}/seg_NNNNN.npz plus an
+    index.json listing each segment's rows, snapshot count and time range.
+    A segment stores one compressed member per column, so readers only
+    decompress the columns they ask for. The index is replaced atomically
+    after each segment is written; a crash loses at most the unflushed
+    buffer.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "data/chain_snapshots",
+        flush_snapshots: int = 60,
+        flush_interval_seconds: float = 300.0
+    ):
+        self.logger = logger.bind(module="chain_recorder")
+        self.base_dir = Path(base_dir)
+        self.flush_snapshots = flush_snapshots
+        self.flush_interval_seconds = flush_interval_seconds
+
+        # (underlying, date) -> buffered snapshots
+        self._buffers: Dict[Tuple[str, str], List[Tuple[float, float, str, Sequence[Dict]]]] = {}
+        self._last_flush: Dict[Tuple[str, str], float] = {}
+
+        self.stats = {
+            "snapshots_recorded": 0,
+            "segments_written": 0,
+            "rows_written": 0,
+            "bytes_written": 0,
+            "last_flush_ms": 0.0
+        }
+
+    def record(
+        self,
+        underlying: str,
+        spot: float,
+        expiry: str,
+        strikes: Sequence[Dict],
+        timestamp: Optional[datetime] = None
+    ) -> None:
+        """
+        Buffer one chain refresh
+
+        Args:
+            underlying: Underlying symbol (e.g. "NIFTY")
+            spot: Underlying price at the refresh
+            expiry: Expiry date of the chain (ISO)
+            strikes: [{"strike", "call": {...}, "put": {...}}, ...]
+            timestamp: Refresh time (defaults to now; naive times are IST)
+        """
+        if not strikes:
+            return
+        if timestamp is None:
+            timestamp = datetime.now(IST)
+        elif timestamp.tzinfo is None:
+            timestamp = IST.localize(timestamp)
+        # Partitions are IST trading days, whatever the server's timezone
+        key = (underlying, timestamp.astimezone(IST).date().isoformat())
+
+        # A new day closes out the previous partition
+        for other in [k for k in self._buffers if k[0] == underlying and k != key]:
+            self._flush_partition(other)
+
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append((timestamp.timestamp(), float(spot), str(expiry)[:10], strikes))
+        self._last_flush.setdefault(key, time.monotonic())
+        self.stats["snapshots_recorded"] += 1
+
+        if (
+            len(buffer) >= self.flush_snapshots
+            or time.monotonic() - self._last_flush[key] >= self.flush_interval_seconds
+        ):
+            self._flush_partition(key)
+
+    def flush(self, underlying: Optional[str] = None) -> int:
+        """Write every buffered partition (or one underlying's); returns segments written"""
+        written = 0
+        for key in list(self._buffers):
+            if underlying is None or key[0] == underlying:
+                written += self._flush_partition(key)
+        return written
+
+    def _flush_partition(self, key: Tuple[str, str]) -> int:
+        # The buffer is only released once its segment is on disk, so a failed
+        # write keeps the snapshots for the next flush
+        buffer = self._buffers.get(key)
+        if not buffer:
+            self._buffers.pop(key, None)
+            self._last_flush.pop(key, None)
+            return 0
+
+        start = time.perf_counter()
+        underlying, day = key
+        partition = self.base_dir / underlying / day
+        partition.mkdir(parents=True, exist_ok=True)
+
+        columns = self._to_columns(buffer)
+        index = _read_index(partition)
+        segment_name = f"seg_{len(index['segments']):05d}.npz"
+        segment_path = partition / segment_name
+
+        tmp_path = partition / f".{segment_name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp_path, segment_path)
+
+        strikes = columns["strike"]
+        index["segments"].append({
+            "file": segment_name,
+            "rows": int(len(strikes)),
+            "snapshots": len(buffer),
+            "first_ts": buffer[0][0],
+            "last_ts": buffer[-1][0],
+            "min_strike": float(strikes.min()),
+            "max_strike": float(strikes.max())
+        })
+        _write_index(partition, index)
+        self._buffers.pop(key, None)
+        self._last_flush.pop(key, None)
+
+        self.stats["segments_written"] += 1
+        self.stats["rows_written"] += int(len(strikes))
+        self.stats["bytes_written"] += segment_path.stat().st_size
+        self.stats["last_flush_ms"] = (time.perf_counter() - start) * 1000
+
+        self.logger.debug(
+            f"Wrote {underlying} {day}/{segment_name}: {len(buffer)} snapshots, "
+            f"{len(strikes)} rows in {self.stats['last_flush_ms']:.1f}ms"
+        )
+        return 1
+
+    def _to_columns(self, buffer: List[Tuple[float, float, str, Sequence[Dict]]]) -> Dict[str, np.ndarray]:
+        rows = [row for _, _, _, strikes in buffer for row in strikes]
+        columns: Dict[str, np.ndarray] = {
+            "strike": np.fromiter((row["strike"] for row in rows), dtype=np.float64, count=len(rows))
+        }
+        for side in SIDES:
+            for name in SIDE_FLOAT_FIELDS + SIDE_INT_FIELDS:
+                column = f"{side}_{name}"
+                dtype = _column_dtype(column)
+                columns[column] = np.fromiter(
+                    (_number(row.get(side, {}).get(name), name in SIDE_INT_FIELDS) for row in rows),
+                    dtype=dtype,
+                    count=len(rows)
+                )
+
+        columns["snap_ts"] = np.array([ts for ts, _, _, _ in buffer], dtype=np.float64)
+        columns["snap_spot"] = np.array([spot for _, spot, _, _ in buffer], dtype=np.float64)
+        columns["snap_expiry"] = np.array([expiry for _, _, expiry, _ in buffer], dtype="U10")
+        columns["snap_offset"] = np.cumsum([0] + [len(strikes) for _, _, _, strikes in buffer])[:-1].astype(np.int64)
+        return columns
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "buffered_snapshots": sum(len(buffer) for buffer in self._buffers.values())
+        }
+
+
+class ChainSnapshotReader:
+    """
+    Reads recorded partitions without loading whole days
+
+    Each requested column is decompressed once from its segments into an
+    uncompressed .npy under the partition's .cache directory and then
+    memory-mapped, so repeated backtest passes page in only the columns
+    and rows they touch. Caches are rebuilt when the index is newer (the
+    partition gained segments since).
+    """
+
+    def __init__(self, base_dir: str = "data/chain_snapshots"):
+        self.logger = logger.bind(module="chain_reader")
+        self.base_dir = Path(base_dir)
+
+    def list_underlyings(self) -> List[str]:
+        if not self.base_dir.exists():
+            return []
+        return sorted(p.name for p in self.base_dir.iterdir() if p.is_dir())
+
+    def list_dates(self, underlying: str, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        root = self.base_dir / underlying
+        if not root.exists():
+            return []
+        dates = sorted(p.name for p in root.iterdir() if (p / INDEX_FILE).exists())
+        return [d for d in dates if (start is None or d >= start) and (end is None or d <= end)]
+
+    def column(self, underlying: str, day: str, name: str) -> np.ndarray:
+        """One column for a whole partition, memory-mapped read-only"""
+        partition = self.base_dir / underlying / day
+        index_path = partition / INDEX_FILE
+        if not index_path.exists():
+            raise FileNotFoundError(f"No recorded chains for {underlying} on {day}")
+        if name not in ROW_COLUMNS and name not in SNAPSHOT_COLUMNS:
+            raise KeyError(f"Unknown chain column: {name}")
+
+        cache_path = partition / CACHE_DIR / f"{name}.npy"
+        if not cache_path.exists() or cache_path.stat().st_mtime_ns <= index_path.stat().st_mtime_ns:
+            self._build_cache(partition, name, cache_path)
+        return np.load(cache_path, mmap_mode="r")
+
+    def load_day(
+        self,
+        underlying: str,
+        day: str,
+        columns: Optional[Sequence[str]] = None
+    ) -> ChainDay:
+        """
+        Snapshots of one day with the requested row columns
+
+        Args:
+            underlying: Underlying symbol
+            day: Partition date (YYYY-MM-DD)
+            columns: Row columns to load (all when omitted)
+        """
+        names = ROW_COLUMNS if columns is None else tuple(dict.fromkeys(("strike", *columns)))
+        offsets = self.column(underlying, day, "snap_offset")
+        strikes = self.column(underlying, day, "strike")
+        return ChainDay(
+            underlying=underlying,
+            date=day,
+            timestamps=self.column(underlying, day, "snap_ts"),
+            spots=self.column(underlying, day, "snap_spot"),
+            expiries=self.column(underlying, day, "snap_expiry"),
+            offsets=np.append(offsets, len(strikes)),
+            columns={name: strikes if name == "strike" else self.column(underlying, day, name) for name in names}
+        )
+
+    def iter_snapshots(
+        self,
+        underlying: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Replay recorded chains in time order in the recorder's input shape"""
+        for day in self.list_dates(underlying, start, end):
+            chain_day = self.load_day(underlying, day)
+            columns = {name: np.asarray(values) for name, values in chain_day.columns.items()}
+            for i in range(len(chain_day)):
+                rows = chain_day.snapshot_rows(i)
+                strikes = []
+                for j in range(rows.start, rows.stop):
+                    strikes.append({
+                        "strike": float(columns["strike"][j]),
+                        **{
+                            side: {
+                                name: columns[f"{side}_{name}"][j].item()
+                                for name in SIDE_FLOAT_FIELDS + SIDE_INT_FIELDS
+                            }
+                            for side in SIDES
+                        }
+                    })
+                yield {
+                    "underlying": underlying,
+                    "timestamp": datetime.fromtimestamp(float(chain_day.timestamps[i]), IST),
+                    "spot": float(chain_day.spots[i]),
+                    "expiry": str(chain_day.expiries[i]),
+                    "strikes": strikes
+                }
+
+    def strike_series(
+        self,
+        underlying: str,
+        strike: float,
+        column: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        expiry: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Time series of one column for one strike across days
+
+        Only the strike, target and snapshot columns are read.
+
+        Returns:
+            (epoch-second timestamps, values)
+        """
+        timestamps: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        for day in self.list_dates(underlying, start, end):
+            strikes = self.column(underlying, day, "strike")
+            rows = np.flatnonzero(strikes == strike)
+            if len(rows) == 0:
+                continue
+            offsets = self.column(underlying, day, "snap_offset")
+            snapshot = np.searchsorted(offsets, rows, side="right") - 1
+            if expiry is not None:
+                keep = self.column(underlying, day, "snap_expiry")[snapshot] == expiry
+                rows, snapshot = rows[keep], snapshot[keep]
+            timestamps.append(self.column(underlying, day, "snap_ts")[snapshot])
+            values.append(self.column(underlying, day, column)[rows])
+
+        if not timestamps:
+            return np.empty(0), np.empty(0, dtype=_column_dtype(column))
+        return np.concatenate(timestamps), np.concatenate(values)
+
+    def _build_cache(self, partition: Path, name: str, cache_path: Path) -> None:
+        index = _read_index(partition)
+        parts = []
+        row_base = 0
+        for segment in index["segments"]:
+            with np.load(partition / segment["file"]) as npz:
+                part = npz[name]
+            if name == "snap_offset":
+                part = part + row_base
+            row_base += segment["rows"]
+            parts.append(part)
+
+        data = np.concatenate(parts) if parts else np.empty(0, dtype=_column_dtype(name))
+        cache_path.parent.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_name(f".{cache_path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp_path, cache_path)
+
+
+def _number(value: Any, integer: bool = False) -> float:
+    """Column value; integer columns cannot hold NaN or inf, so those become 0"""
+    try:
+        number = float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+    if integer and not math.isfinite(number):
+        return 0.0
+    return number
+
+
+def _read_index(partition: Path) -> Dict[str, Any]:
+    index_path = partition / INDEX_FILE
+    if not index_path.exists():
+        return {"version": 1, "segments": []}
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def _write_index(partition: Path, index: Dict[str, Any]) -> None:
+    tmp_path = partition / f".{INDEX_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, partition / INDEX_FILE)
+
+
+# Global instances
+chain_snapshot_recorder = ChainSnapshotRecorder()
+chain_snapshot_reader = ChainSnapshotReader()
@@ -6,11 +6,16 @@ Stores and manages historical option chain data for Z-score calculations
 import json
 import sqlite3
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import numpy as np
 from pathlib import Path
 
+from .sqlite_store import SQLitePool
+
+# Metrics normalised by Z-score; each keeps mergeable per-day aggregates
+ZSCORE_METRICS = ['ndt', 'gex_atm', 'charm_sum', 'rr25', 'vanna_tilt', 'pin_distance']
+
 @dataclass
 class HistoricalSignal:
     """Historical signal data for Z-score calculation"""
@@ -43,11 +48,14 @@ class HistoricalDataService:
     def __init__(self, db_path: str = "data/sentiment_history.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self._pool = SQLitePool(self.db_path)
+        # Window stats memoised per (lookback_days, cutoff_date); cleared on writes
+        self._stats_cache: Dict[Tuple[int, str], Dict[str, ZScoreStats]] = {}
         self._init_database()
     
     def _init_database(self):
         """Initialize SQLite database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.write() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS historical_signals (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -79,66 +87,157 @@ class HistoricalDataService:
                 )
             """)
             
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_metric_stats (
+                    date TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    sum REAL NOT NULL,
+                    sum_sq REAL NOT NULL,
+                    PRIMARY KEY (date, metric)
+                )
+            """)
+            
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_date_timestamp 
                 ON historical_signals(date, timestamp)
             """)
+            
+            # Databases created before daily aggregates existed: backfill once
+            has_signals = conn.execute("SELECT 1 FROM historical_signals LIMIT 1").fetchone()
+            has_aggregates = conn.execute("SELECT 1 FROM daily_metric_stats LIMIT 1").fetchone()
+            if has_signals and not has_aggregates:
+                self._rebuild_daily_stats(conn)
+    
+    def _rebuild_daily_stats(self, conn: sqlite3.Connection):
+        """Recompute per-day metric aggregates from the stored signals"""
+        conn.execute("DELETE FROM daily_metric_stats")
+        for metric in ZSCORE_METRICS:
+            conn.execute(f"""
+                INSERT INTO daily_metric_stats (date, metric, count, sum, sum_sq)
+                SELECT date, ?, COUNT(*), SUM({metric}), SUM({metric} * {metric})
+                FROM historical_signals
+                GROUP BY date
+            """, (metric,))
+    
+    def rebuild_daily_stats(self):
+        """Rebuild daily aggregates, e.g. after editing historical_signals directly"""
+        with self._pool.write() as conn:
+            self._rebuild_daily_stats(conn)
+        self._stats_cache.clear()
     
     def store_signal(self, signal: HistoricalSignal) -> bool:
         """Store a historical signal in the database"""
+        return self.store_signals([signal]) == 1
+    
+    def store_signals(self, signals: Iterable[HistoricalSignal]) -> int:
+        """Store signals in one transaction; returns the number stored"""
+        signals = list(signals)
+        if not signals:
+            return 0
+        
+        # Pre-aggregate per (date, metric) so each day costs one upsert
+        aggregates: Dict[Tuple[str, str], List[float]] = {}
+        for signal in signals:
+            for metric in ZSCORE_METRICS:
+                value = float(getattr(signal, metric))
+                agg = aggregates.setdefault((signal.date, metric), [0, 0.0, 0.0])
+                agg[0] += 1
+                agg[1] += value
+                agg[2] += value * value
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
+            with self._pool.write() as conn:
+                conn.executemany("""
                     INSERT INTO historical_signals 
                     (date, timestamp, spot, ndt, gex_atm, charm_sum, rr25, 
                      vanna_tilt, fb_ratio, pin_distance, iv_front_atm, rv_30m, 
                      regime, next_6h_return)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                """, [(
                     signal.date, signal.timestamp, signal.spot, signal.ndt,
                     signal.gex_atm, signal.charm_sum, signal.rr25, signal.vanna_tilt,
                     signal.fb_ratio, signal.pin_distance, signal.iv_front_atm,
                     signal.rv_30m, signal.regime, signal.next_6h_return
-                ))
-            return True
+                ) for signal in signals])
+                
+                # Fold the signals into their days' aggregates in the same transaction
+                conn.executemany("""
+                    INSERT INTO daily_metric_stats (date, metric, count, sum, sum_sq)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(date, metric) DO UPDATE SET
+                        count = count + excluded.count,
+                        sum = sum + excluded.sum,
+                        sum_sq = sum_sq + excluded.sum_sq
+                """, [(date, metric, *agg) for (date, metric), agg in aggregates.items()])
+            self._stats_cache.clear()
+            return len(signals)
         except Exception as e:
-            print(f"Error storing signal: {e}")
-            return False
+            print(f"Error storing signals: {e}")
+            return 0
+    
+    def load_signals(self, lookback_days: int = 60) -> List[HistoricalSignal]:
+        """Stored signals for the last N days, oldest first"""
+        cutoff_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        
+        with self._pool.read() as conn:
+            cursor = conn.execute("""
+                SELECT date, timestamp, spot, ndt, gex_atm, charm_sum, rr25,
+                       vanna_tilt, fb_ratio, pin_distance, iv_front_atm, rv_30m,
+                       regime, next_6h_return
+                FROM historical_signals
+                WHERE date >= ?
+                ORDER BY date ASC, timestamp ASC
+            """, (cutoff_date,))
+            
+            return [HistoricalSignal(*row) for row in cursor.fetchall()]
     
     def get_zscore_stats(self, lookback_days: int = 60) -> Dict[str, ZScoreStats]:
-        """Get Z-score statistics for the last N days"""
+        """
+        Get Z-score statistics for the last N days
+        
+        Merges one (count, sum, sum_sq) row per day and metric instead of
+        scanning the signals, and reuses the result until the next write or
+        until the window rolls over to a new day.
+        """
         cutoff_date = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        cache_key = (lookback_days, cutoff_date)
+        if cache_key in self._stats_cache:
+            return self._stats_cache[cache_key]
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.read() as conn:
             cursor = conn.execute("""
-                SELECT ndt, gex_atm, charm_sum, rr25, vanna_tilt, pin_distance
-                FROM historical_signals 
+                SELECT metric, SUM(count), SUM(sum), SUM(sum_sq)
+                FROM daily_metric_stats
                 WHERE date >= ?
-                ORDER BY date DESC, timestamp DESC
+                GROUP BY metric
             """, (cutoff_date,))
             
-            data = cursor.fetchall()
+            rows = {row[0]: row[1:] for row in cursor.fetchall()}
         
-        if not data:
+        if not rows:
             # Return default stats if no historical data
             return self._get_default_stats()
         
-        # Convert to numpy array for calculations
-        data_array = np.array(data)
-        metrics = ['ndt', 'gex_atm', 'charm_sum', 'rr25', 'vanna_tilt', 'pin_distance']
-        
+        last_updated = datetime.now().isoformat()
         stats = {}
-        for i, metric in enumerate(metrics):
-            values = data_array[:, i]
+        for metric in ZSCORE_METRICS:
+            count, total, total_sq = rows.get(metric, (0, 0.0, 0.0))
+            if not count:
+                continue
+            mean = total / count
+            # Population variance, matching np.std over the raw values
+            variance = max(total_sq / count - mean * mean, 0.0)
             stats[metric] = ZScoreStats(
-                mean=float(np.mean(values)),
-                std=float(np.std(values)),
-                count=len(values),
-                last_updated=datetime.now().isoformat()
+                mean=float(mean),
+                std=float(np.sqrt(variance)),
+                count=int(count),
+                last_updated=last_updated
             )
         
-        # Update cached stats in database
+        # Persist for get_cached_stats; only on recompute, not every lookup
         self._update_cached_stats(stats)
+        self._stats_cache[cache_key] = stats
         
         return stats
     
@@ -155,17 +254,19 @@ class HistoricalDataService:
     
     def _update_cached_stats(self, stats: Dict[str, ZScoreStats]):
         """Update cached Z-score stats in database"""
-        with sqlite3.connect(self.db_path) as conn:
-            for metric, stat in stats.items():
-                conn.execute("""
-                    INSERT OR REPLACE INTO zscore_stats 
-                    (metric, mean, std, count, last_updated)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (metric, stat.mean, stat.std, stat.count, stat.last_updated))
+        with self._pool.write() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO zscore_stats 
+                (metric, mean, std, count, last_updated)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (metric, stat.mean, stat.std, stat.count, stat.last_updated)
+                for metric, stat in stats.items()
+            ])
     
     def get_cached_stats(self) -> Dict[str, ZScoreStats]:
         """Get cached Z-score stats from database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.read() as conn:
             cursor = conn.execute("""
                 SELECT metric, mean, std, count, last_updated
                 FROM zscore_stats
@@ -198,7 +299,7 @@ class HistoricalDataService:
         """Get historical performance metrics for a regime"""
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.read() as conn:
             cursor = conn.execute("""
                 SELECT next_6h_return, regime
                 FROM historical_signals 
@@ -234,6 +335,7 @@ class HistoricalDataService:
         print(f"Generating {days} days of mock historical data...")
         
         base_date = datetime.now() - timedelta(days=days)
+        signals = []
         
         for day in range(days):
             current_date = base_date + timedelta(days=day)
@@ -261,23 +363,34 @@ class HistoricalDataService:
                     next_6h_return=np.random.normal(0, 0.02)
                 )
                 
-                self.store_signal(signal)
+                signals.append(signal)
         
+        self.store_signals(signals)
         print(f"Generated mock data for {days} days")
     
     def cleanup_old_data(self, keep_days: int = 90):
         """Clean up data older than specified days"""
         cutoff_date = (datetime.now() - timedelta(days=keep_days)).strftime('%Y-%m-%d')
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.write() as conn:
             cursor = conn.execute("""
                 DELETE FROM historical_signals WHERE date < ?
             """, (cutoff_date,))
             
             deleted_count = cursor.rowcount
+            
+            conn.execute("""
+                DELETE FROM daily_metric_stats WHERE date < ?
+            """, (cutoff_date,))
+        
+        self._stats_cache.clear()
         
         print(f"Cleaned up {deleted_count} old records")
         return deleted_count
+    
+    def close(self):
+        """Close pooled database connections"""
+        self._pool.close()
 
 # Singleton instance
 historical_service = HistoricalDataService()
@@ -18,7 +18,11 @@ import sys
 sys.path.append('/Users/ashishdhiman/niftytradesetup/niftytradesetup')
 from Dhan_Tradehull_V2 import Tradehull
 
+from app.utils import option_pricing
+from app.utils.market_hours import IST
 from .historical_data_service import HistoricalSignal, historical_service
+from .vol_surface import VolSurfaceService
+from .chain_store import chain_snapshot_reader
 
 @dataclass
 class OptionChainSnapshot:
@@ -162,10 +166,28 @@ class MarketDataFetcher:
         return pd.DataFrame(data)
     
     def fetch_option_chain_historical(self, symbol: str = "NIFTY", days: int = 60) -> List[OptionChainSnapshot]:
-        """Fetch historical option chain data using Tradehull integration"""
+        """Fetch historical option chain data, preferring chains recorded from live refreshes"""
+        print(f"🔄 Fetching option chain data for {symbol} for {days} days...")
+        
+        recorded = self.load_recorded_snapshots(symbol, days)
+        recorded_dates = {snapshot.date for snapshot in recorded}
+        if recorded:
+            print(f"✅ Loaded {len(recorded)} recorded option chain snapshots for {len(recorded_dates)} days")
+        if len(recorded_dates) >= days:
+            return recorded
+        
+        # Fill the days without recordings from the historical fetch
+        fetched = [
+            snapshot for snapshot in self._fetch_option_chain_snapshots(days)
+            if snapshot.date not in recorded_dates
+        ]
+        snapshots = sorted(recorded + fetched, key=lambda snapshot: snapshot.timestamp)
+        keep = set(sorted({snapshot.date for snapshot in snapshots})[-days:])
+        return [snapshot for snapshot in snapshots if snapshot.date in keep]
+    
+    def _fetch_option_chain_snapshots(self, days: int) -> List[OptionChainSnapshot]:
+        """Option chains built around historical spot prices from Tradehull"""
         try:
-            print(f"🔄 Fetching option chain data for {symbol} for {days} days...")
-            
             # First get spot data using Tradehull
             spot_data = self.fetch_nifty_historical_prices(days)
             
@@ -218,6 +240,24 @@ class MarketDataFetcher:
             print(f"Error fetching option chain data: {e}")
             return self._generate_synthetic_option_data(days)
     
+    def load_recorded_snapshots(self, symbol: str = "NIFTY", days: int = 60) -> List[OptionChainSnapshot]:
+        """Recorded option chains for the last `days` recorded sessions"""
+        dates = chain_snapshot_reader.list_dates(symbol)[-days:]
+        if not dates:
+            return []
+        
+        snapshots = []
+        for recorded in chain_snapshot_reader.iter_snapshots(symbol, dates[0], dates[-1]):
+            timestamp = recorded['timestamp'].astimezone(IST)
+            snapshots.append(OptionChainSnapshot(
+                date=timestamp.strftime('%Y-%m-%d'),
+                timestamp=timestamp.replace(microsecond=0).isoformat(),
+                spot=recorded['spot'],
+                expiry=recorded['expiry'],
+                strikes=recorded['strikes']
+            ))
+        return snapshots
+    
     def _fetch_dhan_option_chain(self, spot: float, date_str: str) -> Optional[List[Dict]]:
         """Fetch real option chain data from Dhan API"""
         try:
@@ -321,22 +361,23 @@ class MarketDataFetcher:
         """Generate realistic option chain data for given spot price"""
         strikes = []
         atm_strike = round(spot / 50) * 50
+        dte = self._calculate_dte(date_str)
         
-        # Generate strikes around ATM
-        for i in range(-10, 11):
-            strike = atm_strike + (i * 50)
-            
-            # Calculate realistic Greeks and IVs
-            dte = self._calculate_dte(date_str)
-            moneyness = strike / spot
-            
-            # Realistic IV with skew
-            call_iv = self._calculate_iv(moneyness, dte, option_type='call')
-            put_iv = self._calculate_iv(moneyness, dte, option_type='put')
-            
-            # Calculate Greeks using Black-Scholes approximations
-            call_greeks = self._calculate_greeks(spot, strike, call_iv, dte, 'call')
-            put_greeks = self._calculate_greeks(spot, strike, put_iv, dte, 'put')
+        # Strikes around ATM with realistic skewed IVs
+        strike_grid = atm_strike + np.arange(-10, 11) * 50
+        call_ivs = np.array([self._calculate_iv(k / spot, dte, option_type='call') for k in strike_grid])
+        put_ivs = np.array([self._calculate_iv(k / spot, dte, option_type='put') for k in strike_grid])
+        
+        # Greeks for the whole chain in two vectorized Black-Scholes calls
+        call_chain = self._calculate_chain_greeks(spot, strike_grid, call_ivs, dte, 'call')
+        put_chain = self._calculate_chain_greeks(spot, strike_grid, put_ivs, dte, 'put')
+        
+        for i, strike in enumerate(strike_grid.tolist()):
+            call_iv, put_iv = float(call_ivs[i]), float(put_ivs[i])
+            call_greeks = call_chain.row(i)
+            put_greeks = put_chain.row(i)
+            call_greeks['price'] = max(0.05, call_greeks['price'])
+            put_greeks['price'] = max(0.05, put_greeks['price'])
             
             # Realistic OI and volume patterns
             distance_from_atm = abs(strike - spot) / spot
@@ -406,51 +447,17 @@ class MarketDataFetcher:
         iv = base_iv + skew_adjustment + time_adjustment + random_adjustment
         return max(0.08, min(0.50, iv))  # Keep IV between 8% and 50%
     
+    def _calculate_chain_greeks(self, spot: float, strikes: np.ndarray, ivs: np.ndarray,
+                                dte: float, option_type: str) -> option_pricing.OptionGreeks:
+        """Black-Scholes price and greeks for a strip of strikes"""
+        t = max(dte, 1) / 365.0  # Minimum 1 day
+        return option_pricing.greeks(spot, strikes, t, ivs, option_type == 'call', r=0.06)
+    
     def _calculate_greeks(self, spot: float, strike: float, iv: float, dte: float, option_type: str) -> Dict:
-        """Calculate option Greeks using simplified Black-Scholes"""
-        from scipy.stats import norm
-        import math
-        
-        r = 0.06  # Risk-free rate
-        t = dte / 365.0
-        
-        if t <= 0:
-            t = 1/365  # Minimum 1 day
-        
-        # Black-Scholes calculations
-        d1 = (math.log(spot/strike) + (r + 0.5*iv**2)*t) / (iv*math.sqrt(t))
-        d2 = d1 - iv*math.sqrt(t)
-        
-        if option_type == 'call':
-            price = spot*norm.cdf(d1) - strike*math.exp(-r*t)*norm.cdf(d2)
-            delta = norm.cdf(d1)
-        else:
-            price = strike*math.exp(-r*t)*norm.cdf(-d2) - spot*norm.cdf(-d1)
-            delta = -norm.cdf(-d1)
-        
-        # Common Greeks
-        gamma = norm.pdf(d1) / (spot * iv * math.sqrt(t))
-        theta = (-spot*norm.pdf(d1)*iv/(2*math.sqrt(t)) - 
-                r*strike*math.exp(-r*t)*norm.cdf(d2 if option_type=='call' else -d2)) / 365
-        vega = spot * norm.pdf(d1) * math.sqrt(t) / 100
-        
-        # Second-order Greeks
-        vanna = vega * (1 - d1) / (spot * iv)
-        charm = -norm.pdf(d1) * (2*r*t - d2*iv*math.sqrt(t)) / (2*t*iv*math.sqrt(t)) / 365
-        
-        if option_type == 'put':
-            charm = -charm
-            vanna = -vanna
-        
-        return {
-            'price': max(0.05, price),
-            'delta': delta,
-            'gamma': gamma,
-            'theta': theta,
-            'vega': vega,
-            'vanna': vanna,
-            'charm': charm
-        }
+        """Calculate option Greeks for a single strike"""
+        greeks = self._calculate_chain_greeks(spot, np.array([strike]), np.array([iv]), dte, option_type).row(0)
+        greeks['price'] = max(0.05, greeks['price'])
+        return greeks
     
     def _calculate_dte(self, date_str: str) -> int:
         """Calculate days to expiry for nearest monthly expiry"""
@@ -499,6 +506,8 @@ class MarketDataFetcher:
     def convert_to_historical_signals(self, snapshots: List[OptionChainSnapshot]) -> List[HistoricalSignal]:
         """Convert option chain snapshots to historical signals"""
         signals = []
+        # Dedicated surface so historical replays never touch the live one
+        surface = VolSurfaceService()
         
         for i, snapshot in enumerate(snapshots):
             try:
@@ -506,13 +515,22 @@ class MarketDataFetcher:
                 spot = snapshot.spot
                 strikes_data = snapshot.strikes
                 
-                # Find ATM strike
-                atm_strike = min(strikes_data, key=lambda x: abs(x['strike'] - spot))
+                # Fit the snapshot's smile once; RR25 and FB read from the fit
+                as_of = datetime.fromisoformat(snapshot.timestamp).replace(tzinfo=None)
+                surface.prune_expired("NIFTY", as_of)
+                surface.update_chain(
+                    "NIFTY",
+                    snapshot.expiry,
+                    spot,
+                    [s['strike'] for s in strikes_data],
+                    [s['call']['iv'] for s in strikes_data],
+                    [s['put']['iv'] for s in strikes_data],
+                    as_of=as_of
+                )
                 
                 # Calculate RR25 (25 delta risk reversal)
-                call_25d = self._find_strike_by_delta(strikes_data, 0.25, 'call')
-                put_25d = self._find_strike_by_delta(strikes_data, -0.25, 'put')
-                rr25 = (call_25d['iv'] - put_25d['iv']) * 100 if call_25d and put_25d else 0
+                rr25_iv = surface.risk_reversal("NIFTY", 0.25, snapshot.expiry)
+                rr25 = rr25_iv * 100 if rr25_iv is not None else 0
                 
                 # Calculate NDT (Net Delta Tilt)
                 atm_strikes = [s for s in strikes_data if abs(s['strike'] - spot) / spot <= 0.02]
@@ -530,8 +548,8 @@ class MarketDataFetcher:
                 charm_sum = sum(s['call']['charm'] * s['call']['oi'] + 
                               s['put']['charm'] * s['put']['oi'] for s in atm_strikes)
                 
-                # FB ratio (front/back month IV) - simplified as current/0.9*current
-                fb_ratio = atm_strike['call']['iv'] / (atm_strike['call']['iv'] * 0.9)
+                # FB ratio (front/back ATM IV); neutral until a back expiry is on the surface
+                fb_ratio = surface.front_back_ratio("NIFTY") or 1.0
                 
                 # Pin distance
                 max_oi_strike = max(strikes_data, key=lambda x: x['call']['oi'] + x['put']['oi'])
@@ -551,20 +569,6 @@ class MarketDataFetcher:
         
         return signals
     
-    def _find_strike_by_delta(self, strikes_data: List[Dict], target_delta: float, option_type: str) -> Optional[Dict]:
-        """Find strike closest to target delta"""
-        best_strike = None
-        min_diff = float('inf')
-        
-        for strike_data in strikes_data:
-            delta = strike_data[option_type]['delta']
-            diff = abs(delta - abs(target_delta))
-            if diff < min_diff:
-                min_diff = diff
-                best_strike = strike_data[option_type]
-        
-        return best_strike
-    
     def _calculate_realized_vol(self, snapshots: List[OptionChainSnapshot], current_idx: int) -> float:
         """Calculate 30-minute realized volatility"""
         if current_idx < 30:
@@ -605,10 +609,7 @@ class MarketDataFetcher:
             # Clear existing data and store new data
             historical_service.cleanup_old_data(0)  # Clear all old data
             
-            stored_count = 0
-            for signal in signals:
-                if historical_service.store_signal(signal):
-                    stored_count += 1
+            stored_count = historical_service.store_signals(signals)
             
             print(f"✅ Stored {stored_count} historical signals successfully")
             
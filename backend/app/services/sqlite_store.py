@@ -0,0 +1,125 @@
+"""
+Pooled SQLite Access
+Long-lived WAL-mode connections for the local analytics databases
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Union
+
+# Connection pragmas applied to every pooled connection
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",    # WAL + NORMAL: durable up to the last checkpointed commit
+    "cache_size": -16000,       # 16 MB page cache (negative = KiB)
+    "temp_store": "MEMORY",
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000
+}
+
+
+class SQLitePool:
+    """
+    One writer connection plus a small pool of reader connections
+
+    The database runs in WAL mode, so readers see the last committed state
+    and never block the writer, and the writer never blocks readers. SQLite
+    allows a single writer at a time, so writes are serialised on one
+    connection behind a lock instead of contending for the file lock.
+    Connections stay open for the pool's lifetime, which keeps each
+    connection's prepared-statement cache warm.
+    """
+
+    def __init__(self, db_path: Union[str, Path], max_readers: int = 4, cached_statements: int = 256):
+        self.db_path = Path(db_path)
+        self.max_readers = max_readers
+        self.cached_statements = cached_statements
+
+        self._write_lock = threading.Lock()
+        self._writer: sqlite3.Connection = None
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,  # Transactions are explicit, see write()
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        for name, value in DEFAULT_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._connect()
+            # Persistent per database file; set once by the writer
+            self._writer.execute("PRAGMA journal_mode=WAL")
+        return self._writer
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one IMMEDIATE transaction on the writer connection"""
+        if self._closed:
+            raise RuntimeError(f"SQLite pool for {self.db_path} is closed")
+
+        with self._write_lock:
+            conn = self._get_writer()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection (autocommit, snapshot per statement)"""
+        if self._closed:
+            raise RuntimeError(f"SQLite pool for {self.db_path} is closed")
+
+        # Make sure the database is in WAL mode before the first reader opens
+        if self._writer is None:
+            with self._write_lock:
+                self._get_writer()
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                can_open = len(self._all_readers) < self.max_readers
+                if can_open:
+                    conn = self._connect()
+                    self._all_readers.append(conn)
+            if not can_open:
+                conn = self._readers.get()
+
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def checkpoint(self, mode: str = "PASSIVE"):
+        """Fold the WAL back into the main database file"""
+        with self._write_lock:
+            self._get_writer().execute(f"PRAGMA wal_checkpoint({mode})")
+
+    def close(self):
+        """Close all connections; the pool cannot be used afterwards"""
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+        self._readers = queue.LifoQueue()
@@ -0,0 +1,411 @@
+"""
+Implied Volatility Surface Service
+Fits per-expiry smiles from option chains and answers IV queries from cached fits
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time
+from typing import Dict, List, Optional, Tuple, Any
+
+import numpy as np
+from loguru import logger
+from scipy.optimize import least_squares
+
+from app.utils import option_pricing
+
+MIN_SVI_POINTS = 5
+EXPIRY_CUTOFF = dt_time(15, 30)  # NSE options expire at the close
+DELTA_GRID_POINTS = 201
+
+
+@dataclass
+class SmileFit:
+    """
+    Fitted smile for one expiry, in log-moneyness k = ln(K / F)
+
+    `model` is "svi" (raw SVI: a, b, rho, m, sigma) or "poly" (quadratic
+    total variance for sparse chains). The forward-delta grid is built at
+    fit time so delta queries are a single interpolation.
+    """
+    expiry: str
+    time_to_expiry: float
+    model: str
+    params: np.ndarray
+    rmse: float
+    num_quotes: int
+    fitted_at: float
+    delta_grid: np.ndarray = field(repr=False)  # Call forward delta, ascending
+    iv_grid: np.ndarray = field(repr=False)
+
+    def total_variance(self, k: Any) -> np.ndarray:
+        k = np.asarray(k, dtype=float)
+        if self.model == "svi":
+            a, b, rho, m, sigma = self.params
+            w = a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + sigma * sigma))
+        else:
+            w = np.polyval(self.params, k)
+        return np.maximum(w, option_pricing.MIN_VOLATILITY ** 2 * self.time_to_expiry)
+
+    def iv(self, k: Any) -> np.ndarray:
+        return np.sqrt(self.total_variance(k) / self.time_to_expiry)
+
+    def iv_at_delta(self, delta: float) -> float:
+        """IV at a call delta (0..1) or put delta (-1..0)"""
+        call_delta = 1.0 + delta if delta < 0 else delta
+        return float(np.interp(call_delta, self.delta_grid, self.iv_grid))
+
+
+@dataclass
+class _SmileQuotes:
+    """Latest OTM quotes for one expiry plus the fit derived from them"""
+    spot: float
+    forward: float
+    time_to_expiry: float
+    strikes: np.ndarray
+    ivs: np.ndarray
+    fit: Optional[SmileFit] = None
+    dirty: bool = True
+    fit_failed: bool = False  # Last fit of these quotes failed; retried on the next update
+
+
+class VolSurfaceService:
+    """
+    Per-underlying implied volatility surfaces
+
+    Each expiry keeps its latest out-of-the-money quotes (puts below the
+    forward, calls above) and a fitted smile. A chain update only refits
+    when quotes moved more than `refit_tolerance` or time decayed
+    noticeably, and refits warm-start from the previous parameters, so
+    steady streams cost little. Single-quote updates mark the smile dirty
+    and the next query refits it; a failed fit is not retried until the
+    quotes change again. Queries otherwise read cached fits:
+    IV at strike is a closed-form evaluation, IV at delta and risk
+    reversals interpolate the cached delta grid, and the term structure
+    is rebuilt only when an ATM level changes.
+    """
+
+    def __init__(self, refit_tolerance: float = 0.0005, risk_free_rate: float = option_pricing.DEFAULT_RISK_FREE_RATE):
+        self.logger = logger.bind(module="vol_surface")
+        self.refit_tolerance = refit_tolerance
+        self.risk_free_rate = risk_free_rate
+
+        self.surfaces: Dict[str, Dict[str, _SmileQuotes]] = {}
+        self._term_structure: Dict[str, List[Tuple[str, float, float]]] = {}
+
+        self.stats = {
+            "chain_updates": 0,
+            "quote_updates": 0,
+            "fits": 0,
+            "skipped_fits": 0,
+            "fallback_fits": 0,
+            "failed_fits": 0,
+            "last_fit_ms": 0.0
+        }
+
+    def update_chain(
+        self,
+        underlying: str,
+        expiry: str,
+        spot: float,
+        strikes: Any,
+        call_ivs: Any,
+        put_ivs: Any,
+        time_to_expiry: Optional[float] = None,
+        as_of: Optional[datetime] = None
+    ) -> Optional[SmileFit]:
+        """
+        Ingest one expiry's chain and refit its smile if quotes changed
+
+        Args:
+            underlying: Underlying symbol (e.g. "NIFTY")
+            expiry: Expiry date (ISO)
+            spot: Current underlying price
+            strikes: Strike prices
+            call_ivs, put_ivs: IVs per strike, decimal or percent
+            time_to_expiry: Years to expiry (derived from the date if omitted)
+            as_of: Quote time used to derive time to expiry
+
+        Returns:
+            SmileFit for the expiry, or None if there were no usable quotes
+        """
+        self.stats["chain_updates"] += 1
+        t = time_to_expiry if time_to_expiry is not None else self._years_to_expiry(expiry, as_of)
+        t = max(t, option_pricing.MIN_TIME_TO_EXPIRY)
+        forward = spot * np.exp(self.risk_free_rate * t)
+
+        strikes = np.asarray(strikes, dtype=float)
+        call_ivs = self._normalize(call_ivs)
+        put_ivs = self._normalize(put_ivs)
+        ivs = np.where(strikes >= forward, call_ivs, put_ivs)
+
+        usable = np.isfinite(ivs) & (ivs > 0) & (strikes > 0)
+        strikes, ivs = strikes[usable], ivs[usable]
+        if len(strikes) < 3:
+            return None
+
+        order = np.argsort(strikes)
+        strikes, ivs = strikes[order], ivs[order]
+
+        smiles = self.surfaces.setdefault(underlying, {})
+        quotes = smiles.get(expiry)
+        if quotes is not None and not quotes.dirty and quotes.fit is not None and self._unchanged(quotes, strikes, ivs, t):
+            # Sticky-moneyness: keep the fit, follow the forward
+            quotes.spot, quotes.forward = spot, forward
+            self.stats["skipped_fits"] += 1
+            return quotes.fit
+
+        if quotes is None:
+            quotes = _SmileQuotes(spot, forward, t, strikes, ivs)
+            smiles[expiry] = quotes
+        else:
+            quotes.spot, quotes.forward, quotes.time_to_expiry = spot, forward, t
+            quotes.strikes, quotes.ivs = strikes, ivs
+            quotes.dirty = True
+
+        return self._ensure_fit(underlying, expiry)
+
+    def update_quote(self, underlying: str, expiry: str, strike: float, option_type: str, iv: float) -> None:
+        """Update one strike's IV; the smile refits on its next query"""
+        quotes = self.surfaces.get(underlying, {}).get(expiry)
+        if quotes is None:
+            return
+        # Only the OTM side feeds the smile
+        if (option_type.upper() in ("CE", "CALL")) != (strike >= quotes.forward):
+            return
+
+        iv = float(self._normalize(iv))
+        index = np.searchsorted(quotes.strikes, strike)
+        if index < len(quotes.strikes) and quotes.strikes[index] == strike:
+            if abs(quotes.ivs[index] - iv) < self.refit_tolerance:
+                return
+            quotes.ivs = quotes.ivs.copy()
+            quotes.ivs[index] = iv
+        else:
+            quotes.strikes = np.insert(quotes.strikes, index, strike)
+            quotes.ivs = np.insert(quotes.ivs, index, iv)
+
+        quotes.dirty = True
+        self.stats["quote_updates"] += 1
+
+    def iv_at_strike(self, underlying: str, strike: float, expiry: Optional[str] = None) -> Optional[float]:
+        fit, quotes = self._fit_for(underlying, expiry)
+        if fit is None:
+            return None
+        return float(fit.iv(np.log(strike / quotes.forward)))
+
+    def iv_at_delta(self, underlying: str, delta: float, expiry: Optional[str] = None) -> Optional[float]:
+        """IV at a forward delta; positive for calls, negative for puts"""
+        fit, _ = self._fit_for(underlying, expiry)
+        if fit is None:
+            return None
+        return fit.iv_at_delta(delta)
+
+    def atm_iv(self, underlying: str, expiry: Optional[str] = None) -> Optional[float]:
+        fit, _ = self._fit_for(underlying, expiry)
+        if fit is None:
+            return None
+        return float(fit.iv(0.0))
+
+    def risk_reversal(self, underlying: str, delta: float = 0.25, expiry: Optional[str] = None) -> Optional[float]:
+        """Call IV minus put IV at the same absolute delta (decimal vol)"""
+        fit, _ = self._fit_for(underlying, expiry)
+        if fit is None:
+            return None
+        return fit.iv_at_delta(delta) - fit.iv_at_delta(-delta)
+
+    def butterfly(self, underlying: str, delta: float = 0.25, expiry: Optional[str] = None) -> Optional[float]:
+        """Average wing IV minus ATM IV (decimal vol)"""
+        fit, _ = self._fit_for(underlying, expiry)
+        if fit is None:
+            return None
+        return 0.5 * (fit.iv_at_delta(delta) + fit.iv_at_delta(-delta)) - float(fit.iv(0.0))
+
+    def term_structure(self, underlying: str) -> List[Tuple[str, float, float]]:
+        """[(expiry, years to expiry, ATM IV), ...] ordered front to back"""
+        smiles = self.surfaces.get(underlying, {})
+        if any(quotes.dirty for quotes in smiles.values()):
+            for expiry in list(smiles):
+                self._ensure_fit(underlying, expiry)
+        return self._term_structure.get(underlying, [])
+
+    def front_back_ratio(self, underlying: str) -> Optional[float]:
+        """Front-expiry ATM IV over the next expiry's, None with a single expiry"""
+        structure = self.term_structure(underlying)
+        if len(structure) < 2 or structure[1][2] <= 0:
+            return None
+        return structure[0][2] / structure[1][2]
+
+    def iv_at_time(self, underlying: str, time_to_expiry: float) -> Optional[float]:
+        """ATM IV at any horizon, linear in total variance between expiries"""
+        structure = self.term_structure(underlying)
+        if not structure:
+            return None
+        times = np.array([t for _, t, _ in structure])
+        total_variance = np.array([iv * iv * t for _, t, iv in structure])
+        w = np.interp(time_to_expiry, times, total_variance)
+        if time_to_expiry < times[0]:
+            w = total_variance[0] * time_to_expiry / times[0]  # Flat front vol
+        return float(np.sqrt(w / max(time_to_expiry, option_pricing.MIN_TIME_TO_EXPIRY)))
+
+    def remove_expiry(self, underlying: str, expiry: str) -> None:
+        if self.surfaces.get(underlying, {}).pop(expiry, None) is not None:
+            self._rebuild_term_structure(underlying)
+
+    def prune_expired(self, underlying: str, as_of: Optional[datetime] = None) -> int:
+        """Drop smiles whose expiry has passed; returns how many were removed"""
+        expired = [
+            expiry for expiry in self.surfaces.get(underlying, {})
+            if self._years_to_expiry(expiry, as_of) <= 0
+        ]
+        for expiry in expired:
+            self.remove_expiry(underlying, expiry)
+        return len(expired)
+
+    def get_fit(self, underlying: str, expiry: Optional[str] = None) -> Optional[SmileFit]:
+        return self._fit_for(underlying, expiry)[0]
+
+    def _fit_for(self, underlying: str, expiry: Optional[str]) -> Tuple[Optional[SmileFit], Optional[_SmileQuotes]]:
+        smiles = self.surfaces.get(underlying)
+        if not smiles:
+            return None, None
+        if expiry is None:
+            expiry = min(smiles, key=lambda e: smiles[e].time_to_expiry)
+        quotes = smiles.get(expiry)
+        if quotes is None:
+            return None, None
+        if quotes.dirty:
+            self._ensure_fit(underlying, expiry)
+        return quotes.fit, quotes
+
+    def _ensure_fit(self, underlying: str, expiry: str) -> Optional[SmileFit]:
+        quotes = self.surfaces[underlying][expiry]
+        if not quotes.dirty and (quotes.fit is not None or quotes.fit_failed):
+            return quotes.fit
+
+        start = time.perf_counter()
+        previous = quotes.fit
+        try:
+            quotes.fit = self._fit_smile(expiry, quotes, previous)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            # Serve the previous fit until new quotes arrive rather than
+            # refitting the same quotes on every query
+            quotes.fit = previous
+            quotes.dirty = False
+            quotes.fit_failed = True
+            self.stats["failed_fits"] += 1
+            self.logger.warning(f"Smile fit failed for {underlying} {expiry}: {e}")
+            return previous
+        quotes.dirty = False
+        quotes.fit_failed = False
+
+        self.stats["fits"] += 1
+        self.stats["last_fit_ms"] = (time.perf_counter() - start) * 1000
+
+        if previous is None or abs(float(previous.iv(0.0)) - float(quotes.fit.iv(0.0))) > 1e-6:
+            self._rebuild_term_structure(underlying)
+        return quotes.fit
+
+    def _fit_smile(self, expiry: str, quotes: _SmileQuotes, previous: Optional[SmileFit]) -> SmileFit:
+        t = quotes.time_to_expiry
+        k = np.log(quotes.strikes / quotes.forward)
+        market_w = quotes.ivs * quotes.ivs * t
+        if len(k) >= MIN_SVI_POINTS:
+            if previous is not None and previous.model == "svi":
+                initial = previous.params * np.array([t / previous.time_to_expiry, t / previous.time_to_expiry, 1, 1, 1])
+                max_nfev = 50
+            else:
+                initial = np.array([0.5 * market_w.min(), 0.1, -0.3, 0.0, 0.1])
+                max_nfev = 200
+
+            # a >= 0 keeps total variance positive in both wings; the
+            # curvature floor keeps noisy chains from collapsing into a V
+            w_max = market_w.max()
+            sigma_floor = 0.25 * np.sqrt(market_w.min())
+            lower = np.array([0.0, 1e-6, -0.999, 2 * k.min(), sigma_floor])
+            upper = np.array([w_max, 10.0, 0.999, 2 * k.max(), 2.0])
+            initial = np.clip(initial, lower + 1e-9, upper - 1e-9)
+
+            def residuals(x):
+                a, b, rho, m, sigma = x
+                w = a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + sigma * sigma))
+                return np.sqrt(np.maximum(w, 1e-12) / t) - quotes.ivs
+
+            result = least_squares(residuals, initial, bounds=(lower, upper), max_nfev=max_nfev, x_scale="jac")
+            params, model = result.x, "svi"
+        else:
+            self.stats["fallback_fits"] += 1
+            params, model = np.polyfit(k, market_w, min(2, len(k) - 1)), "poly"
+
+        fit = SmileFit(
+            expiry=expiry,
+            time_to_expiry=t,
+            model=model,
+            params=params,
+            rmse=0.0,
+            num_quotes=len(k),
+            fitted_at=time.time(),
+            delta_grid=np.empty(0),
+            iv_grid=np.empty(0)
+        )
+        fit.rmse = float(np.sqrt(np.mean((fit.iv(k) - quotes.ivs) ** 2)))
+
+        # Forward-delta lookup grid out to +/-6 ATM standard deviations
+        atm_std = float(np.sqrt(fit.total_variance(0.0)))
+        grid_k = np.linspace(-6 * atm_std, 6 * atm_std, DELTA_GRID_POINTS)
+        grid_w = fit.total_variance(grid_k)
+        sqrt_w = np.sqrt(grid_w)
+        call_delta = option_pricing.norm_cdf(-grid_k / sqrt_w + 0.5 * sqrt_w)
+        # Delta falls as k rises; interpolation wants ascending x
+        fit.delta_grid = call_delta[::-1]
+        fit.iv_grid = np.sqrt(grid_w / t)[::-1]
+        return fit
+
+    def _rebuild_term_structure(self, underlying: str) -> None:
+        smiles = self.surfaces.get(underlying, {})
+        self._term_structure[underlying] = sorted(
+            (
+                (expiry, quotes.time_to_expiry, float(quotes.fit.iv(0.0)))
+                for expiry, quotes in smiles.items()
+                if quotes.fit is not None
+            ),
+            key=lambda row: row[1]
+        )
+
+    def _unchanged(self, quotes: _SmileQuotes, strikes: np.ndarray, ivs: np.ndarray, t: float) -> bool:
+        if len(strikes) != len(quotes.strikes) or not np.array_equal(strikes, quotes.strikes):
+            return False
+        if abs(t - quotes.time_to_expiry) > 0.01 * quotes.time_to_expiry:
+            return False
+        return float(np.max(np.abs(ivs - quotes.ivs))) < self.refit_tolerance
+
+    def _normalize(self, ivs: Any) -> np.ndarray:
+        """Decimal IVs (percent quotes are divided by 100)"""
+        ivs = np.asarray(ivs, dtype=float)
+        return np.where(ivs > 1.0, ivs / 100.0, ivs)
+
+    def _years_to_expiry(self, expiry: str, as_of: Optional[datetime]) -> float:
+        expiry_at = datetime.combine(datetime.fromisoformat(expiry).date(), EXPIRY_CUTOFF)
+        now = as_of or datetime.now()
+        return (expiry_at - now).total_seconds() / (365.0 * 86400.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "underlyings": {
+                underlying: {
+                    expiry: {
+                        "model": quotes.fit.model if quotes.fit else None,
+                        "rmse": quotes.fit.rmse if quotes.fit else None,
+                        "quotes": len(quotes.strikes),
+                        "dirty": quotes.dirty
+                    }
+                    for expiry, quotes in smiles.items()
+                }
+                for underlying, smiles in self.surfaces.items()
+            }
+        }
+
+
+# Global instance
+vol_surface_service = VolSurfaceService()
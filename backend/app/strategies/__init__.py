@@ -5,6 +5,8 @@ Provides the strategy engine with pluggable architecture for trading strategies.
 This module contains:
 - BaseStrategy: Abstract base class for all strategies
 - StrategyRegistry: Dynamic loading and management system
+- DispatchTable: Symbol-routed market data delivery to subscribed strategies
+- TickFeed: Shared-memory tick ring feeding isolated strategy workers
 - Strategy implementations (vol_oi, etc.)
 """
 
@@ -14,7 +16,9 @@ from app.strategies.base import (
     MarketData,
     StrategyState,
     SignalType,
-    SignalStrength
+    SignalStrength,
+    MarketDataType,
+    StrategySubscription
 )
 
 from app.strategies.registry import (
@@ -23,6 +27,9 @@ from app.strategies.registry import (
     register_strategy
 )
 
+from app.strategies.dispatch import DispatchTable, parse_option_symbol
+from app.strategies.feed import TickFeed, FeedCursor, TICK_DTYPE
+
 # Import Volume-OI strategy
 from app.strategies.vol_oi import VolumeOIStrategy, VolumeOIConfig
 
@@ -37,12 +44,23 @@ __all__ = [
     'StrategyState',
     'SignalType',
     'SignalStrength',
+    'MarketDataType',
+    'StrategySubscription',
     
     # Registry system
     'StrategyRegistry',
     'strategy_registry',
     'register_strategy',
     
+    # Market data dispatch
+    'DispatchTable',
+    'parse_option_symbol',
+    
+    # Shared-memory tick feed
+    'TickFeed',
+    'FeedCursor',
+    'TICK_DTYPE',
+    
     # Strategy implementations
     'VolumeOIStrategy',
     'VolumeOIConfig'
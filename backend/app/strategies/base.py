@@ -12,7 +12,7 @@ from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, Dict, Any, List, Tuple, Union
+from typing import Optional, Dict, Any, List, Tuple, Union, FrozenSet, Iterable
 from dataclasses import dataclass
 import uuid
 import hashlib
@@ -44,6 +44,14 @@ class SignalStrength(str, Enum):
     CRITICAL = "critical"
 
 
+class MarketDataType(str, Enum):
+    """Kinds of data a market data tick can carry"""
+    TRADE = "trade"      # LTP and volume
+    QUOTE = "quote"      # Bid/ask
+    GREEKS = "greeks"    # Delta, gamma, theta, vega, IV
+    OI = "oi"            # Open interest
+
+
 @dataclass
 class MarketData:
     """Market data snapshot for strategy processing"""
@@ -65,6 +73,67 @@ class MarketData:
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.utcnow()
+    
+    @property
+    def data_types(self) -> FrozenSet[MarketDataType]:
+        """Kinds of data present in this tick"""
+        types = set()
+        if self.ltp is not None:
+            types.add(MarketDataType.TRADE)
+        if self.bid is not None or self.ask is not None:
+            types.add(MarketDataType.QUOTE)
+        if any(value is not None for value in (self.delta, self.gamma, self.theta, self.vega, self.iv)):
+            types.add(MarketDataType.GREEKS)
+        if self.open_interest:
+            types.add(MarketDataType.OI)
+        return frozenset(types)
+
+
+@dataclass(frozen=True)
+class StrategySubscription:
+    """
+    Market data a strategy wants delivered
+    
+    A tick is delivered when its instrument is listed in `symbols`, or its
+    underlying is in `underlyings` and its expiry passes the `expiries`
+    filter. With neither symbols nor underlyings, every instrument passing
+    the expiry filter matches. Empty `expiries` or `data_types` mean any;
+    otherwise a tick must carry at least one of the requested data types.
+    """
+    symbols: FrozenSet[str] = frozenset()
+    underlyings: FrozenSet[str] = frozenset()
+    expiries: FrozenSet[str] = frozenset()            # "YYYY-MM-DD"
+    data_types: FrozenSet[MarketDataType] = frozenset()
+    
+    @classmethod
+    def create(
+        cls,
+        symbols: Iterable[str] = (),
+        underlyings: Iterable[str] = (),
+        expiries: Iterable[str] = (),
+        data_types: Iterable[Union[MarketDataType, str]] = ()
+    ) -> "StrategySubscription":
+        return cls(
+            symbols=frozenset(symbols),
+            underlyings=frozenset(underlyings),
+            expiries=frozenset(str(expiry)[:10] for expiry in expiries),
+            data_types=frozenset(MarketDataType(data_type) for data_type in data_types)
+        )
+    
+    @property
+    def is_wildcard(self) -> bool:
+        """True if every instrument matches"""
+        return not (self.symbols or self.underlyings or self.expiries)
+    
+    def matches_instrument(self, symbol: str, underlying: Optional[str], expiry: Optional[str]) -> bool:
+        """Whether the instrument (as parsed from its symbol) is subscribed"""
+        if symbol in self.symbols:
+            return True
+        if self.expiries and expiry not in self.expiries:
+            return False
+        if self.underlyings:
+            return underlying in self.underlyings
+        return not self.symbols
 
 
 @dataclass
@@ -400,6 +469,45 @@ class BaseStrategy(ABC):
             await self._handle_error(f"Signal generation error: {e}")
             return None
     
+    async def generate_signals(self, batch: List[MarketData]) -> List[TradingSignal]:
+        """
+        Process one tick cycle's market data in order.
+        
+        The registry delivers each strategy's routed ticks as one batch per
+        cycle; override to process a batch more efficiently than tick by tick.
+        
+        Args:
+            batch: Market data routed to this strategy, in arrival order
+            
+        Returns:
+            List[TradingSignal]: Signals generated from the batch
+        """
+        signals = []
+        for market_data in batch:
+            signal = await self.generate_signal(market_data)
+            if signal:
+                signals.append(signal)
+        return signals
+    
+    def get_subscription(self) -> StrategySubscription:
+        """
+        Market data this strategy should receive.
+        
+        Defaults to the `symbols`, `underlyings`, `expiries` and `data_types`
+        config keys, each optional; with none set the strategy receives
+        everything. Override to derive the subscription from strategy state.
+        
+        Returns:
+            StrategySubscription: Subscription declaration
+        """
+        config = self.config if isinstance(self.config, dict) else {}
+        return StrategySubscription.create(
+            symbols=config.get('symbols') or (),
+            underlyings=config.get('underlyings') or (),
+            expiries=config.get('expiries') or (),
+            data_types=config.get('data_types') or ()
+        )
+    
     # ==================== Risk Management ====================
     
     async def _check_risk_limits(self) -> bool:
@@ -0,0 +1,194 @@
+"""
+Market Data Dispatch
+Routes each tick only to the strategies subscribed to its instrument
+
+Strategies declare a StrategySubscription (symbols, underlyings, expiries,
+data types). The table indexes subscriptions by symbol and underlying and
+resolves each instrument's subscriber list once, on first sight, so
+routing a tick costs a dict lookup plus one step per actual subscriber,
+however many strategies are running. Instruments are identified from the
+weekly, monthly and display symbol forms, or from instrument metadata
+registered by the feed.
+"""
+
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from app.strategies.base import MarketData, MarketDataType, StrategySubscription
+
+# Weekly option symbols as built by app.backtest.events.option_symbol,
+# e.g. NIFTY2412524000CE: underlying, yy, month (1-9 or O/N/D), dd, strike, side
+_OPTION_SYMBOL = re.compile(r"^([A-Z&-]+)(\d{2})([1-9OND])(\d{2})(\d+(?:\.\d+)?)(CE|PE)$")
+_MONTHS = {"O": 10, "N": 11, "D": 12}
+_MONTH_NAMES = {name.upper(): number for number, name in enumerate(calendar.month_abbr) if name}
+_MONTH_PATTERN = "|".join(_MONTH_NAMES)
+# Monthly contracts, e.g. NIFTY24JAN24000CE: underlying, yy, month, strike, side
+_MONTHLY_SYMBOL = re.compile(rf"^([A-Z&-]+)(\d{{2}})({_MONTH_PATTERN})(\d+(?:\.\d+)?)(CE|PE)$")
+# Display names, e.g. "NIFTY 25 JAN 24000 CALL": underlying, dd, month, optional year, strike, side
+_DISPLAY_NAME = re.compile(
+    rf"^([A-Z&-]+) (\d{{1,2}}) ({_MONTH_PATTERN})(?: (\d{{2}}|\d{{4}}))? (\d+(?:\.\d+)?) (CALL|PUT|CE|PE)$"
+)
+
+# (strategy name, requested data types or None for any)
+Route = Tuple[str, Optional[FrozenSet[MarketDataType]]]
+
+
+def _last_thursday(year: int, month: int) -> date:
+    """Monthly expiry: last Thursday of the month"""
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    return last - timedelta(days=(last.weekday() - 3) % 7)
+
+
+def _display_expiry(day: int, month: int, year: Optional[str], today: Optional[date] = None) -> date:
+    """Expiry of a display name; without a year, the next such date not long past"""
+    if year is not None:
+        return date(int(year) if len(year) == 4 else 2000 + int(year), month, day)
+    today = today or date.today()
+    expiry = date(today.year, month, day)
+    # Contracts listed late in the year for early next year
+    return expiry if expiry >= today - timedelta(days=31) else date(today.year + 1, month, day)
+
+
+def parse_option_symbol(symbol: str) -> Tuple[str, Optional[str]]:
+    """(underlying, "YYYY-MM-DD" expiry) of an option symbol; (symbol, None) for anything else"""
+    text = " ".join(symbol.upper().split())
+    try:
+        match = _OPTION_SYMBOL.match(text)
+        if match is not None:
+            underlying, year, month, day = match.group(1, 2, 3, 4)
+            expiry = date(2000 + int(year), _MONTHS.get(month) or int(month), int(day))
+            return underlying, expiry.isoformat()
+
+        match = _MONTHLY_SYMBOL.match(text)
+        if match is not None:
+            underlying, year, month = match.group(1, 2, 3)
+            return underlying, _last_thursday(2000 + int(year), _MONTH_NAMES[month]).isoformat()
+
+        match = _DISPLAY_NAME.match(text)
+        if match is not None:
+            underlying, day, month, year = match.group(1, 2, 3, 4)
+            return underlying, _display_expiry(int(day), _MONTH_NAMES[month], year).isoformat()
+    except ValueError:
+        pass
+    return symbol, None
+
+
+class DispatchTable:
+    """
+    Subscription index from instruments to strategies
+
+    Routes are cached per symbol and rebuilt lazily after any subscription
+    change.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[str, StrategySubscription] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_underlying: Dict[str, Set[str]] = {}
+        self._unkeyed: Set[str] = set()  # No symbols or underlyings: checked for every instrument
+        self._routes: Dict[str, Tuple[Route, ...]] = {}
+        self._instruments: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.stats = {"ticks": 0, "deliveries": 0, "unrouted": 0, "cycles": 0}
+
+    def subscribe(self, strategy_name: str, subscription: StrategySubscription):
+        """Add or replace a strategy's subscription"""
+        self.unsubscribe(strategy_name)
+        self._subscriptions[strategy_name] = subscription
+        for symbol in subscription.symbols:
+            self._by_symbol.setdefault(symbol, set()).add(strategy_name)
+        for underlying in subscription.underlyings:
+            self._by_underlying.setdefault(underlying, set()).add(strategy_name)
+        if not subscription.symbols and not subscription.underlyings:
+            self._unkeyed.add(strategy_name)
+        self._routes.clear()
+
+    def unsubscribe(self, strategy_name: str) -> bool:
+        """Remove a strategy's subscription; False if it had none"""
+        subscription = self._subscriptions.pop(strategy_name, None)
+        if subscription is None:
+            return False
+        for index, keys in ((self._by_symbol, subscription.symbols), (self._by_underlying, subscription.underlyings)):
+            for key in keys:
+                names = index.get(key)
+                if names is not None:
+                    names.discard(strategy_name)
+                    if not names:
+                        del index[key]
+        self._unkeyed.discard(strategy_name)
+        self._routes.clear()
+        return True
+
+    def subscription(self, strategy_name: str) -> Optional[StrategySubscription]:
+        return self._subscriptions.get(strategy_name)
+
+    def register_instrument(self, symbol: str, underlying: str, expiry: Optional[str] = None):
+        """Record a symbol's underlying and expiry from instrument metadata, overriding parsing"""
+        self._instruments[symbol] = (underlying, expiry)
+        self._routes.pop(symbol, None)
+
+    def instrument(self, symbol: str) -> Tuple[str, Optional[str]]:
+        """Cached (underlying, expiry) for a symbol"""
+        instrument = self._instruments.get(symbol)
+        if instrument is None:
+            instrument = self._instruments[symbol] = parse_option_symbol(symbol)
+        return instrument
+
+    def route(self, symbol: str) -> Tuple[Route, ...]:
+        """Strategies subscribed to `symbol`, in subscription order"""
+        routes = self._routes.get(symbol)
+        if routes is not None:
+            return routes
+
+        underlying, expiry = self.instrument(symbol)
+        candidates = set(self._unkeyed)
+        candidates.update(self._by_symbol.get(symbol, ()))
+        candidates.update(self._by_underlying.get(underlying, ()))
+        routes = tuple(
+            (name, subscription.data_types or None)
+            for name, subscription in self._subscriptions.items()
+            if name in candidates and subscription.matches_instrument(symbol, underlying, expiry)
+        )
+        self._routes[symbol] = routes
+        return routes
+
+    def partition(self, ticks: Sequence[MarketData]) -> Dict[str, List[MarketData]]:
+        """Split one tick cycle into per-strategy batches, keeping arrival order"""
+        batches: Dict[str, List[MarketData]] = {}
+        routes_by_symbol = self._routes
+        deliveries = unrouted = 0
+
+        for tick in ticks:
+            routes = routes_by_symbol.get(tick.symbol)
+            if routes is None:
+                routes = self.route(tick.symbol)
+            if not routes:
+                unrouted += 1
+                continue
+
+            present = None
+            for name, wanted in routes:
+                if wanted is not None:
+                    if present is None:
+                        present = tick.data_types
+                    if not present & wanted:
+                        continue
+                batch = batches.get(name)
+                if batch is None:
+                    batch = batches[name] = []
+                batch.append(tick)
+                deliveries += 1
+
+        self.stats["cycles"] += 1
+        self.stats["ticks"] += len(ticks)
+        self.stats["deliveries"] += deliveries
+        self.stats["unrouted"] += unrouted
+        return batches
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            "subscriptions": len(self._subscriptions),
+            "cached_routes": len(self._routes)
+        }
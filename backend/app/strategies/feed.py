@@ -0,0 +1,316 @@
+"""
+Shared-Memory Tick Feed
+Single-writer, many-reader ring of market data records in shared memory
+
+The publisher (API process) appends fixed-size tick records to a ring
+buffer in a SharedMemory segment; strategy workers in other processes or
+threads attach by name and read with their own cursor. Nothing is
+pickled or copied per reader on the hot path, and a slow reader never
+blocks the writer: if it falls more than `capacity` records behind, the
+overwritten records are counted as dropped and it resumes from the
+oldest record still in the ring.
+
+Segment layout:
+    header   HEADER_BYTES   write sequence, symbol count, capacity, max symbols
+    symbols  max_symbols x SYMBOL_BYTES, null-padded UTF-8
+    records  capacity x TICK_DTYPE
+"""
+
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.strategies.base import MarketData
+
+HEADER_BYTES = 64
+SYMBOL_BYTES = 48
+DEFAULT_CAPACITY = 65536
+DEFAULT_MAX_SYMBOLS = 8192
+
+# Header slots (int64)
+_WRITE_SEQ = 0
+_SYMBOL_COUNT = 1
+_CAPACITY = 2
+_MAX_SYMBOLS = 3
+
+TICK_DTYPE = np.dtype([
+    ("seq", np.int64),              # Global sequence number; identifies the record in its slot
+    ("published_at", np.float64),   # time.time() when written, for reader lag
+    ("timestamp", np.float64),      # Market data timestamp (epoch seconds)
+    ("symbol_id", np.int32),
+    ("ltp", np.float64),
+    ("bid", np.float64),            # NaN when absent
+    ("ask", np.float64),
+    ("bid_qty", np.int64),          # -1 when absent
+    ("ask_qty", np.int64),
+    ("volume", np.int64),
+    ("oi", np.int64),
+    ("delta", np.float64),
+    ("gamma", np.float64),
+    ("theta", np.float64),
+    ("vega", np.float64),
+    ("iv", np.float64)
+])
+
+_GREEKS = ("delta", "gamma", "theta", "vega", "iv")
+
+
+def _float(value: Optional[Decimal]) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # MarketData timestamps are naive UTC
+    return value.timestamp()
+
+
+def _decimal(value: float) -> Optional[Decimal]:
+    return Decimal(repr(value)) if value == value else None  # NaN -> None
+
+
+class TickFeed:
+    """
+    Tick ring in a named shared memory segment
+
+    Create one in the publishing process with TickFeed.create(), pass
+    `name` to workers, and attach there with TickFeed.attach(name). Only
+    the creating side may publish.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self._header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self._header[_CAPACITY])
+        self.max_symbols = int(self._header[_MAX_SYMBOLS])
+        self._symbol_table = np.ndarray(
+            (self.max_symbols,), dtype=f"S{SYMBOL_BYTES}", buffer=shm.buf, offset=HEADER_BYTES
+        )
+        self._records = np.ndarray(
+            (self.capacity,), dtype=TICK_DTYPE, buffer=shm.buf,
+            offset=HEADER_BYTES + self.max_symbols * SYMBOL_BYTES
+        )
+        self._symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+
+    @classmethod
+    def create(
+        cls,
+        capacity: int = DEFAULT_CAPACITY,
+        max_symbols: int = DEFAULT_MAX_SYMBOLS,
+        name: Optional[str] = None
+    ) -> "TickFeed":
+        """Allocate a new feed segment; the caller owns and must unlink it"""
+        size = HEADER_BYTES + max_symbols * SYMBOL_BYTES + capacity * TICK_DTYPE.itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_MAX_SYMBOLS] = max_symbols
+        del header
+        feed = cls(shm, owner=True)
+        feed._records["seq"] = -1
+        return feed
+
+    @classmethod
+    def attach(cls, name: str) -> "TickFeed":
+        """Map an existing feed segment for reading"""
+        # Workers are children of the owner and share its resource tracker,
+        # so the segment stays registered once and is reclaimed only if the
+        # owner dies without unlinking it
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def write_seq(self) -> int:
+        """Sequence number the next published record will get"""
+        return int(self._header[_WRITE_SEQ])
+
+    @property
+    def symbol_count(self) -> int:
+        return int(self._header[_SYMBOL_COUNT])
+
+    def symbol_id(self, symbol: str) -> int:
+        """Id of `symbol`, registering it in the shared table if new (writer only)"""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+        if not self.owner:
+            raise RuntimeError("Only the feed owner can register symbols")
+
+        symbol_id = len(self._symbols)
+        if symbol_id >= self.max_symbols:
+            raise RuntimeError(f"Tick feed symbol table full ({self.max_symbols})")
+        encoded = symbol.encode()
+        if len(encoded) > SYMBOL_BYTES:
+            raise ValueError(f"Symbol too long for tick feed: {symbol}")
+        self._symbol_table[symbol_id] = encoded
+        self._symbols.append(symbol)
+        self._symbol_ids[symbol] = symbol_id
+        # Publish the table entry before any record can reference it
+        self._header[_SYMBOL_COUNT] = symbol_id + 1
+        return symbol_id
+
+    def symbols(self) -> List[str]:
+        """Symbol table, indexed by symbol id"""
+        count = self.symbol_count
+        if len(self._symbols) < count:
+            for symbol_id in range(len(self._symbols), count):
+                symbol = self._symbol_table[symbol_id].decode()
+                self._symbols.append(symbol)
+                self._symbol_ids[symbol] = symbol_id
+        return self._symbols
+
+    def publish(self, market_data: MarketData) -> int:
+        """Append one tick; returns its sequence number"""
+        return self.publish_many([market_data])
+
+    def publish_many(self, ticks: Iterable[MarketData]) -> int:
+        """Append ticks in order; returns the sequence number of the last one"""
+        ticks = list(ticks)
+        if not ticks:
+            return self.write_seq - 1
+        if not self.owner:
+            raise RuntimeError("Only the feed owner can publish")
+
+        batch = np.empty(len(ticks), dtype=TICK_DTYPE)
+        for i, tick in enumerate(ticks):
+            batch[i] = (
+                0,
+                0.0,
+                _epoch(tick.timestamp),
+                self.symbol_id(tick.symbol),
+                float(tick.ltp),
+                _float(tick.bid),
+                _float(tick.ask),
+                tick.bid_qty if tick.bid_qty is not None else -1,
+                tick.ask_qty if tick.ask_qty is not None else -1,
+                tick.volume or 0,
+                tick.open_interest or 0,
+                *(_float(getattr(tick, greek)) for greek in _GREEKS)
+            )
+        return self.publish_records(batch)
+
+    def publish_records(self, batch: np.ndarray) -> int:
+        """Append pre-built TICK_DTYPE records (seq and published_at are filled in)"""
+        start = self.write_seq
+        if len(batch) > self.capacity:
+            # Only the newest `capacity` records would survive anyway
+            start += len(batch) - self.capacity
+            self._header[_WRITE_SEQ] = start
+            batch = batch[-self.capacity:]
+        n = len(batch)
+        seqs = np.arange(start, start + n)
+        slots = seqs % self.capacity
+        batch["seq"] = -1
+        batch["published_at"] = time.time()
+
+        # Seqlock-style: invalidate the slots, write the payload, then stamp
+        # the new sequence numbers, so a lagging reader that copies a slot
+        # mid-write sees a sequence mismatch rather than a torn record
+        self._records["seq"][slots] = -1
+        self._records[slots] = batch
+        self._records["seq"][slots] = seqs
+        # Readers only look below the write sequence, so bump it last
+        self._header[_WRITE_SEQ] = start + n
+        return start + n - 1
+
+    def cursor(self, from_start: bool = False) -> "FeedCursor":
+        """New reader positioned at the live edge (or the oldest record kept)"""
+        return FeedCursor(self, from_start)
+
+    def to_market_data(self, records: np.ndarray) -> List[MarketData]:
+        """Decode records read from the feed back into MarketData"""
+        symbols = self.symbols()
+        columns = {name: records[name].tolist() for name in TICK_DTYPE.names}
+        symbol_ids, timestamps = columns["symbol_id"], columns["timestamp"]
+        ltp, bid, ask = columns["ltp"], columns["bid"], columns["ask"]
+        bid_qty, ask_qty = columns["bid_qty"], columns["ask_qty"]
+        volume, oi = columns["volume"], columns["oi"]
+        delta, gamma, theta = columns["delta"], columns["gamma"], columns["theta"]
+        vega, iv = columns["vega"], columns["iv"]
+        return [
+            MarketData(
+                symbol=symbols[symbol_ids[i]],
+                ltp=_decimal(ltp[i]),
+                volume=volume[i],
+                open_interest=oi[i],
+                bid=_decimal(bid[i]),
+                ask=_decimal(ask[i]),
+                bid_qty=bid_qty[i] if bid_qty[i] >= 0 else None,
+                ask_qty=ask_qty[i] if ask_qty[i] >= 0 else None,
+                delta=_decimal(delta[i]),
+                gamma=_decimal(gamma[i]),
+                theta=_decimal(theta[i]),
+                vega=_decimal(vega[i]),
+                iv=_decimal(iv[i]),
+                timestamp=datetime.utcfromtimestamp(timestamps[i])
+            )
+            for i in range(len(records))
+        ]
+
+    def close(self):
+        """Unmap the segment, and remove it if this side created it"""
+        self._header = self._symbol_table = self._records = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A view is still exported (e.g. a record array kept by a caller);
+            # the mapping goes with it, but the name must not outlive the owner
+            pass
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class FeedCursor:
+    """One reader's position in a TickFeed"""
+
+    def __init__(self, feed: TickFeed, from_start: bool = False):
+        self.feed = feed
+        head = feed.write_seq
+        self.position = max(head - feed.capacity, 0) if from_start else head
+        self.dropped = 0
+
+    @property
+    def backlog(self) -> int:
+        """Records published but not yet read"""
+        return max(self.feed.write_seq - self.position, 0)
+
+    def read(self, max_records: int = 4096) -> np.ndarray:
+        """
+        Copy out up to `max_records` unread records, oldest first
+
+        Records the writer overwrote before (or while) they were copied are
+        skipped and added to `dropped`.
+        """
+        feed = self.feed
+        head = feed.write_seq
+        oldest = head - feed.capacity
+        if self.position < oldest:
+            self.dropped += oldest - self.position
+            self.position = oldest
+
+        end = min(head, self.position + max_records)
+        if end <= self.position:
+            return feed._records[:0].copy()
+
+        slots = np.arange(self.position, end) % feed.capacity
+        records = feed._records[slots]  # Fancy indexing copies
+        expected = np.arange(self.position, end)
+        # Valid only if the slot held this record before and after the copy
+        intact = (records["seq"] == expected) & (feed._records["seq"][slots] == expected)
+        if not intact.all():
+            self.dropped += int((~intact).sum())
+            records = records[intact]
+        self.position = end
+        return records
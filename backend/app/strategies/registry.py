@@ -9,13 +9,14 @@ dynamic loading, configuration management, and runtime control.
 import asyncio
 import importlib
 import inspect
-from typing import Dict, Type, Optional, List, Any, Callable
+from typing import Dict, Type, Optional, List, Any, Callable, Sequence
 from pathlib import Path
 from datetime import datetime
 import traceback
 
 from app.core.logging import get_logger
-from app.strategies.base import BaseStrategy
+from app.strategies.base import BaseStrategy, MarketData, TradingSignal
+from app.strategies.dispatch import DispatchTable
 from app.db.models.strategy import Strategy as StrategyModel, StrategyStatus
 
 
@@ -36,6 +37,7 @@ class StrategyRegistry:
         self._configs: Dict[str, Dict[str, Any]] = {}
         self._strategy_metadata: Dict[str, Dict[str, Any]] = {}
         self._loaded_modules: Dict[str, Any] = {}
+        self._dispatch = DispatchTable()
         
         logger.info("Strategy registry initialized")
     
@@ -340,6 +342,7 @@ class StrategyRegistry:
             # Start strategy
             if await instance.start():
                 self._instances[strategy_name] = instance
+                self.refresh_subscription(strategy_name)
                 logger.info(f"Strategy started: {strategy_name}")
                 return True
             else:
@@ -370,6 +373,7 @@ class StrategyRegistry:
             # Stop strategy
             if await instance.stop():
                 del self._instances[strategy_name]
+                self._dispatch.unsubscribe(strategy_name)
                 logger.info(f"Strategy stopped: {strategy_name}")
                 return True
             else:
@@ -508,6 +512,7 @@ class StrategyRegistry:
             if strategy_name in self._instances:
                 instance = self._instances[strategy_name]
                 instance.config.update(config)
+                self.refresh_subscription(strategy_name)
                 logger.info(f"Updated config for running strategy: {strategy_name}")
             
             return True
@@ -516,6 +521,116 @@ class StrategyRegistry:
             logger.error(f"Error updating strategy config {strategy_name}: {e}")
             return False
     
+    # ==================== Market Data Dispatch ====================
+    
+    def refresh_subscription(self, strategy_name: str) -> bool:
+        """
+        Re-read a running strategy's subscription into the dispatch table.
+        
+        Called on start and config updates; strategies whose subscription
+        depends on runtime state call it when that state changes.
+        
+        Args:
+            strategy_name: Name of running strategy
+            
+        Returns:
+            bool: True if the subscription was updated
+        """
+        instance = self._instances.get(strategy_name)
+        if instance is None:
+            return False
+        
+        try:
+            subscription = instance.get_subscription()
+        except Exception as e:
+            logger.error(f"Error reading subscription for {strategy_name}: {e}")
+            return False
+        
+        self._dispatch.subscribe(strategy_name, subscription)
+        logger.info(
+            f"Strategy {strategy_name} subscribed: {len(subscription.symbols)} symbols, "
+            f"{len(subscription.underlyings)} underlyings, {len(subscription.expiries)} expiries"
+            + (" (all instruments)" if subscription.is_wildcard else "")
+        )
+        return True
+    
+    def register_instrument(self, symbol: str, underlying: str, expiry: Optional[str] = None) -> None:
+        """
+        Record an instrument's underlying and expiry from instrument metadata.
+        
+        Takes precedence over parsing the symbol, for feeds whose symbols
+        do not carry them in a recognised form.
+        
+        Args:
+            symbol: Symbol as it appears on ticks
+            underlying: Underlying the instrument belongs to
+            expiry: Expiry as YYYY-MM-DD, None for non-expiring instruments
+        """
+        self._dispatch.register_instrument(symbol, underlying, expiry)
+    
+    async def dispatch_market_data(self, ticks: Sequence[MarketData]) -> List[TradingSignal]:
+        """
+        Deliver one tick cycle to the strategies subscribed to each instrument.
+        
+        Each subscribed strategy receives its ticks as a single in-order batch
+        (BaseStrategy.generate_signals); strategies with nothing routed to
+        them are not called. A failing strategy does not affect the others.
+        
+        Args:
+            ticks: Market data received this cycle, in arrival order
+            
+        Returns:
+            List[TradingSignal]: Signals generated across all strategies
+        """
+        batches = self._dispatch.partition(ticks)
+        deliveries = [
+            (strategy_name, self._instances[strategy_name], batch)
+            for strategy_name, batch in batches.items()
+            if strategy_name in self._instances
+        ]
+        if not deliveries:
+            return []
+        
+        if len(deliveries) == 1:
+            strategy_name, instance, batch = deliveries[0]
+            try:
+                return await instance.generate_signals(batch)
+            except Exception as e:
+                logger.error(f"Error dispatching market data to {strategy_name}: {e}")
+                return []
+        
+        results = await asyncio.gather(
+            *(instance.generate_signals(batch) for _, instance, batch in deliveries),
+            return_exceptions=True
+        )
+        
+        signals = []
+        for (strategy_name, _, _), result in zip(deliveries, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error dispatching market data to {strategy_name}: {result}")
+                continue
+            signals.extend(result)
+        return signals
+    
+    def get_dispatch_status(self) -> Dict[str, Any]:
+        """
+        Get dispatch table subscriptions and counters.
+        
+        Returns:
+            Dict[str, Any]: Per-strategy subscriptions and routing stats
+        """
+        subscriptions = {}
+        for strategy_name in self._instances:
+            subscription = self._dispatch.subscription(strategy_name)
+            if subscription is not None:
+                subscriptions[strategy_name] = {
+                    'symbols': sorted(subscription.symbols),
+                    'underlyings': sorted(subscription.underlyings),
+                    'expiries': sorted(subscription.expiries),
+                    'data_types': sorted(data_type.value for data_type in subscription.data_types)
+                }
+        return {'strategies': subscriptions, **self._dispatch.get_stats()}
+    
     async def stop_all_strategies(self) -> Dict[str, bool]:
         """
         Stop all running strategies.
@@ -542,7 +657,8 @@ class StrategyRegistry:
             'total_running': len(self._instances),
             'registered_strategies': list(self._strategies.keys()),
             'running_strategies': list(self._instances.keys()),
-            'loaded_modules': list(self._loaded_modules.keys())
+            'loaded_modules': list(self._loaded_modules.keys()),
+            'dispatch': self._dispatch.get_stats()
         }
 
 
@@ -6,16 +6,19 @@ This module contains the core detection algorithms for:
 - Volume spike detection (>3σ AND >5× 1-minute average)
 - Mid-price jump detection (≥0.15% within 2 seconds)
 - OI change confirmation (>1.5σ within 240 seconds)
+
+Ticks can be processed one at a time, or a whole snapshot of instruments
+(e.g. every strike of a chain) in one vectorized pass.
 """
 
 import asyncio
-from collections import deque
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
-from typing import Optional, Dict, List, Tuple, Deque, Any
-import statistics
+from typing import Optional, Dict, List, Sequence, Tuple, Any
 import math
 
+import numpy as np
+
 from app.core.logging import get_logger
 from app.strategies.base import MarketData
 from app.strategies.vol_oi.models import (
@@ -25,11 +28,27 @@ from app.strategies.vol_oi.models import (
     SignalStrength
 )
 from app.strategies.vol_oi.config import VolumeOIConfig
-from app.data.processor import StatisticalProcessor
+from app.strategies.vol_oi.rolling import SymbolWindows, SymbolWindowsMatrix
 
 
 logger = get_logger(__name__)
 
+# 1-minute average window, assuming 3-second intervals
+ONE_MINUTE_PERIODS = 20
+# Recent prices kept per symbol for jump detection
+PRICE_BUFFER_POINTS = 10
+# Float slack when screening for price jumps; candidates are then confirmed
+# in Decimal, so moves of exactly the threshold (e.g. 0.45 on 300.00) count
+PRICE_JUMP_TOLERANCE_PCT = 1e-9
+
+# Snapshot-path candidate filters; the same thresholds VolumeSignal and
+# OISignal.__post_init__ apply, which still make the final call
+SPIKE_MIN_ZSCORE = 3.0
+SPIKE_MIN_MULTIPLIER = 5.0
+OI_MIN_ZSCORE = 1.5
+
+DetectionResult = Tuple[Optional[VolumeSignal], Optional[PriceJumpSignal], Optional[OISignal]]
+
 
 class VolumeOIDetector:
     """
@@ -43,19 +62,23 @@ class VolumeOIDetector:
         self.config = config
         self.redis_client = redis_client
         
-        # Data buffers for rolling calculations
-        self.volume_buffer: Dict[str, Deque[Tuple[datetime, int]]] = {}
-        self.price_buffer: Dict[str, Deque[Tuple[datetime, Decimal]]] = {}
-        self.oi_buffer: Dict[str, Deque[Tuple[datetime, int]]] = {}
+        # Per-symbol ring buffers with incrementally maintained statistics
+        self.windows: Dict[str, SymbolWindows] = {}
         
-        # Rolling statistics
-        self.volume_stats: Dict[str, Dict[str, float]] = {}
-        self.oi_stats: Dict[str, Dict[str, float]] = {}
+        # Symbols processed through process_snapshot, one matrix row each
+        self.matrix = SymbolWindowsMatrix(
+            volume_periods=config.volume_lookback_periods,
+            oi_periods=config.oi_lookback_periods,
+            recent_periods=ONE_MINUTE_PERIODS,
+            price_points=PRICE_BUFFER_POINTS
+        )
         
         # Trigger tracking for confirmation windows
         self.trigger_times: Dict[str, datetime] = {}
         
-        # Statistical processor for advanced calculations
+        # Statistical processor for advanced calculations; imported here so the
+        # strategy package (and the backtester) load without the live data feeds
+        from app.data.processor import StatisticalProcessor
         self.stat_processor = StatisticalProcessor(redis_client)
         
         logger.info(f"VolumeOI Detector initialized with config: {config.strategy_name}")
@@ -72,6 +95,9 @@ class VolumeOIDetector:
         """
         try:
             symbol = market_data.symbol
+            if symbol in self.matrix:
+                fired = await self.process_snapshot([market_data])
+                return fired.get(symbol, (None, None, None))
             
             # Update data buffers
             await self._update_buffers(market_data)
@@ -88,62 +114,23 @@ class VolumeOIDetector:
             return None, None, None
     
     async def _update_buffers(self, market_data: MarketData) -> None:
-        """Update rolling data buffers for statistics calculation."""
+        """Push the tick into the symbol's rolling windows, updating statistics in O(1)."""
         symbol = market_data.symbol
-        timestamp = market_data.timestamp
-        
-        # Initialize buffers if needed
-        if symbol not in self.volume_buffer:
-            self.volume_buffer[symbol] = deque(maxlen=self.config.volume_lookback_periods)
-            self.price_buffer[symbol] = deque(maxlen=10)  # Keep last 10 prices for jump detection
-            self.oi_buffer[symbol] = deque(maxlen=self.config.oi_lookback_periods)
-            self.volume_stats[symbol] = {}
-            self.oi_stats[symbol] = {}
-        
-        # Add new data points
-        self.volume_buffer[symbol].append((timestamp, market_data.volume))
-        self.price_buffer[symbol].append((timestamp, market_data.ltp))
-        self.oi_buffer[symbol].append((timestamp, market_data.open_interest))
-        
-        # Update rolling statistics
-        await self._update_rolling_stats(symbol)
-    
-    async def _update_rolling_stats(self, symbol: str) -> None:
-        """Update rolling statistics for volume and OI."""
-        try:
-            # Volume statistics
-            if len(self.volume_buffer[symbol]) >= 2:
-                volumes = [vol for _, vol in self.volume_buffer[symbol]]
-                self.volume_stats[symbol] = {
-                    'mean': statistics.mean(volumes),
-                    'stddev': statistics.stdev(volumes) if len(volumes) > 1 else 0,
-                    'min': min(volumes),
-                    'max': max(volumes),
-                    'count': len(volumes)
-                }
-                
-                # Calculate 1-minute average (last 20 periods assuming 3-second intervals)
-                recent_volumes = volumes[-20:] if len(volumes) >= 20 else volumes
-                self.volume_stats[symbol]['1min_avg'] = statistics.mean(recent_volumes)
-            
-            # OI statistics
-            if len(self.oi_buffer[symbol]) >= 2:
-                ois = [oi for _, oi in self.oi_buffer[symbol]]
-                oi_changes = []
-                for i in range(1, len(ois)):
-                    change = ois[i] - ois[i-1]
-                    oi_changes.append(change)
-                
-                if oi_changes:
-                    self.oi_stats[symbol] = {
-                        'mean_change': statistics.mean(oi_changes),
-                        'stddev_change': statistics.stdev(oi_changes) if len(oi_changes) > 1 else 0,
-                        'current_oi': ois[-1],
-                        'previous_oi': ois[-2] if len(ois) >= 2 else ois[-1]
-                    }
-                    
-        except Exception as e:
-            logger.error(f"Error updating rolling stats for {symbol}: {e}")
+        windows = self.windows.get(symbol)
+        if windows is None:
+            windows = self.windows[symbol] = SymbolWindows(
+                volume_periods=self.config.volume_lookback_periods,
+                oi_periods=self.config.oi_lookback_periods,
+                recent_periods=ONE_MINUTE_PERIODS,
+                price_points=PRICE_BUFFER_POINTS
+            )
+        
+        windows.push(
+            market_data.timestamp.timestamp(),
+            float(market_data.volume or 0),
+            float(market_data.ltp),
+            float(market_data.open_interest or 0)
+        )
     
     async def _detect_volume_spike(self, market_data: MarketData) -> Optional[VolumeSignal]:
         """
@@ -160,51 +147,65 @@ class VolumeOIDetector:
             current_volume = market_data.volume
             
             # Need sufficient data for statistics
-            if (symbol not in self.volume_stats or 
-                len(self.volume_buffer[symbol]) < self.config.volume_lookback_periods // 2):
+            windows = self.windows.get(symbol)
+            if (windows is None or len(windows.volume) < 2 or
+                len(windows.volume) < self.config.volume_lookback_periods // 2):
                 return None
             
-            stats = self.volume_stats[symbol]
-            
             # Check minimum volume threshold
             if current_volume < self.config.min_volume_threshold:
                 return None
             
-            # Calculate z-score
-            if stats['stddev'] == 0:
-                volume_zscore = 0
-            else:
-                volume_zscore = (current_volume - stats['mean']) / stats['stddev']
-            
-            # Calculate multiplier vs 1-minute average
-            volume_multiplier = current_volume / stats['1min_avg'] if stats['1min_avg'] > 0 else 0
-            
-            # Create volume signal
-            volume_signal = VolumeSignal(
-                symbol=symbol,
-                timestamp=market_data.timestamp,
-                current_volume=current_volume,
-                volume_1min_avg=int(stats['1min_avg']),
-                volume_stddev=Decimal(str(stats['stddev'])),
-                volume_zscore=Decimal(str(volume_zscore)),
-                volume_multiplier=Decimal(str(volume_multiplier)),
-                strength=SignalStrength.WEAK,  # Will be set in __post_init__
-                is_spike=False  # Will be set in __post_init__
+            window = windows.volume
+            return self._volume_signal(
+                symbol, market_data.timestamp, current_volume, window.mean, window.stddev, window.recent_mean
             )
             
-            # Log significant volume activity
-            if volume_signal.is_spike:
-                logger.info(f"Volume spike detected: {symbol} - "
-                          f"Volume: {current_volume:,} "
-                          f"(Z-score: {volume_zscore:.2f}, "
-                          f"Multiplier: {volume_multiplier:.2f}x)")
-            
-            return volume_signal if volume_signal.is_spike else None
-            
         except Exception as e:
             logger.error(f"Error detecting volume spike for {symbol}: {e}")
             return None
     
+    def _volume_signal(
+        self,
+        symbol: str,
+        timestamp: datetime,
+        current_volume: int,
+        mean: float,
+        stddev: float,
+        one_min_avg: float
+    ) -> Optional[VolumeSignal]:
+        """Build the volume signal from rolling statistics; None unless it is a spike."""
+        # Calculate z-score
+        if stddev == 0:
+            volume_zscore = 0
+        else:
+            volume_zscore = (current_volume - mean) / stddev
+        
+        # Calculate multiplier vs 1-minute average
+        volume_multiplier = current_volume / one_min_avg if one_min_avg > 0 else 0
+        
+        # Create volume signal
+        volume_signal = VolumeSignal(
+            symbol=symbol,
+            timestamp=timestamp,
+            current_volume=current_volume,
+            volume_1min_avg=int(one_min_avg),
+            volume_stddev=Decimal(str(stddev)),
+            volume_zscore=Decimal(str(volume_zscore)),
+            volume_multiplier=Decimal(str(volume_multiplier)),
+            strength=SignalStrength.WEAK,  # Will be set in __post_init__
+            is_spike=False  # Will be set in __post_init__
+        )
+        
+        # Log significant volume activity
+        if volume_signal.is_spike:
+            logger.info(f"Volume spike detected: {symbol} - "
+                      f"Volume: {current_volume:,} "
+                      f"(Z-score: {volume_zscore:.2f}, "
+                      f"Multiplier: {volume_multiplier:.2f}x)")
+        
+        return volume_signal if volume_signal.is_spike else None
+    
     async def _detect_price_jump(self, market_data: MarketData) -> Optional[PriceJumpSignal]:
         """
         Detect price jump: ≥0.15% within 2 seconds.
@@ -218,45 +219,33 @@ class VolumeOIDetector:
         try:
             symbol = market_data.symbol
             current_price = market_data.ltp
-            current_time = market_data.timestamp
             
             # Need at least 2 price points
-            if symbol not in self.price_buffer or len(self.price_buffer[symbol]) < 2:
+            windows = self.windows.get(symbol)
+            if windows is None or len(windows.prices) < 2:
                 return None
             
             # Look for price jumps within the time window
-            time_threshold = current_time - timedelta(seconds=self.config.price_jump_window_seconds)
-            
-            for past_time, past_price in reversed(list(self.price_buffer[symbol])[:-1]):
-                if past_time < time_threshold:
+            window_seconds = self.config.price_jump_window_seconds
+            threshold_pct = float(self.config.price_jump_threshold_pct) - PRICE_JUMP_TOLERANCE_PCT
+            now = windows.price_times.last
+            price = float(current_price)
+            
+            for age in range(1, len(windows.prices)):
+                time_diff = now - windows.price_times.get(age)
+                if time_diff > window_seconds:
                     break
                 
                 # Calculate price change
+                past_price = windows.prices.get(age)
                 if past_price > 0:
-                    price_change_pct = abs((current_price - past_price) / past_price * 100)
-                    time_diff = (current_time - past_time).total_seconds()
+                    price_change_pct = abs((price - past_price) / past_price * 100)
                     
                     # Check if jump threshold met
-                    if (price_change_pct >= float(self.config.price_jump_threshold_pct) and 
-                        time_diff <= self.config.price_jump_window_seconds):
-                        
-                        price_signal = PriceJumpSignal(
-                            symbol=symbol,
-                            timestamp=current_time,
-                            previous_price=past_price,
-                            current_price=current_price,
-                            price_change_pct=Decimal(str(price_change_pct)),
-                            time_window_seconds=int(time_diff),
-                            is_jump=True,  # Will be validated in __post_init__
-                            direction="up" if current_price > past_price else "down"
+                    if price_change_pct >= threshold_pct and self._is_jump(past_price, current_price):
+                        return self._price_jump_signal(
+                            symbol, market_data.timestamp, past_price, current_price, price_change_pct, time_diff
                         )
-                        
-                        logger.info(f"Price jump detected: {symbol} - "
-                                  f"Change: {price_change_pct:.3f}% "
-                                  f"in {time_diff:.1f}s "
-                                  f"({past_price} → {current_price})")
-                        
-                        return price_signal
             
             return None
             
@@ -264,6 +253,41 @@ class VolumeOIDetector:
             logger.error(f"Error detecting price jump for {symbol}: {e}")
             return None
     
+    def _is_jump(self, past_price: float, current_price: Decimal) -> bool:
+        """Exact threshold check on Decimal prices for a move that passed the float screen."""
+        past_price = Decimal(repr(past_price))
+        change_pct = abs((current_price - past_price) / past_price * 100)
+        return change_pct >= float(self.config.price_jump_threshold_pct)
+    
+    def _price_jump_signal(
+        self,
+        symbol: str,
+        timestamp: datetime,
+        past_price: float,
+        current_price: Decimal,
+        price_change_pct: float,
+        time_diff: float
+    ) -> PriceJumpSignal:
+        """Build the price jump signal for a move that met the threshold."""
+        past_price = Decimal(repr(past_price))
+        price_signal = PriceJumpSignal(
+            symbol=symbol,
+            timestamp=timestamp,
+            previous_price=past_price,
+            current_price=current_price,
+            price_change_pct=Decimal(str(price_change_pct)),
+            time_window_seconds=int(time_diff),
+            is_jump=True,  # Will be validated in __post_init__
+            direction="up" if current_price > past_price else "down"
+        )
+        
+        logger.info(f"Price jump detected: {symbol} - "
+                  f"Change: {price_change_pct:.3f}% "
+                  f"in {time_diff:.1f}s "
+                  f"({past_price} → {current_price})")
+        
+        return price_signal
+    
     async def _detect_oi_change(self, market_data: MarketData) -> Optional[OISignal]:
         """
         Detect OI change confirmation: >1.5σ within 240 seconds of trigger.
@@ -293,55 +317,221 @@ class VolumeOIDetector:
                 return None
             
             # Need sufficient OI data
-            if (symbol not in self.oi_stats or 
-                len(self.oi_buffer[symbol]) < self.config.oi_lookback_periods // 2):
+            windows = self.windows.get(symbol)
+            if (windows is None or not len(windows.oi_changes) or
+                windows.oi_points < self.config.oi_lookback_periods // 2):
                 return None
             
             # Check minimum OI threshold
             if current_oi < self.config.min_oi_threshold:
                 return None
             
-            stats = self.oi_stats[symbol]
-            previous_oi = stats['previous_oi']
-            oi_change = current_oi - previous_oi
-            
-            # Calculate z-score of OI change
-            if stats['stddev_change'] == 0:
-                oi_zscore = 0
-            else:
-                oi_zscore = (oi_change - stats['mean_change']) / stats['stddev_change']
-            
-            # Create OI signal
-            oi_signal = OISignal(
-                symbol=symbol,
-                timestamp=current_time,
-                previous_oi=previous_oi,
-                current_oi=current_oi,
-                oi_change=oi_change,
-                oi_change_pct=Decimal('0'),  # Will be calculated in __post_init__
-                oi_stddev=Decimal(str(stats['stddev_change'])),
-                oi_zscore=Decimal(str(oi_zscore)),
-                time_since_trigger_seconds=int(time_since_trigger),
-                is_confirmation=False,  # Will be set in __post_init__
-                strength=SignalStrength.WEAK  # Will be set in __post_init__
+            changes = windows.oi_changes
+            return self._oi_signal(
+                symbol, current_time, current_oi, int(windows.previous_oi),
+                changes.mean, changes.stddev, time_since_trigger
             )
             
-            # Log significant OI changes
-            if oi_signal.is_confirmation:
-                logger.info(f"OI confirmation detected: {symbol} - "
-                          f"Change: {oi_change:,} "
-                          f"(Z-score: {oi_zscore:.2f}) "
-                          f"after {time_since_trigger:.1f}s")
-                
-                # Remove trigger since confirmed
-                del self.trigger_times[symbol]
-            
-            return oi_signal if oi_signal.is_confirmation else None
-            
         except Exception as e:
             logger.error(f"Error detecting OI change for {symbol}: {e}")
             return None
     
+    def _oi_signal(
+        self,
+        symbol: str,
+        timestamp: datetime,
+        current_oi: int,
+        previous_oi: int,
+        mean_change: float,
+        stddev_change: float,
+        time_since_trigger: float
+    ) -> Optional[OISignal]:
+        """Build the OI signal; None unless it confirms, in which case the trigger is consumed."""
+        oi_change = current_oi - previous_oi
+        
+        # Calculate z-score of OI change
+        if stddev_change == 0:
+            oi_zscore = 0
+        else:
+            oi_zscore = (oi_change - mean_change) / stddev_change
+        
+        # Create OI signal
+        oi_signal = OISignal(
+            symbol=symbol,
+            timestamp=timestamp,
+            previous_oi=previous_oi,
+            current_oi=current_oi,
+            oi_change=oi_change,
+            oi_change_pct=Decimal('0'),  # Will be calculated in __post_init__
+            oi_stddev=Decimal(str(stddev_change)),
+            oi_zscore=Decimal(str(oi_zscore)),
+            time_since_trigger_seconds=int(time_since_trigger),
+            is_confirmation=False,  # Will be set in __post_init__
+            strength=SignalStrength.WEAK  # Will be set in __post_init__
+        )
+        
+        # Log significant OI changes
+        if oi_signal.is_confirmation:
+            logger.info(f"OI confirmation detected: {symbol} - "
+                      f"Change: {oi_change:,} "
+                      f"(Z-score: {oi_zscore:.2f}) "
+                      f"after {time_since_trigger:.1f}s")
+            
+            # Remove trigger since confirmed
+            del self.trigger_times[symbol]
+        
+        return oi_signal if oi_signal.is_confirmation else None
+    
+    # ==================== Snapshot (cross-symbol) detection ====================
+    
+    async def process_snapshot(self, snapshot: Sequence[MarketData]) -> Dict[str, DetectionResult]:
+        """
+        Process one observation for each of many instruments in a single pass.
+        
+        Meant for whole-chain scans: rolling statistics for every symbol are
+        updated as matrix rows, and the volume spike, price jump and OI change
+        tests run as array operations across symbols. Signal objects are only
+        built for symbols that pass, so the decisions match process_market_data.
+        
+        Symbols seen here keep their state in the snapshot matrices from then
+        on; per-tick updates for them via process_market_data are routed here.
+        
+        Args:
+            snapshot: Latest market data per instrument; a symbol listed more
+                than once is applied in order of appearance
+            
+        Returns:
+            (VolumeSignal, PriceJumpSignal, OISignal) per symbol with at least one signal
+        """
+        fired: Dict[str, DetectionResult] = {}
+        try:
+            for batch in self._distinct_batches(snapshot):
+                for symbol, signals in self._detect_batch(batch).items():
+                    previous = fired.get(symbol, (None, None, None))
+                    fired[symbol] = tuple(new or old for new, old in zip(signals, previous))
+        except Exception as e:
+            logger.error(f"Error processing snapshot of {len(snapshot)} instruments: {e}")
+        return fired
+    
+    @staticmethod
+    def _distinct_batches(snapshot: Sequence[MarketData]) -> List[List[MarketData]]:
+        """Split into batches with each symbol at most once, preserving per-symbol order."""
+        if len({market_data.symbol for market_data in snapshot}) == len(snapshot):
+            return [list(snapshot)]
+        seen: Dict[str, int] = {}
+        batches: List[List[MarketData]] = []
+        for market_data in snapshot:
+            occurrence = seen.get(market_data.symbol, 0)
+            seen[market_data.symbol] = occurrence + 1
+            if occurrence == len(batches):
+                batches.append([])
+            batches[occurrence].append(market_data)
+        return batches
+    
+    def _detect_batch(self, snapshot: List[MarketData]) -> Dict[str, DetectionResult]:
+        config = self.config
+        matrix = self.matrix
+        symbols = [market_data.symbol for market_data in snapshot]
+        
+        # Symbols first seen tick by tick move into the matrices
+        if self.windows:
+            for symbol in symbols:
+                windows = self.windows.pop(symbol, None)
+                if windows is not None:
+                    matrix.adopt(symbol, windows)
+        
+        rows = matrix.rows_for(symbols)
+        timestamps = np.array([market_data.timestamp.timestamp() for market_data in snapshot])
+        volumes = np.array([float(market_data.volume or 0) for market_data in snapshot])
+        prices = np.array([float(market_data.ltp) for market_data in snapshot])
+        open_interests = np.array([float(market_data.open_interest or 0) for market_data in snapshot])
+        matrix.push(rows, timestamps, volumes, prices, open_interests)
+        
+        volume_signals: Dict[int, VolumeSignal] = {}
+        price_signals: Dict[int, PriceJumpSignal] = {}
+        oi_signals: Dict[int, OISignal] = {}
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Volume spikes
+            volume = matrix.volume
+            count = volume.count(rows)
+            mean = volume.mean[rows]
+            stddev = volume.stddev(rows)
+            one_min_avg = volume.recent_mean(rows)
+            zscore = np.where(stddev > 0, (volumes - mean) / stddev, 0.0)
+            multiplier = np.where(one_min_avg > 0, volumes / one_min_avg, 0.0)
+            candidates = (
+                (count >= 2) & (count >= config.volume_lookback_periods // 2) &
+                (volumes >= config.min_volume_threshold) &
+                (zscore >= SPIKE_MIN_ZSCORE) & (multiplier >= SPIKE_MIN_MULTIPLIER)
+            )
+            for i in np.flatnonzero(candidates).tolist():
+                signal = self._volume_signal(
+                    symbols[i], snapshot[i].timestamp, snapshot[i].volume,
+                    float(mean[i]), float(stddev[i]), float(one_min_avg[i])
+                )
+                if signal is not None:
+                    volume_signals[i] = signal
+            
+            # Price jumps: the most recent past price within the window that moved enough
+            ages = np.arange(1, matrix.prices.capacity)
+            past_times = matrix.price_times.ages(rows, ages)
+            past_prices = matrix.prices.ages(rows, ages)
+            time_diff = timestamps[:, None] - past_times
+            held = ages[None, :] < matrix.prices.count(rows)[:, None]
+            in_window = np.logical_and.accumulate(held & (time_diff <= config.price_jump_window_seconds), axis=1)
+            change_pct = np.abs((prices[:, None] - past_prices) / past_prices * 100)
+            hits = in_window & (past_prices > 0) & (change_pct >= float(config.price_jump_threshold_pct) - PRICE_JUMP_TOLERANCE_PCT)
+            for i in np.flatnonzero(hits.any(axis=1)).tolist():
+                # Nearest qualifying age first, as in the per-tick scan
+                for age in np.flatnonzero(hits[i]).tolist():
+                    past_price = float(past_prices[i, age])
+                    if self._is_jump(past_price, snapshot[i].ltp):
+                        price_signals[i] = self._price_jump_signal(
+                            symbols[i], snapshot[i].timestamp, past_price, snapshot[i].ltp,
+                            float(change_pct[i, age]), float(time_diff[i, age])
+                        )
+                        break
+            
+            # OI confirmation, only for symbols with an open trigger
+            triggered = [i for i, symbol in enumerate(symbols) if symbol in self.trigger_times]
+            if triggered:
+                since_trigger = np.array([
+                    (snapshot[i].timestamp - self.trigger_times[symbols[i]]).total_seconds() for i in triggered
+                ])
+                expired = since_trigger > config.oi_confirmation_window_seconds
+                for i in np.asarray(triggered)[expired].tolist():
+                    del self.trigger_times[symbols[i]]
+                
+                live = np.asarray(triggered)[~expired]
+                since_trigger = since_trigger[~expired]
+                live_rows = rows[live]
+                changes = matrix.oi_changes
+                mean_change = changes.mean[live_rows]
+                stddev_change = changes.stddev(live_rows)
+                oi_change = open_interests[live] - matrix.previous_oi[live_rows]
+                oi_zscore = np.where(stddev_change > 0, (oi_change - mean_change) / stddev_change, 0.0)
+                candidates = (
+                    (changes.count(live_rows) > 0) &
+                    (matrix.oi_points[live_rows] >= config.oi_lookback_periods // 2) &
+                    (open_interests[live] >= config.min_oi_threshold) &
+                    (np.abs(oi_zscore) >= OI_MIN_ZSCORE)
+                )
+                for j in np.flatnonzero(candidates).tolist():
+                    i = int(live[j])
+                    signal = self._oi_signal(
+                        symbols[i], snapshot[i].timestamp, snapshot[i].open_interest,
+                        int(matrix.previous_oi[rows[i]]), float(mean_change[j]),
+                        float(stddev_change[j]), float(since_trigger[j])
+                    )
+                    if signal is not None:
+                        oi_signals[i] = signal
+        
+        return {
+            symbols[i]: (volume_signals.get(i), price_signals.get(i), oi_signals.get(i))
+            for i in sorted(volume_signals.keys() | price_signals.keys() | oi_signals.keys())
+        }
+    
     def set_trigger(self, symbol: str, trigger_time: datetime) -> None:
         """
         Set trigger time for OI confirmation window.
@@ -391,37 +581,38 @@ class VolumeOIDetector:
     
     def get_volume_stats(self, symbol: str) -> Optional[Dict[str, float]]:
         """Get current volume statistics for symbol."""
-        return self.volume_stats.get(symbol)
+        if symbol in self.matrix:
+            return self.matrix.volume_stats(symbol)
+        windows = self.windows.get(symbol)
+        return windows.volume_stats() if windows is not None else None
     
     def get_oi_stats(self, symbol: str) -> Optional[Dict[str, float]]:
         """Get current OI statistics for symbol."""
-        return self.oi_stats.get(symbol)
+        if symbol in self.matrix:
+            return self.matrix.oi_stats(symbol)
+        windows = self.windows.get(symbol)
+        return windows.oi_stats() if windows is not None else None
     
     def get_buffer_sizes(self) -> Dict[str, Dict[str, int]]:
         """Get current buffer sizes for monitoring."""
         buffer_info = {}
         
-        for symbol in self.volume_buffer.keys():
+        for symbol, windows in self.windows.items():
             buffer_info[symbol] = {
-                'volume_buffer': len(self.volume_buffer[symbol]),
-                'price_buffer': len(self.price_buffer[symbol]),
-                'oi_buffer': len(self.oi_buffer[symbol])
+                'volume_buffer': len(windows.volume),
+                'price_buffer': len(windows.prices),
+                'oi_buffer': windows.oi_points
             }
+        for symbol in self.matrix.index:
+            buffer_info[symbol] = self.matrix.buffer_sizes(symbol)
         
         return buffer_info
     
     def reset_symbol_data(self, symbol: str) -> None:
         """Reset all data for a specific symbol."""
-        if symbol in self.volume_buffer:
-            del self.volume_buffer[symbol]
-        if symbol in self.price_buffer:
-            del self.price_buffer[symbol]
-        if symbol in self.oi_buffer:
-            del self.oi_buffer[symbol]
-        if symbol in self.volume_stats:
-            del self.volume_stats[symbol]
-        if symbol in self.oi_stats:
-            del self.oi_stats[symbol]
+        if symbol in self.windows:
+            del self.windows[symbol]
+        self.matrix.remove(symbol)
         if symbol in self.trigger_times:
             del self.trigger_times[symbol]
         
@@ -430,7 +621,7 @@ class VolumeOIDetector:
     def get_detection_summary(self) -> Dict[str, Any]:
         """Get detection engine status summary."""
         return {
-            'tracked_symbols': list(self.volume_buffer.keys()),
+            'tracked_symbols': list(self.windows.keys()) + list(self.matrix.index),
             'active_triggers': len(self.trigger_times),
             'trigger_symbols': list(self.trigger_times.keys()),
             'buffer_sizes': self.get_buffer_sizes(),
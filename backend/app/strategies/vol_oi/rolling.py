@@ -0,0 +1,531 @@
+"""
+Rolling Window Statistics
+Constant-time rolling statistics for the Volume-OI detector.
+
+Each tracked series lives in a preallocated ring buffer of plain floats.
+Pushing a value updates the window mean and variance (sliding Welford),
+the mean of the most recent values and the window min/max (monotonic
+deques) in O(1) amortized time, instead of recomputing them over the
+whole window on every tick.
+
+The *Matrix classes hold the same windows for many symbols at once, one
+row per symbol, and update every row of a snapshot with NumPy operations.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Pushes between exact recomputations of the running sums, bounding float drift
+RESYNC_INTERVAL = 1024
+# Also recompute when M2 falls below this fraction of its peak since the last
+# recompute: after a burst of large values leaves the window, the remaining
+# small M2 would otherwise carry rounding error sized to the burst
+RESYNC_SHRINK = 1e-4
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring buffer of floats.
+
+    Once full, each push overwrites the oldest value.
+    """
+
+    __slots__ = ("capacity", "_values", "_count", "_pushed")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._values: List[float] = [0.0] * capacity
+        self._count = 0
+        self._pushed = 0  # Total values ever pushed; next write goes to _pushed % capacity
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, value: float) -> None:
+        self._values[self._pushed % self.capacity] = value
+        self._pushed += 1
+        if self._count < self.capacity:
+            self._count += 1
+
+    def get(self, age: int) -> float:
+        """
+        Value pushed `age` pushes ago (0 is the latest).
+
+        Args:
+            age: How many pushes back, less than len(self)
+        """
+        if not 0 <= age < self._count:
+            raise IndexError(f"Ring buffer age {age} out of range for {self._count} values")
+        return self._values[(self._pushed - 1 - age) % self.capacity]
+
+    @property
+    def last(self) -> float:
+        return self.get(0)
+
+    def values(self) -> List[float]:
+        """Window contents, oldest first."""
+        return [self._values[(self._pushed - self._count + i) % self.capacity] for i in range(self._count)]
+
+    def clear(self) -> None:
+        self._count = 0
+        self._pushed = 0
+
+
+class RollingWindow(RingBuffer):
+    """
+    Ring buffer with O(1) mean, sample variance, min/max and recent mean.
+
+    Args:
+        capacity: Window length in values
+        recent: Length of the trailing sub-window for recent_mean (0 disables it)
+    """
+
+    __slots__ = ("recent", "_mean", "_m2", "_m2_peak", "_recent_sum", "_min", "_max", "_since_resync")
+
+    def __init__(self, capacity: int, recent: int = 0):
+        super().__init__(capacity)
+        self.recent = min(recent, capacity)
+        self._mean = 0.0
+        self._m2 = 0.0          # Sum of squared deviations from the mean
+        self._m2_peak = 0.0
+        self._recent_sum = 0.0
+        self._min: Deque[Tuple[int, float]] = deque()  # (push index, value), values increasing
+        self._max: Deque[Tuple[int, float]] = deque()  # (push index, value), values decreasing
+        self._since_resync = 0
+
+    def push(self, value: float) -> None:
+        value = float(value)
+        index = self._pushed
+        full = self._count == self.capacity
+        evicted = self._values[index % self.capacity] if full else 0.0
+
+        # Trailing sub-window sum: drop the value leaving it before it is overwritten
+        if self.recent and self.recent < self.capacity:
+            if index >= self.recent:
+                self._recent_sum -= self._values[(index - self.recent) % self.capacity]
+            self._recent_sum += value
+
+        super().push(value)
+
+        # Sliding Welford update of mean and M2
+        if full:
+            old_mean = self._mean
+            self._mean += (value - evicted) / self._count
+            self._m2 += (value - evicted) * (value - self._mean + evicted - old_mean)
+        else:
+            delta = value - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (value - self._mean)
+
+        # Monotonic deques: the front is the window min/max
+        oldest = index - self.capacity
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        if self._min[0][0] <= oldest:
+            self._min.popleft()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        if self._max[0][0] <= oldest:
+            self._max.popleft()
+
+        self._since_resync += 1
+        if self._m2 > self._m2_peak:
+            self._m2_peak = self._m2
+        if self._since_resync >= RESYNC_INTERVAL or self._m2 < self._m2_peak * RESYNC_SHRINK:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recompute the running sums exactly from the buffer."""
+        values = self.values()
+        self._mean = math.fsum(values) / len(values)
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in values)
+        if self.recent and self.recent < self.capacity:
+            self._recent_sum = math.fsum(values[-self.recent:])
+        self._m2_peak = self._m2
+        self._since_resync = 0
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._count else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1 denominator); 0 with fewer than two values."""
+        return max(self._m2, 0.0) / (self._count - 1) if self._count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._count else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._count else 0.0
+
+    @property
+    def recent_mean(self) -> float:
+        """Mean of the last `recent` values (all values while fewer are held)."""
+        if not self._count:
+            return 0.0
+        if not self.recent or self.recent >= self.capacity:
+            return self._mean
+        return self._recent_sum / min(self._count, self.recent)
+
+    def clear(self) -> None:
+        super().clear()
+        self._mean = self._m2 = self._m2_peak = self._recent_sum = 0.0
+        self._min.clear()
+        self._max.clear()
+        self._since_resync = 0
+
+
+class SymbolWindows:
+    """
+    Per-symbol rolling state used by VolumeOIDetector.
+
+    Args:
+        volume_periods: Volume window length
+        oi_periods: OI window length in observations (changes are one fewer)
+        recent_periods: Volume sub-window for the 1-minute average
+        price_points: Recent prices kept for jump detection
+    """
+
+    __slots__ = ("volume", "oi_changes", "oi_points", "oi_periods", "current_oi", "previous_oi",
+                 "price_times", "prices")
+
+    def __init__(self, volume_periods: int, oi_periods: int, recent_periods: int = 20, price_points: int = 10):
+        self.volume = RollingWindow(volume_periods, recent=recent_periods)
+        self.oi_changes = RollingWindow(max(oi_periods - 1, 1))
+        self.oi_periods = oi_periods
+        self.oi_points = 0
+        self.current_oi: Optional[float] = None
+        self.previous_oi: Optional[float] = None
+        self.price_times = RingBuffer(price_points)
+        self.prices = RingBuffer(price_points)
+
+    def push(self, timestamp: float, volume: float, price: float, open_interest: float) -> None:
+        self.volume.push(volume)
+        self.price_times.push(timestamp)
+        self.prices.push(price)
+
+        if self.current_oi is not None:
+            self.oi_changes.push(open_interest - self.current_oi)
+        self.previous_oi = self.current_oi if self.current_oi is not None else open_interest
+        self.current_oi = open_interest
+        self.oi_points = min(self.oi_points + 1, self.oi_periods)
+
+    def volume_stats(self) -> Dict[str, float]:
+        window = self.volume
+        if len(window) < 2:
+            return {}
+        return {
+            'mean': window.mean,
+            'stddev': window.stddev,
+            'min': window.min,
+            'max': window.max,
+            'count': len(window),
+            '1min_avg': window.recent_mean
+        }
+
+    def oi_stats(self) -> Dict[str, float]:
+        if not len(self.oi_changes):
+            return {}
+        return {
+            'mean_change': self.oi_changes.mean,
+            'stddev_change': self.oi_changes.stddev,
+            'current_oi': self.current_oi,
+            'previous_oi': self.previous_oi
+        }
+
+
+class RingBufferMatrix:
+    """
+    Ring buffers of floats for many series, one row per series.
+
+    Rows grow on demand; a push updates any set of distinct rows at once.
+    """
+
+    def __init__(self, capacity: int, rows: int = 64):
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.values = np.zeros((rows, capacity))
+        self.pushed = np.zeros(rows, dtype=np.int64)
+
+    @property
+    def rows(self) -> int:
+        return len(self.pushed)
+
+    def resize(self, rows: int) -> None:
+        extra = rows - self.rows
+        if extra > 0:
+            self.values = np.vstack([self.values, np.zeros((extra, self.capacity))])
+            self.pushed = np.concatenate([self.pushed, np.zeros(extra, dtype=np.int64)])
+
+    def count(self, rows: np.ndarray) -> np.ndarray:
+        return np.minimum(self.pushed[rows], self.capacity)
+
+    def push(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Append one value to each of `rows` (which must be distinct)."""
+        self.values[rows, self.pushed[rows] % self.capacity] = values
+        self.pushed[rows] += 1
+
+    def ages(self, rows: np.ndarray, ages: np.ndarray) -> np.ndarray:
+        """
+        Values pushed `ages` pushes ago for each row, shape (len(rows), len(ages)).
+
+        Entries at ages beyond a row's count are stale; mask them with count().
+        """
+        slots = (self.pushed[rows, None] - 1 - ages[None, :]) % self.capacity
+        return self.values[rows[:, None], slots]
+
+    def row_values(self, row: int) -> List[float]:
+        """One row's contents, oldest first."""
+        count = int(min(self.pushed[row], self.capacity))
+        return self.ages(np.array([row]), np.arange(count - 1, -1, -1))[0].tolist()
+
+    def load(self, row: int, values: Sequence[float]) -> None:
+        """Replace a row's contents with `values` (oldest first)."""
+        self.reset(np.array([row]))
+        values = list(values)[-self.capacity:]
+        self.values[row, :len(values)] = values
+        self.pushed[row] = len(values)
+
+    def reset(self, rows: np.ndarray) -> None:
+        self.values[rows] = 0.0
+        self.pushed[rows] = 0
+
+
+class RollingWindowMatrix(RingBufferMatrix):
+    """
+    RollingWindow statistics maintained for many rows at once.
+
+    Updates are the same sliding Welford recurrences as RollingWindow,
+    applied elementwise, with the same periodic and shrink-triggered
+    exact recomputation.
+    """
+
+    def __init__(self, capacity: int, recent: int = 0, rows: int = 64):
+        super().__init__(capacity, rows)
+        self.recent = min(recent, capacity)
+        self.mean = np.zeros(rows)
+        self.m2 = np.zeros(rows)
+        self.m2_peak = np.zeros(rows)
+        self.recent_sum = np.zeros(rows)
+
+    def resize(self, rows: int) -> None:
+        extra = rows - self.rows
+        super().resize(rows)
+        if extra > 0:
+            for name in ("mean", "m2", "m2_peak", "recent_sum"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra)]))
+
+    def push(self, rows: np.ndarray, values: np.ndarray) -> None:
+        capacity = self.capacity
+        pushed = self.pushed[rows]
+        full = pushed >= capacity
+        evicted = np.where(full, self.values[rows, pushed % capacity], 0.0)
+
+        if self.recent and self.recent < capacity:
+            leaving = np.where(pushed >= self.recent, self.values[rows, (pushed - self.recent) % capacity], 0.0)
+            self.recent_sum[rows] += values - leaving
+
+        super().push(rows, values)
+        count = np.minimum(pushed + 1, capacity)
+
+        mean = self.mean[rows]
+        m2 = self.m2[rows]
+        slide_mean = mean + (values - evicted) / count
+        slide_m2 = m2 + (values - evicted) * (values - slide_mean + evicted - mean)
+        delta = values - mean
+        grow_mean = mean + delta / count
+        grow_m2 = m2 + delta * (values - grow_mean)
+        m2 = np.where(full, slide_m2, grow_m2)
+        self.mean[rows] = np.where(full, slide_mean, grow_mean)
+        self.m2[rows] = m2
+
+        peak = np.maximum(self.m2_peak[rows], m2)
+        self.m2_peak[rows] = peak
+        stale = ((pushed + 1) % RESYNC_INTERVAL == 0) | (m2 < peak * RESYNC_SHRINK)
+        if stale.any():
+            self._resync(rows[stale])
+
+    def _resync(self, rows: np.ndarray) -> None:
+        """Recompute the running sums exactly for `rows`."""
+        count = self.count(rows)
+        valid = np.arange(self.capacity)[None, :] < count[:, None]
+        values = np.where(valid, self.values[rows], 0.0)
+        mean = values.sum(axis=1) / np.maximum(count, 1)
+        self.mean[rows] = mean
+        self.m2[rows] = np.where(valid, (values - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        self.m2_peak[rows] = self.m2[rows]
+        if self.recent and self.recent < self.capacity:
+            recent = self.ages(rows, np.arange(self.recent))
+            in_window = np.arange(self.recent)[None, :] < count[:, None]
+            self.recent_sum[rows] = np.where(in_window, recent, 0.0).sum(axis=1)
+
+    def variance(self, rows: np.ndarray) -> np.ndarray:
+        """Sample variance per row; 0 with fewer than two values."""
+        count = self.count(rows)
+        return np.where(count > 1, np.maximum(self.m2[rows], 0.0) / np.maximum(count - 1, 1), 0.0)
+
+    def stddev(self, rows: np.ndarray) -> np.ndarray:
+        return np.sqrt(self.variance(rows))
+
+    def recent_mean(self, rows: np.ndarray) -> np.ndarray:
+        """Mean of each row's last `recent` values (all values while fewer are held)."""
+        if not self.recent or self.recent >= self.capacity:
+            return self.mean[rows]
+        count = self.count(rows)
+        return np.where(count > 0, self.recent_sum[rows] / np.maximum(np.minimum(count, self.recent), 1), 0.0)
+
+    def load(self, row: int, values: Sequence[float]) -> None:
+        super().load(row, values)
+        rows = np.array([row])
+        self._resync(rows)
+
+    def reset(self, rows: np.ndarray) -> None:
+        super().reset(rows)
+        for name in ("mean", "m2", "m2_peak", "recent_sum"):
+            getattr(self, name)[rows] = 0.0
+
+
+class SymbolWindowsMatrix:
+    """
+    SymbolWindows for many symbols, laid out as matrix rows.
+
+    Used by VolumeOIDetector's snapshot path; a symbol first seen through
+    the per-tick path can be moved in with adopt().
+    """
+
+    def __init__(
+        self,
+        volume_periods: int,
+        oi_periods: int,
+        recent_periods: int = 20,
+        price_points: int = 10,
+        rows: int = 64
+    ):
+        self.index: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._next_row = 0
+        self.oi_periods = oi_periods
+        self.volume = RollingWindowMatrix(volume_periods, recent=recent_periods, rows=rows)
+        self.oi_changes = RollingWindowMatrix(max(oi_periods - 1, 1), rows=rows)
+        self.oi_points = np.zeros(rows, dtype=np.int64)
+        self.current_oi = np.full(rows, np.nan)
+        self.previous_oi = np.full(rows, np.nan)
+        self.price_times = RingBufferMatrix(price_points, rows)
+        self.prices = RingBufferMatrix(price_points, rows)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def rows_for(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row per symbol, allocating rows for new symbols."""
+        index = self.index
+        for symbol in symbols:
+            if symbol not in index:
+                if self._free_rows:
+                    index[symbol] = self._free_rows.pop()
+                else:
+                    index[symbol] = self._next_row
+                    self._next_row += 1
+        if self._next_row > len(self.oi_points):
+            self._grow(max(self._next_row, 2 * len(self.oi_points)))
+        return np.fromiter((index[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+
+    def _grow(self, rows: int) -> None:
+        extra = rows - len(self.oi_points)
+        for matrix in (self.volume, self.oi_changes, self.price_times, self.prices):
+            matrix.resize(rows)
+        self.oi_points = np.concatenate([self.oi_points, np.zeros(extra, dtype=np.int64)])
+        self.current_oi = np.concatenate([self.current_oi, np.full(extra, np.nan)])
+        self.previous_oi = np.concatenate([self.previous_oi, np.full(extra, np.nan)])
+
+    def push(
+        self,
+        rows: np.ndarray,
+        timestamps: np.ndarray,
+        volumes: np.ndarray,
+        prices: np.ndarray,
+        open_interests: np.ndarray
+    ) -> None:
+        """Push one observation for each of `rows` (which must be distinct)."""
+        self.volume.push(rows, volumes)
+        self.price_times.push(rows, timestamps)
+        self.prices.push(rows, prices)
+
+        current = self.current_oi[rows]
+        seen = ~np.isnan(current)
+        if seen.any():
+            self.oi_changes.push(rows[seen], open_interests[seen] - current[seen])
+        self.previous_oi[rows] = np.where(seen, current, open_interests)
+        self.current_oi[rows] = open_interests
+        self.oi_points[rows] = np.minimum(self.oi_points[rows] + 1, self.oi_periods)
+
+    def adopt(self, symbol: str, windows: SymbolWindows) -> None:
+        """Move a symbol's per-tick windows into its matrix row."""
+        row = int(self.rows_for([symbol])[0])
+        self.volume.load(row, windows.volume.values())
+        self.oi_changes.load(row, windows.oi_changes.values())
+        self.price_times.load(row, windows.price_times.values())
+        self.prices.load(row, windows.prices.values())
+        self.oi_points[row] = windows.oi_points
+        self.current_oi[row] = np.nan if windows.current_oi is None else windows.current_oi
+        self.previous_oi[row] = np.nan if windows.previous_oi is None else windows.previous_oi
+
+    def remove(self, symbol: str) -> None:
+        """Forget a symbol; its row is cleared and reused for the next new symbol."""
+        row = self.index.pop(symbol, None)
+        if row is None:
+            return
+        self._free_rows.append(row)
+        rows = np.array([row])
+        for matrix in (self.volume, self.oi_changes, self.price_times, self.prices):
+            matrix.reset(rows)
+        self.oi_points[row] = 0
+        self.current_oi[row] = self.previous_oi[row] = np.nan
+
+    def volume_stats(self, symbol: str) -> Dict[str, float]:
+        rows = np.array([self.index[symbol]])
+        if self.volume.count(rows)[0] < 2:
+            return {}
+        values = self.volume.row_values(int(rows[0]))
+        return {
+            'mean': float(self.volume.mean[rows][0]),
+            'stddev': float(self.volume.stddev(rows)[0]),
+            'min': min(values),
+            'max': max(values),
+            'count': len(values),
+            '1min_avg': float(self.volume.recent_mean(rows)[0])
+        }
+
+    def oi_stats(self, symbol: str) -> Dict[str, float]:
+        rows = np.array([self.index[symbol]])
+        if not self.oi_changes.count(rows)[0]:
+            return {}
+        return {
+            'mean_change': float(self.oi_changes.mean[rows][0]),
+            'stddev_change': float(self.oi_changes.stddev(rows)[0]),
+            'current_oi': float(self.current_oi[rows][0]),
+            'previous_oi': float(self.previous_oi[rows][0])
+        }
+
+    def buffer_sizes(self, symbol: str) -> Dict[str, int]:
+        rows = np.array([self.index[symbol]])
+        return {
+            'volume_buffer': int(self.volume.count(rows)[0]),
+            'price_buffer': int(self.prices.count(rows)[0]),
+            'oi_buffer': int(self.oi_points[rows][0])
+        }
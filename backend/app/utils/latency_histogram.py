@@ -0,0 +1,309 @@
+"""
+Streaming latency histograms with constant memory.
+
+Log-bucketed (HDR-style) histograms give O(1) recording and percentile
+queries with bounded relative error. Windowed histograms keep short
+time-sliced buckets for rolling 1-minute and 5-minute views alongside the
+session-wide histogram.
+"""
+
+import math
+import time
+from array import array
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple, Any
+
+# Quantiles reported by every summary
+SUMMARY_PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+# Named rolling windows (seconds); None is the whole session
+SUMMARY_WINDOWS = {"1m": 60, "5m": 300, "session": None}
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (values in milliseconds).
+
+    Bucket i covers [min_value_ms * b^i, min_value_ms * b^(i+1)) with
+    b = 1 + precision, so any reported percentile is within `precision`
+    relative error of the true sample value.
+    """
+
+    __slots__ = (
+        "min_value_ms", "max_value_ms", "precision", "_log_base",
+        "counts", "count", "total", "min", "max"
+    )
+
+    def __init__(
+        self,
+        min_value_ms: float = 0.01,
+        max_value_ms: float = 60000.0,
+        precision: float = 0.02
+    ):
+        self.min_value_ms = min_value_ms
+        self.max_value_ms = max_value_ms
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+
+        self.counts = array("q", bytes(8 * self.bucket_index(max_value_ms) + 8))
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def bucket_index(self, value_ms: float) -> int:
+        """Bucket index for a value, clamped to the histogram range."""
+        if value_ms <= self.min_value_ms:
+            return 0
+        if value_ms >= self.max_value_ms:
+            value_ms = self.max_value_ms
+        return int(math.log(value_ms / self.min_value_ms) / self._log_base)
+
+    def bucket_value(self, index: int) -> float:
+        """Representative (geometric mid-point) value of a bucket."""
+        return self.min_value_ms * math.exp((index + 0.5) * self._log_base)
+
+    def record(self, value_ms: float) -> int:
+        """Record a sample and return its bucket index."""
+        index = self.bucket_index(value_ms)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        return index
+
+    def percentile(self, percentile: float) -> float:
+        """Value at a percentile (0-100)."""
+        return self.percentiles((percentile,))[percentile]
+
+    def percentiles(self, percentiles: Iterable[float] = SUMMARY_PERCENTILES) -> Dict[float, float]:
+        """Values at several percentiles in a single pass."""
+        buckets = ((i, c) for i, c in enumerate(self.counts) if c)
+        return self._percentiles_from_buckets(buckets, self.count, percentiles, self.min, self.max)
+
+    def fraction_at_or_below(self, value_ms: float) -> float:
+        """Fraction of samples at or below a value (bucket resolution)."""
+        if self.count == 0:
+            return 0.0
+        limit = self.bucket_index(value_ms)
+        return sum(self.counts[:limit + 1]) / self.count
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean, min/max and standard percentiles."""
+        return self._summary(self.percentiles(), self.count, self.total, self.min, self.max)
+
+    def reset(self) -> None:
+        """Clear all recorded samples."""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _percentiles_from_buckets(
+        self,
+        buckets: Iterable[Tuple[int, int]],
+        count: int,
+        percentiles: Iterable[float],
+        low: float,
+        high: float
+    ) -> Dict[float, float]:
+        """Walk (index, count) pairs in index order to resolve percentiles."""
+        percentiles = sorted(percentiles)
+        result = {p: 0.0 for p in percentiles}
+        if count == 0:
+            return result
+
+        targets = [(p, max(1, math.ceil(p / 100.0 * count))) for p in percentiles]
+        position = 0
+        cumulative = 0
+
+        for index, bucket_count in buckets:
+            cumulative += bucket_count
+            while position < len(targets) and cumulative >= targets[position][1]:
+                value = self.bucket_value(index)
+                result[targets[position][0]] = min(max(value, low), high)
+                position += 1
+            if position == len(targets):
+                break
+
+        return result
+
+    @staticmethod
+    def _summary(
+        percentiles: Dict[float, float],
+        count: int,
+        total: float,
+        low: float,
+        high: float
+    ) -> Dict[str, Any]:
+        return {
+            "count": count,
+            "mean_ms": total / count if count else 0.0,
+            "min_ms": low if count else 0.0,
+            "max_ms": high,
+            "p50_ms": percentiles.get(50.0, 0.0),
+            "p95_ms": percentiles.get(95.0, 0.0),
+            "p99_ms": percentiles.get(99.0, 0.0),
+            "p999_ms": percentiles.get(99.9, 0.0)
+        }
+
+
+class WindowedLatencyHistogram:
+    """
+    Session histogram plus time-sliced sparse buckets for rolling windows.
+
+    Samples are also added to a slot covering `slot_seconds`; slots older
+    than `window_seconds` are dropped, so memory is bounded by the number
+    of slots times the occupied buckets per slot.
+    """
+
+    __slots__ = ("session", "slot_seconds", "window_seconds", "_slots")
+
+    def __init__(
+        self,
+        slot_seconds: int = 10,
+        window_seconds: int = 300,
+        **histogram_kwargs
+    ):
+        self.session = LatencyHistogram(**histogram_kwargs)
+        self.slot_seconds = slot_seconds
+        self.window_seconds = window_seconds
+
+        # Each slot: [slot_id, {bucket: count}, count, total, min, max]
+        self._slots: deque = deque()
+
+    def record(self, value_ms: float, now: Optional[float] = None) -> None:
+        """Record a sample at the given (monotonic) time."""
+        now = time.monotonic() if now is None else now
+        index = self.session.record(value_ms)
+        slot_id = int(now // self.slot_seconds)
+
+        if not self._slots or self._slots[-1][0] != slot_id:
+            self._slots.append([slot_id, {}, 0, 0.0, math.inf, 0.0])
+            self._expire(slot_id)
+
+        slot = self._slots[-1]
+        slot[1][index] = slot[1].get(index, 0) + 1
+        slot[2] += 1
+        slot[3] += value_ms
+        if value_ms < slot[4]:
+            slot[4] = value_ms
+        if value_ms > slot[5]:
+            slot[5] = value_ms
+
+    def summary(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Summary over the last `window_seconds` (None for the session)."""
+        if window_seconds is None:
+            return self.session.summary()
+
+        merged, count, total, low, high = self._merge_window(window_seconds, now)
+        percentiles = self.session._percentiles_from_buckets(
+            sorted(merged.items()), count, SUMMARY_PERCENTILES, low, high
+        )
+        return LatencyHistogram._summary(percentiles, count, total, low, high)
+
+    def fraction_at_or_below(
+        self,
+        value_ms: float,
+        window_seconds: Optional[int] = None,
+        now: Optional[float] = None
+    ) -> float:
+        """Fraction of samples at or below a value over a window."""
+        if window_seconds is None:
+            return self.session.fraction_at_or_below(value_ms)
+
+        merged, count, _, _, _ = self._merge_window(window_seconds, now)
+        if count == 0:
+            return 0.0
+        limit = self.session.bucket_index(value_ms)
+        return sum(c for index, c in merged.items() if index <= limit) / count
+
+    def windowed_summary(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Summaries for every named window (1m, 5m, session)."""
+        now = time.monotonic() if now is None else now
+        return {
+            name: self.summary(seconds, now)
+            for name, seconds in SUMMARY_WINDOWS.items()
+        }
+
+    def reset(self) -> None:
+        """Clear session and windowed samples."""
+        self.session.reset()
+        self._slots.clear()
+
+    def _merge_window(self, window_seconds: int, now: Optional[float]) -> Tuple[Dict[int, int], int, float, float, float]:
+        """Merge the sparse slots that fall inside a window."""
+        now = time.monotonic() if now is None else now
+        first_slot = int((now - window_seconds) // self.slot_seconds)
+
+        merged: Dict[int, int] = {}
+        count, total, low, high = 0, 0.0, math.inf, 0.0
+        for slot_id, buckets, slot_count, slot_total, slot_min, slot_max in self._slots:
+            if slot_id < first_slot:
+                continue
+            for index, bucket_count in buckets.items():
+                merged[index] = merged.get(index, 0) + bucket_count
+            count += slot_count
+            total += slot_total
+            low = min(low, slot_min)
+            high = max(high, slot_max)
+
+        return merged, count, total, low, high
+
+    def _expire(self, current_slot: int) -> None:
+        """Drop slots that fell out of the longest window."""
+        oldest_slot = current_slot - self.window_seconds // self.slot_seconds
+        while self._slots and self._slots[0][0] < oldest_slot:
+            self._slots.popleft()
+
+
+class LatencyHistogramSet:
+    """Named group of windowed histograms (e.g. one per execution stage)."""
+
+    def __init__(self, **histogram_kwargs):
+        self._histogram_kwargs = histogram_kwargs
+        self.histograms: Dict[str, WindowedLatencyHistogram] = {}
+
+    def record(self, name: str, value_ms: float, now: Optional[float] = None) -> None:
+        """Record a sample into the named histogram, creating it on first use."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = WindowedLatencyHistogram(**self._histogram_kwargs)
+        histogram.record(value_ms, now)
+
+    def get(self, name: str) -> Optional[WindowedLatencyHistogram]:
+        return self.histograms.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Windowed summaries for every histogram in the set."""
+        now = time.monotonic()
+        return {
+            name: histogram.windowed_summary(now)
+            for name, histogram in self.histograms.items()
+        }
+
+    def reset(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+
+# Registry of histogram sets exported through the health API
+_histogram_sets: Dict[str, LatencyHistogramSet] = {}
+
+
+def register_histogram_set(name: str, histogram_set: LatencyHistogramSet) -> None:
+    """Expose a histogram set through get_latency_snapshot."""
+    _histogram_sets[name] = histogram_set
+
+
+def get_latency_snapshot() -> Dict[str, Any]:
+    """Windowed summaries for all registered histogram sets."""
+    return {
+        name: histogram_set.snapshot()
+        for name, histogram_set in _histogram_sets.items()
+    }
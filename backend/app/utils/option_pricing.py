@@ -0,0 +1,220 @@
+"""
+Vectorized Black-Scholes pricing, greeks and implied volatility.
+
+Every function broadcasts over NumPy arrays, so a whole option chain (or
+chain x scenario grid) is priced in one call. Inputs use decimal
+volatility and time in years.
+
+Greek units:
+    delta   per 1 point of spot
+    gamma   per 1 point of spot
+    theta   per calendar day
+    vega    per 1 vol point (0.01)
+    vanna   change in delta per 1.00 of volatility
+    charm   change in delta per calendar day
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+from scipy.special import ndtr
+
+ArrayLike = Union[float, np.ndarray]
+
+DEFAULT_RISK_FREE_RATE = 0.06
+MIN_TIME_TO_EXPIRY = 1.0 / (365.0 * 24.0)  # One hour
+MIN_VOLATILITY = 1e-4
+MAX_VOLATILITY = 5.0
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def norm_pdf(x: ArrayLike) -> np.ndarray:
+    return _INV_SQRT_2PI * np.exp(-0.5 * np.square(x))
+
+
+def norm_cdf(x: ArrayLike) -> np.ndarray:
+    return ndtr(x)
+
+
+@dataclass
+class OptionGreeks:
+    """Prices and greeks for a batch of options (arrays share one shape)"""
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    vega: np.ndarray
+    vanna: np.ndarray
+    charm: np.ndarray
+
+    def row(self, index) -> dict:
+        """Greeks of a single option as plain floats"""
+        return {
+            name: float(getattr(self, name)[index])
+            for name in ("price", "delta", "gamma", "theta", "vega", "vanna", "charm")
+        }
+
+
+def _prepare(spot, strike, t, vol):
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    t = np.maximum(np.asarray(t, dtype=float), MIN_TIME_TO_EXPIRY)
+    vol = np.clip(np.asarray(vol, dtype=float), MIN_VOLATILITY, MAX_VOLATILITY)
+    return spot, strike, t, vol
+
+
+def _d1_d2(spot, strike, t, vol, r, q):
+    sqrt_t = np.sqrt(t)
+    vol_sqrt_t = vol * sqrt_t
+    d1 = (np.log(spot / strike) + (r - q + 0.5 * vol * vol) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t, sqrt_t
+
+
+def price(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    vol: ArrayLike,
+    is_call: ArrayLike,
+    r: float = DEFAULT_RISK_FREE_RATE,
+    q: float = 0.0
+) -> np.ndarray:
+    """Black-Scholes price for calls (is_call True) and puts"""
+    spot, strike, t, vol = _prepare(spot, strike, t, vol)
+    d1, d2, _ = _d1_d2(spot, strike, t, vol, r, q)
+    forward_discount = spot * np.exp(-q * t)
+    strike_discount = strike * np.exp(-r * t)
+    call = forward_discount * ndtr(d1) - strike_discount * ndtr(d2)
+    put = strike_discount * ndtr(-d2) - forward_discount * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def greeks(
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    vol: ArrayLike,
+    is_call: ArrayLike,
+    r: float = DEFAULT_RISK_FREE_RATE,
+    q: float = 0.0
+) -> OptionGreeks:
+    """Price and first/second-order greeks in one pass"""
+    spot, strike, t, vol = _prepare(spot, strike, t, vol)
+    is_call = np.asarray(is_call, dtype=bool)
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t, vol, r, q)
+
+    pdf_d1 = norm_pdf(d1)
+    cdf_d1, cdf_d2 = ndtr(d1), ndtr(d2)
+    dividend_discount = np.exp(-q * t)
+    strike_discount = strike * np.exp(-r * t)
+
+    call_price = spot * dividend_discount * cdf_d1 - strike_discount * cdf_d2
+    put_price = call_price - spot * dividend_discount + strike_discount  # Put-call parity
+
+    delta = dividend_discount * np.where(is_call, cdf_d1, cdf_d1 - 1.0)
+    gamma = dividend_discount * pdf_d1 / (spot * vol * sqrt_t)
+    vega = spot * dividend_discount * pdf_d1 * sqrt_t
+
+    common_theta = -spot * dividend_discount * pdf_d1 * vol / (2.0 * sqrt_t)
+    call_theta = common_theta - r * strike_discount * cdf_d2 + q * spot * dividend_discount * cdf_d1
+    put_theta = (
+        common_theta + r * strike_discount * ndtr(-d2) - q * spot * dividend_discount * ndtr(-d1)
+    )
+
+    vanna = -dividend_discount * pdf_d1 * d2 / vol
+
+    # dDelta/dt (per year) for calls; puts differ by the dividend term only
+    charm_core = dividend_discount * pdf_d1 * (2.0 * (r - q) * t - d2 * vol * sqrt_t) / (2.0 * t * vol * sqrt_t)
+    call_charm = q * dividend_discount * cdf_d1 - charm_core
+    put_charm = -q * dividend_discount * ndtr(-d1) - charm_core
+
+    return OptionGreeks(
+        price=np.where(is_call, call_price, put_price),
+        delta=delta,
+        gamma=gamma,
+        theta=np.where(is_call, call_theta, put_theta) / 365.0,
+        vega=vega / 100.0,
+        vanna=vanna,
+        charm=np.where(is_call, call_charm, put_charm) / 365.0
+    )
+
+
+def implied_volatility(
+    option_price: ArrayLike,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    t: ArrayLike,
+    is_call: ArrayLike,
+    r: float = DEFAULT_RISK_FREE_RATE,
+    q: float = 0.0,
+    initial_vol: Optional[ArrayLike] = None,
+    tol: float = 1e-6,
+    max_iter: int = 20
+) -> np.ndarray:
+    """
+    Implied volatility for a batch of prices
+
+    Newton steps from a Brenner-Subrahmanyam/Corrado-Miller start converge
+    in a few iterations for most of a chain; elements whose Newton step
+    leaves the bracket fall back to bisection on the same iteration, so
+    every element stays inside [MIN_VOLATILITY, MAX_VOLATILITY]. Prices
+    outside no-arbitrage bounds return NaN.
+    """
+    option_price = np.asarray(option_price, dtype=float)
+    spot, strike, t, _ = _prepare(spot, strike, t, 0.2)
+    shape = np.broadcast_shapes(option_price.shape, spot.shape, strike.shape, t.shape, np.shape(is_call))
+    option_price = np.broadcast_to(option_price, shape)
+    spot = np.broadcast_to(spot, shape)
+    strike = np.broadcast_to(strike, shape)
+    t = np.broadcast_to(t, shape)
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), shape)
+
+    forward_discount = spot * np.exp(-q * t)
+    strike_discount = strike * np.exp(-r * t)
+    lower = np.where(
+        is_call,
+        np.maximum(forward_discount - strike_discount, 0.0),
+        np.maximum(strike_discount - forward_discount, 0.0)
+    )
+    upper = np.where(is_call, forward_discount, strike_discount)
+    valid = (option_price > lower) & (option_price < upper)
+
+    if initial_vol is None:
+        # Corrado-Miller approximation (Brenner-Subrahmanyam at the money)
+        call_price = np.where(is_call, option_price, option_price + forward_discount - strike_discount)
+        half_gap = 0.5 * (forward_discount - strike_discount)
+        adjusted = call_price - half_gap
+        radicand = np.maximum(adjusted * adjusted - (forward_discount - strike_discount) ** 2 / np.pi, 0.0)
+        vol = np.sqrt(2.0 * np.pi / t) / (forward_discount + strike_discount) * (adjusted + np.sqrt(radicand))
+    else:
+        vol = np.broadcast_to(np.asarray(initial_vol, dtype=float), shape).copy()
+    vol = np.clip(np.nan_to_num(vol, nan=0.2), 0.01, MAX_VOLATILITY)
+
+    low = np.full(shape, MIN_VOLATILITY)
+    high = np.full(shape, MAX_VOLATILITY)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        d1, _, sqrt_t = _d1_d2(spot, strike, t, vol, r, q)
+        model = price(spot, strike, t, vol, is_call, r, q)
+        diff = model - option_price
+
+        converged = np.abs(diff) < tol * np.maximum(option_price, 1.0)
+        active &= ~converged
+
+        # Maintain the bracket: price is increasing in volatility
+        high = np.where(active & (diff > 0), vol, high)
+        low = np.where(active & (diff < 0), vol, low)
+
+        vega = forward_discount * norm_pdf(d1) * sqrt_t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = vol - diff / vega
+        use_newton = np.isfinite(newton) & (newton > low) & (newton < high)
+        next_vol = np.where(use_newton, newton, 0.5 * (low + high))
+        vol = np.where(active, next_vol, vol)
+
+    return np.where(valid, vol, np.nan)
@@ -0,0 +1,205 @@
+"""
+Streaming mean/variance estimators with O(1) updates.
+
+RollingStats keeps a fixed-size ring of samples and updates the window mean
+and sum of squared deviations incrementally (sliding-window Welford), so a
+new sample costs a constant number of float operations regardless of the
+window length. EWMAStats tracks an exponentially weighted mean/variance for
+fast-reacting baselines. MultiHorizonStats groups several of both under
+names so callers can compare short, medium and long horizons.
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, Optional, Any
+
+
+class RollingStats:
+    """
+    Exact rolling mean and sample variance over the last `window` values.
+
+    Floating point drift from repeated add/remove is bounded by an exact
+    recomputation from the ring every `resync_every` evictions.
+    """
+
+    __slots__ = ("window", "resync_every", "_values", "_head", "count", "mean", "_m2", "_evictions")
+
+    def __init__(self, window: int, resync_every: Optional[int] = None):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self.resync_every = resync_every or window * 16
+        self._values = array("d", bytes(8 * window))
+        self._head = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._evictions = 0
+
+    def update(self, value: float) -> None:
+        """Add a sample, evicting the oldest once the window is full."""
+        if self.count < self.window:
+            self._values[(self._head + self.count) % self.window] = value
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+            return
+
+        old = self._values[self._head]
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.window
+
+        old_mean = self.mean
+        self.mean += (value - old) / self.window
+        self._m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self._evictions += 1
+        if self._evictions >= self.resync_every:
+            self._resync()
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.update(value)
+
+    @property
+    def last(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self._values[(self._head + self.count - 1) % self.window]
+
+    @property
+    def variance(self) -> float:
+        """Sample (n-1) variance, matching statistics.variance."""
+        if self.count < 2:
+            return 0.0
+        return max(self._m2, 0.0) / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def z_score(self, value: float) -> float:
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+    def values(self) -> list:
+        """Window contents, oldest first."""
+        return [self._values[(self._head + i) % self.window] for i in range(self.count)]
+
+    def reset(self) -> None:
+        self._head = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._evictions = 0
+
+    def _resync(self) -> None:
+        """Recompute mean and M2 exactly from the ring."""
+        values = self.values()
+        self.mean = math.fsum(values) / self.count
+        self._m2 = math.fsum((v - self.mean) ** 2 for v in values)
+        self._evictions = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std
+        }
+
+
+class EWMAStats:
+    """
+    Exponentially weighted mean and variance.
+
+    `halflife` is expressed in samples; alpha = 1 - 0.5 ** (1 / halflife).
+    """
+
+    __slots__ = ("halflife", "alpha", "count", "mean", "variance")
+
+    def __init__(self, halflife: float):
+        if halflife <= 0:
+            raise ValueError("halflife must be positive")
+        self.halflife = halflife
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.variance = (1.0 - self.alpha) * (self.variance + self.alpha * delta * delta)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def z_score(self, value: float) -> float:
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "halflife": self.halflife,
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std
+        }
+
+
+class MultiHorizonStats:
+    """Named rolling windows and EWMA estimators fed from one stream."""
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, int]] = None,
+        halflives: Optional[Dict[str, float]] = None
+    ):
+        self.rolling: Dict[str, RollingStats] = {
+            name: RollingStats(size) for name, size in (windows or {}).items()
+        }
+        self.ewma: Dict[str, EWMAStats] = {
+            name: EWMAStats(halflife) for name, halflife in (halflives or {}).items()
+        }
+
+    def update(self, value: float) -> None:
+        for stats in self.rolling.values():
+            stats.update(value)
+        for stats in self.ewma.values():
+            stats.update(value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.update(value)
+
+    def get(self, name: str):
+        return self.rolling.get(name) or self.ewma.get(name)
+
+    def z_scores(self, value: float) -> Dict[str, float]:
+        """z-score of a value against every horizon."""
+        return {
+            **{name: stats.z_score(value) for name, stats in self.rolling.items()},
+            **{name: stats.z_score(value) for name, stats in self.ewma.items()}
+        }
+
+    def reset(self) -> None:
+        for stats in (*self.rolling.values(), *self.ewma.values()):
+            stats.reset()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            **{name: stats.summary() for name, stats in self.rolling.items()},
+            **{name: stats.summary() for name, stats in self.ewma.items()}
+        }
@@ -40,6 +40,9 @@ class EventType(str, Enum):
     POSITION_LIMIT = "position_limit"
     LOSS_LIMIT = "loss_limit"
     
+    # Calibration events
+    CALIBRATION_UPDATE = "calibration_update"
+    
     # System events
     SYSTEM_STATUS = "system_status"
     ERROR = "error"
@@ -335,6 +338,14 @@ class SocketManager:
             SubscriptionType.RISK
         )
     
+    async def broadcast_calibration_update(self, job_data: Dict[str, Any]):
+        """Broadcast calibration job progress or result"""
+        await self.broadcast(
+            EventType.CALIBRATION_UPDATE,
+            job_data,
+            SubscriptionType.STRATEGY
+        )
+    
     async def broadcast_system_status(self, status_data: Dict[str, Any]):
         """Broadcast system status update"""
         await self.broadcast(
@@ -0,0 +1,393 @@
+"""
+Calibration Job Runner
+
+Runs walk-forward parameter calibration outside the web process:
+- Folds are precomputed once and cached on disk
+- Each fold is optimized in a separate worker process
+- Fold results are checkpointed after every fold
+- The latest fold's parameters are published; test windows are only reported
+- Jobs interrupted by a restart resume from their last checkpoint
+- Jobs can be cancelled mid-search and resumed later
+- Progress and results are pushed over the websocket
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.core.logging import get_logger
+from app.services.calibration_service import (
+    calibration_service,
+    CalibrationParams,
+    HistoricalSignal,
+    build_walk_forward_folds,
+    run_walk_forward_fold,
+    walk_forward_split,
+    zscore_stats_from_signals
+)
+
+logger = get_logger(__name__)
+
+CANCEL_FLAG = "cancel"
+SHUTDOWN_FLAG = ".shutdown"
+SIGNALS_FILE = "signals.json"
+MIN_SIGNALS = 50
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class CalibrationJob:
+    """Calibration job and its checkpointed progress"""
+    job_id: str
+    lookback_days: int
+    n_folds: int
+    max_iterations: int
+    population_size: int
+    seed: Optional[int] = None
+    status: JobStatus = JobStatus.PENDING
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    signals_path: Optional[str] = None  # Signal set the folds were built from, fixed at first run
+    fold_paths: List[str] = field(default_factory=list)
+    fold_results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    best: Optional[Dict[str, Any]] = None  # Published (latest fold) parameters and test scores
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        return len(self.fold_results) / self.n_folds if self.n_folds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        data["progress"] = self.progress
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CalibrationJob":
+        data = {k: v for k, v in data.items() if k != "progress"}
+        data["status"] = JobStatus(data["status"])
+        return cls(**data)
+
+
+class CalibrationJobRunner:
+    """
+    Schedules calibration jobs onto a worker process pool
+
+    The web process only coordinates: it loads signals, builds the fold
+    cache in a thread and awaits fold results from the pool, so request
+    handling stays responsive. Cancellation and shutdown are signalled to
+    running folds through flag files the optimizer polls every generation.
+    """
+
+    def __init__(self, base_dir: str = "data/calibration_jobs", max_workers: Optional[int] = None):
+        self.base_dir = Path(base_dir)
+        self.fold_cache_dir = self.base_dir / "folds"
+        # Leave a core for the API process
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+        self.jobs: Dict[str, CalibrationJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.is_running = False
+
+    async def start(self):
+        """Start the worker pool and resume interrupted jobs"""
+        if self.is_running:
+            logger.warning("Calibration job runner is already running")
+            return
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        (self.base_dir / SHUTDOWN_FLAG).unlink(missing_ok=True)
+
+        # Spawned workers do not inherit the event loop or open sockets
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self.is_running = True
+
+        self._load_jobs()
+        for job in self.jobs.values():
+            if job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+                logger.info(f"Resuming calibration job {job.job_id} ({len(job.fold_results)}/{job.n_folds} folds done)")
+                self._schedule(job)
+
+        logger.info(f"Calibration job runner started with {self.max_workers} worker(s)")
+
+    async def stop(self):
+        """Stop the runner; running jobs keep their checkpoints and resume on next start"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        (self.base_dir / SHUTDOWN_FLAG).touch()
+
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+        if self._executor:
+            await asyncio.to_thread(self._executor.shutdown, True, cancel_futures=True)
+            self._executor = None
+
+        logger.info("Calibration job runner stopped")
+
+    async def submit(
+        self,
+        lookback_days: int = 60,
+        n_folds: int = 4,
+        max_iterations: int = 100,
+        population_size: int = 15,
+        seed: Optional[int] = None
+    ) -> CalibrationJob:
+        """Create and schedule a walk-forward calibration job"""
+        if not self.is_running:
+            raise RuntimeError("Calibration job runner is not running")
+
+        job = CalibrationJob(
+            job_id=uuid.uuid4().hex[:12],
+            lookback_days=lookback_days,
+            n_folds=n_folds,
+            max_iterations=max_iterations,
+            population_size=population_size,
+            seed=seed
+        )
+        self.jobs[job.job_id] = job
+        self._checkpoint(job)
+        self._schedule(job)
+
+        logger.info(f"Calibration job {job.job_id} submitted: {lookback_days} days, {n_folds} folds")
+        return job
+
+    async def cancel(self, job_id: str) -> CalibrationJob:
+        """Stop a job; folds already finished stay in its checkpoint"""
+        job = self._get(job_id)
+        if job.status not in (JobStatus.PENDING, JobStatus.RUNNING):
+            return job
+
+        self._job_dir(job_id).mkdir(parents=True, exist_ok=True)
+        (self._job_dir(job_id) / CANCEL_FLAG).touch()
+        task = self._tasks.get(job_id)
+        if task is None:
+            await self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    async def resume(self, job_id: str) -> CalibrationJob:
+        """Re-run the remaining folds of a cancelled or failed job"""
+        job = self._get(job_id)
+        if job.status not in (JobStatus.CANCELLED, JobStatus.FAILED):
+            return job
+
+        (self._job_dir(job_id) / CANCEL_FLAG).unlink(missing_ok=True)
+        job.status = JobStatus.PENDING
+        job.error = None
+        job.finished_at = None
+        self._checkpoint(job)
+        self._schedule(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[CalibrationJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[CalibrationJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _schedule(self, job: CalibrationJob):
+        self._tasks[job.job_id] = asyncio.create_task(self._run_job(job))
+
+    async def _run_job(self, job: CalibrationJob):
+        cancel_flag = self._job_dir(job.job_id) / CANCEL_FLAG
+        stop_flags = [str(cancel_flag), str(self.base_dir / SHUTDOWN_FLAG)]
+        loop = asyncio.get_running_loop()
+
+        try:
+            job.status = JobStatus.RUNNING
+            job.started_at = job.started_at or datetime.now(timezone.utc).isoformat()
+            self._checkpoint(job)
+            await self._broadcast(job)
+
+            signals = await asyncio.to_thread(self._job_signals, job)
+            fold_paths = await asyncio.to_thread(
+                build_walk_forward_folds, calibration_service, signals, job.n_folds, str(self.fold_cache_dir)
+            )
+            if job.fold_results and fold_paths != job.fold_paths:
+                # Checkpointed folds came from a different signal set; their scores don't carry over
+                logger.warning(f"Calibration job {job.job_id} folds changed; discarding {len(job.fold_results)} fold result(s)")
+                job.fold_results = {}
+                job.best = None
+            job.fold_paths = fold_paths
+            self._checkpoint(job)
+
+            async def run_fold(index: int):
+                result = await loop.run_in_executor(
+                    self._executor,
+                    run_walk_forward_fold,
+                    fold_paths[index],
+                    stop_flags,
+                    job.max_iterations,
+                    job.population_size,
+                    None if job.seed is None else job.seed + index
+                )
+                return index, result
+
+            remaining = [i for i in range(job.n_folds) if str(i) not in job.fold_results]
+            for next_result in asyncio.as_completed([run_fold(i) for i in remaining]):
+                index, result = await next_result
+                if result["stopped"]:
+                    continue  # Partial search: rerun this fold on resume
+
+                job.fold_results[str(index)] = result
+                self._checkpoint(job)
+                await self._broadcast(job)
+
+                logger.info(
+                    f"Calibration job {job.job_id} fold {index}: train={result['train_score']:.3f}, "
+                    f"test={result['test_score']:.3f} ({result['elapsed_s']:.1f}s)"
+                )
+
+            if cancel_flag.exists():
+                await self._finish(job, JobStatus.CANCELLED)
+            elif len(job.fold_results) == job.n_folds:
+                job.best = self._select_parameters(job)
+                await asyncio.to_thread(self._save_result, job, signals)
+                await self._finish(job, JobStatus.COMPLETED)
+            # Otherwise stopped by shutdown: stays RUNNING and resumes on next start
+
+        except asyncio.CancelledError:
+            # Runner shutdown; keep the checkpoint as RUNNING
+            raise
+        except Exception as e:
+            logger.error(f"Calibration job {job.job_id} failed: {e}")
+            job.error = str(e)
+            await self._finish(job, JobStatus.FAILED)
+        finally:
+            self._tasks.pop(job.job_id, None)
+
+    def _job_signals(self, job: CalibrationJob) -> List[HistoricalSignal]:
+        """Signal set of the job: loaded once, then reread from the job directory on resume"""
+        if not (job.signals_path and os.path.exists(job.signals_path)):
+            signals = self._load_signals(job.lookback_days)
+            path = self._job_dir(job.job_id) / SIGNALS_FILE
+            tmp_path = path.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump([asdict(signal) for signal in signals], f, default=float)
+            os.replace(tmp_path, path)
+            job.signals_path = str(path)
+
+        # Always read back from disk so first run and resume hash identical values into the fold digest
+        with open(job.signals_path) as f:
+            return [HistoricalSignal(**row) for row in json.load(f)]
+
+    def _load_signals(self, lookback_days: int):
+        signals = calibration_service.historical_service.load_signals(lookback_days)
+        if len(signals) < MIN_SIGNALS:
+            # Same fallback as CalibrationService.optimize_parameters
+            signals = calibration_service._load_test_data(signals[0].date if signals else datetime.now().strftime('%Y-%m-%d'))
+        return signals
+
+    def _select_parameters(self, job: CalibrationJob) -> Dict[str, Any]:
+        """
+        Parameters to publish: the latest fold's
+
+        The latest fold trains on the most recent window. Picking the fold
+        with the highest test score would make the test windows part of the
+        selection; instead they are only reported, per fold and as a mean.
+        """
+        index = job.n_folds - 1
+        test_scores = [job.fold_results[str(i)]["test_score"] for i in range(job.n_folds)]
+        return {
+            "fold": index,
+            **job.fold_results[str(index)],
+            "mean_test_score": sum(test_scores) / len(test_scores)
+        }
+
+    def _save_result(self, job: CalibrationJob, signals):
+        """Evaluate the latest fold's parameters on its (unseen) test window and publish them"""
+        ordered = sorted(signals, key=lambda s: s.timestamp)
+        train, test = walk_forward_split(ordered, job.n_folds, job.best["fold"])
+
+        params = CalibrationParams.from_vector(job.best["params"])
+        result = calibration_service.evaluate_parameters(params, test, zscore_stats_from_signals(train))
+        calibration_service.save_calibration_result(result)
+
+    async def _finish(self, job: CalibrationJob, status: JobStatus):
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        self._checkpoint(job)
+        await self._broadcast(job)
+        logger.info(f"Calibration job {job.job_id} {status.value}")
+
+    def _checkpoint(self, job: CalibrationJob):
+        job_dir = self._job_dir(job.job_id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = job_dir / "job.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_dict(), f, default=str)
+        os.replace(tmp_path, job_dir / "job.json")
+
+    def _load_jobs(self):
+        for path in self.base_dir.glob("*/job.json"):
+            try:
+                with open(path) as f:
+                    job = CalibrationJob.from_dict(json.load(f))
+                self.jobs[job.job_id] = job
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Skipping unreadable calibration checkpoint {path}: {e}")
+
+    async def _broadcast(self, job: CalibrationJob):
+        try:
+            from app.websockets.socket_manager import get_socket_manager
+            data = job.to_dict()
+            data.pop("fold_results")
+            await get_socket_manager().broadcast_calibration_update(data)
+        except Exception as e:
+            logger.debug(f"Calibration update broadcast failed: {e}")
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.base_dir / job_id
+
+    def _get(self, job_id: str) -> CalibrationJob:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown calibration job: {job_id}")
+        return job
+
+
+# Global runner instance
+_runner_instance: Optional[CalibrationJobRunner] = None
+
+def get_calibration_job_runner() -> CalibrationJobRunner:
+    """Get the global calibration job runner instance"""
+    global _runner_instance
+    if _runner_instance is None:
+        _runner_instance = CalibrationJobRunner()
+    return _runner_instance
+
+async def start_calibration_job_runner():
+    """Start the calibration job runner"""
+    await get_calibration_job_runner().start()
+
+async def stop_calibration_job_runner():
+    """Stop the calibration job runner"""
+    global _runner_instance
+    if _runner_instance:
+        await _runner_instance.stop()
+        _runner_instance = None
@@ -0,0 +1,596 @@
+"""
+Strategy Runtime
+
+Hosts strategies outside the API event loop, one isolated worker each:
+- Workers are spawned processes (own interpreter and GIL) or threads (own event loop)
+- Ticks reach every worker through one shared-memory TickFeed
+- Signals and heartbeats come back over a queue to a central signal router
+- Per-strategy CPU time, feed lag, backlog, drops and heartbeat health are tracked
+- A crashed or hung worker is reported without affecting the others
+
+Process workers scale across cores; thread workers only keep slow or
+blocking strategy code off the API loop, since they share the GIL.
+
+The runtime is not part of the API lifespan: the process that owns the
+market data feed starts it, registers the order-routing signal handler
+and hands each tick cycle to process_market_data, which also dispatches
+the cycle to strategies running in-process in the registry.
+"""
+
+import asyncio
+import importlib
+import inspect
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.strategies.base import MarketData, TradingSignal
+from app.strategies.dispatch import DispatchTable
+from app.strategies.feed import DEFAULT_CAPACITY, DEFAULT_MAX_SYMBOLS, FeedCursor, TickFeed
+
+logger = get_logger(__name__)
+
+WORKER_MODES = ("process", "thread")
+STOP_TIMEOUT_SECONDS = 10.0
+REGISTRY_SOURCE = "registry"  # Signal source for in-process registry strategies
+
+
+@dataclass
+class StrategyWorkerSpec:
+    """Everything a worker needs to build and run its strategy (picklable)"""
+    worker_id: str
+    strategy_name: str
+    config: Dict[str, Any]
+    feed_name: str
+    symbols: Optional[List[str]] = None       # Narrows the strategy's own subscription
+    strategy_modules: List[str] = field(default_factory=list)
+    heartbeat_interval: float = 1.0
+    poll_interval: float = 0.002
+    max_batch: int = 1024
+
+
+class _WorkerStats:
+    """Counters kept inside a worker and shipped with each heartbeat"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.signals = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.lag_max = 0.0
+        self.lag_sum = 0.0
+        self.lag_count = 0
+        self.cpu_start = time.thread_time()
+        self.cpu_mark = self.cpu_start
+        self.wall_mark = time.perf_counter()
+
+    def observe_lag(self, published_at: np.ndarray, now: float):
+        lag = now - published_at
+        self.lag_max = max(self.lag_max, float(lag.max()))
+        self.lag_sum += float(lag.sum())
+        self.lag_count += len(lag)
+
+    def heartbeat(self, cursor: FeedCursor) -> Dict[str, Any]:
+        """Snapshot the counters; lag and utilization cover the time since the last heartbeat"""
+        cpu, wall = time.thread_time(), time.perf_counter()
+        elapsed = wall - self.wall_mark
+        snapshot = {
+            "ticks": self.ticks,
+            "signals": self.signals,
+            "errors": self.errors,
+            "cpu_seconds": cpu - self.cpu_start,
+            "cpu_utilization": (cpu - self.cpu_mark) / elapsed if elapsed > 0 else 0.0,
+            "busy_seconds": self.busy_seconds,
+            "lag_ms_avg": 1000.0 * self.lag_sum / self.lag_count if self.lag_count else 0.0,
+            "lag_ms_max": 1000.0 * self.lag_max,
+            "backlog": cursor.backlog,
+            "dropped": cursor.dropped,
+            "sent_at": time.time()
+        }
+        self.cpu_mark, self.wall_mark = cpu, wall
+        self.lag_max = self.lag_sum = 0.0
+        self.lag_count = 0
+        return snapshot
+
+
+def run_strategy_worker(spec: StrategyWorkerSpec, outbox, control):
+    """
+    Worker entry point, for both spawned processes and threads
+
+    Messages put on `outbox` are (kind, worker_id, payload) tuples with kind
+    one of ready, signal, heartbeat, failed, stopped. `control` accepts
+    "stop", "pause" and "resume".
+    """
+    try:
+        asyncio.run(_worker_main(spec, outbox, control))
+    except Exception as e:
+        outbox.put(("failed", spec.worker_id, f"{type(e).__name__}: {e}"))
+
+
+async def _worker_main(spec: StrategyWorkerSpec, outbox, control):
+    # Spawned processes start with an empty registry
+    from app.strategies.registry import strategy_registry
+    for module in ("app.strategies", *spec.strategy_modules):
+        importlib.import_module(module)
+
+    strategy = await strategy_registry.create_strategy_instance(spec.strategy_name, spec.config)
+    if strategy is None:
+        outbox.put(("failed", spec.worker_id, f"Could not create strategy {spec.strategy_name}"))
+        return
+    if not await strategy.start():
+        outbox.put(("failed", spec.worker_id, f"Strategy {spec.strategy_name} failed to start"))
+        return
+
+    # Records for unsubscribed instruments are dropped before decoding
+    subscription = strategy.get_subscription()
+    routing = DispatchTable()
+    routing.subscribe(spec.worker_id, subscription)
+    wanted = set(spec.symbols) if spec.symbols else None
+    filtered = wanted is not None or not subscription.is_wildcard
+    mask = np.zeros(0, dtype=bool)
+
+    feed = TickFeed.attach(spec.feed_name)
+    cursor = feed.cursor()
+    stats = _WorkerStats()
+    next_heartbeat = time.perf_counter()
+    outbox.put(("ready", spec.worker_id, None))
+
+    try:
+        while True:
+            command = _poll_control(control)
+            if command == "stop":
+                break
+            if command == "pause":
+                await strategy.pause()
+            elif command == "resume":
+                await strategy.resume()
+
+            records = cursor.read(spec.max_batch)
+            if len(records):
+                stats.observe_lag(records["published_at"], time.time())
+                if filtered:
+                    if len(mask) < feed.symbol_count:
+                        mask = np.array([
+                            bool(routing.route(symbol)) and (wanted is None or symbol in wanted)
+                            for symbol in feed.symbols()
+                        ], dtype=bool)
+                    records = records[mask[records["symbol_id"]]]
+
+                busy_start = time.perf_counter()
+                ticks = feed.to_market_data(records)
+                if subscription.data_types:
+                    ticks = routing.partition(ticks).get(spec.worker_id, [])
+                stats.ticks += len(ticks)
+                try:
+                    signals = await strategy.generate_signals(ticks) if ticks else []
+                except Exception as e:
+                    stats.errors += 1
+                    signals = []
+                    logger.error(f"Strategy worker {spec.worker_id} failed on a batch of {len(ticks)} ticks: {e}")
+                for signal in signals:
+                    stats.signals += 1
+                    outbox.put(("signal", spec.worker_id, signal))
+                stats.busy_seconds += time.perf_counter() - busy_start
+
+            now = time.perf_counter()
+            if now >= next_heartbeat:
+                outbox.put(("heartbeat", spec.worker_id, stats.heartbeat(cursor)))
+                next_heartbeat = now + spec.heartbeat_interval
+
+            if not len(records) or cursor.backlog == 0:
+                await asyncio.sleep(spec.poll_interval)
+    finally:
+        final = stats.heartbeat(cursor)
+        try:
+            await strategy.stop()
+        finally:
+            feed.close()
+            outbox.put(("stopped", spec.worker_id, final))
+
+
+def _poll_control(control) -> Optional[str]:
+    try:
+        return control.get_nowait()
+    except queue.Empty:
+        return None
+
+
+@dataclass
+class StrategyWorker:
+    """Runtime-side record of one hosted strategy"""
+    worker_id: str
+    strategy_name: str
+    mode: str
+    symbols: Optional[List[str]]
+    handle: Any                      # multiprocessing.Process or threading.Thread
+    control: Any
+    status: str = "starting"         # starting, running, paused, unresponsive, stopping, stopped, failed, crashed
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    last_heartbeat: Optional[float] = None
+    stats: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    exit_seen: bool = False          # Exited on the last health check; crashed if still unexplained
+
+    @property
+    def alive(self) -> bool:
+        return self.handle.is_alive()
+
+    def to_dict(self, heartbeat_timeout: float) -> Dict[str, Any]:
+        age = time.time() - self.last_heartbeat if self.last_heartbeat else None
+        return {
+            "worker_id": self.worker_id,
+            "strategy_name": self.strategy_name,
+            "mode": self.mode,
+            "pid": getattr(self.handle, "pid", None),
+            "symbols": self.symbols,
+            "status": self.status,
+            "alive": self.alive,
+            "healthy": self.status in ("running", "paused") and age is not None and age <= heartbeat_timeout,
+            "started_at": self.started_at,
+            "heartbeat_age_seconds": age,
+            "error": self.error,
+            **self.stats
+        }
+
+
+SignalHandler = Callable[[TradingSignal, str], Any]
+TickListener = Callable[[Sequence[MarketData]], Any]
+
+
+class StrategyRuntime:
+    """
+    Runs registered strategies in isolated workers fed from shared memory
+
+    Example:
+        runtime = get_strategy_runtime()
+        runtime.register_signal_handler(route_to_order_manager)
+        worker_id = await runtime.add_strategy("volume_oi_confirm", config, mode="process")
+        await runtime.process_market_data(ticks)   # Each market data cycle
+    """
+
+    def __init__(
+        self,
+        feed_capacity: int = DEFAULT_CAPACITY,
+        max_symbols: int = DEFAULT_MAX_SYMBOLS,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 5.0,
+        poll_interval: float = 0.002,
+        max_recent_signals: int = 1000
+    ):
+        self.feed_capacity = feed_capacity
+        self.max_symbols = max_symbols
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.poll_interval = poll_interval
+
+        self.feed: Optional[TickFeed] = None
+        self.workers: Dict[str, StrategyWorker] = {}
+        self.recent_signals: Deque[Dict[str, Any]] = deque(maxlen=max_recent_signals)
+        self.signal_handlers: List[SignalHandler] = []
+        self.tick_listeners: List[TickListener] = []
+        self.is_running = False
+
+        self._context = multiprocessing.get_context("spawn")
+        self._outbox = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._drain_thread: Optional[threading.Thread] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._routing: set = set()
+
+    async def start(self):
+        """Create the tick feed and start draining worker messages"""
+        if self.is_running:
+            return
+        self.feed = TickFeed.create(self.feed_capacity, self.max_symbols)
+        self._outbox = self._context.Queue()
+        self._loop = asyncio.get_running_loop()
+        self.is_running = True
+        self._drain_thread = threading.Thread(target=self._drain, name="strategy-runtime-drain", daemon=True)
+        self._drain_thread.start()
+        self._monitor_task = asyncio.create_task(self._monitor())
+        logger.info(f"Strategy runtime started (feed {self.feed.name}, {self.feed_capacity} slots)")
+
+    async def stop(self):
+        """Stop every worker, then release the feed"""
+        if not self.is_running:
+            return
+        await asyncio.gather(
+            *(self.remove_strategy(worker_id) for worker_id in list(self.workers)),
+            return_exceptions=True
+        )
+        self.is_running = False
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+        if self._drain_thread:
+            await asyncio.to_thread(self._drain_thread.join, 2.0)
+        if self._routing:
+            await asyncio.gather(*self._routing, return_exceptions=True)
+        self.feed.close()
+        self.feed = None
+        logger.info("Strategy runtime stopped")
+
+    async def add_strategy(
+        self,
+        strategy_name: str,
+        config: Dict[str, Any],
+        mode: str = "process",
+        symbols: Optional[Sequence[str]] = None,
+        strategy_modules: Sequence[str] = ()
+    ) -> str:
+        """
+        Start a registered strategy in its own worker
+
+        Args:
+            strategy_name: Name the strategy is registered under
+            config: Strategy configuration
+            mode: "process" (separate core, full isolation) or "thread"
+            symbols: Only deliver these symbols (default: all)
+            strategy_modules: Modules to import in the worker to register the strategy
+
+        Returns:
+            str: Worker id
+        """
+        if not self.is_running:
+            raise RuntimeError("Strategy runtime is not running")
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Unknown worker mode {mode}; expected one of {WORKER_MODES}")
+
+        worker_id = f"{strategy_name}-{uuid.uuid4().hex[:8]}"
+        spec = StrategyWorkerSpec(
+            worker_id=worker_id,
+            strategy_name=strategy_name,
+            config=dict(config),
+            feed_name=self.feed.name,
+            symbols=list(symbols) if symbols else None,
+            strategy_modules=list(strategy_modules),
+            heartbeat_interval=self.heartbeat_interval,
+            poll_interval=self.poll_interval
+        )
+
+        if mode == "process":
+            control = self._context.Queue()
+            handle = self._context.Process(
+                target=run_strategy_worker, args=(spec, self._outbox, control),
+                name=f"strategy-{worker_id}", daemon=True
+            )
+        else:
+            control = queue.Queue()
+            handle = threading.Thread(
+                target=run_strategy_worker, args=(spec, self._outbox, control),
+                name=f"strategy-{worker_id}", daemon=True
+            )
+
+        self.workers[worker_id] = StrategyWorker(
+            worker_id=worker_id,
+            strategy_name=strategy_name,
+            mode=mode,
+            symbols=spec.symbols,
+            handle=handle,
+            control=control
+        )
+        handle.start()
+        logger.info(f"Started {mode} worker {worker_id} for strategy {strategy_name}")
+        return worker_id
+
+    async def remove_strategy(self, worker_id: str, timeout: float = STOP_TIMEOUT_SECONDS) -> bool:
+        """Stop a worker and forget it; hung process workers are terminated"""
+        worker = self._get(worker_id)
+        if worker.alive:
+            worker.status = "stopping"
+            worker.control.put("stop")
+            await asyncio.to_thread(worker.handle.join, timeout)
+        if worker.alive:
+            if worker.mode == "process":
+                logger.warning(f"Strategy worker {worker_id} did not stop in {timeout}s; terminating")
+                worker.handle.terminate()
+                await asyncio.to_thread(worker.handle.join, 1.0)
+            else:
+                logger.warning(f"Strategy worker thread {worker_id} did not stop in {timeout}s; abandoning it")
+        self.workers.pop(worker_id, None)
+        logger.info(f"Removed strategy worker {worker_id}")
+        return True
+
+    async def pause_strategy(self, worker_id: str):
+        """Pause trading in a worker; it keeps consuming ticks"""
+        worker = self._get(worker_id)
+        worker.control.put("pause")
+        worker.status = "paused"
+
+    async def resume_strategy(self, worker_id: str):
+        """Resume trading in a paused worker"""
+        worker = self._get(worker_id)
+        worker.control.put("resume")
+        worker.status = "running"
+
+    def publish(self, market_data: MarketData) -> int:
+        """Send one tick to every worker; returns its feed sequence number"""
+        if self.feed is None:
+            raise RuntimeError("Strategy runtime is not running")
+        return self.feed.publish(market_data)
+
+    def publish_many(self, ticks: Sequence[MarketData]) -> int:
+        """Send a batch of ticks to every worker; returns the last sequence number"""
+        if self.feed is None:
+            raise RuntimeError("Strategy runtime is not running")
+        return self.feed.publish_many(ticks)
+
+    async def process_market_data(self, ticks: Sequence[MarketData]) -> int:
+        """
+        Deliver one market data cycle to every strategy
+
+        Ticks are published to the workers, when running, and dispatched to
+        the registry's in-process strategies by subscription; signals from
+        both reach the same handlers. Returns the number of registry signals.
+        """
+        from app.strategies.registry import strategy_registry
+        if self.feed is not None and ticks:
+            self.feed.publish_many(ticks)
+
+        # Order-side consumers (e.g. the adaptive re-quote engine) see the same cycle
+        for listener in self.tick_listeners:
+            try:
+                result = listener(ticks)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Tick listener failed: {e}")
+
+        signals = await strategy_registry.dispatch_market_data(ticks)
+        for signal in signals:
+            await self._route(signal, REGISTRY_SOURCE)
+        return len(signals)
+
+    def register_signal_handler(self, handler: SignalHandler):
+        """Route worker signals to `handler(signal, worker_id)`; may be sync or async"""
+        self.signal_handlers.append(handler)
+
+    def register_tick_listener(self, listener: TickListener):
+        """Call `listener(ticks)` with every market data cycle; may be sync or async"""
+        self.tick_listeners.append(listener)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Feed position and per-worker health and metrics"""
+        workers = {
+            worker_id: worker.to_dict(self.heartbeat_timeout)
+            for worker_id, worker in self.workers.items()
+        }
+        return {
+            "is_running": self.is_running,
+            "feed": {
+                "name": self.feed.name,
+                "capacity": self.feed.capacity,
+                "write_seq": self.feed.write_seq,
+                "symbols": self.feed.symbol_count
+            } if self.feed else None,
+            "workers": workers,
+            "healthy_workers": sum(1 for worker in workers.values() if worker["healthy"]),
+            "signals_routed": len(self.recent_signals)
+        }
+
+    def _drain(self):
+        """Forward worker messages to the event loop (runs in its own thread)"""
+        while self.is_running:
+            try:
+                message = self._outbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._on_message, message)
+            except RuntimeError:
+                break  # Loop closed
+
+    def _on_message(self, message):
+        kind, worker_id, payload = message
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            return
+
+        if kind == "heartbeat":
+            worker.last_heartbeat = time.time()
+            worker.stats = payload
+            if worker.status == "unresponsive":
+                logger.info(f"Strategy worker {worker_id} is responsive again")
+                worker.status = "running"
+        elif kind == "signal":
+            task = asyncio.create_task(self._route(payload, worker_id))
+            self._routing.add(task)
+            task.add_done_callback(self._routing.discard)
+        elif kind == "ready":
+            worker.status = "running"
+            worker.last_heartbeat = time.time()
+        elif kind == "stopped":
+            worker.stats = payload
+            worker.status = "stopped"
+        elif kind == "failed":
+            worker.status = "failed"
+            worker.error = payload
+            logger.error(f"Strategy worker {worker_id} failed: {payload}")
+
+    async def _route(self, signal: TradingSignal, worker_id: str):
+        self.recent_signals.append({
+            "worker_id": worker_id,
+            "signal_id": signal.signal_id,
+            "strategy_name": signal.strategy_name,
+            "signal_type": signal.signal_type.value,
+            "symbol": signal.symbol,
+            "quantity": signal.quantity,
+            "received_at": datetime.now(timezone.utc).isoformat()
+        })
+        for handler in self.signal_handlers:
+            try:
+                result = handler(signal, worker_id)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Signal handler failed for {signal.signal_id} from {worker_id}: {e}")
+
+    async def _monitor(self):
+        """Flag workers that died or stopped sending heartbeats"""
+        while self.is_running:
+            now = time.time()
+            for worker in list(self.workers.values()):
+                if worker.status in ("stopping", "stopped", "failed", "crashed"):
+                    continue
+                if not worker.alive:
+                    # Its final message may still be in the queue; wait one check
+                    if not worker.exit_seen:
+                        worker.exit_seen = True
+                        continue
+                    worker.status = "crashed"
+                    exitcode = getattr(worker.handle, "exitcode", None)
+                    worker.error = f"Worker exited unexpectedly (exit code {exitcode})"
+                    logger.error(f"Strategy worker {worker.worker_id} crashed: {worker.error}")
+                elif (
+                    worker.status in ("running", "paused")
+                    and worker.last_heartbeat
+                    and now - worker.last_heartbeat > self.heartbeat_timeout
+                ):
+                    worker.status = "unresponsive"
+                    logger.warning(
+                        f"Strategy worker {worker.worker_id} missed heartbeats "
+                        f"for {now - worker.last_heartbeat:.1f}s"
+                    )
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _get(self, worker_id: str) -> StrategyWorker:
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            raise KeyError(f"Unknown strategy worker: {worker_id}")
+        return worker
+
+
+# Global runtime instance
+_runtime_instance: Optional[StrategyRuntime] = None
+
+def get_strategy_runtime() -> StrategyRuntime:
+    """Get the global strategy runtime instance"""
+    global _runtime_instance
+    if _runtime_instance is None:
+        _runtime_instance = StrategyRuntime()
+    return _runtime_instance
+
+async def start_strategy_runtime():
+    """Start the strategy runtime"""
+    await get_strategy_runtime().start()
+
+async def stop_strategy_runtime():
+    """Stop the strategy runtime and its workers"""
+    global _runtime_instance
+    if _runtime_instance:
+        await _runtime_instance.stop()
+        _runtime_instance = None
@@ -11,6 +11,8 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from app.utils import option_pricing
+
 class GreeksRangeModel:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -219,8 +221,44 @@ class GreeksRangeModel:
         else:
             return "neutral"
     
+    def _atm_window(self, option_chain: pd.DataFrame, spot_price: float) -> pd.DataFrame:
+        """Rows within ±1.5% of spot"""
+        window = spot_price * 0.015
+        strikes = option_chain['strike'].astype(float)
+        return option_chain[(strikes - spot_price).abs() <= window]
+    
+    def _column(self, chain: pd.DataFrame, name: str, default) -> np.ndarray:
+        """Column as float array, or a constant when the chain lacks it"""
+        if name in chain.columns:
+            return chain[name].astype(float).to_numpy()
+        return np.full(len(chain), float(default))
+    
+    def _side_ivs(self, chain: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Call and put IVs in decimal form (handles percent quotes)"""
+        call_iv = self._column(chain, 'call_iv', 0.15)
+        put_iv = self._column(chain, 'put_iv', 0.15)
+        call_iv = np.where(call_iv > 1.0, call_iv / 100.0, call_iv)
+        put_iv = np.where(put_iv > 1.0, put_iv / 100.0, put_iv)
+        return call_iv, put_iv
+    
+    def _time_to_expiry(self, days_to_expiry: Optional[float], front_iv: Optional[float] = None,
+                        expected_move_pct: Optional[float] = None) -> float:
+        """
+        Time to expiry in years: explicit days, else implied by the straddle
+        (EM ≈ 0.8·σ·√T), else a one-week default
+        """
+        if days_to_expiry is not None and days_to_expiry > 0:
+            return days_to_expiry / 365.0
+        if expected_move_pct and front_iv:
+            sigma = self._norm_iv(front_iv)
+            if sigma > 0:
+                t = (expected_move_pct / (np.sqrt(2.0 / np.pi) * sigma)) ** 2
+                return float(np.clip(t, 1.0 / 365.0, 60.0 / 365.0))
+        return 7.0 / 365.0
+    
     def calculate_vanna_shift(self, option_chain: pd.DataFrame, spot_price: float, 
-                            front_iv: float, back_iv: float) -> float:
+                            front_iv: float, back_iv: float,
+                            time_to_expiry: Optional[float] = None) -> float:
         """
         Calculate vanna-based spot shift
         """
@@ -239,38 +277,44 @@ class GreeksRangeModel:
         
         # Sum vanna and gamma in ±1.5% band around ATM
         window = spot_price * 0.015
-        vanna_net = 0
-        gamma_net = 0
-        atm_strikes_count = 0
-        
         print(f"   ATM window: {spot_price - window:.2f} to {spot_price + window:.2f}")
         
-        for _, row in option_chain.iterrows():
-            strike = float(row['strike'])
-            if abs(strike - spot_price) <= window:
-                atm_strikes_count += 1
-                # Use both gammas if available for better vanna estimation  
-                call_gamma = float(row.get('call_gamma', 0))
-                put_gamma = float(row.get('put_gamma', 0))
-                gamma = float(row.get('gamma', 0.5 * (call_gamma + put_gamma)))
-                
-                # CRITICAL: Normalize IVs (handle both percent and decimal formats)
-                call_iv = self._norm_iv(row.get('call_iv', 0.15))
-                put_iv = self._norm_iv(row.get('put_iv', 0.15))
-                avg_iv = (call_iv + put_iv) / 2
-                
-                # Estimate vanna (this is a simplified approximation)
-                estimated_vanna = gamma * avg_iv * 0.1  # Simple vanna estimation
-                
-                oi = float(row.get('call_oi', 0)) + float(row.get('put_oi', 0))
-                
-                vanna_net += estimated_vanna * oi
-                gamma_net += abs(gamma) * oi
-                
-                if atm_strikes_count <= 3:
-                    print(f"     Strike {strike}: gamma={gamma:.6f}, avg_iv={avg_iv:.4f}, est_vanna={estimated_vanna:.6f}, oi={oi:,.0f}")
+        atm = self._atm_window(option_chain, spot_price)
+        atm_strikes_count = len(atm)
+        if atm_strikes_count == 0:
+            print("   ❌ No strikes in ATM window, returning 0")
+            return 0
+        
+        t = time_to_expiry if time_to_expiry is not None else self._time_to_expiry(None)
+        strikes = atm['strike'].astype(float).to_numpy()
+        call_iv, put_iv = self._side_ivs(atm)
+        call_oi = self._column(atm, 'call_oi', 0)
+        put_oi = self._column(atm, 'put_oi', 0)
+        
+        # Black-Scholes vanna/gamma per side in one pass over the window
+        call_model = option_pricing.greeks(spot_price, strikes, t, call_iv, True)
+        put_model = option_pricing.greeks(spot_price, strikes, t, put_iv, False)
+        
+        call_vanna = self._column(atm, 'call_vanna', np.nan)
+        put_vanna = self._column(atm, 'put_vanna', np.nan)
+        call_vanna = np.where(np.isnan(call_vanna), call_model.vanna, call_vanna)
+        put_vanna = np.where(np.isnan(put_vanna), put_model.vanna, put_vanna)
+        
+        # Prefer chain gammas where quoted, model gammas otherwise
+        chain_gamma = self._column(atm, 'gamma', np.nan)
+        call_gamma = self._column(atm, 'call_gamma', np.nan)
+        put_gamma = self._column(atm, 'put_gamma', np.nan)
+        call_gamma = np.where(np.isnan(call_gamma), np.where(np.isnan(chain_gamma), call_model.gamma, chain_gamma), call_gamma)
+        put_gamma = np.where(np.isnan(put_gamma), np.where(np.isnan(chain_gamma), put_model.gamma, chain_gamma), put_gamma)
+        
+        vanna_net = float(np.sum(call_vanna * call_oi + put_vanna * put_oi))
+        gamma_net = float(np.sum(np.abs(call_gamma) * call_oi + np.abs(put_gamma) * put_oi))
         
-        print(f"   ATM strikes processed: {atm_strikes_count}")
+        for i in range(min(3, atm_strikes_count)):
+            print(f"     Strike {strikes[i]}: call_vanna={call_vanna[i]:.6f}, put_vanna={put_vanna[i]:.6f}, "
+                  f"call_iv={call_iv[i]:.4f}, put_iv={put_iv[i]:.4f}, oi={call_oi[i] + put_oi[i]:,.0f}")
+        
+        print(f"   ATM strikes processed: {atm_strikes_count} (T={t * 365:.2f}d)")
         print(f"   Vanna net: {vanna_net:.6f}, Gamma net: {gamma_net:.6f}")
         
         if gamma_net == 0:
@@ -282,20 +326,28 @@ class GreeksRangeModel:
         print(f"   📊 Calculated vanna shift: {vanna_shift:.6f}")
         return vanna_shift
     
-    def calculate_charm_modifier(self, option_chain: pd.DataFrame, spot_price: float) -> float:
+    def calculate_charm_modifier(self, option_chain: pd.DataFrame, spot_price: float,
+                                 time_to_expiry: Optional[float] = None) -> float:
         """
         Calculate charm-based range modifier
         """
         # Sum charm in ±1.5% band around ATM
-        window = spot_price * 0.015
-        charm_net = 0
-        
-        for _, row in option_chain.iterrows():
-            strike = float(row['strike'])
-            if abs(strike - spot_price) <= window:
-                charm = float(row.get('charm', 0))
-                oi = float(row.get('call_oi', 0)) + float(row.get('put_oi', 0))
-                charm_net += charm * oi
+        atm = self._atm_window(option_chain, spot_price)
+        call_oi = self._column(atm, 'call_oi', 0)
+        put_oi = self._column(atm, 'put_oi', 0)
+        
+        if 'charm' in atm.columns:
+            charm_net = float(np.sum(atm['charm'].astype(float).to_numpy() * (call_oi + put_oi)))
+        elif len(atm):
+            # No quoted charm: per-side Black-Scholes charm from the chain IVs
+            t = time_to_expiry if time_to_expiry is not None else self._time_to_expiry(None)
+            strikes = atm['strike'].astype(float).to_numpy()
+            call_iv, put_iv = self._side_ivs(atm)
+            call_charm = option_pricing.greeks(spot_price, strikes, t, call_iv, True).charm
+            put_charm = option_pricing.greeks(spot_price, strikes, t, put_iv, False).charm
+            charm_net = float(np.sum(call_charm * call_oi + put_charm * put_oi))
+        else:
+            charm_net = 0.0
         
         # Z-score against historical data
         if len(self.charm_history) > 10:
@@ -359,7 +411,8 @@ class GreeksRangeModel:
     
     def greeks_range_model(self, option_chain: pd.DataFrame, spot_price: float, 
                           front_iv: float, back_iv: float, 
-                          hours_to_close: float = 6.5, expected_move_pct: float = None) -> Dict:
+                          hours_to_close: float = 6.5, expected_move_pct: float = None,
+                          days_to_expiry: Optional[float] = None) -> Dict:
         """
         Main GRM calculation function
         """
@@ -376,6 +429,9 @@ class GreeksRangeModel:
             print(f"   📉 Back IV: {back_iv}")
             print(f"   ⏰ Hours to close: {hours_to_close}")
             
+            time_to_expiry = self._time_to_expiry(days_to_expiry, front_iv, expected_move_pct)
+            print(f"   ⏳ Time to expiry: {time_to_expiry * 365:.2f} days")
+            
             # Step 1: Calculate Dealer GEX and find gamma map
             print("🔢 GRM MODEL DEBUG: Step 1 - Calculating Dealer GEX...")
             gex_data = self.calculate_dealer_gex(option_chain)
@@ -405,7 +461,7 @@ class GreeksRangeModel:
             
             # Step 2: Calculate vanna shift
             print("🔄 GRM MODEL DEBUG: Step 2 - Calculating vanna shift...")
-            vanna_shift = self.calculate_vanna_shift(option_chain, spot_price, front_iv, back_iv)
+            vanna_shift = self.calculate_vanna_shift(option_chain, spot_price, front_iv, back_iv, time_to_expiry)
             base_center = spot_price + vanna_shift
             vanna_center_clipped = np.clip(base_center, wall_lo, wall_hi)
             print(f"   ↔️ Vanna shift: {vanna_shift:.2f}")
@@ -414,7 +470,7 @@ class GreeksRangeModel:
             
             # Step 3: Calculate charm modifier
             print("⚡ GRM MODEL DEBUG: Step 3 - Calculating charm modifier...")
-            charm_modifier = self.calculate_charm_modifier(option_chain, spot_price)
+            charm_modifier = self.calculate_charm_modifier(option_chain, spot_price, time_to_expiry)
             print(f"   ⚡ Charm modifier: {charm_modifier:.4f}")
             
             # Step 4: Calculate expected move
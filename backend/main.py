@@ -23,6 +23,8 @@ from app.websockets.events import cleanup_socket_events
 from app.data import start_option_chain_feed, stop_option_chain_feed, start_ltp_feed, stop_ltp_feed
 from app.data import get_statistical_processor, cleanup_statistical_processor
 from app.worker.data_retention import start_data_retention_worker, stop_data_retention_worker
+from app.worker.calibration_jobs import start_calibration_job_runner, stop_calibration_job_runner
+from app.risk.circuit_breaker import circuit_breaker
 
 
 # Initialize Socket.IO server
@@ -66,6 +68,15 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning(f"Redis cache initialization failed: {redis_health.get('error', 'Unknown error')}")
         
+        # Start circuit breaker (restores VIX history, flushes new samples periodically)
+        logger.info("Starting circuit breaker...")
+        try:
+            await circuit_breaker.start()
+            logger.info("Circuit breaker started successfully")
+        except Exception as e:
+            logger.warning(f"Failed to start circuit breaker: {e}")
+            # Continue without restored VIX history for now
+        
         # Initialize WebSocket system
         logger.info("Setting up WebSocket events...")
         await setup_socket_events()
@@ -98,6 +109,15 @@ async def lifespan(app: FastAPI):
             logger.warning(f"Failed to start data retention worker: {e}")
             # Continue without retention worker for now
         
+        # Start calibration job runner (resumes interrupted jobs)
+        logger.info("Starting calibration job runner...")
+        try:
+            await start_calibration_job_runner()
+            logger.info("Calibration job runner started successfully")
+        except Exception as e:
+            logger.warning(f"Failed to start calibration job runner: {e}")
+            # Continue without calibration jobs for now
+        
         # Initialize statistical processor
         logger.info("Starting statistical processor...")
         try:
@@ -131,6 +151,11 @@ async def lifespan(app: FastAPI):
         await stop_data_retention_worker()
         logger.info("Data retention worker stopped")
         
+        # Stop calibration job runner
+        logger.info("Stopping calibration job runner...")
+        await stop_calibration_job_runner()
+        logger.info("Calibration job runner stopped")
+        
         # Stop statistical processor
         logger.info("Stopping statistical processor...")
         await cleanup_statistical_processor()
@@ -140,6 +165,11 @@ async def lifespan(app: FastAPI):
         await cleanup_socket_events()
         logger.info("WebSocket system cleaned up")
         
+        # Flush pending VIX samples while Redis is still open
+        logger.info("Stopping circuit breaker...")
+        await circuit_breaker.stop()
+        logger.info("Circuit breaker stopped")
+        
         # Close Redis connections
         await close_redis()
         logger.info("Redis connections closed")
@@ -31,6 +31,14 @@ except ImportError as e:
     print(f"⚠️ Kill switch module not available: {e}")
     KILL_SWITCH_AVAILABLE = False
 
+# Import option chain snapshot recorder
+try:
+    from app.services.chain_store import chain_snapshot_recorder
+    CHAIN_RECORDER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ Chain snapshot recorder not available: {e}")
+    CHAIN_RECORDER_AVAILABLE = False
+
 app = FastAPI(title="Nifty Trade Setup API", version="1.0.0")
 
 # Add CORS middleware
@@ -49,6 +57,16 @@ frontend_dist_path = os.path.join(os.path.dirname(__file__), "..", "frontend", "
 _dhan_client = None
 _dhan_client_initialized = False
 
+@app.on_event("shutdown")
+async def flush_chain_recorder():
+    """Write buffered option chain snapshots before the process exits"""
+    if CHAIN_RECORDER_AVAILABLE:
+        try:
+            written = chain_snapshot_recorder.flush()
+            print(f"✅ Flushed {written} option chain snapshot segments")
+        except Exception as e:
+            print(f"⚠️ Failed to flush option chain snapshots: {e}")
+
 # API Routes
 @app.get("/api/health")
 async def health():
@@ -485,6 +503,13 @@ async def get_option_chain():
         if not oc_df.empty and "Expiry" in oc_df.columns:
             expiry = str(oc_df.iloc[0].get("Expiry", expiry))
         
+        # Keep a replayable record of every real chain refresh
+        if CHAIN_RECORDER_AVAILABLE:
+            try:
+                chain_snapshot_recorder.record("NIFTY", spot_price, expiry, option_chain)
+            except Exception as e:
+                print(f"⚠️ Failed to record option chain snapshot: {e}")
+        
         return {
             "symbol": "NIFTY",
             "spot_price": spot_price,
@@ -0,0 +1,76 @@
+"""
+Backtest engine smoke test: the backtester imports with the real risk
+components and a replay is deterministic
+
+Run with: python -m pytest -q test_backtest_engine.py
+"""
+
+from app.backtest import BacktestConfig, FillModelConfig, TickTape, run_backtest
+from app.strategies.base import BaseStrategy, SignalType, TradingSignal
+
+
+class BuyThenExit(BaseStrategy):
+    """Buys two lots on the first tick of each symbol and exits ten ticks later"""
+
+    def __init__(self):
+        super().__init__("buy_then_exit", {})
+        self.ticks = {}
+
+    async def initialize(self):
+        return True
+
+    async def process_market_data(self, market_data):
+        count = self.ticks[market_data.symbol] = self.ticks.get(market_data.symbol, 0) + 1
+        if count == 1:
+            return TradingSignal(f"sig-{market_data.symbol}", self.strategy_name, SignalType.BUY, market_data.symbol, 2)
+        if count == 10:
+            return TradingSignal(None, self.strategy_name, SignalType.EXIT, market_data.symbol, 2)
+        return None
+
+    async def on_trade_fill(self, trade):
+        pass
+
+    async def on_position_update(self, position):
+        pass
+
+    def get_strategy_specific_config(self):
+        return {}
+
+    async def cleanup(self):
+        pass
+
+
+def _tape() -> TickTape:
+    start = 1_700_000_000.0
+    return TickTape.from_records(
+        {
+            "symbol": symbol,
+            "timestamp": start + i,
+            "ltp": 100.0 + i * 0.5,
+            "bid_price": 99.95 + i * 0.5,
+            "ask_price": 100.05 + i * 0.5,
+            "bid_qty": 750,
+            "ask_qty": 750,
+            "volume": 10,
+            "open_interest": 1000
+        }
+        for i in range(20)
+        for symbol in ("NIFTY2412524000CE", "NIFTY2412524000PE")
+    )
+
+
+def _config() -> BacktestConfig:
+    return BacktestConfig(fill=FillModelConfig(latency_ms=50, latency_jitter_ms=20, seed=7))
+
+
+def test_backtest_round_trip_is_deterministic():
+    first = run_backtest(BuyThenExit(), _tape(), _config())
+    second = run_backtest(BuyThenExit(), _tape(), _config())
+
+    assert first.events == 40
+    assert [t["side"] for t in first.trades].count("buy") == 2
+    assert all(t["position_after"] >= 0 for t in first.trades)
+    assert first.realized_pnl > 0
+    assert [(t["symbol"], t["price"], t["lots"]) for t in first.trades] == \
+        [(t["symbol"], t["price"], t["lots"]) for t in second.trades]
+    assert first.total_pnl == second.total_pnl
@@ -0,0 +1,95 @@
+"""
+Kill switch flatten plan test: fills keep one ready flatten order per
+contract, so the legs of a spread never net against each other
+
+Run with: python -m pytest -q test_kill_switch.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.broker.enums import ProductType, TransactionType
+from app.orders.kill_switch import EmergencyKillSwitch
+from app.orders.models import OrderRequest, OrderType
+
+
+def _request(option_type: str, side: TransactionType, product_type=ProductType.MIS) -> OrderRequest:
+    return OrderRequest(
+        symbol="NIFTY",
+        strike=24000.0,
+        option_type=option_type,
+        expiry="2024-01-25",
+        transaction_type=side,
+        order_type=OrderType.LIMIT,
+        product_type=product_type,
+        quantity=50,
+        price=100.0,
+        strategy_name="straddle",
+        metadata={"security_id": f"sec-{option_type}"}
+    )
+
+
+def _kill_switch() -> EmergencyKillSwitch:
+    broker = SimpleNamespace(order_rate_limiter=None)
+    return EmergencyKillSwitch(broker, redis_manager=None)
+
+
+def test_on_fill_builds_one_flatten_order_per_contract():
+    kill_switch = _kill_switch()
+    call = _request("CE", TransactionType.BUY)
+    put = _request("PE", TransactionType.SELL, ProductType.NRML)
+
+    kill_switch.on_fill(call, 50, 100.0)
+    kill_switch.on_fill(put, -50, 80.0)
+
+    assert set(kill_switch.flatten_plan) == {call.contract, put.contract}
+
+    call_exit = kill_switch.flatten_plan[call.contract].order_request
+    assert call_exit.transaction_type == TransactionType.SELL
+    assert call_exit.quantity == 50
+    assert (call_exit.strike, call_exit.option_type, call_exit.expiry) == (24000.0, "CE", "2024-01-25")
+    assert call_exit.order_type == OrderType.MARKET
+    assert call_exit.product_type == ProductType.MIS
+    assert call_exit.metadata["security_id"] == "sec-CE"
+
+    put_exit = kill_switch.flatten_plan[put.contract].order_request
+    assert put_exit.transaction_type == TransactionType.BUY
+    assert put_exit.quantity == 50
+    assert put_exit.product_type == ProductType.NRML
+
+
+def test_closing_fill_removes_only_that_contract():
+    kill_switch = _kill_switch()
+    call = _request("CE", TransactionType.BUY)
+    put = _request("PE", TransactionType.BUY)
+
+    kill_switch.on_fill(call, 50, 100.0)
+    kill_switch.on_fill(put, 50, 80.0)
+    kill_switch.on_fill(_request("CE", TransactionType.SELL), -50, 105.0)
+
+    assert set(kill_switch.flatten_plan) == {put.contract}
+    assert kill_switch.flatten_plan[put.contract].order_request.quantity == 50
+
+
+def test_sync_positions_keys_broker_rows_by_contract():
+    kill_switch = _kill_switch()
+    call = _request("CE", TransactionType.BUY)
+    kill_switch.on_fill(call, 50, 100.0)
+
+    asyncio.run(kill_switch.sync_positions([{
+        "tradingSymbol": "NIFTY-Jan2024-24000-CE",
+        "securityId": "sec-CE",
+        "productType": "INTRADAY",
+        "drvExpiryDate": "2024-01-25 14:30:00",
+        "drvOptionType": "CALL",
+        "drvStrikePrice": 24000.0,
+        "netQty": 100,
+        "costPrice": 101.0,
+        "lastTradedPrice": 102.0
+    }]))
+
+    assert set(kill_switch.flatten_plan) == {call.contract}
+    flatten = kill_switch.flatten_plan[call.contract]
+    assert flatten.strategy_id == "straddle"
+    assert flatten.order_request.quantity == 100
+    assert flatten.order_request.product_type == ProductType.MIS
@@ -0,0 +1,62 @@
+"""
+Pre-trade gate direction test: size, limit and concentration rules bind
+orders that add exposure, while reduce-only exits always pass them
+
+Run with: python -m pytest -q test_pretrade_gate.py
+"""
+
+from app.risk.calculator import risk_calculator
+from app.risk.pretrade import PreTradeCheck, PreTradeRiskGate, PreTradeRule
+
+
+def _gate_at_strategy_limit() -> PreTradeRiskGate:
+    gate = PreTradeRiskGate()
+    gate.on_fill("NIFTY", "straddle", risk_calculator.max_total_lots, 900_000.0)
+    gate.on_fill("BANKNIFTY", "spread", 2, 100_000.0)
+    return gate
+
+
+def _check(side: int, lots: int, position_lots: int) -> PreTradeCheck:
+    return PreTradeCheck(
+        symbol="NIFTY",
+        strategy_id="straddle",
+        lots=lots,
+        price=100.0,
+        order_value=lots * 75 * 100.0,
+        side=side,
+        position_lots=position_lots
+    )
+
+
+def test_exit_at_the_limit_is_allowed():
+    gate = _gate_at_strategy_limit()
+
+    result = gate.evaluate(_check(-1, 2, risk_calculator.max_total_lots))
+
+    assert result.allowed, result.reasons
+
+
+def test_adding_at_the_limit_is_rejected():
+    gate = _gate_at_strategy_limit()
+
+    result = gate.evaluate(_check(1, 2, risk_calculator.max_total_lots))
+
+    assert not result.allowed
+    assert result.failed_rule == PreTradeRule.STRATEGY_LOTS
+
+
+def test_partial_exit_below_minimum_signal_size_is_allowed():
+    gate = _gate_at_strategy_limit()
+
+    result = gate.evaluate(_check(-1, 1, 1))
+
+    assert result.allowed, result.reasons
+
+
+def test_flip_checks_only_the_added_lots():
+    gate = _gate_at_strategy_limit()
+    check = _check(-1, 4, 2)
+
+    assert check.exposure_lots == 0
+    assert gate.evaluate(check).allowed
+    assert _check(-1, 6, 2).exposure_lots == 2